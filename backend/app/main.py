@@ -1,9 +1,19 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from routers import methodology, outline, literature_review, refinement, structure, sources, general, citations, data_analysis
+from services.admission import AdmissionMiddleware
+from services.idempotency import IdempotencyMiddleware
+from services.model_scheduler import ModelCallContextMiddleware
+from routers import methodology, outline, literature_review, refinement, structure, sources, general, citations, data_analysis, indexing, semantic, citation_clusters, projects, sync, snapshots, similarity, evidence, references, prefetch, scheduler
 
 app = FastAPI(title="Socratic AI Backend")
 
+# Rejects model work that could not finish within its budget (429 + Retry-After); inside the
+# idempotency middleware so replays are never shed
+app.add_middleware(AdmissionMiddleware)
+
+# Replays retried POSTs that carry an Idempotency-Key; added before CORS so replays get CORS headers too
+app.add_middleware(IdempotencyMiddleware)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -11,8 +21,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "Idempotent-Replayed", "Retry-After"],
 )
 
+# Priority class and tenant for the model calls each request makes
+app.add_middleware(ModelCallContextMiddleware)
+
 # Include routers
 app.include_router(methodology.router, tags=["methodology"])
 app.include_router(outline.router, tags=["outline"])
@@ -23,6 +37,17 @@ app.include_router(sources.router, tags=["sources"])
 app.include_router(general.router, tags=["general"])
 app.include_router(citations.router, tags=["citations"])
 app.include_router(data_analysis.router, tags=["data_analysis"])
+app.include_router(indexing.router, tags=["indexing"])
+app.include_router(semantic.router, tags=["semantic"])
+app.include_router(citation_clusters.router, tags=["citation_clusters"])
+app.include_router(projects.router, tags=["projects"])
+app.include_router(sync.router, tags=["sync"])
+app.include_router(snapshots.router, tags=["snapshots"])
+app.include_router(similarity.router, tags=["similarity"])
+app.include_router(evidence.router, tags=["evidence"])
+app.include_router(references.router, tags=["references"])
+app.include_router(prefetch.router, tags=["prefetch"])
+app.include_router(scheduler.router, tags=["scheduler"])
 
 @app.get("/")
 async def root():
@@ -30,6 +55,7 @@ async def root():
 
 # Add a basic knowledge base endpoint since your frontend might be calling it
 from pydantic import BaseModel
+from typing import Optional
 
 class KnowledgeBaseResult(BaseModel):
     content: dict
@@ -39,9 +65,21 @@ class KnowledgeBaseResponse(BaseModel):
     results: list[KnowledgeBaseResult]
 
 @app.get("/api/query_kb")
-async def query_knowledge_base(query: str):
-    """Basic placeholder for knowledge base querying"""
+async def query_knowledge_base(query: str, project_id: Optional[str] = None, k: int = 5):
+    """Semantic search over a project's indexed evidence; placeholder result when no project index exists"""
     try:
+        if project_id:
+            from services.semantic_index import search_project
+            matches = search_project(project_id, query, k=k)
+            if matches:
+                return KnowledgeBaseResponse(results=[
+                    KnowledgeBaseResult(
+                        content={"text": match["text"], "id": match["id"], **match["metadata"]},
+                        score=match["score"]
+                    )
+                    for match in matches
+                ])
+
         # This is a placeholder implementation
         results = [
             KnowledgeBaseResult(
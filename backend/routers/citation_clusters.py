@@ -0,0 +1,51 @@
+from fastapi import APIRouter, HTTPException
+from schemas.citation_clusters import (
+    ClusterProjectRequest, AddCitationsRequest, MergeClustersRequest, CitationClustersResponse
+)
+from services.citation_dedup import build_project_clusters, get_cluster_index
+import logging
+
+logger = logging.getLogger(__name__)
+router = APIRouter(prefix="/citation-clusters", tags=["Citation Clusters"])
+
+def clusters_response(index, include_singletons: bool = False) -> CitationClustersResponse:
+    return CitationClustersResponse(
+        project_id=index.project_id,
+        unique_citations=len(index.members),
+        clusters=index.clusters(include_singletons)
+    )
+
+@router.post("/{project_id}/build", response_model=CitationClustersResponse)
+def build_clusters(project_id: str, request: ClusterProjectRequest):
+    """Cluster every citation in a project; call when a project is loaded."""
+    try:
+        return clusters_response(build_project_clusters(request.project, project_id))
+    except Exception as e:
+        logger.error(f"Error clustering citations for {project_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Citation clustering failed: {str(e)}")
+
+@router.post("/{project_id}/citations", response_model=CitationClustersResponse)
+def add_citations(project_id: str, request: AddCitationsRequest):
+    """Add newly generated citations to the project's clusters."""
+    index = get_cluster_index(project_id)
+    index.add_many([citation.dict() for citation in request.citations])
+    return clusters_response(index)
+
+@router.get("/{project_id}", response_model=CitationClustersResponse)
+def get_clusters(project_id: str, include_singletons: bool = False):
+    index = get_cluster_index(project_id, create=False)
+    if index is None:
+        raise HTTPException(status_code=404, detail=f"No citation clusters for project {project_id}")
+    return clusters_response(index, include_singletons)
+
+@router.post("/{project_id}/merge", response_model=CitationClustersResponse)
+def merge_clusters(project_id: str, request: MergeClustersRequest):
+    """Merge the clusters holding the given citation keys; kept across rebuilds."""
+    index = get_cluster_index(project_id, create=False)
+    if index is None:
+        raise HTTPException(status_code=404, detail=f"No citation clusters for project {project_id}")
+    try:
+        index.merge(request.citation_keys)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return clusters_response(index)
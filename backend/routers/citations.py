@@ -1,24 +1,75 @@
 from fastapi import APIRouter, HTTPException
-from schemas.citations import CitationValidityRequest, CitationValidityResponse
+from schemas.citations import (
+    CitationValidityRequest, CitationValidityResponse,
+    BatchCitationValidityRequest, BatchCitationValidityResponse, BatchCitationVerdict
+)
 from services.bedrock_service import invoke_bedrock
+from services.citation_dedup import cluster_citation_keys, cluster_member_keys
+from services.citation_verdicts import get_verdict_store
 import json
 import re
 
 router = APIRouter()
 
+# Unique citations validated per model call; keeps the JSON reply well under max_tokens
+BATCH_VALIDATION_SIZE = 20
+
+VALIDATION_CRITERIA = """VALIDATION CRITERIA:
+1. Citation Format: Is the APA citation properly formatted?
+2. Source Credibility: Does this appear to be a credible academic/professional source?
+3. Relevance: Does the source logically support the research question and thesis?
+4. Accessibility: Can this source realistically be accessed (not fake, realistic publication)?"""
+
+STATUS_DEFINITIONS = """  * "valid": Citation is properly formatted, credible, relevant, and accessible
+  * "partial": Citation has minor issues but is generally acceptable (e.g., formatting issues, tangential relevance)
+  * "invalid": Citation has major problems (fake source, completely irrelevant, or severely malformed)
+  * "error": Unable to properly assess the citation"""
+
+def describe_methodology(methodology) -> str:
+    if isinstance(methodology, dict):
+        return methodology.get('description', str(methodology))
+    return str(methodology)
+
+def clean_link(link):
+    return link if link and link != 'null' else None
+
+def stored_verdicts(project_id: str, groups: dict) -> dict:
+    """
+    Stored verdict per cluster representative. Verdicts are kept under canonical
+    keys and matched through the project's current clusters, so a verdict for
+    any formatting of a source applies to its near-duplicates.
+    """
+    members = cluster_member_keys(project_id, [key for keys in groups.values() for key in keys])
+    found = get_verdict_store().get_many(project_id, {m for related in members.values() for m in related})
+    verdicts = {}
+    for representative, keys in groups.items():
+        candidates = keys + [m for key in keys for m in members[key]]
+        match = next((found[key] for key in candidates if key in found), None)
+        if match:
+            verdicts[representative] = match
+    return verdicts
+
 @router.post("/check_citation_validity", response_model=CitationValidityResponse)
-async def check_citation_validity(request: CitationValidityRequest):
+def check_citation_validity(request: CitationValidityRequest):
     """
     Check if a citation is valid and supports the given context.
     Returns status: 'valid', 'partial', 'invalid', or 'error'
     """
+    # Near-duplicate formattings of one source share a verdict through the project's cluster index
+    [(canonical_key, citation_key)] = cluster_citation_keys(
+        request.project_id, [(request.citation.apa, request.citation.title, request.citation.author)]
+    )
+    if request.project_id and not request.force_revalidate:
+        cached = stored_verdicts(request.project_id, {citation_key: [canonical_key]}).get(citation_key)
+        if cached:
+            return CitationValidityResponse(
+                status=cached['status'],
+                explanation=cached['explanation'] or '',
+                link=cached['link']
+            )
+
     try:
-        # Extract methodology information
-        methodology_description = ""
-        if isinstance(request.context.methodology, dict):
-            methodology_description = request.context.methodology.get('description', str(request.context.methodology))
-        else:
-            methodology_description = str(request.context.methodology)
+        methodology_description = describe_methodology(request.context.methodology)
 
         prompt = f"""
 You are an expert academic librarian and research validator. Your task is to analyze a citation and determine if it's valid and appropriately supports the given research context.
@@ -36,19 +87,12 @@ Subsection: "{request.context.subsection_title}"
 Research Question: "{request.context.question}"
 Methodology: {methodology_description}
 
-VALIDATION CRITERIA:
-1. Citation Format: Is the APA citation properly formatted?
-2. Source Credibility: Does this appear to be a credible academic/professional source?
-3. Relevance: Does the source logically support the research question and thesis?
-4. Accessibility: Can this source realistically be accessed (not fake, realistic publication)?
+{VALIDATION_CRITERIA}
 
 INSTRUCTIONS:
 - Analyze the citation against the four criteria above
 - Determine validity status:
-  * "valid": Citation is properly formatted, credible, relevant, and accessible
-  * "partial": Citation has minor issues but is generally acceptable (e.g., formatting issues, tangential relevance)
-  * "invalid": Citation has major problems (fake source, completely irrelevant, or severely malformed)
-  * "error": Unable to properly assess the citation
+{STATUS_DEFINITIONS}
 
 - If the source appears to be real and accessible, try to provide a realistic web link where it might be found (academic databases, publisher websites, etc.). If unsure, do not provide a link.
 
@@ -72,11 +116,21 @@ Return only the JSON response.
                 json_text = json_match.group()
                 result = json.loads(json_text)
                 
-                return CitationValidityResponse(
+                verdict = CitationValidityResponse(
                     status=result.get('status', 'error'),
                     explanation=result.get('explanation', 'Unable to validate citation'),
-                    link=result.get('link') if result.get('link') != 'null' else None
+                    link=clean_link(result.get('link'))
                 )
+                if request.project_id and verdict.status != 'error':
+                    get_verdict_store().put_many(request.project_id, {
+                        canonical_key: {
+                            "apa": request.citation.apa,
+                            "status": verdict.status,
+                            "explanation": verdict.explanation,
+                            "link": verdict.link
+                        }
+                    })
+                return verdict
             else:
                 return CitationValidityResponse(
                     status='error',
@@ -94,4 +148,156 @@ Return only the JSON response.
             
     except Exception as e:
         print(f"Citation validation error: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Error validating citation: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Error validating citation: {str(e)}")
+
+@router.post("/check_citation_validity_batch", response_model=BatchCitationValidityResponse)
+def check_citation_validity_batch(request: BatchCitationValidityRequest):
+    """
+    Validate many citations at once. Citations are grouped by canonical key
+    (authors, year, title) or, for a project, by near-duplicate cluster; verdicts
+    already stored for the project are reused,
+    and the remaining unique sources are validated in as few model calls as possible.
+    """
+    try:
+        # Group request items by canonical key, keeping every usage for context
+        keys = cluster_citation_keys(
+            request.project_id, [(item.citation.apa, item.citation.title, item.citation.author) for item in request.items]
+        )
+        groups = {}
+        for index, (item, (canonical_key, key)) in enumerate(zip(request.items, keys)):
+            group = groups.setdefault(key, {"citation": item.citation, "indices": [], "usages": [], "keys": []})
+            group["indices"].append(index)
+            if canonical_key not in group["keys"]:
+                group["keys"].append(canonical_key)
+            if item.question:
+                usage = f"{item.question} ({item.section_title or 'Unknown section'} > {item.subsection_title or 'Unknown subsection'})"
+                if usage not in group["usages"]:
+                    group["usages"].append(usage)
+
+        # Verdicts judge relevance to this project's thesis, so they are only shared within a project
+        store = get_verdict_store()
+        use_store = request.project_id and not request.force_revalidate
+        verdicts = stored_verdicts(request.project_id, {k: g["keys"] for k, g in groups.items()}) if use_store else {}
+        cached_keys = set(verdicts)
+        pending = [key for key in groups if key not in verdicts]
+
+        model_calls = 0
+        methodology_description = describe_methodology(request.context.methodology)
+        for start in range(0, len(pending), BATCH_VALIDATION_SIZE):
+            batch = pending[start:start + BATCH_VALIDATION_SIZE]
+            model_calls += 1
+            new_verdicts = validate_citation_batch(
+                [(key, groups[key]) for key in batch], request.context.thesis, methodology_description
+            )
+            if request.project_id:
+                store.put_many(request.project_id, {
+                    canonical_key: verdict
+                    for key, verdict in new_verdicts.items() if verdict["status"] != 'error'
+                    for canonical_key in groups[key]["keys"]
+                })
+            verdicts.update(new_verdicts)
+
+        results = [None] * len(request.items)
+        for key, group in groups.items():
+            verdict = verdicts.get(key) or {
+                "status": "error", "explanation": "Citation was not assessed by the validator", "link": None
+            }
+            for index in group["indices"]:
+                results[index] = BatchCitationVerdict(
+                    citation_key=key,
+                    apa=request.items[index].citation.apa,
+                    status=verdict["status"],
+                    explanation=verdict.get("explanation") or '',
+                    link=verdict.get("link"),
+                    cached=key in cached_keys
+                )
+
+        return BatchCitationValidityResponse(
+            results=results,
+            unique_citations=len(groups),
+            validated=len(pending),
+            cached=len(cached_keys),
+            model_calls=model_calls
+        )
+
+    except Exception as e:
+        print(f"Batch citation validation error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error validating citations: {str(e)}")
+
+def validate_citation_batch(groups, thesis: str, methodology_description: str) -> dict:
+    """Validate several unique citations in one model call; returns {citation_key: verdict}."""
+    citation_blocks = []
+    for number, (key, group) in enumerate(groups, 1):
+        citation = group["citation"]
+        usages = "\n".join(f"       - {usage}" for usage in group["usages"][:3]) or "       - (no question context provided)"
+        citation_blocks.append(f"""[C{number}]
+    APA: "{citation.apa}"
+    Title: "{citation.title or 'Not provided'}"
+    Author: "{citation.author or 'Not provided'}"
+    Description: "{citation.description or 'Not provided'}"
+    Used to answer:
+{usages}""")
+
+    prompt = f"""
+You are an expert academic librarian and research validator. Your task is to analyze each citation below and determine if it's valid and appropriately supports the research it is used for.
+
+RESEARCH CONTEXT:
+Thesis: "{thesis}"
+Methodology: {methodology_description}
+
+CITATIONS TO VALIDATE:
+{chr(10).join(citation_blocks)}
+
+{VALIDATION_CRITERIA}
+
+INSTRUCTIONS:
+- Assess every citation independently against the four criteria above, judging relevance against the questions it is used to answer
+- Determine validity status for each:
+{STATUS_DEFINITIONS}
+
+- If a source appears to be real and accessible, try to provide a realistic web link where it might be found. If unsure, use null.
+
+Respond with a JSON array containing exactly one object per citation, in the same order:
+[
+    {{
+        "id": "C1",
+        "status": "valid|partial|invalid|error",
+        "explanation": "Clear explanation addressing format, credibility, relevance, and accessibility",
+        "link": "https://example.com/link-to-source or null"
+    }}
+]
+
+Return only the JSON array.
+        """
+
+    verdicts = {}
+    response = invoke_bedrock(prompt)
+    try:
+        json_match = re.search(r'\[.*\]', response, re.DOTALL)
+        parsed = json.loads(json_match.group()) if json_match else []
+    except json.JSONDecodeError as parse_error:
+        print(f"JSON parse error: {parse_error}")
+        parsed = []
+
+    for position, result in enumerate(parsed):
+        if not isinstance(result, dict):
+            continue
+        match = re.search(r'\d+', str(result.get('id', '')))
+        number = int(match.group()) if match else position + 1
+        if 1 <= number <= len(groups):
+            key, group = groups[number - 1]
+            verdicts[key] = {
+                "apa": group["citation"].apa,
+                "status": result.get('status', 'error'),
+                "explanation": result.get('explanation', 'Unable to validate citation'),
+                "link": clean_link(result.get('link'))
+            }
+
+    for key, group in groups:
+        verdicts.setdefault(key, {
+            "apa": group["citation"].apa,
+            "status": "error",
+            "explanation": "Unable to parse validation response",
+            "link": None
+        })
+    return verdicts
@@ -1,30 +1,106 @@
 from fastapi import APIRouter, HTTPException
 from schemas.data_analysis import (
-    QuestionAnalysisRequest, DataAnalysisResponse, InclusionExclusionRequest, InclusionExclusionAnalysis,
-    BuildDataOutlineRequest, BuildDataOutlineResponse, SubsectionOutlineRequest, SubsectionOutlineResponse
+    QuestionAnalysisRequest, DataAnalysisResponse, AnalysisRecomputation, InclusionExclusionRequest, InclusionExclusionAnalysis,
+    BuildDataOutlineRequest, BuildDataOutlineResponse, SubsectionOutlineRequest, SubsectionOutlineResponse,
+    BuildDataOutlinesRequest, BuildDataOutlinesResponse, PreviousSection, SectionStitch, LiteratureMapStats
+)
+from services.analysis_state import (
+    context_hash, get_analysis_state_store, merge_analysis, parse_delta, plan_reanalysis,
+    question_label, summarize_clusters
 )
 from services.bedrock_service import invoke_bedrock
-from typing import List, Dict, Any, Union
+from services.literature_map import citation_label, get_key_point_cache, map_responses, parse_key_points
+from services.model_scheduler import submit_in_context, track_usage
+from services.outline_parser import parse_outline
+from services.semantic_index import format_related_evidence
+from services.theme_clusters import build_clustered_analysis, cluster_questions, format_clusters, parse_cluster_naming
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Dict, Any, Optional, Union
 import json
 import logging
 import re
+import time
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/data-analysis", tags=["Data Analysis"])
 
+# Above this much response text a single outline prompt would have to truncate, so key points are extracted first
+SINGLE_PROMPT_LITERATURE_CHARS = 12000
+
 @router.post("/analyze-subsection", response_model=DataAnalysisResponse)
 def analyze_subsection_data(request: QuestionAnalysisRequest):
     """
     Analyze research questions and citations to generate data-driven outline content.
     This is completely dynamic and works for any research topic.
+
+    With a project_id the result is kept per subsection. Later calls send only
+    questions whose text or citations changed (plus a summary of the previous
+    themes) and merge the answer into the stored analysis; if nothing changed
+    the stored analysis is returned without calling the model, and if questions
+    were only removed they are dropped from it locally. Results from a
+    failed model call are returned but never kept.
     """
     try:
         logger.info(f"Starting analysis for subsection: {request.subsection_title}")
         logger.info(f"Number of questions: {len(request.questions)}")
         logger.info(f"Number of citations: {len(request.citations)}")
         
-        # Prepare the analysis prompt - completely generic, no hardcoded content
-        analysis_prompt = f"""
+        # Evidence from other sections that is semantically close to this subsection
+        related_evidence = format_related_evidence(
+            request.project_id, f"{request.subsection_title}\n{request.subsection_context}"
+        )
+        related_section = f"""
+RELATED EVIDENCE FROM OTHER SECTIONS (context only; do not build themes from it):
+{related_evidence}
+""" if related_evidence else ""
+
+        state_store = get_analysis_state_store() if request.project_id and request.incremental else None
+        state_key = state_store.key(request.project_id, request.section_title, request.subsection_title) if state_store else None
+        state = state_store.get(state_key) if state_store else None
+        plan = plan_reanalysis(state, request)
+        logger.info(f"Analysis mode: {plan['mode']} ({len(plan['changed'])} of {len(request.questions)} questions to analyze)")
+
+        analysis_data = None
+        # False when the result stands in for an answer the model did not give
+        complete = True
+        with track_usage() as usage:
+            if plan["mode"] == "cached":
+                analysis_data = DataAnalysisResponse(**state["result"])
+            elif plan["mode"] == "pruned":
+                analysis_data = DataAnalysisResponse(**merge_analysis(state["result"], {}, plan))
+            elif plan["mode"] == "incremental":
+                analysis_data = run_incremental_analysis(request, related_section, state["result"], plan)
+                if analysis_data is None:
+                    logger.info("Incremental analysis response could not be merged; running full analysis")
+                    plan = dict(plan, mode="full", changed=list(range(len(request.questions))), relabel={}, removed=[])
+            if analysis_data is None:
+                if request.pre_cluster and request.questions:
+                    analysis_data, complete = run_clustered_analysis(request, related_section)
+                else:
+                    analysis_data = run_full_analysis(request, related_section)
+
+        if usage.failures or not complete:
+            # invoke_bedrock returned an error as text and the parser's fallbacks built a result from it,
+            # or the model's cluster names were unusable and local ones stand in
+            logger.info("Analysis does not reflect a usable model answer; not keeping it for later calls")
+        elif state_store and analysis_data is not None:
+            result = analysis_data.dict(exclude={"recomputation"})
+            state_store.put(state_key, request.project_id, context_hash(request), plan["hashes"], result)
+        if analysis_data is not None:
+            analysis_data.recomputation = describe_recomputation(plan, len(request.questions))
+        return analysis_data
+        
+    except Exception as e:
+        logger.error(f"Error analyzing subsection data: {str(e)}")
+        logger.error(f"Error type: {type(e).__name__}")
+        import traceback
+        logger.error(f"Traceback: {traceback.format_exc()}")
+        raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
+
+def run_full_analysis(request: QuestionAnalysisRequest, related_section: str):
+    """Analyze every question and citation of the subsection."""
+    # Prepare the analysis prompt - completely generic, no hardcoded content
+    analysis_prompt = f"""
 You are analyzing research data for academic paper writing. Analyze the following research questions and citations to extract themes, patterns, and logical structures from the ACTUAL DATA provided.
 
 RESEARCH CONTEXT:
@@ -36,7 +112,7 @@ RESEARCH CONTEXT:
 
 RESEARCH QUESTIONS AND CITATIONS:
 {format_questions_and_citations(request.questions, request.citations)}
-
+{related_section}
 ANALYSIS TASKS:
 1. THEMATIC ANALYSIS: Identify 2-4 major themes that emerge from the actual content of the citations and questions. Base themes ONLY on what you find in the data, not predetermined categories.
 
@@ -67,34 +143,152 @@ IMPORTANT:
 Respond with a structured analysis that identifies what themes and patterns actually exist in this specific research data.
 """
 
-        logger.info("Calling Bedrock service...")
-        
-        # Get AI analysis of the actual data
-        response = invoke_bedrock(analysis_prompt)
-        
-        logger.info(f"Received response from Bedrock, length: {len(response) if response else 0}")
-        
-        # Parse the response into structured data
-        analysis_data = parse_analysis_response(response, request)
-        
-        logger.info("Successfully parsed response into analysis data")
-        return analysis_data
-        
-    except Exception as e:
-        logger.error(f"Error analyzing subsection data: {str(e)}")
-        logger.error(f"Error type: {type(e).__name__}")
-        import traceback
-        logger.error(f"Traceback: {traceback.format_exc()}")
-        raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
+    logger.info("Calling Bedrock service...")
+    
+    # Get AI analysis of the actual data
+    response = invoke_bedrock(analysis_prompt)
+    
+    logger.info(f"Received response from Bedrock, length: {len(response) if response else 0}")
+    
+    # Parse the response into structured data
+    analysis_data = parse_analysis_response(response, request)
+    
+    logger.info("Successfully parsed response into analysis data")
+    return analysis_data
+
+def run_clustered_analysis(request: QuestionAnalysisRequest, related_section: str):
+    """
+    Group questions locally, then ask the model only to name, describe and
+    order the groups. Without a usable answer the local groups are returned
+    with names built from their key phrases. Returns the analysis and
+    whether the model named it.
+    """
+    clusters = cluster_questions(request.questions, request.citations)
+    naming_prompt = f"""
+Research questions for an academic paper subsection have been grouped by the terms their questions and sources share. Name and order the groups.
+
+RESEARCH CONTEXT:
+- Subsection: {request.subsection_title}
+- Subsection Context: {request.subsection_context}
+- Parent Section: {request.section_title}
+- Thesis: {request.thesis}
+- Methodology: {request.methodology}
+
+{format_clusters(clusters, request.questions)}
+{related_section}
+For each cluster give a specific theme name (3-8 words) and a one-sentence description grounded in its questions and evidence, then the order in which the themes should be presented and one outline point per cluster.
+
+Respond with JSON only:
+{{
+  "themes": [{{"cluster": 1, "theme_name": "...", "theme_description": "..."}}],
+  "order": [1, 2],
+  "approach": "...",
+  "reasoning": "...",
+  "transitions": ["one sentence from each theme to the next"],
+  "outline_points": [{{"cluster": 1, "content": "...", "rationale": "..."}}]
+}}
+"""
+
+    logger.info(f"Calling Bedrock service to name {len(clusters)} local clusters...")
+    naming = parse_cluster_naming(invoke_bedrock(naming_prompt, max_tokens=1500), len(clusters))
+    if naming is None:
+        logger.info("Cluster naming unavailable; using locally named themes")
+    result = build_clustered_analysis(clusters, naming, request.subsection_title)
+    analysis = DataAnalysisResponse(
+        **result,
+        content_summary=(
+            f"Analysis of {len(request.questions)} research questions and {len(request.citations)} citations "
+            f"for {request.subsection_title} in {len(clusters)} themes"
+        ),
+        analysis_confidence=(
+            "High - themes clustered from the research data and named by the model" if naming
+            else "Medium - themes clustered from the research data; names generated locally"
+        )
+    )
+    return analysis, naming is not None
+
+def run_incremental_analysis(request: QuestionAnalysisRequest, related_section: str,
+                             previous: Dict[str, Any], plan: Dict[str, Any]):
+    """Analyze only new or changed questions and merge them into the previous analysis; None if unusable."""
+    removed_note = f"""
+Questions removed since the previous analysis (drop them from the themes): {', '.join(plan['removed'])}
+""" if plan["removed"] else ""
+
+    incremental_prompt = f"""
+You previously analyzed the research questions and citations of this subsection. Some questions were added or changed; analyze ONLY those and fit them into the existing themes.
+
+RESEARCH CONTEXT:
+- Subsection: {request.subsection_title}
+- Subsection Context: {request.subsection_context}
+- Parent Section: {request.section_title}
+- Thesis: {request.thesis}
+- Methodology: {request.methodology}
+
+EXISTING THEMES (from the previous analysis, with current question labels):
+{summarize_clusters(previous, plan['relabel'])}
+{removed_note}
+NEW OR CHANGED QUESTIONS AND CITATIONS:
+{format_questions_and_citations(request.questions, request.citations, only=plan['changed'])}
+{related_section}
+TASKS:
+1. Assign each new or changed question (by its label, e.g. "Q3") to an existing theme, or propose a new theme if it does not fit any.
+2. For each theme you touch, list key concepts and evidence types found in the new citations.
+3. Propose outline points supported by the new evidence only, each with the labels of the questions it draws on.
+
+Base everything on the actual citation content. Respond with JSON only, in this shape:
+{{
+  "thematic_clusters": [
+    {{"theme_name": "existing or new theme name", "theme_description": "only for new themes", "questions": ["Q3"],
+      "key_concepts": ["..."], "evidence_types": ["..."], "temporal_scope": "e.g. 2015-2022 or null"}}
+  ],
+  "outline_points": [
+    {{"content": "...", "supporting_evidence": ["..."], "citations": [1], "rationale": "...", "questions": ["Q3"]}}
+  ]
+}}
+"""
+
+    logger.info("Calling Bedrock service for incremental analysis...")
+    response = invoke_bedrock(incremental_prompt)
+    delta = parse_delta(response)
+    if delta is None:
+        return None
+    merged = merge_analysis(previous, delta, plan)
+    merged["content_summary"] = (
+        f"AI analysis of {len(request.questions)} research questions and {len(request.citations)} citations "
+        f"for {request.subsection_title} ({len(plan['changed'])} re-analyzed)"
+    )
+    try:
+        return DataAnalysisResponse(**merged)
+    except ValueError as e:
+        logger.error(f"Merged analysis failed validation: {str(e)}")
+        return None
+
+def describe_recomputation(plan: Dict[str, Any], question_count: int) -> AnalysisRecomputation:
+    changed = set(plan["changed"])
+    parts = {
+        "full": ["thematic_clusters", "logical_structure", "generated_outline", "content_summary"],
+        "incremental": ["thematic_clusters", "logical_structure.sequence", "generated_outline.main_points", "content_summary"],
+        "pruned": ["thematic_clusters", "logical_structure.sequence"],
+        "cached": []
+    }[plan["mode"]]
+    return AnalysisRecomputation(
+        mode=plan["mode"],
+        recomputed_questions=[question_label(i) for i in sorted(changed)],
+        reused_questions=[question_label(i) for i in range(question_count) if i not in changed],
+        removed_questions=plan["removed"],
+        recomputed_parts=parts
+    )
 
-def format_questions_and_citations(questions, citations):
-    """Format the research questions and citations for AI analysis"""
+def format_questions_and_citations(questions, citations, only=None):
+    """Format the research questions and citations for AI analysis (only: indices to include)"""
     formatted_content = ""
     
     # Build citation lookup
     citation_map = {i+1: citation for i, citation in enumerate(citations)}
     
     for i, question in enumerate(questions, 1):
+        if only is not None and i - 1 not in only:
+            continue
         formatted_content += f"\nQUESTION {i}: {question.get('question', '')}\n"
         
         # Add citations for this question if available
@@ -121,7 +315,7 @@ def parse_analysis_response(response_text, request):
             parsed_data = json.loads(json_content)
             
             # Convert to our schema format
-            return convert_to_schema_format(parsed_data, request)
+            return convert_to_schema_format(parsed_data, request, response_text)
         else:
             # Parse unstructured response
             return parse_unstructured_response(response_text, request)
@@ -130,11 +324,22 @@ def parse_analysis_response(response_text, request):
         # Fallback to text parsing
         return parse_unstructured_response(response_text, request)
 
-def convert_to_schema_format(parsed_data, request):
-    """Convert parsed JSON to our Pydantic schema format"""
-    # This would convert the AI's JSON response to match our schema
-    # Implementation depends on the AI's response format
-    pass
+def convert_to_schema_format(parsed_data, request, response_text=""):
+    """Convert parsed JSON to our Pydantic schema format; parts missing or malformed come from text parsing"""
+    fallback = parse_unstructured_response(response_text, request).dict(exclude={"recomputation"})
+    if not isinstance(parsed_data, dict):
+        return DataAnalysisResponse(**fallback)
+    for field in ("thematic_clusters", "logical_structure", "generated_outline", "content_summary", "analysis_confidence"):
+        if field not in parsed_data:
+            continue
+        candidate = dict(fallback, **{field: parsed_data[field]})
+        try:
+            DataAnalysisResponse(**candidate)
+        except ValueError:
+            logger.info(f"Ignoring malformed {field} in analysis JSON")
+            continue
+        fallback = candidate
+    return DataAnalysisResponse(**fallback)
 
 def parse_unstructured_response(response_text, request):
     """Parse unstructured AI response into our schema format"""
@@ -284,29 +489,45 @@ def extract_outline_from_ai_response(response_text, themes):
     from schemas.data_analysis import GeneratedOutline, OutlinePoint
     
     main_points = []
-    
-    # Look for numbered or bulleted outline points
+
+    # Responses in the numbered outline format come straight from the parsed tree
+    for node in parse_outline(response_text)["nodes"]:
+        if len(main_points) == 4:  # Limit to 4 main points
+            break
+        if node["depth"] != 1 or len(node["text"]) <= 20:
+            continue
+        numbers = [int(ref) for ref in node["refs"] if ref.isdigit()]
+        main_points.append(OutlinePoint(
+            level=str(len(main_points) + 1),
+            content=node["text"],
+            supporting_evidence=[child["text"] for child in node["children"][:2]] or [f"Evidence from research analysis {len(main_points) + 1}"],
+            citations=numbers or [i + 1 for i in range(min(3, len(themes)))],
+            rationale="Key finding from thematic analysis of research data"
+        ))
+
+    # Otherwise look for numbered or bulleted outline points
     outline_patterns = [
         r'(?i)(?:^|\n)\s*(\d+)[\.\)]\s*([^\n]+)',  # 1. Main point
         r'(?i)(?:^|\n)\s*[-*•]\s*([^\n]+)',        # • Bullet point
         r'(?i)(?:^|\n)\s*([A-Z][^\n]{20,100})',    # Capitalized sentences
     ]
     
-    for pattern in outline_patterns:
-        matches = re.findall(pattern, response_text, re.MULTILINE)
-        if matches and len(main_points) < 4:  # Limit to 4 main points
-            for match in matches[:4-len(main_points)]:
-                content = match[1] if isinstance(match, tuple) and len(match) > 1 else match[0] if isinstance(match, tuple) else match
+    if not main_points:
+        for pattern in outline_patterns:
+            matches = re.findall(pattern, response_text, re.MULTILINE)
+            if matches and len(main_points) < 4:  # Limit to 4 main points
+                for match in matches[:4-len(main_points)]:
+                    content = match[1] if isinstance(match, tuple) and len(match) > 1 else match[0] if isinstance(match, tuple) else match
                 
-                # Skip very short or generic content
-                if len(content.strip()) > 20 and not content.lower().startswith(('this ', 'the ', 'it ')):
-                    main_points.append(OutlinePoint(
-                        level=str(len(main_points) + 1),
-                        content=content.strip(),
-                        supporting_evidence=[f"Evidence from research analysis {len(main_points) + 1}"],
-                        citations=[i + 1 for i in range(min(3, len(themes)))],
-                        rationale="Key finding from thematic analysis of research data"
-                    ))
+                    # Skip very short or generic content
+                    if len(content.strip()) > 20 and not content.lower().startswith(('this ', 'the ', 'it ')):
+                        main_points.append(OutlinePoint(
+                            level=str(len(main_points) + 1),
+                            content=content.strip(),
+                            supporting_evidence=[f"Evidence from research analysis {len(main_points) + 1}"],
+                            citations=[i + 1 for i in range(min(3, len(themes)))],
+                            rationale="Key finding from thematic analysis of research data"
+                        ))
     
     # Fallback if no clear outline found
     if not main_points:
@@ -543,12 +764,19 @@ def build_data_outline(request: BuildDataOutlineRequest):
     5. Incorporate additional citation considerations
     """
     try:
-        logger.info(f"Building data outline for section: {request.section_title}")
-        logger.info(f"Logic framework items: {len(request.logic_framework)}")
-        logger.info(f"Draft context available: {request.draft_outline_context is not None}")
-        
-        # Execute the systematic 5-step process
-        outline_prompt = f"""
+        return generate_data_outline(request)
+    except Exception as e:
+        logger.error(f"Error building data outline for {request.section_title}: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Data outline building failed: {str(e)}")
+
+def generate_data_outline(request: BuildDataOutlineRequest) -> BuildDataOutlineResponse:
+    """Run the 5-step outline prompt for one section."""
+    logger.info(f"Building data outline for section: {request.section_title}")
+    logger.info(f"Logic framework items: {len(request.logic_framework)}")
+    logger.info(f"Draft context available: {request.draft_outline_context is not None}")
+    
+    # Execute the systematic 5-step process
+    outline_prompt = f"""
 You are an expert academic writer building a comprehensive outline using a systematic 5-step integration process. Work through each step methodically to create substantive, research-based content.
 
 SECTION: {request.section_title}
@@ -556,6 +784,10 @@ CONTEXT: {request.section_context}
 THESIS: {request.thesis}
 METHODOLOGY: {request.methodology}
 
+PAPER POSITION: Section {request.section_position.current} of {request.section_position.total}
+PREVIOUS SECTIONS:
+{format_previous_sections(request.previous_sections)}
+
 ## STEP 1: CONTEXT MAP REVIEW
 Analyze the contextual framework established for this section:
 {format_context_analysis(request.logic_framework)}
@@ -615,44 +847,146 @@ RESPONSE FORMAT:
   "section_title": "{request.section_title}",
   "section_overview": "How this section advances the thesis using integrated findings from all 5 steps",
   "subsection_outlines": [
-    {{
-      "subsection_title": "actual subsection name",
-      "context_integration": "How Step 1 context shapes this subsection",
-      "logic_integration": "How Step 2 logic focuses this subsection", 
-      "draft_integration": "What Step 3 draft content is incorporated",
-      "main_points": ["framework point 1 with Steps 1-3 integration", "framework point 2", "framework point 3", "framework point 4"],
-      "supporting_details": ["citation-based evidence 1", "citation-based evidence 2", "citation-based evidence 3", "citation-based evidence 4"],
-      "transitions": ["logical connection referencing integrated framework", "connection building thesis argument"],
-      "citations_used": [1, 2, 3, 4, 5],
-      "step_integration_notes": "How all 5 steps contributed to this subsection outline"
-    }}
+{{
+  "subsection_title": "actual subsection name",
+  "context_integration": "How Step 1 context shapes this subsection",
+  "logic_integration": "How Step 2 logic focuses this subsection", 
+  "draft_integration": "What Step 3 draft content is incorporated",
+  "main_points": ["framework point 1 with Steps 1-3 integration", "framework point 2", "framework point 3", "framework point 4"],
+  "supporting_details": ["citation-based evidence 1", "citation-based evidence 2", "citation-based evidence 3", "citation-based evidence 4"],
+  "transitions": ["logical connection referencing integrated framework", "connection building thesis argument"],
+  "citations_used": [1, 2, 3, 4, 5],
+  "step_integration_notes": "How all 5 steps contributed to this subsection outline"
+}}
   ],
   "logical_flow": "How subsections build integrated argument from all steps",
   "integration_notes": "Overall integration achievement and thesis advancement",
   "methodology_alignment": "How this section aligns with and supports the research methodology"
 }}"""
 
-        # Generate the outline using AI
-        response_text = invoke_bedrock(outline_prompt)
+    # Generate the outline using AI
+    response_text = invoke_bedrock(outline_prompt)
+    
+    # Parse and structure the response
+    try:
+        import json
+        outline_data = json.loads(response_text)
         
-        # Parse and structure the response
+        # Validate and ensure all required fields are present
+        if not isinstance(outline_data, dict):
+            raise ValueError("Response is not a JSON object")
+        
+        return BuildDataOutlineResponse(**outline_data)
+        
+    except json.JSONDecodeError:
+        # If JSON parsing fails, create structured response from text
+        return create_structured_outline_response(response_text, request)
+
+@router.post("/build-data-outlines", response_model=BuildDataOutlinesResponse)
+def build_data_outlines(request: BuildDataOutlinesRequest):
+    """
+    Build every data section at once instead of one request per section.
+    Sections are generated concurrently, each seeing the planned titles and
+    subsections of the sections before it in place of their generated outlines.
+    A short stitching pass then writes the transitions between sections and
+    corrects overviews that assumed something an earlier section does not cover.
+    """
+    sections = [planned_section_request(request.sections, index) for index in range(len(request.sections))]
+    outlines: List[Any] = [None] * len(sections)
+    errors: Dict[str, str] = {}
+
+    started = time.time()
+    with ThreadPoolExecutor(max_workers=min(request.max_concurrency, max(len(sections), 1))) as pool:
+        futures = {submit_in_context(pool, generate_data_outline, section): index for index, section in enumerate(sections)}
+        for future in as_completed(futures):
+            index = futures[future]
+            try:
+                outlines[index] = future.result()
+            except Exception as e:
+                logger.error(f"Error building data outline for {sections[index].section_title}: {str(e)}")
+                errors[sections[index].section_title] = str(e)
+    timings = {"parallel_wave": round(time.time() - started, 3)}
+
+    stitches: List[SectionStitch] = []
+    completed = [outline for outline in outlines if outline is not None]
+    if request.stitch and len(completed) > 1:
+        started = time.time()
         try:
-            import json
-            outline_data = json.loads(response_text)
-            
-            # Validate and ensure all required fields are present
-            if not isinstance(outline_data, dict):
-                raise ValueError("Response is not a JSON object")
-            
-            return BuildDataOutlineResponse(**outline_data)
-            
-        except json.JSONDecodeError:
-            # If JSON parsing fails, create structured response from text
-            return create_structured_outline_response(response_text, request)
-            
-    except Exception as e:
-        logger.error(f"Error building data outline for {request.section_title}: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Data outline building failed: {str(e)}")
+            stitches = stitch_section_transitions(completed, request.sections[0].thesis)
+            apply_section_stitches(completed, stitches)
+        except Exception as e:
+            logger.error(f"Transition stitching failed, returning unstitched outlines: {str(e)}")
+            stitches = []
+        timings["stitch"] = round(time.time() - started, 3)
+
+    return BuildDataOutlinesResponse(
+        outlines=outlines, errors=errors, stitched=bool(stitches), stitches=stitches, timings=timings
+    )
+
+def planned_section_request(sections: List[BuildDataOutlineRequest], index: int) -> BuildDataOutlineRequest:
+    """Section request whose previous_sections come from the plan (titles and subsection titles)."""
+    section = sections[index]
+    if section.previous_sections:
+        return section
+    planned = [
+        PreviousSection(
+            title=previous.section_title,
+            key_points=[sub.get('subsection_title', '') for sub in previous.subsections if sub.get('subsection_title')]
+        )
+        for previous in sections[:index]
+    ]
+    return section.copy(update={"previous_sections": planned})
+
+def stitch_section_transitions(outlines: List[BuildDataOutlineResponse], thesis: str) -> List[SectionStitch]:
+    """One short call that writes the bridges between independently generated sections."""
+    summaries = []
+    for position, outline in enumerate(outlines, 1):
+        first = outline.subsection_outlines[0] if outline.subsection_outlines else None
+        last = outline.subsection_outlines[-1] if outline.subsection_outlines else None
+        summaries.append(f"""
+SECTION {position}: {outline.section_title}
+- Overview: {outline.section_overview[:400]}
+- Opens with: {first.subsection_title + ' - ' + (first.main_points[0] if first.main_points else '') if first else 'n/a'}
+- Ends with: {last.subsection_title + ' - ' + (last.main_points[-1] if last.main_points else '') if last else 'n/a'}""")
+
+    stitch_prompt = f"""
+These data sections of one paper were outlined independently and in parallel. Reconcile them so they read as one argument.
+
+THESIS: {thesis}
+{''.join(summaries)}
+
+For each section write:
+- opening_transition: one sentence bridging from the previous section's ending (null for the first section)
+- closing_transition: one sentence handing off to the next section (null for the last section)
+- revised_overview: only if the overview assumes or repeats something an earlier section covers; otherwise null
+
+Respond with JSON only:
+{{"sections": [{{"section_title": "...", "opening_transition": "...", "closing_transition": "...", "revised_overview": null}}]}}
+"""
+    response_text = invoke_bedrock(stitch_prompt, max_tokens=1500)
+    start, end = response_text.find('{'), response_text.rfind('}') + 1
+    if start < 0 or end <= start:
+        raise ValueError("Stitching response contained no JSON")
+    return [
+        SectionStitch(**item)
+        for item in json.loads(response_text[start:end]).get("sections", [])
+        if isinstance(item, dict) and item.get("section_title")
+    ]
+
+def apply_section_stitches(outlines: List[BuildDataOutlineResponse], stitches: List[SectionStitch]) -> None:
+    by_title = {stitch.section_title.strip().lower(): stitch for stitch in stitches}
+    for outline in outlines:
+        stitch = by_title.get(outline.section_title.strip().lower())
+        if stitch is None or not outline.subsection_outlines:
+            continue
+        if stitch.opening_transition:
+            first = outline.subsection_outlines[0]
+            first.transitions = [stitch.opening_transition] + first.transitions
+        if stitch.closing_transition:
+            last = outline.subsection_outlines[-1]
+            last.transitions = last.transitions + [stitch.closing_transition]
+        if stitch.revised_overview:
+            outline.section_overview = stitch.revised_overview
 
 def format_logic_framework(logic_framework: List[Dict]) -> str:
     """Format logic framework results for the prompt"""
@@ -868,7 +1202,24 @@ def generate_subsection_outline(request: SubsectionOutlineRequest):
     try:
         logger.info(f"Generating outline for: {request.context_chain.position} {request.context_chain.subsection_title}")
         logger.info(f"Literature responses: {len(request.literature_responses)}")
-        
+
+        responses = [response.dict() for response in request.literature_responses]
+        total_chars = sum(len(response['content']) for response in responses)
+        use_map_reduce = request.map_reduce if request.map_reduce is not None else total_chars > SINGLE_PROMPT_LITERATURE_CHARS
+        literature_map = None
+        if use_map_reduce:
+            # Map: key points from each full response; reduce: the outline prompt below merges them
+            key_points, stats = map_responses(responses, extract_key_points, get_key_point_cache(), request.map_concurrency)
+            literature_map = LiteratureMapStats(key_points=sum(len(points) for points in key_points), **stats)
+            logger.info(f"Literature map: {literature_map.dict()}")
+            literature_heading = "KEY POINTS EXTRACTED FROM EACH LITERATURE RESPONSE (cite using the labels given):"
+            literature_block = format_key_points(responses, key_points)
+        else:
+            literature_heading = "LITERATURE REVIEW RESPONSES:"
+            literature_block = format_literature_responses(
+                responses, limit=None if total_chars <= SINGLE_PROMPT_LITERATURE_CHARS else 500
+            )
+
         # Build comprehensive prompt for 6-level outline generation
         outline_prompt = f"""
 You are an expert academic writer generating a detailed 6-level outline for a research subsection. 
@@ -886,8 +1237,8 @@ Main Thesis: {request.thesis}
 Methodology: {request.methodology}
 Paper Type: {request.paper_type}
 
-LITERATURE REVIEW RESPONSES:
-{format_literature_responses(request.literature_responses)}
+{literature_heading}
+{literature_block}
 
 OUTLINE REQUIREMENTS:
 - Generate exactly {request.outline_requirements.levels} levels of detail
@@ -942,30 +1293,69 @@ Make content specific and evidence-based, not generic.
             detailed_outline=response_data.get('detailed_outline', []),
             context_analysis=response_data.get('context_analysis', 'Context chain analysis completed'),
             literature_integration=response_data.get('literature_integration', 'Literature responses integrated into outline structure'),
-            outline_rationale=response_data.get('outline_rationale', 'Outline structured to support subsection objectives and thesis connection')
+            outline_rationale=response_data.get('outline_rationale', 'Outline structured to support subsection objectives and thesis connection'),
+            literature_map=literature_map
         )
         
     except Exception as e:
         logger.error(f"Error in generate_subsection_outline: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to generate subsection outline: {str(e)}")
 
-def format_literature_responses(responses: List[Dict]) -> str:
-    """Format literature responses for prompt inclusion"""
+def format_literature_responses(responses: List[Dict], limit: Optional[int] = 500) -> str:
+    """Format literature responses for prompt inclusion (content cut to limit characters unless None)"""
     formatted = []
     for i, response in enumerate(responses, 1):
         content = response.get('content', '')
         question = response.get('question', '')
         citations = response.get('citations', [])
+        if limit is not None and len(content) > limit:
+            content = content[:limit] + '...'
         
         formatted.append(f"""
 Response {i}:
 Question: {question if question else 'General response'}
-Content: {content[:500]}{'...' if len(content) > 500 else ''}
+Content: {content}
 Citations: {len(citations)} citations available
 """)
     
     return '\n'.join(formatted)
 
+def extract_key_points(response: Dict[str, Any]) -> Optional[List[Dict[str, Any]]]:
+    """Map step: key points of one full literature response."""
+    citations = response.get('citations') or []
+    citation_lines = '\n'.join(f"[{i}] {citation_label(c)}" for i, c in enumerate(citations, 1)) or "None listed"
+    map_prompt = f"""
+Extract the key points from this literature review response so they can be merged into an academic outline later.
+
+QUESTION: {response.get('question') or 'General response'}
+
+RESPONSE:
+{response.get('content', '')}
+
+CITATIONS:
+{citation_lines}
+
+List 3-8 key points. Each has one specific claim, the concrete evidence behind it (dates, figures, named actors, quotes) and the citation numbers above that support it. Do not add anything the response does not say.
+
+Respond with JSON only:
+{{"key_points": [{{"claim": "...", "evidence": ["..."], "citations": [1]}}]}}
+"""
+    return parse_key_points(invoke_bedrock(map_prompt, max_tokens=1000), citations)
+
+def format_key_points(responses: List[Dict], key_points: List[List[Dict[str, Any]]]) -> str:
+    """Format map step output for the merge prompt"""
+    formatted = []
+    for i, (response, points) in enumerate(zip(responses, key_points), 1):
+        lines = [f"\nResponse {i} - Question: {response.get('question') or 'General response'}"]
+        for point in points:
+            lines.append(f"- {point['claim']}")
+            for evidence in point.get('evidence', []):
+                lines.append(f"    * {evidence}")
+            if point.get('citations'):
+                lines.append(f"    Cite: {'; '.join(point['citations'])}")
+        formatted.append('\n'.join(lines))
+    return '\n'.join(formatted)
+
 def parse_outline_text_response(text_response: str, context_chain) -> Dict:
     """Parse text response into structured outline format"""
     # Simple fallback structure if JSON parsing fails
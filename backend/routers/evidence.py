@@ -0,0 +1,50 @@
+from fastapi import APIRouter, HTTPException
+from typing import Optional
+from schemas.evidence import (
+    EvidenceIndexRequest, EvidenceIndexResponse, CitationEvidenceResponse, EvidenceLookupRequest, EvidenceLookupResponse
+)
+from services.citation_keys import lookup_key
+from services.evidence_index import get_evidence_index
+import logging
+
+logger = logging.getLogger(__name__)
+router = APIRouter(prefix="/evidence", tags=["Evidence"])
+
+SOURCES = {"description", "response"}
+
+def check_source(source: Optional[str]):
+    if source is not None and source not in SOURCES:
+        raise HTTPException(status_code=400, detail=f"source must be one of {sorted(SOURCES)}")
+
+@router.post("/{project_id}/index", response_model=EvidenceIndexResponse)
+def index_project_evidence(project_id: str, request: EvidenceIndexRequest):
+    """Split every citation description and response into scored sentences; unchanged texts are reused."""
+    try:
+        return EvidenceIndexResponse(**get_evidence_index().index_project(request.project, request.project_id or project_id))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error indexing evidence for {project_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Evidence indexing failed: {str(e)}")
+
+@router.get("/{project_id}/citations", response_model=CitationEvidenceResponse)
+def citation_evidence(project_id: str, key: Optional[str] = None, apa: Optional[str] = None,
+                      limit: int = 5, source: Optional[str] = None):
+    """Ranked evidence sentences for one citation, by canonical key or APA string."""
+    if not key and not apa:
+        raise HTTPException(status_code=400, detail="Pass key or apa")
+    check_source(source)
+    result = get_evidence_index().lookup(project_id, lookup_key(key or apa), limit=limit, source=source)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Citation not indexed for this project")
+    return result
+
+@router.post("/{project_id}/lookup", response_model=EvidenceLookupResponse)
+def lookup_evidence(project_id: str, request: EvidenceLookupRequest):
+    """Evidence for several citations at once; citations that were never indexed map to null."""
+    check_source(request.source)
+    index = get_evidence_index()
+    return EvidenceLookupResponse(results={
+        value: index.lookup(project_id, lookup_key(value), limit=request.limit, source=request.source)
+        for value in request.citations
+    })
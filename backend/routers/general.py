@@ -5,7 +5,7 @@ from services.bedrock_service import invoke_bedrock
 router = APIRouter()
 
 @router.post("/ai-response")
-async def ai_response(request: PromptRequest):
+def ai_response(request: PromptRequest):
     try:
         response = invoke_bedrock(request.prompt)
         return {"response": response}
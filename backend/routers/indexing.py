@@ -0,0 +1,27 @@
+from fastapi import APIRouter, HTTPException
+from schemas.indexing import ProjectIndexRequest, ProjectIndexResponse
+from services import opensearch_client
+from services.project_indexer import ProjectIndexer
+import logging
+
+logger = logging.getLogger(__name__)
+router = APIRouter(prefix="/index", tags=["Indexing"])
+
+@router.post("/project", response_model=ProjectIndexResponse)
+def index_project(request: ProjectIndexRequest):
+    """
+    Index a project's outline, responses, citation references and master outlines
+    into OpenSearch. Only chunks whose content hash changed since the last run are sent.
+    """
+    if opensearch_client.client is None:
+        raise HTTPException(status_code=503, detail="OpenSearch is not configured (set OPENSEARCH_ENDPOINT)")
+
+    try:
+        indexer = ProjectIndexer(opensearch_client.client)
+        report = indexer.index_project(request.project, request.project_id, request.full_reindex)
+        return ProjectIndexResponse(**report)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error indexing project: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Indexing failed: {str(e)}")
@@ -1,18 +1,78 @@
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from schemas.literature_review import (
+    CitationDigestRequest,
+    CitationDigestResponse,
     CitationResponseRequest,
     FusedResponseRequest,
-    LLMResponse
+    FusionSummary,
+    LLMResponse,
+    OutlineParseRequest,
+    SectionProseRequest,
+    SectionProseResponse
 )
 from services.bedrock_service import invoke_bedrock
+from services.citation_digest import format_digest, get_digest_cache, relevant_claims
+from services.fused_outline import context_hash, get_fused_outline_store, merge_branches, plan_refuse, provenance, split_branches
+from services.outline_parser import parse_outline
+from services.prose_pipeline import assemble, citation_lines, prose_prompt, related_section, run_pipeline
+import json
 
 router = APIRouter()
 
 # --- Routers only, no Pydantic models here ---
 
+# An answer built from a digest only reorganises quotes already in the prompt
+DERIVED_MAX_TOKENS = 2500
+
+def generate(prompt: str, max_tokens: int) -> str:
+    return invoke_bedrock(prompt, max_tokens=max_tokens)
+
+def derived_citation_prompt(request: CitationResponseRequest, reference_number: str, digest) -> str:
+    """Per-question prompt over the claims of the work's digest closest to the question."""
+    claims = relevant_claims(digest, f"{request.question}\n{request.subsection_context}")
+    return f"""Answer the research question using ONLY the claims and quotes below from one cited work.
+Write a detailed outline starting with "1." in this numbering format:
+1. / a. / i. / 1) / a) / i) (each level indented under the previous one)
+
+Every point must use an exact quote from the list and end with [{reference_number}]. Do not add anything that is not in the list.
+
+Thesis: {request.thesis}
+Section Context: {request.section_context}
+Subsection Context: {request.subsection_context}
+Question: {request.question}
+
+Work [{reference_number}]: {request.citation.apa or request.citation.title or request.citation.source}
+{format_digest(claims, digest.get("summary", ""))}
+
+Begin your outline below:
+"""
+
+@router.post("/generate_citation_digests", response_model=CitationDigestResponse)
+def generate_citation_digests(request: CitationDigestRequest):
+    """Digest every distinct work once before answering the questions that cite them."""
+    results = get_digest_cache().prefetch(request.citations, generate, request.max_concurrency)
+    counts = {status: sum(1 for _, s in results if s == status) for status in ("generated", "cached", "failed")}
+    return CitationDigestResponse(
+        digests=[{"citation_key": key, "status": status} for key, status in results], **counts
+    )
+
 @router.post("/generate_citation_response", response_model=LLMResponse)
-async def generate_citation_response(request: CitationResponseRequest):
+def generate_citation_response(request: CitationResponseRequest):
     reference_number = request.reference_id or str(request.citation_number)
+    if request.use_digest:
+        digest, status = get_digest_cache().get_or_create(request.citation, generate)
+        if digest is not None:
+            try:
+                response = invoke_bedrock(derived_citation_prompt(request, reference_number, digest), max_tokens=DERIVED_MAX_TOKENS)
+                return LLMResponse(
+                    response=response,
+                    outline=parse_outline(response, {reference_number: request.citation}),
+                    digest_status=status
+                )
+            except Exception as e:
+                raise HTTPException(status_code=500, detail=f"Error generating citation response: {str(e)}")
+
     prompt = f"""
 You are an expert on the works of {request.citation.author or "the cited author"}.
 Your task is to answer the following research question using ONLY the cited work, quoting exactly and providing a detailed, multi-tiered outline starting at level 3 with the following numbering format:
@@ -53,12 +113,12 @@ Begin your outline below:
 """
     try:
         response = invoke_bedrock(prompt)
-        return LLMResponse(response=response)
+        return LLMResponse(response=response, outline=parse_outline(response, {reference_number: request.citation}))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating citation response: {str(e)}")
 
 @router.post("/generate_fused_response", response_model=LLMResponse)
-async def generate_fused_response(request: FusedResponseRequest):
+def generate_fused_response(request: FusedResponseRequest):
     # Build citation references mapping
     citation_refs = {}
     for ref in (request.citation_references or []):
@@ -122,78 +182,114 @@ Citation Outlines:
 
 Master Outline:
 """
+    store = get_fused_outline_store() if request.incremental else None
+    state_key = store.key(request) if store else None
+    state = store.get(state_key) if store else None
+    plan = plan_refuse(state, request)
     try:
-        response = invoke_bedrock(prompt)
-        return LLMResponse(response=response)
+        response = None
+        if plan["mode"] == "cached":
+            response = state["fused"]
+        elif plan["mode"] == "incremental":
+            replacements = refuse_branches(request, plan)
+            if replacements is not None:
+                response = merge_branches(plan, replacements)
+        if response is None:
+            plan = dict(plan, mode="full", changed=[i["ref"] for i in plan["inputs"]], kept=[])
+            response = invoke_bedrock(prompt)
+
+        branches = split_branches(response)["branches"]
+        if store and branches:
+            store.put(state_key, request.project_id, context_hash(request), plan["inputs"], response)
+        kept = {"cached": len(branches), "incremental": len(plan["kept"])}.get(plan["mode"], 0)
+        fusion = FusionSummary(
+            mode=plan["mode"],
+            changed_refs=plan["changed"],
+            removed_refs=plan["removed"],
+            points_kept=kept,
+            points_refused=len(branches) - kept,
+            provenance=provenance(branches)
+        )
+        return LLMResponse(response=response, outline=parse_outline(response, citation_refs), fusion=fusion)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating fused response: {str(e)}")
 
+def refuse_branches(request: FusedResponseRequest, plan):
+    """
+    Re-fuse only the top-level points that drew on changed or removed
+    citation outlines. Returns the replacement points (possibly none), or None
+    when the model's answer has no usable outline and a full fuse is needed.
+    """
+    removed = set(plan["removed"])
+    if not plan["changed"] and all(set(b["refs"]) <= removed for b in plan["affected"]):
+        return []
+
+    outlines = dict(zip([i["ref"] for i in plan["inputs"]], request.citation_responses))
+    changed_outlines = "\n\n".join(f"Citation [{ref}]:\n{outlines[ref]}" for ref in plan["changed"])
+    affected = "\n".join(b["text"] for b in plan["affected"]) or "(none)"
+    kept = "\n".join(b["text"].split("\n", 1)[0].strip() for b in plan["kept"]) or "(none)"
+    prompt = f"""You are updating part of a master outline after some citation outlines changed.
+
+Question: {request.question}
+Subsection Context: {request.subsection_context}
+
+POINTS THAT STAY AS THEY ARE (do not repeat them):
+{kept}
+
+POINTS TO REWRITE:
+{affected}
+
+UPDATED CITATION OUTLINES:
+{changed_outlines or "(none)"}
+{f"REMOVED CITATIONS (drop anything that rests only on them): {', '.join(f'[{ref}]' for ref in plan['removed'])}" if plan["removed"] else ""}
+
+Rewrite the points to rewrite so they reflect the updated citation outlines, and add points for material in the
+updated outlines that fits none of the points that stay. Keep quotes and [X] references from other citations
+verbatim. Use the same numbering format (1. / a. / i. / 1) / a) / i)), starting at "1.", and return only the
+rewritten and new points.
+"""
+    split = split_branches(invoke_bedrock(prompt))
+    return split["branches"] or None
+
+@router.post("/parse_outline")
+def parse_outline_text(request: OutlineParseRequest):
+    """Outline tree for a stored response that was generated before trees were returned."""
+    references = {ref.reference_id: ref.citation for ref in (request.citation_references or [])}
+    return parse_outline(request.text, references)
+
 @router.post("/generate_prose_from_outline", response_model=LLMResponse)
-async def generate_prose_from_outline(request: FusedResponseRequest):
+def generate_prose_from_outline(request: FusedResponseRequest):
     """Generate full academic prose from fused outline with responses"""
     
-    # Build citation references mapping
-    citation_refs = {}
-    for ref in (request.citation_references or []):
-        citation_refs[ref.reference_id] = ref.citation
-    
-    # Build citations list with reference numbers
-    citations_list = "\n".join([
-        f"[{ref.reference_id}]: {ref.citation.apa or ref.citation.title or ref.citation.source}" 
-        for ref in (request.citation_references or [])
-    ])
-    
     # Build responses list - assuming these are the fused outline responses
     responses_content = "\n\n".join([
         f"Response {i+1}:\n{resp}" 
         for i, resp in enumerate(request.citation_responses)
     ])
-    
-    prompt = f"""You are an academic synthesis and writing engine.
-Your task is to convert the fused outline—which contains section/subsection structure, contextual analysis, and question responses—into research-paper-quality prose.
-
-PRIMARY OBJECTIVE:
-Transform the completed section/subsection content into full, coherent paragraphs that:
-- Clearly express the larger point or argument implied by the section's context statement
-- Integrate and elaborate upon the data and responses from the fused outline
-- Maintain academic flow, logical structure, and narrative cohesion
-
-WRITING REQUIREMENTS:
-- Write at a formal academic level, suitable for publication or graduate-level research
-- Each subsection should produce 2–4 well-developed paragraphs unless otherwise directed by data density
-- Maintain strong coherence using transitions that reinforce the section's relationship to the broader argument
-- Use context statement: "{request.section_context or request.subsection_context}"
-
-CITATION FORMAT:
-- Use blue-linked citations for in-app pop-up functionality
-- Format: <span style="color:blue;" data-cite="[Reference]">[Reference]</span>
-- Example: According to the analysis <span style="color:blue;" data-cite="[1]">[1]</span>
-- Multiple sources: <span style="color:blue;" data-cite="[1,2]">[1, 2]</span>
-
-STYLE REQUIREMENTS:
-- Objective, analytical tone
-- Smooth transitions between evidence and interpretation  
-- Avoid repetition of citation phrases or excessive quotation; paraphrase appropriately
-- Begin with the intent and purpose described in the contextual analysis
-- Every paragraph should stay aligned with why this section exists and how it supports the thesis
-
-THESIS CONTEXT: {request.thesis}
-METHODOLOGY: {request.methodology}
-SECTION CONTEXT: {request.section_context}
-SUBSECTION CONTEXT: {request.subsection_context}
-
-QUESTION BEING ADDRESSED: {request.question}
-
-AVAILABLE CITATIONS:
-{citations_list}
-
-FUSED OUTLINE CONTENT TO CONVERT TO PROSE:
-{responses_content}
 
-Generate full academic prose that converts the outline structure into flowing paragraphs while maintaining all citations and arguments. Do not use bullet points or outline formatting - write complete paragraphs only."""
+    # Related evidence from other sections of the same project, for cross-references
+    related = related_section(request.project_id, f"{request.question}\n{request.subsection_context}")
+    prompt = prose_prompt(
+        request.thesis, request.methodology, request.section_context, request.subsection_context,
+        [request.question], citation_lines(request.citation_references), responses_content, related
+    )
 
     try:
         response = invoke_bedrock(prompt)
         return LLMResponse(response=response)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error generating prose from outline: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Error generating prose from outline: {str(e)}")
+
+@router.post("/generate_section_prose", response_model=SectionProseResponse)
+def generate_section_prose(request: SectionProseRequest):
+    """
+    Prose for many subsections at once: one call per subsection, run
+    concurrently, assembled in paper order with a short transition pass.
+    """
+    return SectionProseResponse(**assemble(request, run_pipeline(request, generate)))
+
+@router.post("/generate_section_prose/stream")
+def stream_section_prose(request: SectionProseRequest):
+    """Same build as /generate_section_prose, streamed as NDJSON events as each subsection finishes."""
+    lines = (json.dumps(event, ensure_ascii=False) + "\n" for event in run_pipeline(request, generate))
+    return StreamingResponse(lines, media_type="application/x-ndjson")
@@ -9,6 +9,7 @@ from schemas.methodology import (
     GeneratedMethodology
 )
 from services.bedrock_service import invoke_bedrock
+from services.prefetch import get_prefetcher, model_fields
 import json
 import re
 
@@ -75,7 +76,11 @@ async def get_methodology_options():
     return MethodologyOptionsResponse(methodologies=methodologies)
 
 @router.post("/generate_methodology_options", response_model=MethodologyGenerationResponse)
-async def generate_methodology_options(request: MethodologySelectionRequest):
+def generate_methodology_options(request: MethodologySelectionRequest):
+    prefetched = get_prefetcher().take("generate_methodology_options", request.dict())
+    if prefetched is not None:
+        return prefetched
+
     try:
         # Get methodology info from the predefined options
         methodologies = [
@@ -222,6 +227,11 @@ async def generate_methodology_options(request: MethodologySelectionRequest):
         print(f"Error in generate_methodology_options: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error generating methodologies: {str(e)}")
 
+get_prefetcher().register(
+    "generate_methodology_options", model_fields(MethodologySelectionRequest),
+    lambda request: generate_methodology_options(MethodologySelectionRequest(**request))
+)
+
 
 def create_primary_methodology_defaults(selected_methodology_obj, request):
     """Create default methodologies based on primary methodology only"""
@@ -22,6 +22,7 @@ from schemas.structure import (
 )
 from services.bedrock_service import invoke_bedrock
 from services.paper_structure_service import PaperStructureService
+from services.prefetch import get_prefetcher
 import json
 import re
 import logging
@@ -30,7 +31,7 @@ router = APIRouter()
 logger = logging.getLogger(__name__)
 
 @router.post("/generate_outline", response_model=OutlineGenerationResponse)
-async def generate_outline(request: OutlineGenerationRequest):
+def generate_outline(request: OutlineGenerationRequest):
     try:
         response = invoke_bedrock(request.prompt)
         
@@ -68,7 +69,7 @@ async def generate_outline(request: OutlineGenerationRequest):
         raise HTTPException(status_code=500, detail=f"Error generating outline: {str(e)}")
 
 @router.post("/generate_sections", response_model=SectionGenerationResponse)
-async def generate_sections(request: SectionGenerationRequest):
+def generate_sections(request: SectionGenerationRequest):
     try:
         # Extract methodology information
         methodology_description = ""
@@ -138,7 +139,7 @@ async def generate_sections(request: SectionGenerationRequest):
         raise HTTPException(status_code=500, detail=f"Error generating sections: {str(e)}")
 
 @router.post("/generate_subsections", response_model=SubsectionGenerationResponse)
-async def generate_subsections(request: SubsectionGenerationRequest):
+def generate_subsections(request: SubsectionGenerationRequest):
     try:
         # Extract methodology information
         methodology_description = ""
@@ -216,7 +217,7 @@ async def generate_subsections(request: SubsectionGenerationRequest):
         raise HTTPException(status_code=500, detail=f"Error generating subsections: {str(e)}")
 
 @router.post("/generate_questions", response_model=QuestionGenerationResponse)
-async def generate_questions(request: QuestionGenerationRequest):
+def generate_questions(request: QuestionGenerationRequest):
     try:
         # Extract methodology information
         methodology_description = ""
@@ -276,7 +277,7 @@ async def generate_questions(request: QuestionGenerationRequest):
         raise HTTPException(status_code=500, detail=f"Error generating questions: {str(e)}")
 
 @router.post("/generate_question_citations", response_model=CitationGenerationResponse)
-async def generate_question_citations(request: CitationGenerationRequest):
+def generate_question_citations(request: CitationGenerationRequest):
     try:
         # Debug logging
         print(f"Received citation request: {request}")
@@ -384,7 +385,7 @@ async def get_paper_structure(request: PaperStructureRequest):
         raise HTTPException(status_code=500, detail=f"Error generating paper structure: {str(e)}")
 
 @router.post("/generate_structured_outline", response_model=StructuredOutlineResponse)
-async def generate_structured_outline(request: StructuredOutlineRequest):
+def generate_structured_outline(request: StructuredOutlineRequest):
     """Generate a structured outline based on paper type and methodology."""
     try:
         # Get the structured outline
@@ -486,10 +487,14 @@ async def generate_structured_outline(request: StructuredOutlineRequest):
         raise HTTPException(status_code=500, detail=f"Error generating structured outline: {str(e)}")
 
 @router.post("/generate_section_context")
-async def generate_section_context(request: dict):
+def generate_section_context(request: dict):
     """
     Generate thorough context for a section that relates it back to the thesis.
     """
+    prefetched = get_prefetcher().take("generate_section_context", request)
+    if prefetched is not None:
+        return prefetched
+
     try:
         final_thesis = request.get('final_thesis')
         section_title = request.get('section_title')
@@ -534,8 +539,25 @@ Return only the context statement, no additional text.
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating section context: {str(e)}")
 
+def section_context_request(payload: dict) -> dict:
+    """The fields generate_section_context reads, with its defaults."""
+    if not payload.get('final_thesis') or not payload.get('section_title'):
+        raise ValueError("final_thesis and section_title are required")
+    return {
+        "final_thesis": payload.get('final_thesis'),
+        "section_title": payload.get('section_title'),
+        "section_description": payload.get('section_description', ''),
+        "methodology": payload.get('methodology'),
+        "source_categories": payload.get('source_categories', [])
+    }
+
+get_prefetcher().register(
+    "generate_section_context", section_context_request,
+    lambda request: generate_section_context(request)
+)
+
 @router.post("/generate_subsection_context")
-async def generate_subsection_context(request: dict):
+def generate_subsection_context(request: dict):
     """
     Generate thorough context for a subsection that relates it to its parent section and thesis.
     """
@@ -590,7 +612,7 @@ Return only the context statement, no additional text.
         raise HTTPException(status_code=500, detail=f"Error generating subsection context: {str(e)}")
 
 @router.post("/generate_sections_subsections")
-async def generate_sections_subsections(request: dict):
+def generate_sections_subsections(request: dict):
     """
     Generate sections and subsections for the paper structure preview.
     Takes paper_type, methodology, and structure and returns detailed sections with subsections.
@@ -170,7 +170,7 @@ async def build_data_sections(request: DataSectionBuildRequest):
                 if idx < len(request.identified_data_sections):
                     sections_to_build.append(request.identified_data_sections[idx])
         else:
-            sections_to_build = request.identified_data_sections[:2]  # Build first 2 by default
+            sections_to_build = list(request.identified_data_sections)  # Build every section by default
         
         prompt = f"""
 ## 🧩 **DATA SECTION BUILDER — ACADEMIC PROSE GENERATION**
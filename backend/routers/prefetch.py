@@ -0,0 +1,28 @@
+from fastapi import APIRouter, HTTPException
+from schemas.prefetch import PrefetchCancelResponse, PrefetchEventRequest, PrefetchEventResponse, PrefetchStats
+from services.prefetch import NEXT_STEPS, get_prefetcher
+import logging
+
+logger = logging.getLogger(__name__)
+router = APIRouter(prefix="/prefetch", tags=["Prefetch"])
+
+ANONYMOUS_SCOPE = "anonymous"
+
+@router.post("/events", response_model=PrefetchEventResponse)
+def prefetch_next_steps(request: PrefetchEventRequest):
+    """Queue the generations that usually follow a workflow event so the next click returns at once."""
+    if request.event not in NEXT_STEPS:
+        raise HTTPException(status_code=400, detail=f"event must be one of {sorted(NEXT_STEPS)}")
+    scope = request.project_id or ANONYMOUS_SCOPE
+    prefetches = get_prefetcher().schedule(request.event, scope, request.context)
+    logger.info(f"Prefetch after {request.event} for {scope}: {prefetches}")
+    return PrefetchEventResponse(scope=scope, prefetches=prefetches)
+
+@router.delete("/{scope}", response_model=PrefetchCancelResponse)
+def cancel_prefetches(scope: str):
+    """Drop a project's pending and unclaimed guesses, e.g. when the user goes back and edits the thesis."""
+    return PrefetchCancelResponse(scope=scope, cancelled=get_prefetcher().cancel(scope))
+
+@router.get("/stats", response_model=PrefetchStats)
+def prefetch_stats():
+    return get_prefetcher().stats()
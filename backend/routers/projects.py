@@ -0,0 +1,102 @@
+from fastapi import APIRouter, HTTPException
+from schemas.projects import (
+    ProjectSaveRequest, ProjectSaveResponse, ProjectSummary,
+    ProjectRecord, ProjectRecordsResponse, RecordUpdateRequest
+)
+from services.project_schema import as_legacy_project, normalize_project
+from services.project_store import get_project_store
+from services.project_sync import get_project_sync
+from typing import Any, Dict, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+router = APIRouter(prefix="/projects", tags=["Projects"])
+
+@router.get("", response_model=List[ProjectSummary])
+def list_projects():
+    return get_project_store().list_projects()
+
+@router.post("", response_model=ProjectSaveResponse)
+def save_project(request: ProjectSaveRequest):
+    """
+    Store a full project file (legacy or normalized format); only sections,
+    subsections and responses that changed are rewritten.
+    """
+    try:
+        project = as_legacy_project(request.project)
+        store = get_project_store()
+        # Direct writes bump the sync version so delta clients notice the change
+        result = get_project_sync().external_write(
+            project.get("id"), lambda: store.save_project(project)
+        )
+        return ProjectSaveResponse(**result)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error saving project: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Project save failed: {str(e)}")
+
+@router.get("/storage/stats")
+def storage_stats():
+    """Blob store totals: distinct blobs, raw and compressed bytes, references held."""
+    return get_project_store().blobs.stats()
+
+@router.get("/{project_id}", response_model=Dict[str, Any])
+def get_project(project_id: str, format: str = "legacy"):
+    """
+    Reassemble the full project file for export. format=legacy (default) matches
+    existing project files; format=normalized stores shared subtrees once.
+    """
+    if format not in ("legacy", "normalized"):
+        raise HTTPException(status_code=400, detail="format must be 'legacy' or 'normalized'")
+    project = get_project_store().get_project(project_id)
+    if project is None:
+        raise HTTPException(status_code=404, detail=f"Project {project_id} not found")
+    return normalize_project(project) if format == "normalized" else project
+
+@router.delete("/{project_id}")
+def delete_project(project_id: str):
+    get_project_sync().forget(project_id)
+    if not get_project_store().delete_project(project_id):
+        raise HTTPException(status_code=404, detail=f"Project {project_id} not found")
+    return {"deleted": project_id}
+
+@router.get("/{project_id}/records", response_model=ProjectRecordsResponse)
+def list_records(project_id: str, parent: Optional[str] = None, kind: Optional[str] = None, include_body: bool = True):
+    """
+    List records under one parent path, e.g. parent=data/outlineData for the
+    sections or parent=data/draftData for that container's responses.
+    """
+    records = get_project_store().list_records(project_id, parent=parent, kind=kind, include_body=include_body)
+    return ProjectRecordsResponse(project_id=project_id, records=records)
+
+@router.get("/{project_id}/records/{path:path}", response_model=ProjectRecord)
+def get_record(project_id: str, path: str):
+    record = get_project_store().get_record(project_id, path)
+    if record is None:
+        raise HTTPException(status_code=404, detail=f"Record {path} not found")
+    return record
+
+@router.put("/{project_id}/records/{path:path}", response_model=ProjectRecord)
+def put_record(project_id: str, path: str, request: RecordUpdateRequest):
+    """Replace a single section, subsection, draft container or response."""
+    try:
+        return get_project_sync().external_write(
+            project_id, lambda: get_project_store().put_record(project_id, path, request.value)
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Project {project_id} not found")
+
+@router.delete("/{project_id}/records/{path:path}")
+def delete_record(project_id: str, path: str):
+    try:
+        deleted = get_project_sync().external_write(
+            project_id, lambda: get_project_store().delete_record(project_id, path)
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not deleted:
+        raise HTTPException(status_code=404, detail=f"Record {path} not found")
+    return {"deleted": deleted}
@@ -0,0 +1,49 @@
+from fastapi import APIRouter, HTTPException
+from typing import Optional
+from schemas.references import (
+    ReferenceIndexRequest, ReferenceIndexResponse, CitationUsageResponse, SupportResponse, MarkerSource
+)
+from services.citation_keys import lookup_key
+from services.reference_index import get_reference_index
+import logging
+
+logger = logging.getLogger(__name__)
+router = APIRouter(prefix="/references", tags=["References"])
+
+KINDS = {"response", "outline_point", "prose"}
+
+@router.post("/{project_id}/index", response_model=ReferenceIndexResponse)
+def index_project_references(project_id: str, request: ReferenceIndexRequest):
+    """Resolve the citation markers of every changed response and prose paragraph."""
+    try:
+        return ReferenceIndexResponse(**get_reference_index().index_project(request.project, request.project_id or project_id))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error indexing references for {project_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Reference indexing failed: {str(e)}")
+
+@router.get("/{project_id}/usages", response_model=CitationUsageResponse)
+def citation_usages(project_id: str, key: Optional[str] = None, apa: Optional[str] = None, kind: Optional[str] = None):
+    """Where a source is used, by canonical key or APA string."""
+    if not key and not apa:
+        raise HTTPException(status_code=400, detail="Pass key or apa")
+    if kind is not None and kind not in KINDS:
+        raise HTTPException(status_code=400, detail=f"kind must be one of {sorted(KINDS)}")
+    result = get_reference_index().usages(project_id, lookup_key(key or apa), kind)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Citation is not cited anywhere in this project")
+    return result
+
+@router.get("/{project_id}/supports", response_model=SupportResponse)
+def supporting_citations(project_id: str, location: str):
+    """What supports a response, outline point or prose paragraph."""
+    return SupportResponse(location=location, citations=get_reference_index().supports(project_id, location))
+
+@router.get("/{project_id}/markers/{marker}", response_model=MarkerSource)
+def marker_source(project_id: str, marker: str, scope: str = ""):
+    """The source behind a numbered marker such as 3 or 2_1, seen from a question key or subsection."""
+    result = get_reference_index().resolve(project_id, marker, scope)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Marker does not resolve to a source")
+    return result
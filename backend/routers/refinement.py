@@ -13,7 +13,7 @@ import re
 router = APIRouter()
 
 @router.post("/refine_thesis")
-async def refine_thesis(interaction: ThesisInteraction):
+def refine_thesis(interaction: ThesisInteraction):
     prompt = f"""
     You are a professor skilled in refining thesis statements.  
     Given the original thesis and user responses provided, explicitly provide a SINGLE refined thesis statement enclosed within quotation marks and NO additional commentary or explanations.
@@ -36,7 +36,7 @@ async def refine_thesis(interaction: ThesisInteraction):
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/generate_probing_questions", response_model=ProbingQuestionsResponse)
-async def generate_probing_questions(request: ProbingQuestionsRequest):
+def generate_probing_questions(request: ProbingQuestionsRequest):
     # Determine if this is a government/military context
     is_gov_military = any(keyword in request.paper_type.lower() for keyword in [
         'position', 'proposal', 'analytical', 'intelligence', 'strategic', 'policy',
@@ -108,7 +108,7 @@ Respond with exactly 5 questions, each on a new line, numbered 1-5:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/answer_probing_questions", response_model=AutoRefineResponse)
-async def answer_probing_questions(request: AnswerProbingQuestionsRequest):
+def answer_probing_questions(request: AnswerProbingQuestionsRequest):
     # Filter out empty answers
     answered_questions = []
     for i, answer in enumerate(request.answers):
@@ -165,7 +165,7 @@ Example Response:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/auto_refine_thesis", response_model=AutoRefineResponse)
-async def auto_refine_thesis(request: AutoRefineRequest):
+def auto_refine_thesis(request: AutoRefineRequest):
     # Determine if this is a government/military context based on paper type
     is_gov_military = any(keyword in request.paper_type.lower() for keyword in [
         'position', 'proposal', 'analytical', 'intelligence', 'strategic', 'policy',
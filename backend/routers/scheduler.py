@@ -0,0 +1,16 @@
+from fastapi import APIRouter
+from schemas.scheduler import AdmissionStats, ModelSchedulerStats
+from services.admission import get_admission_controller
+from services.model_scheduler import get_model_scheduler
+
+router = APIRouter(prefix="/scheduler", tags=["Scheduler"])
+
+@router.get("/stats", response_model=ModelSchedulerStats)
+def model_scheduler_stats():
+    """Queue depth, running calls and wait times per priority class."""
+    return get_model_scheduler().stats()
+
+@router.get("/admission", response_model=AdmissionStats)
+def admission_stats():
+    """Admitted and shed requests, overall and per endpoint, with the current backlog."""
+    return get_admission_controller().stats()
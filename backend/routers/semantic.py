@@ -0,0 +1,32 @@
+from fastapi import APIRouter, HTTPException
+from schemas.semantic import SemanticIndexRequest, SemanticIndexResponse, SemanticSearchResponse
+from services import semantic_index
+from typing import Optional
+import logging
+
+logger = logging.getLogger(__name__)
+router = APIRouter(prefix="/semantic-index", tags=["Semantic Index"])
+
+@router.post("/project", response_model=SemanticIndexResponse)
+def build_semantic_index(request: SemanticIndexRequest):
+    """Embed a project's citations, responses and prose; only changed chunks are re-embedded."""
+    try:
+        stats = semantic_index.index_project(request.project, request.project_id)
+        return SemanticIndexResponse(**stats)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error building semantic index: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Semantic indexing failed: {str(e)}")
+
+@router.get("/{project_id}/search", response_model=SemanticSearchResponse)
+def search_semantic_index(project_id: str, query: str, k: int = 5, kind: Optional[str] = None, exact: Optional[bool] = None):
+    """Find the evidence most similar in meaning to the query within one project."""
+    try:
+        results = semantic_index.search_project(
+            project_id, query, k=k, kinds=[kind] if kind else None, exact=exact
+        )
+        return SemanticSearchResponse(results=results)
+    except Exception as e:
+        logger.error(f"Error searching semantic index: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Semantic search failed: {str(e)}")
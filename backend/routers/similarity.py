@@ -0,0 +1,31 @@
+from fastapi import APIRouter, HTTPException
+from schemas.similarity import (
+    SimilarityGroupRequest, SimilarityGroupResponse, SectionGroupingRequest, SectionGroupingResponse
+)
+from services.text_similarity import group_section, group_texts
+import logging
+
+logger = logging.getLogger(__name__)
+router = APIRouter(prefix="/similarity", tags=["Similarity"])
+
+@router.post("/group", response_model=SimilarityGroupResponse)
+def group_similar_texts(request: SimilarityGroupRequest):
+    """Group texts by TF-IDF cosine similarity."""
+    try:
+        return SimilarityGroupResponse(groups=group_texts(request.texts, request.threshold, request.linkage))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.post("/section-groups", response_model=SectionGroupingResponse)
+def group_section_questions(request: SectionGroupingRequest):
+    """Question themes and, within each theme, similar citation findings for every subsection of a section."""
+    try:
+        subsections = group_section(
+            request.section, request.question_threshold, request.finding_threshold, request.linkage
+        )
+        return SectionGroupingResponse(section_title=request.section.get("section_title", ""), subsections=subsections)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error grouping section: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Section grouping failed: {str(e)}")
@@ -0,0 +1,97 @@
+from fastapi import APIRouter, HTTPException
+from schemas.projects import ProjectSaveResponse
+from schemas.snapshots import (
+    SnapshotCreateRequest, SnapshotInfo, BranchCreateRequest, BranchInfo, SnapshotDiff
+)
+from services.project_schema import normalize_project
+from services.project_snapshots import get_project_snapshots
+from services.project_sync import get_project_sync
+from typing import Any, Dict, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+router = APIRouter(prefix="/snapshots", tags=["Project Snapshots"])
+
+@router.post("/{project_id}", response_model=SnapshotInfo)
+def create_snapshot(project_id: str, request: SnapshotCreateRequest):
+    """
+    Snapshot the stored project onto a branch. Only outline, methodology and
+    response nodes that no earlier snapshot has are copied.
+    """
+    # Fold pending delta-sync patches into the store so the snapshot sees them
+    get_project_sync().compact(project_id)
+    try:
+        return get_project_snapshots().create_snapshot(project_id, request.branch, request.message)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Project {project_id} not found")
+
+@router.get("/{project_id}", response_model=List[SnapshotInfo])
+def list_snapshots(project_id: str, branch: Optional[str] = None):
+    """All snapshots newest first, or one branch's history when branch is given."""
+    try:
+        return get_project_snapshots().list_snapshots(project_id, branch)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Branch {branch} not found")
+
+@router.get("/{project_id}/branches", response_model=List[BranchInfo])
+def list_branches(project_id: str):
+    return get_project_snapshots().list_branches(project_id)
+
+@router.post("/{project_id}/branches", response_model=BranchInfo)
+def create_branch(project_id: str, request: BranchCreateRequest):
+    """Start a branch at a snapshot or another branch's head; nothing is copied."""
+    try:
+        return get_project_snapshots().create_branch(project_id, request.name, request.from_snapshot, request.from_branch)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=f"{e.args[0]} not found")
+
+@router.delete("/{project_id}/branches/{name}")
+def delete_branch(project_id: str, name: str):
+    try:
+        deleted = get_project_snapshots().delete_branch(project_id, name)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Branch {name} not found")
+    return {"deleted": name, "snapshots_deleted": deleted}
+
+@router.get("/{project_id}/diff", response_model=SnapshotDiff)
+def diff_snapshots(project_id: str, from_id: str, to_id: str):
+    try:
+        return get_project_snapshots().diff(from_id, to_id)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=f"Snapshot {e.args[0]} not found")
+
+@router.get("/{project_id}/{snapshot_id}", response_model=Dict[str, Any])
+def get_snapshot(project_id: str, snapshot_id: str, format: str = "legacy"):
+    """The project file as of the snapshot (format=legacy or normalized)."""
+    if format not in ("legacy", "normalized"):
+        raise HTTPException(status_code=400, detail="format must be 'legacy' or 'normalized'")
+    snapshots = get_project_snapshots()
+    info = snapshots.get_snapshot_info(snapshot_id)
+    project = snapshots.load_snapshot(snapshot_id) if info and info["project_id"] == project_id else None
+    if project is None:
+        raise HTTPException(status_code=404, detail=f"Snapshot {snapshot_id} not found")
+    return normalize_project(project) if format == "normalized" else project
+
+@router.post("/{project_id}/{snapshot_id}/restore", response_model=ProjectSaveResponse)
+def restore_snapshot(project_id: str, snapshot_id: str):
+    """Make the snapshot the project's working copy (rolls back or checks out a branch)."""
+    snapshots = get_project_snapshots()
+    info = snapshots.get_snapshot_info(snapshot_id)
+    if info is None or info["project_id"] != project_id:
+        raise HTTPException(status_code=404, detail=f"Snapshot {snapshot_id} not found")
+    try:
+        result = get_project_sync().external_write(project_id, lambda: snapshots.restore(snapshot_id))
+        return ProjectSaveResponse(**result)
+    except Exception as e:
+        logger.error(f"Error restoring snapshot {snapshot_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Snapshot restore failed: {str(e)}")
+
+@router.delete("/{project_id}/{snapshot_id}")
+def delete_snapshot(project_id: str, snapshot_id: str):
+    snapshots = get_project_snapshots()
+    info = snapshots.get_snapshot_info(snapshot_id)
+    if info is None or info["project_id"] != project_id or not snapshots.delete_snapshot(snapshot_id):
+        raise HTTPException(status_code=404, detail=f"Snapshot {snapshot_id} not found")
+    return {"deleted": snapshot_id}
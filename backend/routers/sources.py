@@ -4,13 +4,18 @@ from schemas.sources import (
     CitationSearchRequest, QuestionCitationRequest, QuestionCitationResponse
 )
 from services.bedrock_service import invoke_bedrock
+from services.prefetch import get_prefetcher, model_fields
 import json
 import re
 
 router = APIRouter()
 
 @router.post("/recommend_sources")
-async def recommend_sources(request: SourceRecommendationRequest):
+def recommend_sources(request: SourceRecommendationRequest):
+    prefetched = get_prefetcher().take("recommend_sources", request.dict())
+    if prefetched is not None:
+        return prefetched
+
     prompt = f"""
     Based on the following thesis, explicitly recommend ONLY a numbered list of concise document/source categories suitable for comprehensive research.
 
@@ -34,8 +39,13 @@ async def recommend_sources(request: SourceRecommendationRequest):
         else:
             raise HTTPException(status_code=500, detail=f"Service error: {error_msg}")
 
+get_prefetcher().register(
+    "recommend_sources", model_fields(SourceRecommendationRequest),
+    lambda request: recommend_sources(SourceRecommendationRequest(**request))
+)
+
 @router.post("/generate_works_cited", response_model=WorksCitedResponse)
-async def generate_works_cited(request: WorksCitedRequest):
+def generate_works_cited(request: WorksCitedRequest):
     prompt = f"""
     You are an academic researcher skilled in identifying ideal primary and secondary source documents for scholarly papers.
 
@@ -92,7 +102,7 @@ async def generate_works_cited(request: WorksCitedRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/identify_citation")
-async def identify_citation(request: CitationSearchRequest):
+def identify_citation(request: CitationSearchRequest):
     prompt = f"""
     You are an academic assistant tasked with precisely identifying and formatting scholarly citations.
 
@@ -133,7 +143,7 @@ async def identify_citation(request: CitationSearchRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/generate_question_citations", response_model=QuestionCitationResponse)
-async def generate_question_citations(request: QuestionCitationRequest):
+def generate_question_citations(request: QuestionCitationRequest):
     prompt = f"""
     You are an academic researcher skilled in identifying ideal sources to answer specific research questions.
 
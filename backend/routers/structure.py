@@ -15,7 +15,7 @@ import re
 router = APIRouter()
 
 @router.post("/generate_methodology", response_model=MethodologyResponse)
-async def generate_methodology(request: MethodologyRequest):
+def generate_methodology(request: MethodologyRequest):
     prompt = f"""
     You are an expert professor creating detailed research methodologies.
     Given the thesis: "{request.final_thesis}" and these explicitly selected source categories: {', '.join(request.source_categories)},
@@ -30,7 +30,7 @@ async def generate_methodology(request: MethodologyRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/generate_outline", response_model=OutlineResponse)
-async def generate_outline(request: OutlineRequest):
+def generate_outline(request: OutlineRequest):
     prompt = f"""
     You are an expert professor creating structured thesis outlines.
 
@@ -73,7 +73,7 @@ async def generate_outline(request: OutlineRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/generate_sections", response_model=SectionsResponse)
-async def generate_sections(request: SectionsRequest):
+def generate_sections(request: SectionsRequest):
     prompt = f"""
     Explicitly provide ONLY high-level sections for an academic outline based on:
 
@@ -104,7 +104,7 @@ async def generate_sections(request: SectionsRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/generate_subsections", response_model=SubsectionsResponse)
-async def generate_subsections(request: SubsectionsRequest):
+def generate_subsections(request: SubsectionsRequest):
     prompt = f"""
     Explicitly provide subsections (and optionally sub-subsections) for the given section:
 
@@ -137,7 +137,7 @@ async def generate_subsections(request: SubsectionsRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/generate_questions", response_model=QuestionsResponse)
-async def generate_questions(request: QuestionsRequest):
+def generate_questions(request: QuestionsRequest):
     prompt = f"""
     Given the following details, explicitly generate ONLY a precise, thorough list of critical questions and information requirements needed to fully address the subsection described:
 
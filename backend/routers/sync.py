@@ -0,0 +1,81 @@
+from fastapi import APIRouter, Body, Header, HTTPException, Response
+from schemas.sync import SyncedProject, SyncPatchResponse, SyncPatchLogResponse
+from services.json_patch import JsonPatchError, JsonPatchTestFailed
+from services.project_schema import as_legacy_project
+from services.project_sync import VersionConflict, get_project_sync, make_etag, parse_etag
+from typing import Any, Dict, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+router = APIRouter(prefix="/sync", tags=["Project Sync"])
+
+def conflict(project_id: str, error: VersionConflict) -> HTTPException:
+    return HTTPException(
+        status_code=412,
+        detail=f"Project changed since your last sync (server version {error.current_version})",
+        headers={"ETag": make_etag(project_id, error.current_version)}
+    )
+
+@router.get("/{project_id}", response_model=SyncedProject)
+def get_synced_project(project_id: str, response: Response):
+    """Current document and version; the ETag is what later patches send as If-Match."""
+    loaded = get_project_sync().get(project_id)
+    if loaded is None:
+        raise HTTPException(status_code=404, detail=f"Project {project_id} not found")
+    version, project = loaded
+    response.headers["ETag"] = make_etag(project_id, version)
+    return SyncedProject(project_id=project_id, version=version, project=project)
+
+@router.put("/{project_id}", response_model=SyncPatchResponse)
+def put_synced_project(project_id: str, response: Response, project: Dict[str, Any] = Body(...),
+                       if_match: Optional[str] = Header(None)):
+    """Upload a whole project. If-Match is optional here so first uploads and conflict recovery work."""
+    project = as_legacy_project(project)
+    if project.get("id") != project_id:
+        raise HTTPException(status_code=400, detail="Project id does not match the URL")
+    try:
+        version = get_project_sync().put(project, parse_etag(if_match))
+    except VersionConflict as e:
+        raise conflict(project_id, e)
+    response.headers["ETag"] = make_etag(project_id, version)
+    return SyncPatchResponse(project_id=project_id, version=version)
+
+@router.patch("/{project_id}", response_model=SyncPatchResponse)
+def patch_synced_project(project_id: str, response: Response, operations: List[Dict[str, Any]] = Body(...),
+                         if_match: Optional[str] = Header(None)):
+    """
+    Apply an RFC 6902 JSON Patch. If-Match must carry the ETag (or version) the
+    patch was made against; a stale version gets 412 with the current ETag.
+    """
+    expected_version = parse_etag(if_match)
+    if expected_version is None:
+        raise HTTPException(status_code=428, detail="If-Match header with the base version is required")
+    try:
+        version = get_project_sync().patch(project_id, operations, expected_version)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Project {project_id} not found")
+    except VersionConflict as e:
+        raise conflict(project_id, e)
+    except JsonPatchTestFailed as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except (JsonPatchError, ValueError) as e:
+        raise HTTPException(status_code=422, detail=f"Patch could not be applied: {str(e)}")
+    response.headers["ETag"] = make_etag(project_id, version)
+    return SyncPatchResponse(project_id=project_id, version=version)
+
+@router.get("/{project_id}/patches", response_model=SyncPatchLogResponse)
+def get_patches(project_id: str, since: int):
+    """Patches after a version, for catching up another tab; 410 once they have been compacted."""
+    sync = get_project_sync()
+    patches = sync.patches_since(project_id, since)
+    if patches is None:
+        raise HTTPException(status_code=410, detail="Patches were compacted into a snapshot; fetch the full project")
+    loaded = sync.get(project_id)
+    return SyncPatchLogResponse(project_id=project_id, version=loaded[0], patches=patches)
+
+@router.post("/{project_id}/compact", response_model=SyncPatchResponse)
+def compact_project(project_id: str):
+    version = get_project_sync().compact(project_id)
+    if version is None:
+        raise HTTPException(status_code=404, detail=f"Project {project_id} not found")
+    return SyncPatchResponse(project_id=project_id, version=version)
@@ -0,0 +1,30 @@
+from pydantic import BaseModel, Field
+from typing import List, Dict, Any, Optional
+
+class ClusterProjectRequest(BaseModel):
+    project: Dict[str, Any] = Field(..., description="Full project file (id, name, data, ...)")
+
+class ClusterCitation(BaseModel):
+    apa: str
+    title: Optional[str] = None
+    author: Optional[str] = None
+
+class AddCitationsRequest(BaseModel):
+    citations: List[ClusterCitation]
+
+class MergeClustersRequest(BaseModel):
+    citation_keys: List[str]
+
+class ClusterMember(BaseModel):
+    citation_key: str
+    apa: str
+    occurrences: int
+
+class CitationCluster(BaseModel):
+    representative: str
+    members: List[ClusterMember]
+
+class CitationClustersResponse(BaseModel):
+    project_id: str
+    unique_citations: int
+    clusters: List[CitationCluster]
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 
 class CitationInfo(BaseModel):
     apa: str
@@ -17,8 +17,41 @@ class CitationContext(BaseModel):
 class CitationValidityRequest(BaseModel):
     citation: CitationInfo
     context: CitationContext
+    project_id: Optional[str] = None  # when set, verdicts are reused per canonical citation
+    force_revalidate: bool = False
 
 class CitationValidityResponse(BaseModel):
     status: str  # 'valid', 'partial', 'invalid', 'error'
     explanation: str
-    link: Optional[str] = None
\ No newline at end of file
+    link: Optional[str] = None
+
+class BatchCitationItem(BaseModel):
+    citation: CitationInfo
+    section_title: Optional[str] = None
+    subsection_title: Optional[str] = None
+    question: Optional[str] = None
+
+class BatchCitationContext(BaseModel):
+    thesis: str
+    methodology: Any
+
+class BatchCitationValidityRequest(BaseModel):
+    items: List[BatchCitationItem]
+    context: BatchCitationContext
+    project_id: Optional[str] = None
+    force_revalidate: bool = False
+
+class BatchCitationVerdict(BaseModel):
+    citation_key: str
+    apa: str
+    status: str  # 'valid', 'partial', 'invalid', 'error'
+    explanation: str
+    link: Optional[str] = None
+    cached: bool = False
+
+class BatchCitationValidityResponse(BaseModel):
+    results: List[BatchCitationVerdict]  # one per request item, in request order
+    unique_citations: int
+    validated: int
+    cached: int
+    model_calls: int
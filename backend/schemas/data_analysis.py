@@ -9,6 +9,9 @@ class QuestionAnalysisRequest(BaseModel):
     section_title: str = Field(..., description="Title of the parent section")
     thesis: str = Field(..., description="Main thesis statement")
     methodology: str = Field(..., description="Research methodology")
+    project_id: Optional[str] = Field(None, description="Project id, used to pull related evidence from the semantic index")
+    incremental: bool = Field(True, description="Reuse the stored analysis and only re-analyze changed questions (requires project_id)")
+    pre_cluster: bool = Field(True, description="Group questions locally and have the model only name and order the groups")
 
 class ThematicCluster(BaseModel):
     theme_name: str = Field(..., description="Name of the identified theme")
@@ -30,6 +33,7 @@ class OutlinePoint(BaseModel):
     supporting_evidence: List[str] = Field(..., description="Key evidence supporting this point")
     citations: List[int] = Field(..., description="Citation numbers that support this point")
     rationale: str = Field(..., description="Why this point is important and how it connects")
+    questions: List[str] = Field(default_factory=list, description="Labels of the questions this point draws on (Q1, Q2, ...); empty when it spans the subsection")
 
 class GeneratedOutline(BaseModel):
     main_points: List[OutlinePoint] = Field(..., description="Main outline points")
@@ -59,12 +63,20 @@ class InclusionExclusionAnalysis(BaseModel):
     content_priorities: List[ContentItem] = Field(..., description="Prioritized content recommendations")
     narrative_flow: str = Field(..., description="How this fits into overall narrative")
 
+class AnalysisRecomputation(BaseModel):
+    mode: str = Field(..., description="full, incremental, pruned (questions only removed), or cached (nothing changed)")
+    recomputed_questions: List[str] = Field(default_factory=list, description="Questions sent to the model this time")
+    reused_questions: List[str] = Field(default_factory=list, description="Questions whose previous analysis was kept")
+    removed_questions: List[str] = Field(default_factory=list, description="Labels of questions from the previous analysis that are gone")
+    recomputed_parts: List[str] = Field(default_factory=list, description="Response fields that were regenerated or merged")
+
 class DataAnalysisResponse(BaseModel):
     thematic_clusters: List[ThematicCluster] = Field(..., description="Identified themes from the data")
     logical_structure: LogicalStructure = Field(..., description="Recommended structure")
     generated_outline: GeneratedOutline = Field(..., description="AI-generated outline based on analysis")
     content_summary: str = Field(..., description="Summary of what was found in the data")
     analysis_confidence: str = Field(..., description="Confidence level in the analysis")
+    recomputation: Optional[AnalysisRecomputation] = Field(None, description="What this request recomputed versus reused")
 
 # Build Data Outline Schemas
 class SectionPosition(BaseModel):
@@ -100,7 +112,30 @@ class SubsectionOutline(BaseModel):
 
 class BuildDataOutlineResponse(BaseModel):
     section_title: str = Field(..., description="Title of the section")
-    
+    section_overview: str = Field(..., description="Overview of what this section will cover")
+    subsection_outlines: List[SubsectionOutline] = Field(..., description="Detailed outlines for each subsection")
+    logical_flow: str = Field(..., description="Description of the logical flow")
+    integration_notes: str = Field(..., description="How this integrates with Draft Outline 1 and other sections")
+    methodology_alignment: str = Field(..., description="How this section aligns with the research methodology")
+
+class BuildDataOutlinesRequest(BaseModel):
+    sections: List[BuildDataOutlineRequest] = Field(..., description="Data sections in paper order")
+    max_concurrency: int = Field(4, ge=1, le=16, description="Sections generated at the same time")
+    stitch: bool = Field(True, description="Run the transition stitching pass after the parallel wave")
+
+class SectionStitch(BaseModel):
+    section_title: str
+    opening_transition: Optional[str] = Field(None, description="Bridge from the previous section, added to the first subsection")
+    closing_transition: Optional[str] = Field(None, description="Hand-off to the next section, added to the last subsection")
+    revised_overview: Optional[str] = Field(None, description="Overview corrected for what earlier sections actually cover")
+
+class BuildDataOutlinesResponse(BaseModel):
+    outlines: List[Optional[BuildDataOutlineResponse]] = Field(..., description="One outline per requested section (None if it failed)")
+    errors: Dict[str, str] = Field(default_factory=dict, description="Failed sections by title; retry them with build-data-outline")
+    stitched: bool = Field(False, description="Whether the stitching pass was applied")
+    stitches: List[SectionStitch] = Field(default_factory=list, description="Transitions added by the stitching pass")
+    timings: Dict[str, float] = Field(default_factory=dict, description="Seconds spent in the parallel wave and the stitching pass")
+
 # Subsection Outline Generation Schemas
 class ContextChain(BaseModel):
     subsection_context: str = Field(..., description="Context of the subsection")
@@ -129,6 +164,8 @@ class SubsectionOutlineRequest(BaseModel):
     methodology: str = Field(..., description="Research methodology")
     paper_type: str = Field(..., description="Type of academic paper")
     outline_requirements: OutlineRequirements = Field(..., description="Outline generation requirements")
+    map_reduce: Optional[bool] = Field(None, description="Extract key points per response, then merge them; None decides by total response length")
+    map_concurrency: int = Field(4, ge=1, le=16, description="Key point extractions run at the same time")
 
 class OutlineLevel6(BaseModel):
     level: str = Field(..., description="Level identifier (1), (2), (3)")
@@ -154,13 +191,16 @@ class OutlineLevel3(BaseModel):
     reference: str = Field(..., description="Reference information")
     subPoints: List[OutlineLevel4] = Field(default_factory=list, description="Level 4 sub-points")
 
+class LiteratureMapStats(BaseModel):
+    responses: int = Field(..., description="Literature responses in the request")
+    cached: int = Field(..., description="Responses whose key points came from the cache")
+    extracted: int = Field(..., description="Responses sent to the model for key point extraction")
+    failed: int = Field(0, description="Extractions that failed and fell back to the response's leading text")
+    key_points: int = Field(..., description="Key points passed to the merge step")
+
 class SubsectionOutlineResponse(BaseModel):
     detailed_outline: List[OutlineLevel3] = Field(..., description="6-level detailed outline")
     context_analysis: str = Field(..., description="Analysis of context chain")
     literature_integration: str = Field(..., description="How literature was integrated")
     outline_rationale: str = Field(..., description="Rationale for outline structure")
-    section_overview: str = Field(..., description="Overview of what this section will cover")
-    subsection_outlines: List[SubsectionOutline] = Field(..., description="Detailed outlines for each subsection")
-    logical_flow: str = Field(..., description="Description of the logical flow")
-    integration_notes: str = Field(..., description="How this integrates with Draft Outline 1 and other sections")
-    methodology_alignment: str = Field(..., description="How this section aligns with the research methodology")
\ No newline at end of file
+    literature_map: Optional[LiteratureMapStats] = Field(None, description="Map stage statistics when map-reduce was used")
\ No newline at end of file
@@ -0,0 +1,43 @@
+from pydantic import BaseModel, Field
+from typing import List, Dict, Any, Optional
+
+class EvidenceIndexRequest(BaseModel):
+    project: Dict[str, Any] = Field(..., description="Full project export (or its data payload)")
+    project_id: Optional[str] = Field(None, description="Defaults to the project's own id")
+
+class EvidenceIndexResponse(BaseModel):
+    project_id: str
+    citations: int
+    texts: int
+    segmented: int = Field(..., description="Texts split into sentences on this call")
+    reused: int = Field(..., description="Texts already segmented under the same content hash")
+    sentences: int
+    removed: int
+
+class EvidenceSentence(BaseModel):
+    sentence: str
+    score: float
+    specificity: float
+    factual: float
+    verifiable: bool
+    generic: bool
+    source: str = Field(..., description="'description' or 'response'")
+    origins: List[str] = Field(..., description="Question keys (s-ss-q) the text came from")
+
+class DescriptionPicks(BaseModel):
+    origins: List[str]
+    picks: Dict[str, Optional[str]] = Field(..., description="specific, factual, verifiable and substantive sentences")
+
+class CitationEvidenceResponse(BaseModel):
+    citation_key: str
+    apa: str
+    sentences: List[EvidenceSentence]
+    descriptions: List[DescriptionPicks]
+
+class EvidenceLookupRequest(BaseModel):
+    citations: List[str] = Field(..., description="APA strings or canonical citation keys")
+    limit: int = Field(5, ge=1, le=50)
+    source: Optional[str] = Field(None, description="Only 'description' or only 'response' sentences")
+
+class EvidenceLookupResponse(BaseModel):
+    results: Dict[str, Optional[CitationEvidenceResponse]] = Field(..., description="Keyed by the requested strings")
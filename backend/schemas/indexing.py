@@ -0,0 +1,23 @@
+from pydantic import BaseModel, Field
+from typing import List, Dict, Any, Optional
+
+class ProjectIndexRequest(BaseModel):
+    project: Dict[str, Any] = Field(..., description="Full project file (id, name, data, ...)")
+    project_id: Optional[str] = Field(None, description="Override for the project id; defaults to project.id")
+    full_reindex: bool = Field(False, description="Re-send every chunk even if its content hash is unchanged")
+
+class IndexingError(BaseModel):
+    id: str
+    error: str
+
+class ProjectIndexResponse(BaseModel):
+    project_id: str
+    index: str
+    total_chunks: int
+    indexed: int
+    deleted: int
+    unchanged: int
+    failed: int
+    batches: int
+    retries: int
+    errors: List[IndexingError] = []
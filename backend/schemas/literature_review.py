@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import List, Optional
+from pydantic import BaseModel, Field
+from typing import Any, Dict, List, Optional
 
 class Citation(BaseModel):
     apa: Optional[str] = None
@@ -25,6 +25,7 @@ class CitationResponseRequest(BaseModel):
     question_number: int
     citation_number: int
     reference_id: Optional[str] = None
+    use_digest: bool = Field(True, description="Answer from the cached per-work digest instead of recalling the work again")
 
 class FusedResponseRequest(BaseModel):
     question: str
@@ -36,6 +37,74 @@ class FusedResponseRequest(BaseModel):
     methodology: str
     question_number: int
     citation_references: Optional[List[CitationReference]] = []
+    project_id: Optional[str] = None
+    incremental: bool = Field(True, description="Re-fuse only the points that came from changed citation outlines")
+
+class FusionSummary(BaseModel):
+    mode: str = Field(..., description="'full', 'incremental' or 'cached'")
+    changed_refs: List[str]
+    removed_refs: List[str]
+    points_kept: int = Field(..., description="Top-level points carried over verbatim")
+    points_refused: int = Field(..., description="Top-level points written by this call")
+    provenance: Dict[str, List[int]] = Field(..., description="Reference id -> top-level points it contributed to")
 
 class LLMResponse(BaseModel):
-    response: str
\ No newline at end of file
+    response: str
+    outline: Optional[Dict[str, Any]] = Field(None, description="Parsed outline tree, stored next to the response text")
+    digest_status: Optional[str] = Field(None, description="'cached' or 'generated' when answered from the work's digest")
+    fusion: Optional[FusionSummary] = None
+
+class OutlineParseRequest(BaseModel):
+    text: str
+    citation_references: Optional[List[CitationReference]] = []
+
+class CitationDigestRequest(BaseModel):
+    citations: List[Citation]
+    max_concurrency: int = Field(4, ge=1, le=16)
+
+class CitationDigestStatus(BaseModel):
+    citation_key: Optional[str]
+    status: str = Field(..., description="'cached', 'generated' or 'failed'")
+
+class CitationDigestResponse(BaseModel):
+    digests: List[CitationDigestStatus]
+    generated: int
+    cached: int
+    failed: int
+class ProseQuestion(BaseModel):
+    question: str
+    question_number: int
+    fused_response: str = Field(..., description="Latest fused outline for the question")
+    citation_references: Optional[List[CitationReference]] = []
+
+class ProseSubsection(BaseModel):
+    section_index: int
+    subsection_index: int
+    section_title: Optional[str] = ""
+    subsection_title: Optional[str] = ""
+    section_context: Optional[str] = ""
+    subsection_context: Optional[str] = ""
+    questions: List[ProseQuestion] = Field(..., description="Answered questions of the subsection, in order")
+
+class SectionProseRequest(BaseModel):
+    thesis: str
+    methodology: str
+    subsections: List[ProseSubsection] = Field(..., description="Subsections in paper order")
+    project_id: Optional[str] = None
+    max_concurrency: int = Field(4, ge=1, le=16, description="Subsections generated at the same time")
+    transitions: bool = Field(True, description="Write the transitions between subsections once all are done")
+
+class SubsectionProse(BaseModel):
+    position: int = Field(..., description="Index of the subsection in the request")
+    section_index: int
+    subsection_index: int
+    subsection_title: Optional[str] = ""
+    prose: str = ""
+    opening_transition: Optional[str] = Field(None, description="Bridge from the previous subsection, to place before the prose")
+    error: Optional[str] = None
+    elapsed: float = 0.0
+
+class SectionProseResponse(BaseModel):
+    subsections: List[SubsectionProse] = Field(..., description="One entry per requested subsection, in paper order")
+    transitions_written: bool
+    timings: Dict[str, float]
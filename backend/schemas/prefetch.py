@@ -0,0 +1,32 @@
+from pydantic import BaseModel, Field
+from typing import Any, Dict, List, Optional
+
+class PrefetchEventRequest(BaseModel):
+    event: str = Field(..., description="'thesis_finalized', 'methodology_selected' or 'section_created'")
+    project_id: Optional[str] = Field(None, description="Scope for the spend cap and cancellation")
+    context: Dict[str, Any] = Field(..., description="Request fields known so far (final_thesis, paper_type, section_title, ...)")
+
+class PrefetchStatus(BaseModel):
+    endpoint: str
+    status: str = Field(..., description="'queued', 'exists', 'over_budget', 'incomplete' or 'unknown'")
+
+class PrefetchEventResponse(BaseModel):
+    scope: str
+    prefetches: List[PrefetchStatus]
+
+class PrefetchCancelResponse(BaseModel):
+    scope: str
+    cancelled: int = Field(..., description="Guesses dropped; queued ones never reached the model")
+
+class PrefetchStats(BaseModel):
+    pending: int
+    ready: int
+    queued: int
+    hits: int
+    joined: int = Field(..., description="Clicks that waited on a guess already running")
+    cancelled: int
+    expired: int = Field(..., description="Guesses nobody asked for before the TTL")
+    failed: int
+    over_budget: int
+    spend: Dict[str, int] = Field(..., description="Estimated tokens spent per scope in the current window")
+    spend_cap: int
@@ -0,0 +1,34 @@
+from pydantic import BaseModel, Field
+from typing import List, Dict, Any, Optional
+
+class ProjectSaveRequest(BaseModel):
+    project: Dict[str, Any] = Field(..., description="Full project file (id, name, data, ...)")
+
+class ProjectSaveResponse(BaseModel):
+    project_id: str
+    written: int
+    deleted: int
+    unchanged: int
+
+class ProjectSummary(BaseModel):
+    id: str
+    name: Optional[str] = None
+    description: Optional[str] = None
+    createdAt: Optional[str] = None
+    updatedAt: Optional[str] = None
+
+class ProjectRecord(BaseModel):
+    path: str
+    kind: str  # 'project', 'section', 'subsection', 'draft', 'response'
+    parent: Optional[str] = None
+    position: Optional[int] = None
+    hash: str
+    updated_at: float
+    value: Any = None
+
+class ProjectRecordsResponse(BaseModel):
+    project_id: str
+    records: List[ProjectRecord]
+
+class RecordUpdateRequest(BaseModel):
+    value: Any
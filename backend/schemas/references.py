@@ -0,0 +1,42 @@
+from pydantic import BaseModel, Field
+from typing import List, Dict, Any, Optional
+
+class ReferenceIndexRequest(BaseModel):
+    project: Dict[str, Any] = Field(..., description="Full project export (or its data payload)")
+    project_id: Optional[str] = Field(None, description="Defaults to the project's own id")
+
+class ReferenceIndexResponse(BaseModel):
+    project_id: str
+    units: int = Field(..., description="Responses and prose paragraphs in the project")
+    changed: int = Field(..., description="Units re-resolved because their text or citations changed")
+    removed: int
+    resolved: int = Field(..., description="Usages written on this call")
+    usages: int = Field(..., description="Usages now indexed for the project")
+
+class CitationUsage(BaseModel):
+    kind: str = Field(..., description="'response', 'outline_point' or 'prose'")
+    location: str = Field(..., description="responses/<key>/<n>, responses/<key>/<n>#<outline path> or master/<m>/<ss>/<paragraph>")
+    marker: str
+    excerpt: str
+
+class CitationUsageResponse(BaseModel):
+    citation_key: str
+    apa: str
+    counts: Dict[str, int]
+    usages: List[CitationUsage]
+
+class SupportingCitation(BaseModel):
+    citation_key: str
+    apa: str
+    marker: str
+    kind: str
+
+class SupportResponse(BaseModel):
+    location: str
+    citations: List[SupportingCitation]
+
+class MarkerSource(BaseModel):
+    marker: str
+    scope: str = Field(..., description="Question key, subsection ('s-ss') or '' for project-wide reference numbers")
+    citation_key: str
+    apa: str
@@ -0,0 +1,34 @@
+from pydantic import BaseModel, Field
+from typing import Dict
+
+class PriorityClassStats(BaseModel):
+    queued: int = Field(..., description="Calls waiting for a model slot")
+    running: int
+    completed: int
+    tenants_waiting: int = Field(..., description="Projects or users with at least one queued call")
+    wait_avg: float = Field(..., description="Seconds from enqueue to start, over recent calls")
+    wait_p95: float
+    wait_max: float
+    duration_avg: float = Field(..., description="Seconds a call held its slot, over recent calls")
+
+class EndpointAdmissionStats(BaseModel):
+    admitted: int
+    shed: int
+    shed_rate: float
+    work_seconds: float = Field(..., description="Learned model call-seconds per request")
+    service_seconds: float = Field(..., description="Learned seconds per request, excluding queueing")
+    measured: int
+
+class AdmissionStats(BaseModel):
+    admitted: int
+    shed: int
+    shed_rate: float
+    backlog_seconds: Dict[str, float] = Field(..., description="Expected model work of admitted, unfinished requests per class")
+    expected_wait: Dict[str, float] = Field(..., description="Seconds a request arriving now would queue, per class")
+    budgets: Dict[str, float] = Field(..., description="Default budget per class when X-Request-Budget is not sent")
+    endpoints: Dict[str, EndpointAdmissionStats]
+
+class ModelSchedulerStats(BaseModel):
+    capacity: int
+    interactive_reserved: int
+    classes: Dict[str, PriorityClassStats] = Field(..., description="'interactive', 'standard' and 'bulk'")
@@ -0,0 +1,22 @@
+from pydantic import BaseModel, Field
+from typing import List, Dict, Any, Optional
+
+class SemanticIndexRequest(BaseModel):
+    project: Dict[str, Any] = Field(..., description="Full project file (id, name, data, ...)")
+    project_id: Optional[str] = Field(None, description="Override for the project id; defaults to project.id")
+
+class SemanticIndexResponse(BaseModel):
+    project_id: str
+    embedded: int
+    skipped: int
+    removed: int
+    size: int
+
+class SemanticSearchResult(BaseModel):
+    id: str
+    score: float
+    text: str
+    metadata: Dict[str, Any] = {}
+
+class SemanticSearchResponse(BaseModel):
+    results: List[SemanticSearchResult]
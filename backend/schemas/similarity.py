@@ -0,0 +1,39 @@
+from pydantic import BaseModel, Field
+from typing import List, Dict, Any
+
+class SimilarityGroupRequest(BaseModel):
+    texts: List[str] = Field(..., description="Questions, findings or any short texts to group")
+    threshold: float = Field(0.3, ge=0, le=1, description="Minimum TF-IDF cosine similarity to join a group")
+    linkage: str = Field("seed", description="'seed' (each group is its first member's neighbours) or 'connected'")
+
+class SimilarityGroup(BaseModel):
+    members: List[int]
+    key_terms: List[str]
+    theme: str
+
+class SimilarityGroupResponse(BaseModel):
+    groups: List[SimilarityGroup]
+
+class SectionGroupingRequest(BaseModel):
+    section: Dict[str, Any] = Field(..., description="Outline section with subsections, questions and their citations")
+    question_threshold: float = Field(0.3, ge=0, le=1)
+    finding_threshold: float = Field(0.3, ge=0, le=1)
+    linkage: str = Field("seed", description="'seed' or 'connected'")
+
+class FindingGroup(BaseModel):
+    citations: List[List[int]] = Field(..., description="[question index, citation index] pairs within the subsection")
+    key_terms: List[str]
+
+class QuestionGroup(BaseModel):
+    theme: str
+    key_terms: List[str]
+    question_indices: List[int]
+    finding_groups: List[FindingGroup]
+
+class SubsectionGroups(BaseModel):
+    subsection_title: str
+    question_groups: List[QuestionGroup]
+
+class SectionGroupingResponse(BaseModel):
+    section_title: str
+    subsections: List[SubsectionGroups]
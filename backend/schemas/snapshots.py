@@ -0,0 +1,41 @@
+from pydantic import BaseModel
+from typing import List, Dict, Optional
+
+class SnapshotCreateRequest(BaseModel):
+    branch: str = "main"
+    message: Optional[str] = None
+
+class SnapshotInfo(BaseModel):
+    id: str
+    project_id: str
+    branch: str
+    parent_id: Optional[str] = None
+    message: Optional[str] = None
+    created_at: float
+    record_count: int
+    new_nodes: int  # nodes this snapshot added to the shared store; the rest are shared
+    created: Optional[bool] = None  # False when nothing changed since the branch head
+
+class BranchCreateRequest(BaseModel):
+    name: str
+    from_snapshot: Optional[str] = None
+    from_branch: str = "main"
+
+class BranchInfo(BaseModel):
+    name: str
+    head: Optional[str] = None
+    created_at: float
+
+class SnapshotRecordChange(BaseModel):
+    path: str
+    kind: str
+
+class SnapshotDiff(BaseModel):
+    from_id: str
+    to_id: str
+    added: List[str]
+    removed: List[str]
+    changed: List[SnapshotRecordChange]
+    unchanged: int
+    nodes_added: Dict[str, int]  # by node kind: section, subsection, question, response, ...
+    nodes_removed: Dict[str, int]
@@ -0,0 +1,20 @@
+from pydantic import BaseModel
+from typing import List, Dict, Any
+
+class SyncedProject(BaseModel):
+    project_id: str
+    version: int
+    project: Dict[str, Any]
+
+class SyncPatchResponse(BaseModel):
+    project_id: str
+    version: int
+
+class SyncPatchLogEntry(BaseModel):
+    version: int
+    operations: List[Dict[str, Any]]
+
+class SyncPatchLogResponse(BaseModel):
+    project_id: str
+    version: int
+    patches: List[SyncPatchLogEntry]
@@ -0,0 +1,221 @@
+from typing import Any, Dict, Optional
+from services.model_scheduler import (
+    BULK, BULK_PATHS, INTERACTIVE, INTERACTIVE_PATHS, PRIORITIES, STANDARD, ModelCallScheduler,
+    current_call_context, get_model_scheduler, track_usage
+)
+import json
+import logging
+import math
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Seconds a request may take, queueing included, unless it sends X-Request-Budget
+DEFAULT_BUDGETS = {
+    INTERACTIVE: float(os.getenv("ADMISSION_BUDGET_INTERACTIVE", "60")),
+    STANDARD: float(os.getenv("ADMISSION_BUDGET_STANDARD", "180")),
+    BULK: float(os.getenv("ADMISSION_BUDGET_BULK", "600"))
+}
+# Assumed model time per request for known generation endpoints before any have been measured
+DEFAULT_CALL_SECONDS = float(os.getenv("ADMISSION_DEFAULT_CALL_SECONDS", "20"))
+EWMA_ALPHA = 0.2
+# Distinct endpoint keys tracked; later ones share OTHER_ENDPOINTS
+MAX_ENDPOINTS = int(os.getenv("ADMISSION_MAX_ENDPOINTS", "256"))
+OTHER_ENDPOINTS = "*"
+
+def endpoint_key(path: str) -> str:
+    """
+    The stats key for a request path. Generation endpoints are fixed paths
+    and keep their own entry; any other multi-segment path is keyed by its
+    first segment, so per-project paths like /snapshots/{project_id}/... do
+    not each get one.
+    """
+    if path in INTERACTIVE_PATHS or path in BULK_PATHS:
+        return path
+    segments = path.strip("/").split("/")
+    return f"/{segments[0]}/*" if len(segments) > 1 else path
+
+class EndpointStats:
+    def __init__(self, work: float = 0.0, service: float = 0.0):
+        self.work = work  # model call-seconds per request
+        self.service = service  # seconds per request excluding time spent queued for the model
+        self.measured = 0
+        self.admitted = 0
+        self.shed = 0
+
+    def observe(self, work: float, service: float) -> None:
+        if self.measured == 0:
+            self.work, self.service = work, service
+        else:
+            self.work += EWMA_ALPHA * (work - self.work)
+            self.service += EWMA_ALPHA * (service - self.service)
+        self.measured += 1
+
+class AdmissionController:
+    """
+    Estimates when a new request would finish from the model work already
+    admitted ahead of it and rejects it up front when that is past its
+    budget, instead of letting it queue behind Bedrock throttling until it
+    times out. Work ahead is the expected model call-seconds of admitted,
+    unfinished requests in the same or a higher priority class, drained by
+    the slots that class may use; each endpoint's cost is learned from the
+    calls its requests actually make. Endpoints that never call the model
+    are always admitted.
+    """
+
+    def __init__(self, scheduler: Optional[ModelCallScheduler] = None):
+        self.scheduler = scheduler
+        self.lock = threading.Lock()
+        self.endpoints: Dict[str, EndpointStats] = {}
+        self.backlog: Dict[str, float] = {p: 0.0 for p in PRIORITIES}
+
+    def model_scheduler(self) -> ModelCallScheduler:
+        return self.scheduler or get_model_scheduler()
+
+    def endpoint(self, path: str) -> EndpointStats:
+        key = endpoint_key(path)
+        stats = self.endpoints.get(key)
+        if stats is None:
+            seeded = key in INTERACTIVE_PATHS or key in BULK_PATHS
+            if not seeded and len(self.endpoints) >= MAX_ENDPOINTS:
+                key = OTHER_ENDPOINTS
+                stats = self.endpoints.get(key)
+            if stats is None:
+                work = DEFAULT_CALL_SECONDS if seeded else 0.0
+                stats = self.endpoints[key] = EndpointStats(work, work)
+        return stats
+
+    def expected_wait(self, priority: str) -> float:
+        """Seconds until the work admitted ahead of a new request in this class has drained."""
+        ahead = sum(self.backlog[p] for p in PRIORITIES[:PRIORITIES.index(priority) + 1])
+        return ahead / max(self.model_scheduler().slots_for(priority), 1)
+
+    def estimate(self, path: str, priority: str) -> Dict[str, float]:
+        """Expected queueing and total seconds for a request arriving now."""
+        with self.lock:
+            return self._estimate(path, priority)
+
+    def _estimate(self, path: str, priority: str) -> Dict[str, float]:
+        stats = self.endpoint(path)
+        wait = self.expected_wait(priority)
+        return {"wait": wait, "total": wait + stats.service, "work": stats.work}
+
+    def admit(self, path: str, priority: str, budget: float) -> Dict[str, Any]:
+        """{"admitted", "estimate", "retry_after"}; admitted requests must be passed to finish()."""
+        with self.lock:
+            estimate = self._estimate(path, priority)
+            stats = self.endpoint(path)
+            # With nothing queued ahead, shedding cannot make the request any faster
+            if estimate["work"] > 0 and estimate["wait"] > 0 and estimate["total"] > budget:
+                stats.shed += 1
+                # The backlog drains one second per second; retry once the estimate fits the budget
+                retry_after = max(1, math.ceil(min(estimate["total"] - budget, estimate["wait"])))
+                return {"admitted": False, "estimate": estimate["total"], "retry_after": retry_after}
+            stats.admitted += 1
+            self.backlog[priority] += estimate["work"]
+        return {"admitted": True, "estimate": estimate["total"], "retry_after": 0, "work": estimate["work"]}
+
+    def finish(self, path: str, priority: str, reserved: float, usage, elapsed: float) -> None:
+        with self.lock:
+            self.backlog[priority] = max(0.0, self.backlog[priority] - reserved)
+            if usage.calls:
+                # Parallel calls overlap their waits, so never estimate less than the longest call
+                service = max(elapsed - usage.wait_seconds, usage.longest)
+                self.endpoint(path).observe(usage.call_seconds, service)
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            endpoints = {
+                path: {
+                    "admitted": s.admitted,
+                    "shed": s.shed,
+                    "shed_rate": round(s.shed / (s.admitted + s.shed), 4) if s.admitted + s.shed else 0.0,
+                    "work_seconds": round(s.work, 3),
+                    "service_seconds": round(s.service, 3),
+                    "measured": s.measured
+                }
+                for path, s in sorted(self.endpoints.items()) if s.admitted or s.shed
+            }
+            backlog = dict(self.backlog)
+            waits = {p: round(self.expected_wait(p), 3) for p in PRIORITIES}
+        admitted = sum(e["admitted"] for e in endpoints.values())
+        shed = sum(e["shed"] for e in endpoints.values())
+        return {
+            "admitted": admitted,
+            "shed": shed,
+            "shed_rate": round(shed / (admitted + shed), 4) if admitted + shed else 0.0,
+            "backlog_seconds": {p: round(v, 3) for p, v in backlog.items()},
+            "expected_wait": waits,
+            "budgets": DEFAULT_BUDGETS,
+            "endpoints": endpoints
+        }
+
+_controller: Optional[AdmissionController] = None
+
+def get_admission_controller() -> AdmissionController:
+    global _controller
+    if _controller is None:
+        _controller = AdmissionController()
+    return _controller
+
+class AdmissionMiddleware:
+    """
+    Sheds POSTs whose estimated completion exceeds their budget with 429 and
+    a Retry-After header. The budget is X-Request-Budget (seconds) when sent,
+    otherwise the default for the request's priority class; a budget that is
+    not a positive, finite number is rejected with 400. Runs inside
+    ModelCallContextMiddleware so the class is known, and inside the
+    idempotency middleware so replays are never shed.
+    """
+
+    def __init__(self, app, controller: Optional[AdmissionController] = None):
+        self.app = app
+        self.controller = controller
+
+    async def respond(self, send, status: int, payload: Dict[str, Any], headers=()) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        await send({"type": "http.response.start", "status": status, "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            *headers
+        ]})
+        await send({"type": "http.response.body", "body": body})
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST":
+            await self.app(scope, receive, send)
+            return
+        controller = self.controller or get_admission_controller()
+        path = scope["path"]
+        priority, _ = current_call_context()
+        headers = dict(scope.get("headers", []))
+        sent = headers.get(b"x-request-budget")
+        budget = DEFAULT_BUDGETS[priority]
+        if sent is not None:
+            try:
+                budget = float(sent.decode("latin-1"))
+            except ValueError:
+                budget = math.nan
+            # "nan" would admit everything and "inf" or a negative budget would defeat shedding
+            if not math.isfinite(budget) or budget <= 0:
+                await self.respond(send, 400, {"detail": "X-Request-Budget must be a positive number of seconds"})
+                return
+
+        decision = controller.admit(path, priority, budget)
+        if not decision["admitted"]:
+            logger.info(f"Shed {path} ({priority}): estimated {decision['estimate']:.0f}s > budget {budget:.0f}s")
+            await self.respond(send, 429, {
+                "detail": "Server is busy; retry after the indicated delay",
+                "estimated_seconds": round(decision["estimate"], 1),
+                "budget_seconds": budget
+            }, [(b"retry-after", str(decision["retry_after"]).encode())])
+            return
+
+        started = time.time()
+        with track_usage() as usage:
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                controller.finish(path, priority, decision["work"], usage, time.time() - started)
@@ -0,0 +1,222 @@
+from typing import Any, Dict, List, Optional
+from services.data_dir import data_path
+from services.project_documents import content_hash
+import json
+import re
+import sqlite3
+import threading
+import time
+
+# Above this share of changed questions a full re-analysis is cheaper and keeps themes coherent
+FULL_REANALYSIS_RATIO = 0.5
+
+def citation_hash(citation: Dict[str, Any]) -> str:
+    return content_hash({field: citation.get(field) for field in ("apa", "description", "url")})[:16]
+
+def question_hash(question: Dict[str, Any]) -> str:
+    """Hash of a question and the citations attached to it."""
+    return content_hash({
+        "question": question.get("question", ""),
+        "citations": [citation_hash(c) for c in question.get("citations") or [] if isinstance(c, dict)]
+    })[:16]
+
+def context_hash(request) -> str:
+    """Anything besides the questions that shapes the whole analysis."""
+    return content_hash({
+        "thesis": request.thesis,
+        "methodology": request.methodology,
+        "section": request.section_title,
+        "subsection": request.subsection_title,
+        "context": request.subsection_context,
+        "pre_cluster": request.pre_cluster
+    })[:16]
+
+def question_label(index: int) -> str:
+    return f"Q{index + 1}"
+
+def plan_reanalysis(state: Optional[Dict[str, Any]], request) -> Dict[str, Any]:
+    """
+    Compare the request with the stored state. Returns the mode ("full",
+    "incremental", "pruned" when questions were only removed, or "cached"), the
+    current question hashes, the indices of questions to (re)analyze, and a map
+    from old to new labels for the rest.
+    """
+    hashes = [question_hash(q) for q in request.questions]
+    plan = {"mode": "full", "hashes": hashes, "changed": list(range(len(hashes))), "relabel": {}, "removed": []}
+    if not state or state["context_hash"] != context_hash(request):
+        return plan
+
+    old_positions: Dict[str, List[int]] = {}
+    for index, digest in enumerate(state["hashes"]):
+        old_positions.setdefault(digest, []).append(index)
+    changed, relabel = [], {}
+    for index, digest in enumerate(hashes):
+        if old_positions.get(digest):
+            relabel[question_label(old_positions[digest].pop(0))] = question_label(index)
+        else:
+            changed.append(index)
+    removed = [question_label(i) for positions in old_positions.values() for i in positions]
+
+    if not changed and not removed:
+        plan.update(mode="cached", changed=[], relabel=relabel)
+    elif not changed:
+        # Nothing new for the model to read; drop the removed questions from the stored themes
+        plan.update(mode="pruned", changed=[], relabel=relabel, removed=removed)
+    elif hashes and len(changed) <= FULL_REANALYSIS_RATIO * len(hashes):
+        plan.update(mode="incremental", changed=changed, relabel=relabel, removed=removed)
+    return plan
+
+def summarize_clusters(result: Dict[str, Any], relabel: Dict[str, str]) -> str:
+    """Compact text of the previous themes (with current question labels) for the incremental prompt."""
+    lines = []
+    for cluster in result.get("thematic_clusters", []):
+        questions = [relabel[q] for q in cluster.get("questions", []) if q in relabel]
+        concepts = ", ".join(cluster.get("key_concepts", [])[:5])
+        lines.append(
+            f"- {cluster.get('theme_name')}: {cluster.get('theme_description', '')} "
+            f"[questions: {', '.join(questions) or 'none'}; concepts: {concepts or 'n/a'}]"
+        )
+    return "\n".join(lines)
+
+def parse_delta(response_text: str) -> Optional[Dict[str, Any]]:
+    """The JSON object an incremental prompt asks for, or None if the model did not return one."""
+    match = re.search(r"\{.*\}", response_text or "", re.DOTALL)
+    if not match:
+        return None
+    try:
+        delta = json.loads(match.group())
+    except json.JSONDecodeError:
+        return None
+    return delta if isinstance(delta, dict) else None
+
+def merge_analysis(previous: Dict[str, Any], delta: Dict[str, Any], plan: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Fold the analysis of changed questions into the previous result: old
+    question labels are remapped to the current ones, stale assignments are
+    dropped, delta themes update same-named themes or are appended, and new
+    outline points are appended after the existing ones. Outline points are
+    relabelled like themes; points drawn only from changed or removed
+    questions are dropped, since the delta re-proposes points for them.
+    Points without question labels span the subsection and are kept.
+    """
+    relabel = plan["relabel"]
+    clusters = []
+    for cluster in previous.get("thematic_clusters", []):
+        cluster = dict(cluster, questions=[relabel[q] for q in cluster.get("questions", []) if q in relabel])
+        clusters.append(cluster)
+    by_name = {cluster["theme_name"].strip().lower(): cluster for cluster in clusters}
+
+    for update in delta.get("thematic_clusters") or []:
+        if not isinstance(update, dict) or not update.get("theme_name"):
+            continue
+        questions = [q for q in update.get("questions") or [] if isinstance(q, str)]
+        existing = by_name.get(update["theme_name"].strip().lower())
+        if existing is None:
+            existing = {
+                "theme_name": update["theme_name"].strip(),
+                "theme_description": update.get("theme_description") or "",
+                "questions": [],
+                "key_concepts": [],
+                "evidence_types": [],
+                "temporal_scope": update.get("temporal_scope")
+            }
+            clusters.append(existing)
+            by_name[existing["theme_name"].lower()] = existing
+        elif update.get("theme_description"):
+            existing["theme_description"] = update["theme_description"]
+        for field, values in (("questions", questions),
+                              ("key_concepts", update.get("key_concepts") or []),
+                              ("evidence_types", update.get("evidence_types") or [])):
+            existing[field] = existing[field] + [v for v in values if isinstance(v, str) and v not in existing[field]]
+        existing["temporal_scope"] = existing.get("temporal_scope") or update.get("temporal_scope")
+
+    # Themes whose questions all changed or disappeared, and that the delta did not re-use, are stale
+    clusters = [cluster for cluster in clusters if cluster["questions"]] or clusters
+
+    outline = dict(previous.get("generated_outline") or {})
+    points = []
+    for point in outline.get("main_points") or []:
+        sources = point.get("questions") or []
+        kept = [relabel[q] for q in sources if q in relabel]
+        if sources and not kept:
+            continue
+        points.append(dict(point, questions=kept))
+    changed = [question_label(i) for i in plan["changed"]]
+    for point in delta.get("outline_points") or []:
+        if isinstance(point, dict) and point.get("content"):
+            sources = [q for q in point.get("questions") or [] if q in changed]
+            points.append({
+                "level": "",
+                "content": point["content"],
+                "supporting_evidence": [e for e in point.get("supporting_evidence") or [] if isinstance(e, str)],
+                "citations": [c for c in point.get("citations") or [] if isinstance(c, int)],
+                "rationale": point.get("rationale") or "Added from analysis of new or changed questions",
+                "questions": sources or changed
+            })
+    outline["main_points"] = [dict(point, level=str(i + 1)) for i, point in enumerate(points)]
+
+    structure = dict(previous.get("logical_structure") or {})
+    structure["sequence"] = [cluster["theme_name"] for cluster in clusters]
+
+    return dict(
+        previous,
+        thematic_clusters=clusters,
+        logical_structure=structure,
+        generated_outline=outline
+    )
+
+class AnalysisStateStore:
+    """Last analysis result per (project, section, subsection) with the question hashes it was built from."""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or data_path("analysis_state.sqlite3")
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS analysis_state (
+                state_key TEXT PRIMARY KEY,
+                project_id TEXT NOT NULL,
+                context_hash TEXT NOT NULL,
+                hashes TEXT NOT NULL,
+                result TEXT NOT NULL,
+                updated_at REAL NOT NULL
+            )
+            """
+        )
+        self.conn.commit()
+
+    @staticmethod
+    def key(project_id: str, section_title: str, subsection_title: str) -> str:
+        return content_hash([project_id, section_title, subsection_title])
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT context_hash, hashes, result FROM analysis_state WHERE state_key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {"context_hash": row[0], "hashes": json.loads(row[1]), "result": json.loads(row[2])}
+
+    def put(self, key: str, project_id: str, context: str, hashes: List[str], result: Dict[str, Any]) -> None:
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO analysis_state (state_key, project_id, context_hash, hashes, result, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, project_id, context, json.dumps(hashes), json.dumps(result, ensure_ascii=False), time.time())
+            )
+            self.conn.commit()
+
+    def forget_project(self, project_id: str) -> None:
+        with self.lock:
+            self.conn.execute("DELETE FROM analysis_state WHERE project_id = ?", (project_id,))
+            self.conn.commit()
+
+_store: Optional[AnalysisStateStore] = None
+
+def get_analysis_state_store() -> AnalysisStateStore:
+    global _store
+    if _store is None:
+        _store = AnalysisStateStore()
+    return _store
@@ -5,12 +5,13 @@ import os
 import time
 import random
 from dotenv import load_dotenv
+from services.model_scheduler import get_model_scheduler, record_model_failure
 
 load_dotenv()
 
-def invoke_bedrock(prompt: str) -> str:
+def invoke_bedrock(prompt: str, max_tokens: int = 4000) -> str:
     """
-    Invoke AWS Bedrock with the given prompt
+    Invoke AWS Bedrock with the given prompt (max_tokens caps the reply for short passes)
     """
     try:
         # Initialize the Bedrock client
@@ -22,7 +23,7 @@ def invoke_bedrock(prompt: str) -> str:
         # Prepare the request body for Claude
         request_body = {
             "anthropic_version": "bedrock-2023-05-31",
-            "max_tokens": 4000,
+            "max_tokens": max_tokens,
             "messages": [
                 {
                     "role": "user",
@@ -31,12 +32,13 @@ def invoke_bedrock(prompt: str) -> str:
             ]
         }
         
-        # Make the API call
-        response = bedrock_client.invoke_model(
-            modelId="anthropic.claude-3-sonnet-20240229-v1:0",
-            body=json.dumps(request_body),
-            contentType="application/json"
-        )
+        # Make the API call once the scheduler admits this call's priority class and tenant
+        with get_model_scheduler().slot(max_tokens):
+            response = bedrock_client.invoke_model(
+                modelId="anthropic.claude-3-sonnet-20240229-v1:0",
+                body=json.dumps(request_body),
+                contentType="application/json"
+            )
         
         # Parse the response
         response_body = json.loads(response['body'].read())
@@ -45,9 +47,12 @@ def invoke_bedrock(prompt: str) -> str:
         if 'content' in response_body and len(response_body['content']) > 0:
             return response_body['content'][0]['text']
         else:
+            record_model_failure()
             return "No response generated"
             
     except ClientError as e:
+        # Callers get the error as text; the request is still marked so its result is not cached or replayed
+        record_model_failure()
         error_code = e.response['Error']['Code']
         error_message = e.response['Error']['Message']
         
@@ -58,4 +63,5 @@ def invoke_bedrock(prompt: str) -> str:
         else:
             return f"AWS Error ({error_code}): {error_message}"
     except Exception as e:
+        record_model_failure()
         return f"Unexpected error: {str(e)}"
@@ -0,0 +1,142 @@
+from typing import Dict, Optional
+import gzip
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+try:
+    import zstandard
+except ImportError:  # zstd is optional; gzip is always available
+    zstandard = None
+
+_EXTENSIONS = {"zstd": ".zst", "gzip": ".gz"}
+
+# Compressed blobs up to this size are kept in SQLite; small files waste most of a disk block
+FILE_THRESHOLD = 64 * 1024
+
+class ContentAddressedBlobStore:
+    """
+    Compressed blobs keyed by the SHA-256 of their uncompressed bytes, so identical
+    content is stored once however many records point at it. Small blobs are
+    stored in the SQLite table, larger ones as files under root. Each holder takes a
+    reference (put/incref) and releases it with decref; gc() deletes blobs whose
+    reference count has dropped to zero.
+
+    The reference table can share a SQLite connection with its owner so that
+    reference changes commit in the same transaction as the rows holding them.
+    """
+
+    def __init__(self, root: str, conn: Optional[sqlite3.Connection] = None, lock=None, codec: Optional[str] = None):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        self.codec = codec or ("zstd" if zstandard is not None else "gzip")
+        if self.codec == "zstd" and zstandard is None:
+            raise ValueError("zstd compression requires the zstandard package")
+        self.owns_connection = conn is None
+        self.conn = conn or sqlite3.connect(os.path.join(root, "blobs.sqlite3"), check_same_thread=False)
+        self.lock = lock or threading.RLock()
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS blobs (
+                hash TEXT PRIMARY KEY,
+                codec TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                stored_size INTEGER NOT NULL,
+                refcount INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                data BLOB
+            )
+            """
+        )
+        self._commit()
+
+    def _commit(self) -> None:
+        if self.owns_connection:
+            self.conn.commit()
+
+    def _path(self, digest: str, codec: str) -> str:
+        return os.path.join(self.root, digest[:2], digest[2:4], digest + _EXTENSIONS[codec])
+
+    def _compress(self, data: bytes) -> bytes:
+        if self.codec == "zstd":
+            return zstandard.ZstdCompressor(level=10).compress(data)
+        return gzip.compress(data, compresslevel=6)
+
+    @staticmethod
+    def _decompress(data: bytes, codec: str) -> bytes:
+        if codec == "zstd":
+            if zstandard is None:
+                raise RuntimeError("Blob was written with zstd but the zstandard package is not installed")
+            return zstandard.ZstdDecompressor().decompress(data)
+        return gzip.decompress(data)
+
+    def put(self, data: bytes) -> str:
+        """Store data (if new) and take one reference to it; returns its hash."""
+        digest = hashlib.sha256(data).hexdigest()
+        with self.lock:
+            if self.conn.execute("UPDATE blobs SET refcount = refcount + 1 WHERE hash = ?", (digest,)).rowcount:
+                self._commit()
+                return digest
+            compressed = self._compress(data)
+            inline = compressed if len(compressed) <= FILE_THRESHOLD else None
+            if inline is None:
+                path = self._path(digest, self.codec)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                tmp_path = f"{path}.tmp"
+                with open(tmp_path, "wb") as f:
+                    f.write(compressed)
+                os.replace(tmp_path, path)
+            self.conn.execute(
+                "INSERT INTO blobs (hash, codec, size, stored_size, refcount, created_at, data) VALUES (?, ?, ?, ?, 1, ?, ?)",
+                (digest, self.codec, len(data), len(compressed), time.time(), inline)
+            )
+            self._commit()
+            return digest
+
+    def get(self, digest: str) -> Optional[bytes]:
+        with self.lock:
+            row = self.conn.execute("SELECT codec, data FROM blobs WHERE hash = ?", (digest,)).fetchone()
+        if row is None:
+            return None
+        if row[1] is not None:
+            return self._decompress(row[1], row[0])
+        try:
+            with open(self._path(digest, row[0]), "rb") as f:
+                return self._decompress(f.read(), row[0])
+        except FileNotFoundError:
+            return None
+
+    def incref(self, digest: str) -> None:
+        with self.lock:
+            self.conn.execute("UPDATE blobs SET refcount = refcount + 1 WHERE hash = ?", (digest,))
+            self._commit()
+
+    def decref(self, digest: str) -> None:
+        with self.lock:
+            self.conn.execute("UPDATE blobs SET refcount = MAX(refcount - 1, 0) WHERE hash = ?", (digest,))
+            self._commit()
+
+    def gc(self) -> Dict[str, int]:
+        """Delete unreferenced blobs. Call after the transaction releasing them has committed."""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT hash, codec, stored_size, data IS NULL FROM blobs WHERE refcount <= 0"
+            ).fetchall()
+            self.conn.execute("DELETE FROM blobs WHERE refcount <= 0")
+            self.conn.commit()
+            for digest, codec, _, on_disk in rows:
+                if on_disk:
+                    try:
+                        os.remove(self._path(digest, codec))
+                    except FileNotFoundError:
+                        pass
+        return {"deleted": len(rows), "freed_bytes": sum(row[2] for row in rows)}
+
+    def stats(self) -> Dict[str, int]:
+        with self.lock:
+            count, size, stored_size, references = self.conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(stored_size), 0), COALESCE(SUM(refcount), 0) FROM blobs"
+            ).fetchone()
+        return {"blobs": count, "size": size, "stored_size": stored_size, "references": references}
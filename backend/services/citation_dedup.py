@@ -0,0 +1,279 @@
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from services.citation_keys import canonical_citation_key, normalize_text, parse_apa
+from services.data_dir import data_path
+from services.project_documents import iter_project_documents
+import hashlib
+import json
+import os
+import threading
+import numpy as np
+
+NUM_PERM = 128
+BANDS = 16  # 16 bands x 8 rows: candidate pairs start around Jaccard 0.7
+ROWS = NUM_PERM // BANDS
+SIMILARITY_THRESHOLD = 0.7
+_PRIME = np.uint64(4294967311)  # smallest prime above 2**32
+
+_rng = np.random.RandomState(1729)
+_PERM_A = _rng.randint(1, 2 ** 31 - 1, size=NUM_PERM).astype(np.uint64)
+_PERM_B = _rng.randint(0, 2 ** 31 - 1, size=NUM_PERM).astype(np.uint64)
+
+def citation_shingles(apa: str, title: Optional[str] = None) -> List[str]:
+    """Character 5-grams of the normalized title plus author and year tokens."""
+    parsed = parse_apa(apa)
+    title_norm = normalize_text(parsed["title"] or title or apa)
+    padded = f" {title_norm} "
+    shingles = {padded[i:i + 5] for i in range(max(1, len(padded) - 4))}
+    shingles.update(f"a:{normalize_text(name.split(',')[0])}" for name in parsed["authors"])
+    if parsed["year"]:
+        shingles.add(f"y:{parsed['year']}")
+    return sorted(shingles)
+
+def minhash_signature(shingles: Iterable[str]) -> np.ndarray:
+    values = np.array([
+        int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=4).digest(), "little")
+        for s in shingles
+    ] or [0], dtype=np.uint64)
+    # (a * x + b) mod p for every permutation/shingle pair; x < 2**32 and a, b < 2**31 cannot overflow
+    hashed = (np.outer(_PERM_A, values) + _PERM_B[:, None]) % _PRIME
+    return hashed.min(axis=1)
+
+def estimated_similarity(sig_a: np.ndarray, sig_b: np.ndarray) -> float:
+    return float(np.mean(sig_a == sig_b))
+
+def citation_surnames(apa: str) -> List[str]:
+    return sorted({normalize_text(name.split(",")[0]) for name in parse_apa(apa)["authors"]})
+
+class CitationClusterIndex:
+    """
+    Near-duplicate index over one project's citations. Each distinct canonical key
+    gets a MinHash signature; LSH banding proposes candidate pairs, which are
+    confirmed against the similarity threshold and unioned into clusters.
+    Manual merges are kept and survive rebuilds.
+    """
+
+    def __init__(self, project_id: str, path: Optional[str] = None, threshold: float = SIMILARITY_THRESHOLD):
+        self.project_id = project_id
+        self.path = path
+        self.threshold = threshold
+        self.members: Dict[str, Dict[str, Any]] = {}
+        self.signatures: Dict[str, np.ndarray] = {}
+        self.buckets: Dict[str, List[str]] = {}
+        self.parent: Dict[str, str] = {}
+        self.manual_merges: List[List[str]] = []
+        self.lock = threading.RLock()
+        if path and os.path.exists(path):
+            self._load()
+
+    # --- union-find -------------------------------------------------------
+    def _find(self, key: str) -> str:
+        root = key
+        while self.parent[root] != root:
+            root = self.parent[root]
+        while self.parent[key] != root:
+            self.parent[key], key = root, self.parent[key]
+        return root
+
+    def _union(self, a: str, b: str) -> None:
+        root_a, root_b = self._find(a), self._find(b)
+        if root_a == root_b:
+            return
+        # The member seen first (or used most) stays the representative
+        if (self.members[root_b]["count"], -self.members[root_b]["order"]) > (self.members[root_a]["count"], -self.members[root_a]["order"]):
+            root_a, root_b = root_b, root_a
+        self.parent[root_b] = root_a
+
+    # --- indexing ---------------------------------------------------------
+    def add(self, apa: str, title: Optional[str] = None, author: Optional[str] = None) -> str:
+        """Add one citation occurrence and return its cluster representative key."""
+        with self.lock:
+            key = canonical_citation_key(apa, title, author)
+            if key in self.members:
+                self.members[key]["count"] += 1
+                return self._find(key)
+
+            surnames = citation_surnames(apa)
+            self.members[key] = {"apa": apa, "count": 1, "order": len(self.members), "authors": surnames}
+            self.parent[key] = key
+            signature = minhash_signature(citation_shingles(apa, title))
+            self.signatures[key] = signature
+            candidates = set()
+            for band in range(BANDS):
+                bucket = f"{band}:" + hashlib.blake2b(signature[band * ROWS:(band + 1) * ROWS].tobytes(), digest_size=8).hexdigest()
+                candidates.update(self.buckets.setdefault(bucket, []))
+                self.buckets[bucket].append(key)
+            for other in candidates:
+                # Same title by different authors is a different work
+                other_authors = self.members[other].get("authors") or []
+                if surnames and other_authors and not set(surnames) & set(other_authors):
+                    continue
+                if estimated_similarity(signature, self.signatures[other]) >= self.threshold:
+                    self._union(key, other)
+            return self._find(key)
+
+    def add_many(self, citations: Iterable[Dict[str, Any]]) -> int:
+        added = 0
+        with self.lock:
+            for citation in citations:
+                if citation.get("apa"):
+                    self.add(citation["apa"], citation.get("title"), citation.get("author"))
+                    added += 1
+            self.save()
+        return added
+
+    def merge(self, keys: List[str]) -> str:
+        """Manually merge clusters containing the given keys."""
+        with self.lock:
+            known = [key for key in keys if key in self.members]
+            if len(known) < 2:
+                raise ValueError("At least two known citation keys are required to merge")
+            for other in known[1:]:
+                self._union(known[0], other)
+            self.manual_merges.append(known)
+            self.save()
+            return self._find(known[0])
+
+    def resolve(self, key: str) -> str:
+        with self.lock:
+            return self._find(key) if key in self.parent else key
+
+    def clusters(self, include_singletons: bool = False) -> List[Dict[str, Any]]:
+        with self.lock:
+            groups: Dict[str, List[str]] = {}
+            for key in self.members:
+                groups.setdefault(self._find(key), []).append(key)
+            result = []
+            for representative, keys in groups.items():
+                if len(keys) < 2 and not include_singletons:
+                    continue
+                keys.sort(key=lambda k: self.members[k]["order"])
+                result.append({
+                    "representative": representative,
+                    "members": [
+                        {"citation_key": k, "apa": self.members[k]["apa"], "occurrences": self.members[k]["count"]}
+                        for k in keys
+                    ]
+                })
+            result.sort(key=lambda c: -len(c["members"]))
+            return result
+
+    # --- persistence ------------------------------------------------------
+    def save(self) -> None:
+        if not self.path:
+            return
+        payload = {
+            "project_id": self.project_id,
+            "members": self.members,
+            "signatures": {key: sig.tolist() for key, sig in self.signatures.items()},
+            "parent": self.parent,
+            "manual_merges": self.manual_merges
+        }
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(payload, f)
+        os.replace(tmp_path, self.path)
+
+    def _load(self) -> None:
+        with open(self.path, "r", encoding="utf-8") as f:
+            payload = json.load(f)
+        self.members = payload["members"]
+        self.parent = payload["parent"]
+        self.manual_merges = payload.get("manual_merges", [])
+        for key, sig in payload["signatures"].items():
+            signature = np.array(sig, dtype=np.uint64)
+            self.signatures[key] = signature
+            for band in range(BANDS):
+                bucket = f"{band}:" + hashlib.blake2b(signature[band * ROWS:(band + 1) * ROWS].tobytes(), digest_size=8).hexdigest()
+                self.buckets.setdefault(bucket, []).append(key)
+
+_indexes: Dict[str, CitationClusterIndex] = {}
+_registry_lock = threading.Lock()
+
+def _index_path(project_id: str) -> str:
+    safe_id = "".join(ch if ch.isalnum() or ch in "-_" else "_" for ch in project_id)
+    return data_path("citation_clusters", f"{safe_id}.json")
+
+def get_cluster_index(project_id: str, create: bool = True) -> Optional[CitationClusterIndex]:
+    with _registry_lock:
+        if project_id not in _indexes:
+            path = _index_path(project_id)
+            if not create and not os.path.exists(path):
+                return None
+            _indexes[project_id] = CitationClusterIndex(project_id, path)
+        return _indexes[project_id]
+
+def project_citations(project: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [
+        {"apa": doc["metadata"]["apa"]}
+        for doc in iter_project_documents(project)
+        if doc["kind"] == "citation" and doc["metadata"].get("apa")
+    ]
+
+def build_project_clusters(project: Dict[str, Any], project_id: Optional[str] = None) -> CitationClusterIndex:
+    """(Re)cluster every citation in a project file, keeping earlier manual merges."""
+    project_id = project_id or project.get("id")
+    if not project_id:
+        raise ValueError("Project id is required for citation clustering")
+    previous = get_cluster_index(project_id)
+    index = CitationClusterIndex(project_id, _index_path(project_id))
+    index.members, index.signatures, index.buckets, index.parent = {}, {}, {}, {}
+    index.manual_merges = []
+    index.add_many(project_citations(project))
+    for keys in previous.manual_merges:
+        if len([k for k in keys if k in index.members]) >= 2:
+            index.merge(keys)
+    with _registry_lock:
+        _indexes[project_id] = index
+    return index
+
+def cluster_citation_keys(
+    project_id: Optional[str], citations: Sequence[Tuple[str, Optional[str], Optional[str]]]
+) -> List[Tuple[str, str]]:
+    """
+    (canonical key, cluster representative) for each (apa, title, author). Without a
+    project the representative is the canonical key; with one, citations not seen
+    before are added to the project's index, which is saved once for the batch.
+    """
+    keys = [canonical_citation_key(apa, title, author) for apa, title, author in citations]
+    if not project_id:
+        return [(key, key) for key in keys]
+    index = get_cluster_index(project_id)
+    with index.lock:
+        added = False
+        for (apa, title, author), key in zip(citations, keys):
+            if key not in index.members:
+                index.add(apa, title, author)
+                added = True
+        if added:
+            index.save()
+        return [(key, index.resolve(key)) for key in keys]
+
+def cluster_citation_key(project_id: Optional[str], apa: str, title: Optional[str] = None, author: Optional[str] = None) -> str:
+    """Key under which results for a citation are shared; see cluster_citation_keys."""
+    return cluster_citation_keys(project_id, [(apa, title, author)])[0][1]
+
+def cluster_member_keys(project_id: Optional[str], keys: Iterable[str]) -> Dict[str, List[str]]:
+    """
+    Every canonical key currently in the same cluster as each given key, the key
+    itself first. Results stored under any member apply to the whole cluster, so
+    they stay reachable when merges or rebuilds change the representative.
+    """
+    keys = list(keys)
+    index = get_cluster_index(project_id, create=False) if project_id else None
+    if index is None:
+        return {key: [key] for key in keys}
+    with index.lock:
+        groups: Dict[str, List[str]] = {}
+        for member in index.members:
+            groups.setdefault(index._find(member), []).append(member)
+        return {
+            key: [key] + [m for m in groups.get(index.resolve(key), []) if m != key]
+            for key in keys
+        }
+
+def resolve_citation_key(project_id: Optional[str], key: str) -> str:
+    """Map a canonical key to its cluster representative; identity when the project has no index."""
+    if not project_id:
+        return key
+    index = get_cluster_index(project_id, create=False)
+    return index.resolve(key) if index else key
@@ -0,0 +1,179 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from services.citation_keys import canonical_citation_key
+from services.data_dir import data_path
+from services.model_scheduler import submit_in_context
+from services.text_similarity import TfidfMatrix
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Bump when the digest prompt or format changes so stale digests are regenerated
+DIGEST_VERSION = "1"
+DIGEST_MAX_TOKENS = 3000
+MAX_CLAIMS = 20
+
+def citation_source(citation: Any) -> str:
+    """The string the model recalls the work from."""
+    if isinstance(citation, str):
+        return citation.strip()
+    if isinstance(citation, dict):
+        return (citation.get("apa") or citation.get("title") or citation.get("source") or "").strip()
+    return (getattr(citation, "apa", None) or getattr(citation, "title", None) or getattr(citation, "source", None) or "").strip()
+
+def digest_key(citation: Any) -> Optional[str]:
+    source = citation_source(citation)
+    return canonical_citation_key(source) if source else None
+
+def digest_prompt(citation: Any) -> str:
+    author = (citation.get("author") if isinstance(citation, dict) else getattr(citation, "author", None)) or "the cited author"
+    return f"""You are an expert on the works of {author}.
+Recall the following work and list its key claims, each with exact quotes from the text that support it.
+
+Work: {citation_source(citation)}
+
+Return only JSON:
+{{
+  "summary": "two sentences on the work's argument and evidence",
+  "claims": [
+    {{"claim": "a specific claim the work makes", "quotes": ["exact quote from the work"], "location": "page or chapter if known"}}
+  ]
+}}
+
+Rules:
+- At most {MAX_CLAIMS} claims, covering the whole work rather than one topic
+- Quotes must be exact; leave "quotes" empty rather than paraphrase
+- Prefer claims with dates, figures, named actors, programs and cases
+"""
+
+def parse_digest(text: str) -> Optional[Dict[str, Any]]:
+    """The digest JSON with empty claims dropped; None if the model did not return it."""
+    match = re.search(r"\{.*\}", text or "", re.DOTALL)
+    if not match:
+        return None
+    try:
+        data = json.loads(match.group())
+    except json.JSONDecodeError:
+        return None
+    if not isinstance(data, dict) or not isinstance(data.get("claims"), list):
+        return None
+    claims = []
+    for claim in data["claims"][:MAX_CLAIMS]:
+        if isinstance(claim, dict) and claim.get("claim"):
+            claims.append({
+                "claim": str(claim["claim"]).strip(),
+                "quotes": [str(q).strip() for q in claim.get("quotes") or [] if q],
+                "location": str(claim.get("location") or "").strip()
+            })
+    if not claims:
+        return None
+    return {"summary": str(data.get("summary") or "").strip(), "claims": claims}
+
+def relevant_claims(digest: Dict[str, Any], query: str, limit: int = 8) -> List[Dict[str, Any]]:
+    """The digest claims closest to the question by TF-IDF similarity, in the work's own order."""
+    claims = digest["claims"]
+    if len(claims) <= limit:
+        return claims
+    texts = [query] + [" ".join([c["claim"]] + c["quotes"]) for c in claims]
+    scores = TfidfMatrix(texts).similarity()[0, 1:]
+    keep = sorted(sorted(range(len(claims)), key=lambda i: (-scores[i], i))[:limit])
+    return [claims[i] for i in keep]
+
+def format_digest(claims: List[Dict[str, Any]], summary: str = "") -> str:
+    lines = [f"Summary: {summary}"] if summary else []
+    for number, claim in enumerate(claims, 1):
+        location = f" ({claim['location']})" if claim.get("location") else ""
+        lines.append(f"{number}. {claim['claim']}{location}")
+        lines.extend(f'   - "{quote}"' for quote in claim["quotes"])
+    return "\n".join(lines)
+
+class DigestCache:
+    """One digest per canonical citation key, shared by every question and project citing the work."""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or data_path("citation_digests.sqlite3")
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS citation_digests (
+                citation_key TEXT PRIMARY KEY,
+                version TEXT NOT NULL,
+                source TEXT NOT NULL,
+                digest TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )
+            """
+        )
+        self.conn.commit()
+        self.key_locks: Dict[str, threading.Lock] = {}
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT digest FROM citation_digests WHERE citation_key = ? AND version = ?", (key, DIGEST_VERSION)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, key: str, source: str, digest: Dict[str, Any]) -> None:
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO citation_digests (citation_key, version, source, digest, created_at) VALUES (?, ?, ?, ?, ?)",
+                (key, DIGEST_VERSION, source, json.dumps(digest, ensure_ascii=False), time.time())
+            )
+            self.conn.commit()
+
+    def key_lock(self, key: str) -> threading.Lock:
+        with self.lock:
+            return self.key_locks.setdefault(key, threading.Lock())
+
+    def get_or_create(self, citation: Any, generate: Callable[[str, int], str]) -> Tuple[Optional[Dict[str, Any]], str]:
+        """
+        (digest, status) where status is "cached", "generated" or "failed".
+        Concurrent requests for the same work wait for one generation instead
+        of each recalling it; failed generations are not cached.
+        """
+        key = digest_key(citation)
+        if not key:
+            return None, "failed"
+        digest = self.get(key)
+        if digest is not None:
+            return digest, "cached"
+        with self.key_lock(key):
+            digest = self.get(key)
+            if digest is not None:
+                return digest, "cached"
+            digest = parse_digest(generate(digest_prompt(citation), DIGEST_MAX_TOKENS))
+            if digest is None:
+                logger.info(f"Digest generation failed for {key}")
+                return None, "failed"
+            self.put(key, citation_source(citation), digest)
+            return digest, "generated"
+
+    def prefetch(self, citations: List[Any], generate: Callable[[str, int], str], max_workers: int = 4) -> List[Tuple[Optional[str], str]]:
+        """Digest every distinct work in citations, at most max_workers at a time; (key, status) per citation."""
+        keys = [digest_key(c) for c in citations]
+        unique = {}
+        for key, citation in zip(keys, citations):
+            if key and key not in unique:
+                unique[key] = citation
+        statuses: Dict[str, str] = {}
+        if unique:
+            with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(unique)))) as pool:
+                futures = [submit_in_context(pool, self.get_or_create, c, generate) for c in unique.values()]
+                for key, future in zip(unique, futures):
+                    statuses[key] = future.result()[1]
+        return [(key, statuses.get(key, "failed") if key else "failed") for key in keys]
+
+_cache: Optional[DigestCache] = None
+
+def get_digest_cache() -> DigestCache:
+    global _cache
+    if _cache is None:
+        _cache = DigestCache()
+    return _cache
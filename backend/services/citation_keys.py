@@ -0,0 +1,65 @@
+from typing import Dict, List, Optional
+import re
+import unicodedata
+
+_YEAR_RE = re.compile(r"\(\s*((?:1[5-9]|20)\d{2}[a-z]?|n\.\s*d\.)[^)]*\)", re.IGNORECASE)
+_SURNAME_RE = re.compile(r"([A-Z][\w'’\-]+(?:\s+(?:van|von|de|der|den|la|le|di|da|del)?\s*[A-Z][\w'’\-]+)*),\s*(?:[A-Z][a-z]?\.\s*-?\s*)+")
+_LEADING_ARTICLE_RE = re.compile(r"^(?:the|a|an)\s+")
+
+def normalize_text(text: str) -> str:
+    """Lowercase, strip accents and punctuation, collapse whitespace."""
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    text = re.sub(r"[^\w\s]", " ", text.lower())
+    return re.sub(r"\s+", " ", text).strip()
+
+def parse_apa(apa: str) -> Dict[str, object]:
+    """
+    Split an APA reference into authors (surnames), year and title.
+    Works on the "Author, A. A. (Year). Title. Publisher." shape the generators
+    are asked for; fields that cannot be found come back empty.
+    """
+    apa = (apa or "").strip()
+    year_match = _YEAR_RE.search(apa)
+    if not year_match:
+        return {"authors": [], "year": "", "title": ""}
+
+    author_part = apa[:year_match.start()].strip()
+    rest = apa[year_match.end():].lstrip(" .")
+
+    authors: List[str] = [m.group(1) for m in _SURNAME_RE.finditer(author_part)]
+    if not authors and author_part:
+        # Corporate author, e.g. "National Security Agency. (2015)."
+        authors = [author_part.rstrip(".")]
+
+    # Title runs to the first sentence break; subtitles after ':' are kept
+    title_match = re.match(r"(.+?[.?!])(?:\s+[A-Z0-9(]|\s*$)", rest)
+    title = (title_match.group(1) if title_match else rest).rstrip(".")
+
+    return {
+        "authors": authors,
+        "year": re.sub(r"\s+", "", year_match.group(1).lower()),
+        "title": title.strip()
+    }
+
+def canonical_citation_key(apa: str, title: Optional[str] = None, author: Optional[str] = None) -> str:
+    """
+    Stable key for a cited work: "surname+surname|year|normalized title".
+    Formatting differences (initials, punctuation, case, italics markers,
+    trailing publisher) do not change the key.
+    """
+    parsed = parse_apa(apa)
+    authors = parsed["authors"] or ([author] if author else [])
+    surnames = sorted({normalize_text(name.split(",")[0]) for name in authors if name})[:3]
+    title_norm = _LEADING_ARTICLE_RE.sub("", normalize_text(parsed["title"] or title or ""))
+    # Long subtitles are where generators drift the most; key on the main title
+    title_norm = title_norm.split(" ")[:12]
+
+    if not title_norm and not parsed["year"]:
+        return f"raw|{normalize_text(apa)}"
+    return f"{'+'.join(surnames)}|{parsed['year']}|{' '.join(title_norm)}"
+
+def lookup_key(value: str) -> str:
+    """Canonical keys ("surnames|year|title") pass through; anything else is treated as an APA string."""
+    value = value.strip()
+    return value if value.count("|") >= 2 or value.startswith("raw|") else canonical_citation_key(value)
@@ -0,0 +1,82 @@
+from typing import Dict, Iterable, Optional
+from services.data_dir import data_path
+import sqlite3
+import threading
+import time
+
+GLOBAL_PROJECT = "_global"
+
+class CitationVerdictStore:
+    """
+    Persistent citation validation results keyed by (project, canonical citation key),
+    so each unique source is sent to the model once per project.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or data_path("citation_verdicts.sqlite3")
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS verdicts (
+                project_id TEXT NOT NULL,
+                citation_key TEXT NOT NULL,
+                apa TEXT,
+                status TEXT NOT NULL,
+                explanation TEXT,
+                link TEXT,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (project_id, citation_key)
+            )
+            """
+        )
+        self.conn.commit()
+
+    def get_many(self, project_id: Optional[str], keys: Iterable[str]) -> Dict[str, Dict[str, Optional[str]]]:
+        keys = list(set(keys))
+        if not keys:
+            return {}
+        found = {}
+        with self.lock:
+            for start in range(0, len(keys), 500):
+                batch = keys[start:start + 500]
+                rows = self.conn.execute(
+                    f"SELECT citation_key, apa, status, explanation, link FROM verdicts "
+                    f"WHERE project_id = ? AND citation_key IN ({','.join('?' * len(batch))})",
+                    [project_id or GLOBAL_PROJECT, *batch]
+                ).fetchall()
+                for key, apa, status, explanation, link in rows:
+                    found[key] = {"apa": apa, "status": status, "explanation": explanation, "link": link}
+        return found
+
+    def get(self, project_id: Optional[str], key: str) -> Optional[Dict[str, Optional[str]]]:
+        return self.get_many(project_id, [key]).get(key)
+
+    def put_many(self, project_id: Optional[str], verdicts: Dict[str, Dict[str, Optional[str]]]) -> None:
+        now = time.time()
+        with self.lock:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO verdicts (project_id, citation_key, apa, status, explanation, link, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (project_id or GLOBAL_PROJECT, key, v.get("apa"), v["status"], v.get("explanation"), v.get("link"), now)
+                    for key, v in verdicts.items()
+                ]
+            )
+            self.conn.commit()
+
+    def forget(self, project_id: Optional[str], keys: Iterable[str]) -> None:
+        with self.lock:
+            self.conn.executemany(
+                "DELETE FROM verdicts WHERE project_id = ? AND citation_key = ?",
+                [(project_id or GLOBAL_PROJECT, key) for key in keys]
+            )
+            self.conn.commit()
+
+_store: Optional[CitationVerdictStore] = None
+
+def get_verdict_store() -> CitationVerdictStore:
+    global _store
+    if _store is None:
+        _store = CitationVerdictStore()
+    return _store
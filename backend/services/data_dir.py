@@ -0,0 +1,16 @@
+import os
+from dotenv import load_dotenv
+
+load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), "..", ".env"))
+
+# Local state (index manifests, stores, caches) lives under backend/data unless overridden
+DATA_DIR = os.getenv(
+    "REPORT_GENERATOR_DATA_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data")
+)
+
+def data_path(*parts: str) -> str:
+    """Return a path under DATA_DIR, creating its parent directory if needed."""
+    path = os.path.join(DATA_DIR, *parts)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
@@ -0,0 +1,103 @@
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+import hashlib
+import json
+import os
+import re
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+TITAN_MODEL_ID = os.getenv("TITAN_EMBEDDING_MODEL_ID", "amazon.titan-embed-text-v2:0")
+
+class Embedder(ABC):
+    """Turns texts into L2-normalized float32 vectors of a fixed dimension."""
+
+    dim: int = 0
+    name: str = "embedder"
+
+    @abstractmethod
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """One row per text, shape (len(texts), dim)."""
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (vectors / norms).astype(np.float32)
+
+class HashingEmbedder(Embedder):
+    """
+    Deterministic local embedder (signed feature hashing of words and word bigrams).
+    Needs no network access, so it is used in tests and as an offline fallback.
+    """
+
+    name = "hashing"
+
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+
+    def _features(self, text: str) -> List[str]:
+        words = re.findall(r"[a-z0-9]+", text.lower())
+        return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature in self._features(text or ""):
+                digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+                value = int.from_bytes(digest, "little")
+                vectors[row, value % self.dim] += 1.0 if (value >> 63) & 1 else -1.0
+        return _normalize(vectors)
+
+class TitanEmbedder(Embedder):
+    """
+    Bedrock Titan text embeddings. Titan takes one input per call, so batches
+    are fanned out over a small thread pool.
+    """
+
+    name = "titan"
+
+    def __init__(self, model_id: str = TITAN_MODEL_ID, dim: int = 1024, max_workers: int = 4, client=None):
+        self.model_id = model_id
+        self.dim = dim
+        self.max_workers = max_workers
+        self._client = client
+
+    @property
+    def client(self):
+        if self._client is None:
+            import boto3
+            self._client = boto3.client("bedrock-runtime", region_name=os.getenv("AWS_REGION", "us-east-1"))
+        return self._client
+
+    def _embed_one(self, text: str) -> List[float]:
+        body = {"inputText": (text or " ")[:20000]}
+        if "v2" in self.model_id:
+            body.update({"dimensions": self.dim, "normalize": True})
+        response = self.client.invoke_model(
+            modelId=self.model_id,
+            body=json.dumps(body),
+            contentType="application/json"
+        )
+        return json.loads(response["body"].read())["embedding"]
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            vectors = list(pool.map(self._embed_one, texts))
+        return _normalize(np.asarray(vectors, dtype=np.float32))
+
+_default_embedder = None
+
+def get_embedder() -> Embedder:
+    """Embedder selected by EMBEDDER (titan|hashing); defaults to Titan."""
+    global _default_embedder
+    if _default_embedder is None:
+        if os.getenv("EMBEDDER", "titan").lower() == "hashing":
+            _default_embedder = HashingEmbedder()
+        else:
+            _default_embedder = TitanEmbedder()
+    return _default_embedder
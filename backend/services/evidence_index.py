@@ -0,0 +1,294 @@
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from services.citation_keys import canonical_citation_key, normalize_text, parse_apa
+from services.data_dir import data_path
+from services.project_documents import content_hash, draft_containers, project_payload, response_text
+import json
+import re
+import sqlite3
+import threading
+import time
+
+# Abbreviations that end in a period without ending the sentence
+ABBREVIATIONS = {"u.s", "u.k", "u.n", "e.g", "i.e", "etc", "vs", "p", "pp", "no", "dr", "mr", "mrs", "ms", "st", "al", "inc", "jan", "feb", "mar", "apr", "jun", "jul", "aug", "sep", "sept", "oct", "nov", "dec"}
+# A sentence ends at . ! ? (plus closing quotes) before a capital or digit; "[Author, p. 3]" markers stay attached
+BOUNDARY = re.compile(r"[.!?]+[\"'”’)]*\s+(?=[\"'“‘(]?[A-Z0-9])")
+OUTLINE_MARKER = re.compile(r"^\s*(?:[IVXLC]+|[A-Z]|\d+|[a-z]|[ivxlc]+)[.)]\s+")
+MARKER = re.compile(r"\[([^\[\]]{1,80})\]")
+
+ORGANIZATIONS = r"DoD|NIST|DHS|NSA|CIA|FBI|GAO|RAND|CSIS|CNAS|NATO|EU|UN|OSCE|IAEA|OPEC"
+VERIFIABLE = re.compile(rf"(\d{{4}}|\b(Act|Strategy|Framework|Initiative|Policy|Directive|Executive Order|Presidential Policy Directive|{ORGANIZATIONS})\b)", re.IGNORECASE)
+GENERIC = [
+    re.compile(r"this (book|paper|study|research|article)", re.IGNORECASE),
+    re.compile(r"the author[s]? (examine|explore|discuss|analyze)", re.IGNORECASE),
+    re.compile(r"provides? (insights?|analysis|examination)", re.IGNORECASE),
+    re.compile(r"offers? an? (in-depth|comprehensive)", re.IGNORECASE)
+]
+PROPER_NOUNS = re.compile(r"\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*\b")
+
+def split_sentences(text: str) -> List[str]:
+    """Sentences of a description or response; outline markers and wrapping quotes are removed."""
+    sentences = []
+    for line in (text or "").splitlines():
+        line = OUTLINE_MARKER.sub("", line).strip()
+        if not line:
+            continue
+        start = 0
+        for match in BOUNDARY.finditer(line):
+            head = line[start:match.start()]
+            last_word = head.rsplit(None, 1)[-1].lower().rstrip(".") if head.strip() else ""
+            if last_word in ABBREVIATIONS or (len(last_word) == 1 and last_word.isalpha()):
+                continue
+            sentences.append(line[start:match.end()].strip())
+            start = match.end()
+        sentences.append(line[start:].strip())
+    return [s.strip("\"“”' ") for s in sentences if len(s.strip("\"“”' ")) >= 20]
+
+def score_sentence(sentence: str) -> Dict[str, Any]:
+    """
+    The outline view's sentence heuristics in one pass: specificity
+    (calculateContentSpecificity), factual score (extractMostFactualSentence),
+    whether it names a verifiable date/act/agency, and whether it only
+    describes the source ("This study examines ...").
+    """
+    specificity = 0.0
+    if re.search(r"\d{4}", sentence):
+        specificity += 3
+    if re.search(r"\d+%", sentence):
+        specificity += 3
+    if re.search(r"\$\d+", sentence):
+        specificity += 2
+    if re.search(r"\b\d+\b", sentence):
+        specificity += 1
+    specificity += 0.5 * len(PROPER_NOUNS.findall(sentence))
+    meta = bool(re.search(r"\bthis (study|research|paper|analysis)\b", sentence, re.IGNORECASE))
+    vague = bool(re.search(r"\b(comprehensive|systematic|detailed|thorough)\b", sentence, re.IGNORECASE))
+    specificity -= 2 * meta + vague
+
+    factual = 0.0
+    for pattern, weight in ((r"\d{4}", 3), (r"\d+%", 3), (r"\$\d+", 2),
+                            (r"(increased|decreased|found|showed|demonstrated|reported)", 2),
+                            (rf"({ORGANIZATIONS})", 2), (r"(Act|Strategy|Framework|Initiative|Policy)", 2),
+                            (r"(Operation|Project|Program)", 2)):
+        if re.search(pattern, sentence, re.IGNORECASE):
+            factual += weight
+    factual -= 2 * meta + vague
+
+    generic = any(pattern.search(sentence) for pattern in GENERIC)
+    return {
+        "specificity": round(specificity, 2),
+        "factual": round(factual, 2),
+        "verifiable": bool(VERIFIABLE.search(sentence)) and not generic,
+        "generic": generic,
+        "score": round(specificity + factual - (3 if generic else 0), 2)
+    }
+
+def pick_sentences(sentences: List[Dict[str, Any]]) -> Dict[str, Optional[int]]:
+    """Positions the outline view would choose for its best/factual/verifiable/substantive helpers."""
+    def best(field, fits):
+        candidates = [(s[field], -s["position"], s["position"]) for s in sentences if fits(s) and s[field] > 0]
+        return max(candidates)[2] if candidates else None
+    return {
+        "specific": best("specificity", lambda s: 20 < len(s["sentence"]) < 300),
+        "factual": best("factual", lambda s: len(s["sentence"]) <= 150),
+        "verifiable": next((s["position"] for s in sentences if s["verifiable"] and len(s["sentence"]) >= 30), None),
+        "substantive": next((s["position"] for s in sentences if not s["generic"] and 40 < len(s["sentence"]) < 200), None)
+    }
+
+def surname_tokens(apa: str) -> List[str]:
+    return [normalize_text(name.split(",")[0]) for name in parse_apa(apa)["authors"] if name]
+
+def attribute_markers(sentence: str, citations: List[Dict[str, Any]]) -> List[int]:
+    """Indices of the question's citations a response sentence points to via [n] or [Surname, p. x]."""
+    found = []
+    for marker in MARKER.findall(sentence):
+        for part in re.split(r"[;,]\s*", marker):
+            part = part.strip()
+            if part.isdigit() and 1 <= int(part) <= len(citations):
+                found.append(int(part) - 1)
+                continue
+            normalized = normalize_text(part)
+            for index, citation in enumerate(citations):
+                if any(name and normalized.startswith(name) for name in surname_tokens(citation.get("apa") or "")):
+                    found.append(index)
+    return sorted(set(found))
+
+def iter_evidence_texts(project: Dict[str, Any]) -> Iterator[Tuple[str, str, str, str, str]]:
+    """
+    (citation key, apa, source, origin, text) for every citation description and
+    every response sentence attributed to a citation. Origin is the question key.
+    """
+    data = project_payload(project)
+    outlines = [data.get("outlineData") or []] + [c.get("outline") or [] for c in draft_containers(project)]
+    question_citations: Dict[str, List[Dict[str, Any]]] = {}
+    for outline in outlines:
+        for s_idx, section in enumerate(outline):
+            for ss_idx, subsection in enumerate(section.get("subsections") or []):
+                for q_idx, question in enumerate(subsection.get("questions") or []):
+                    if not isinstance(question, dict):
+                        continue
+                    key = f"{s_idx}-{ss_idx}-{q_idx}"
+                    citations = [c for c in question.get("citations") or [] if isinstance(c, dict) and c.get("apa")]
+                    question_citations.setdefault(key, citations)
+                    for citation in citations:
+                        if citation.get("description"):
+                            yield canonical_citation_key(citation["apa"]), citation["apa"], "description", key, citation["description"]
+
+    for container in draft_containers(project):
+        for key, responses in (container.get("responses") or {}).items():
+            citations = question_citations.get(key) or []
+            if not citations:
+                continue
+            for response in responses if isinstance(responses, list) else [responses]:
+                attributed: Dict[int, List[str]] = {}
+                for sentence in split_sentences(response_text(response)):
+                    for index in attribute_markers(sentence, citations):
+                        attributed.setdefault(index, []).append(sentence)
+                for index, sentences in attributed.items():
+                    apa = citations[index]["apa"]
+                    yield canonical_citation_key(apa), apa, "response", key, "\n".join(sentences)
+
+class EvidenceIndex:
+    """
+    Scored sentences per citation. Texts are segmented and scored once per
+    distinct content hash; projects only record which texts belong to which
+    citation, so re-indexing an unchanged project does no sentence work.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or data_path("evidence_index.sqlite3")
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS evidence_texts (
+                project_id TEXT NOT NULL,
+                citation_key TEXT NOT NULL,
+                text_hash TEXT NOT NULL,
+                source TEXT NOT NULL,
+                origin TEXT NOT NULL,
+                apa TEXT NOT NULL,
+                PRIMARY KEY (project_id, citation_key, text_hash, origin)
+            );
+            CREATE TABLE IF NOT EXISTS evidence_sentences (
+                text_hash TEXT NOT NULL,
+                position INTEGER NOT NULL,
+                sentence TEXT NOT NULL,
+                score REAL NOT NULL,
+                features TEXT NOT NULL,
+                PRIMARY KEY (text_hash, position)
+            );
+            CREATE TABLE IF NOT EXISTS evidence_picks (
+                text_hash TEXT PRIMARY KEY,
+                picks TEXT NOT NULL,
+                created_at REAL NOT NULL
+            );
+            """
+        )
+        self.conn.commit()
+
+    def index_project(self, project: Dict[str, Any], project_id: Optional[str] = None) -> Dict[str, Any]:
+        project_id = project_id or project.get("id")
+        if not project_id:
+            raise ValueError("Project has no id; pass project_id")
+        rows, texts = set(), {}
+        for citation_key, apa, source, origin, text in iter_evidence_texts(project):
+            digest = content_hash(text)[:32]
+            rows.add((project_id, citation_key, digest, source, origin, apa))
+            texts[digest] = text
+
+        with self.lock:
+            known = {row[0] for row in self.conn.execute(
+                f"SELECT text_hash FROM evidence_picks WHERE text_hash IN ({','.join('?' * len(texts))})", list(texts)
+            )} if texts else set()
+            new = {digest: text for digest, text in texts.items() if digest not in known}
+            sentence_count = 0
+            for digest, text in new.items():
+                scored = [dict(score_sentence(s), sentence=s, position=i) for i, s in enumerate(split_sentences(text))]
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO evidence_sentences (text_hash, position, sentence, score, features) VALUES (?, ?, ?, ?, ?)",
+                    [(digest, s["position"], s["sentence"], s["score"],
+                      json.dumps({k: s[k] for k in ("specificity", "factual", "verifiable", "generic")})) for s in scored]
+                )
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO evidence_picks (text_hash, picks, created_at) VALUES (?, ?, ?)",
+                    (digest, json.dumps(pick_sentences(scored)), time.time())
+                )
+                sentence_count += len(scored)
+
+            previous = self.conn.execute("SELECT COUNT(*) FROM evidence_texts WHERE project_id = ?", (project_id,)).fetchone()[0]
+            self.conn.execute("DELETE FROM evidence_texts WHERE project_id = ?", (project_id,))
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO evidence_texts (project_id, citation_key, text_hash, source, origin, apa) VALUES (?, ?, ?, ?, ?, ?)",
+                sorted(rows)
+            )
+            self._collect_garbage()
+            self.conn.commit()
+        return {
+            "project_id": project_id,
+            "citations": len({row[1] for row in rows}),
+            "texts": len(texts),
+            "segmented": len(new),
+            "reused": len(texts) - len(new),
+            "sentences": sentence_count,
+            "removed": max(previous - len(rows), 0)
+        }
+
+    def _collect_garbage(self) -> None:
+        """Drop sentences of texts no project refers to any more (caller holds the lock)."""
+        self.conn.execute("DELETE FROM evidence_sentences WHERE text_hash NOT IN (SELECT text_hash FROM evidence_texts)")
+        self.conn.execute("DELETE FROM evidence_picks WHERE text_hash NOT IN (SELECT text_hash FROM evidence_texts)")
+
+    def lookup(self, project_id: str, citation_key: str, limit: int = 5, source: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Ranked sentences for one citation plus the sentences the outline view's helpers would pick."""
+        with self.lock:
+            texts = self.conn.execute(
+                "SELECT text_hash, source, origin, apa FROM evidence_texts WHERE project_id = ? AND citation_key = ?"
+                + (" AND source = ?" if source else "") + " ORDER BY source, origin",
+                (project_id, citation_key) + ((source,) if source else ())
+            ).fetchall()
+            if not texts:
+                return None
+            hashes = list(dict.fromkeys(row[0] for row in texts))
+            placeholders = ",".join("?" * len(hashes))
+            sentences = self.conn.execute(
+                f"SELECT text_hash, position, sentence, score, features FROM evidence_sentences "
+                f"WHERE text_hash IN ({placeholders}) ORDER BY score DESC, position",
+                hashes
+            ).fetchall()
+            picks = dict(self.conn.execute(
+                f"SELECT text_hash, picks FROM evidence_picks WHERE text_hash IN ({placeholders})", hashes
+            ).fetchall())
+
+        origins = {}
+        for digest, text_source, origin, _ in texts:
+            origins.setdefault(digest, {"source": text_source, "origins": []})["origins"].append(origin)
+        by_position = {(row[0], row[1]): row[2] for row in sentences}
+        ranked, seen = [], set()
+        for digest, position, sentence, score, features in sentences:
+            if sentence in seen:
+                continue
+            seen.add(sentence)
+            ranked.append(dict(json.loads(features), sentence=sentence, score=score,
+                               source=origins[digest]["source"], origins=origins[digest]["origins"]))
+            if len(ranked) >= limit:
+                break
+
+        descriptions = []
+        for digest in hashes:
+            if origins[digest]["source"] != "description":
+                continue
+            chosen = json.loads(picks.get(digest, "{}"))
+            descriptions.append({
+                "origins": origins[digest]["origins"],
+                "picks": {name: by_position.get((digest, position)) if position is not None else None
+                          for name, position in chosen.items()}
+            })
+        return {"citation_key": citation_key, "apa": texts[0][3], "sentences": ranked, "descriptions": descriptions}
+
+_index: Optional[EvidenceIndex] = None
+
+def get_evidence_index() -> EvidenceIndex:
+    global _index
+    if _index is None:
+        _index = EvidenceIndex()
+    return _index
@@ -0,0 +1,165 @@
+from typing import Any, Dict, List, Optional, Set
+from services.data_dir import data_path
+from services.outline_parser import parse_outline
+from services.project_documents import content_hash
+import json
+import re
+import sqlite3
+import threading
+import time
+
+# Above this share of changed citation outlines a full re-fuse is cheaper and keeps the grouping coherent
+FULL_REFUSE_RATIO = 0.5
+TOP_NUMBER = re.compile(r"^(\s*(?:[-*•]\s+)?(?:\*\*)?)\d{1,2}\.")
+
+def context_hash(request) -> str:
+    """Everything besides the citation outlines that shapes the fused outline."""
+    return content_hash({
+        "thesis": request.thesis,
+        "methodology": request.methodology,
+        "section": request.section_context,
+        "subsection": request.subsection_context,
+        "question": request.question
+    })[:16]
+
+def citation_inputs(request) -> List[Dict[str, str]]:
+    """(reference id, outline hash) per citation outline, paired the way the fuse prompt pairs them."""
+    references = request.citation_references or []
+    inputs = []
+    for index, response in enumerate(request.citation_responses):
+        ref = references[index].reference_id if index < len(references) else str(index + 1)
+        inputs.append({"ref": ref, "hash": content_hash(response)[:16]})
+    return inputs
+
+def split_branches(text: str) -> Dict[str, Any]:
+    """
+    The fused outline as its preamble plus one branch per top-level point:
+    the branch's verbatim lines and the citation references found anywhere in
+    it (its provenance).
+    """
+    lines = text.split("\n")
+    tree = parse_outline(text)
+    tops = [node for node in tree["nodes"] if node["depth"] == 1]
+    starts = [node["line"] for node in tops] + [len(lines)]
+    branches = []
+    for node, start, end in zip(tops, starts, starts[1:]):
+        refs: List[str] = []
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            refs.extend(ref for ref in current["refs"] if ref not in refs)
+            stack.extend(current["children"])
+        branches.append({"text": "\n".join(lines[start:end]).rstrip(), "refs": refs})
+    preamble = "\n".join(lines[:starts[0]]).rstrip() if tops else ""
+    return {"preamble": preamble, "branches": branches}
+
+def provenance(branches: List[Dict[str, Any]]) -> Dict[str, List[int]]:
+    """Reference id -> 1-based numbers of the top-level points it contributed to."""
+    by_ref: Dict[str, List[int]] = {}
+    for number, branch in enumerate(branches, 1):
+        for ref in branch["refs"]:
+            by_ref.setdefault(ref, []).append(number)
+    return by_ref
+
+def plan_refuse(state: Optional[Dict[str, Any]], request) -> Dict[str, Any]:
+    """
+    Compare the request with the stored fused outline. Returns the mode
+    ("full", "incremental" or "cached"), the current citation inputs, the
+    references whose outline is new or changed, those that were removed, and
+    for incremental mode the stored branches split into kept and affected.
+    """
+    inputs = citation_inputs(request)
+    plan = {"mode": "full", "inputs": inputs, "changed": [i["ref"] for i in inputs], "removed": [],
+            "kept": [], "affected": [], "preamble": ""}
+    if not state or state["context_hash"] != context_hash(request):
+        return plan
+
+    previous = {i["ref"]: i["hash"] for i in state["inputs"]}
+    changed = [i["ref"] for i in inputs if previous.get(i["ref"]) != i["hash"]]
+    current = {i["ref"] for i in inputs}
+    removed = [ref for ref in previous if ref not in current]
+    if not changed and not removed:
+        return dict(plan, mode="cached", changed=[])
+    if len(changed) + len(removed) > FULL_REFUSE_RATIO * max(len(inputs), 1):
+        return plan
+
+    split = split_branches(state["fused"])
+    if not split["branches"]:
+        return plan
+    touched: Set[str] = set(changed) | set(removed)
+    kept, affected = [], []
+    for position, branch in enumerate(split["branches"]):
+        (affected if touched & set(branch["refs"]) else kept).append(dict(branch, position=position))
+    return dict(plan, mode="incremental", changed=changed, removed=removed,
+                kept=kept, affected=affected, preamble=split["preamble"])
+
+def merge_branches(plan: Dict[str, Any], replacements: List[Dict[str, Any]]) -> str:
+    """
+    Kept branches verbatim in their original order, with the re-fused
+    branches where the first affected branch stood (after the kept ones when
+    only new citations were added); top-level points are renumbered.
+    """
+    insert_at = min((b["position"] for b in plan["affected"]), default=None)
+    ordered: List[Dict[str, Any]] = []
+    for branch in plan["kept"]:
+        if insert_at is not None and branch["position"] > insert_at and replacements is not None:
+            ordered.extend(replacements)
+            replacements = None
+        ordered.append(branch)
+    if replacements is not None:
+        ordered.extend(replacements)
+    texts = [TOP_NUMBER.sub(lambda m, n=number: f"{m.group(1)}{n}.", branch["text"], count=1)
+             for number, branch in enumerate(ordered, 1)]
+    return "\n".join(([plan["preamble"]] if plan["preamble"] else []) + texts)
+
+class FusedOutlineStore:
+    """Last fused outline per question with the citation outline hashes it was fused from."""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or data_path("fused_outlines.sqlite3")
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS fused_outline_state (
+                state_key TEXT PRIMARY KEY,
+                project_id TEXT NOT NULL,
+                context_hash TEXT NOT NULL,
+                inputs TEXT NOT NULL,
+                fused TEXT NOT NULL,
+                updated_at REAL NOT NULL
+            )
+            """
+        )
+        self.conn.commit()
+
+    @staticmethod
+    def key(request) -> str:
+        return content_hash([request.project_id or "", request.section_context, request.subsection_context,
+                             request.question_number, request.question])
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT context_hash, inputs, fused FROM fused_outline_state WHERE state_key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {"context_hash": row[0], "inputs": json.loads(row[1]), "fused": row[2]}
+
+    def put(self, key: str, project_id: Optional[str], context: str, inputs: List[Dict[str, str]], fused: str) -> None:
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO fused_outline_state (state_key, project_id, context_hash, inputs, fused, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, project_id or "", context, json.dumps(inputs), fused, time.time())
+            )
+            self.conn.commit()
+
+_store: Optional[FusedOutlineStore] = None
+
+def get_fused_outline_store() -> FusedOutlineStore:
+    global _store
+    if _store is None:
+        _store = FusedOutlineStore()
+    return _store
@@ -0,0 +1,178 @@
+from typing import Any, Dict, List, Optional, Tuple
+from services.data_dir import data_path
+from services.model_scheduler import track_usage
+from services.project_documents import content_hash
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_TTL_SECONDS = float(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))
+# How long a retry waits for the first attempt with its key before running itself
+IDEMPOTENCY_WAIT_SECONDS = float(os.getenv("IDEMPOTENCY_WAIT_SECONDS", "600"))
+MAX_KEY_LENGTH = 255
+REPLAY_HEADER = "idempotent-replayed"
+
+class IdempotencyStore:
+    """Successful responses per (Idempotency-Key, path) for the replay window."""
+
+    def __init__(self, path: Optional[str] = None, ttl: float = IDEMPOTENCY_TTL_SECONDS):
+        self.path = path or data_path("idempotency.sqlite3")
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS idempotency_records (
+                record_key TEXT PRIMARY KEY,
+                fingerprint TEXT NOT NULL,
+                status INTEGER NOT NULL,
+                headers TEXT NOT NULL,
+                body BLOB NOT NULL,
+                created_at REAL NOT NULL
+            )
+            """
+        )
+        self.conn.commit()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT fingerprint, status, headers, body FROM idempotency_records WHERE record_key = ? AND created_at > ?",
+                (key, time.time() - self.ttl)
+            ).fetchone()
+        if row is None:
+            return None
+        return {"fingerprint": row[0], "status": row[1], "headers": json.loads(row[2]), "body": bytes(row[3])}
+
+    def put(self, key: str, fingerprint: str, status: int, headers: List[Tuple[str, str]], body: bytes) -> None:
+        now = time.time()
+        with self.lock:
+            self.conn.execute("DELETE FROM idempotency_records WHERE created_at <= ?", (now - self.ttl,))
+            self.conn.execute(
+                "INSERT OR REPLACE INTO idempotency_records (record_key, fingerprint, status, headers, body, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, fingerprint, status, json.dumps(headers), body, now)
+            )
+            self.conn.commit()
+
+_store: Optional[IdempotencyStore] = None
+
+def get_idempotency_store() -> IdempotencyStore:
+    global _store
+    if _store is None:
+        _store = IdempotencyStore()
+    return _store
+
+async def send_json(send, status: int, payload: Dict[str, Any]) -> None:
+    body = json.dumps(payload).encode("utf-8")
+    await send({"type": "http.response.start", "status": status,
+                "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]})
+    await send({"type": "http.response.body", "body": body})
+
+class IdempotencyMiddleware:
+    """
+    POSTs carrying an Idempotency-Key header run once per key and path.
+    A retry of a finished request gets the stored response back (marked
+    Idempotent-Replayed) without reaching the endpoint or the model; a retry
+    that arrives while the first attempt is still running waits for it.
+    Only 2xx responses whose model calls all succeeded are stored, so
+    throttled or failed attempts still retry for real. Reusing a key with a different body is rejected with 422.
+    """
+
+    def __init__(self, app, store: Optional[IdempotencyStore] = None):
+        self.app = app
+        self.store = store
+        self.inflight: Dict[str, Tuple[str, asyncio.Event]] = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST":
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope.get("headers", []))
+        key = headers.get(b"idempotency-key", b"").decode("latin-1").strip()
+        if not key:
+            await self.app(scope, receive, send)
+            return
+        if len(key) > MAX_KEY_LENGTH:
+            await send_json(send, 400, {"detail": f"Idempotency-Key must be at most {MAX_KEY_LENGTH} characters"})
+            return
+
+        chunks = []
+        while True:
+            message = await receive()
+            if message["type"] != "http.request":
+                return
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body"):
+                break
+        body = b"".join(chunks)
+        fingerprint = hashlib.sha256(body).hexdigest()
+        record_key = content_hash([key, scope["path"]])
+        store = self.store or get_idempotency_store()
+
+        while True:
+            record = store.get(record_key)
+            if record is not None:
+                if record["fingerprint"] != fingerprint:
+                    await send_json(send, 422, {"detail": "Idempotency-Key was already used with a different request body"})
+                    return
+                await self.replay(record, send)
+                return
+            running = self.inflight.get(record_key)
+            if running is None:
+                break
+            if running[0] != fingerprint:
+                await send_json(send, 422, {"detail": "Idempotency-Key is in use by a different request"})
+                return
+            try:
+                await asyncio.wait_for(running[1].wait(), IDEMPOTENCY_WAIT_SECONDS)
+            except asyncio.TimeoutError:
+                logger.warning(f"Gave up waiting for the first attempt of {scope['path']}; running the retry")
+                break
+
+        done = asyncio.Event()
+        self.inflight[record_key] = (fingerprint, done)
+        response = {"status": 0, "headers": [], "body": [], "complete": False}
+        delivered = False
+
+        async def buffered_receive():
+            nonlocal delivered
+            if not delivered:
+                delivered = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        async def capturing_send(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                response["headers"] = [(k.decode("latin-1"), v.decode("latin-1")) for k, v in message.get("headers", [])]
+            elif message["type"] == "http.response.body":
+                response["body"].append(message.get("body", b""))
+                response["complete"] = not message.get("more_body", False)
+            await send(message)
+
+        try:
+            with track_usage() as usage:
+                await self.app(scope, buffered_receive, capturing_send)
+        finally:
+            # invoke_bedrock returns model errors as text inside a 200; a retry must run again, not replay them
+            if response["complete"] and 200 <= response["status"] < 300 and not usage.failures:
+                try:
+                    store.put(record_key, fingerprint, response["status"], response["headers"], b"".join(response["body"]))
+                except Exception as e:
+                    logger.error(f"Could not store idempotent response for {scope['path']}: {str(e)}")
+            self.inflight.pop(record_key, None)
+            done.set()
+
+    async def replay(self, record: Dict[str, Any], send) -> None:
+        headers = [(k.encode("latin-1"), v.encode("latin-1")) for k, v in record["headers"]]
+        headers.append((REPLAY_HEADER.encode(), b"true"))
+        await send({"type": "http.response.start", "status": record["status"], "headers": headers})
+        await send({"type": "http.response.body", "body": record["body"]})
@@ -0,0 +1,172 @@
+from typing import Any, Callable, List
+import copy
+
+class JsonPatchError(ValueError):
+    """The patch is malformed or does not apply to the document."""
+
+class JsonPatchTestFailed(JsonPatchError):
+    """A "test" operation did not match; the client's view of the document is stale."""
+
+def parse_pointer(pointer: str) -> List[str]:
+    """Split an RFC 6901 JSON pointer into unescaped reference tokens."""
+    if pointer == "":
+        return []
+    if not isinstance(pointer, str) or not pointer.startswith("/"):
+        raise JsonPatchError(f"Invalid JSON pointer: {pointer!r}")
+    return [token.replace("~1", "/").replace("~0", "~") for token in pointer[1:].split("/")]
+
+def escape_token(token: str) -> str:
+    return str(token).replace("~", "~0").replace("/", "~1")
+
+def _list_index(container: list, token: str, allow_end: bool = False) -> int:
+    if allow_end and token == "-":
+        return len(container)
+    if not token.isdigit() or (token != "0" and token.startswith("0")):
+        raise JsonPatchError(f"Invalid array index: {token!r}")
+    index = int(token)
+    if index > len(container) or (index == len(container) and not allow_end):
+        raise JsonPatchError(f"Array index out of range: {index}")
+    return index
+
+def _walk(doc: Any, tokens: List[str]) -> Any:
+    node = doc
+    for token in tokens:
+        if isinstance(node, dict):
+            if token not in node:
+                raise JsonPatchError(f"Path not found: /{'/'.join(escape_token(t) for t in tokens)}")
+            node = node[token]
+        elif isinstance(node, list):
+            node = node[_list_index(node, token)]
+        else:
+            raise JsonPatchError(f"Cannot traverse into a scalar at token {token!r}")
+    return node
+
+def apply_patch(doc: Any, operations: List[dict]) -> Any:
+    """
+    Apply RFC 6902 operations to doc in place and return the (possibly new) root.
+    Either every operation applies or none does: on failure the document is
+    rolled back and a JsonPatchError is raised. Values added to the document are
+    taken from the patch as-is, so callers must not reuse the operation list.
+    """
+    root = [doc]
+    undo: List[Callable[[], None]] = []
+
+    def set_root(value):
+        old = root[0]
+        root[0] = value
+        undo.append(lambda: root.__setitem__(0, old))
+
+    def add(tokens, value):
+        if not tokens:
+            return set_root(value)
+        parent, token = _walk(root[0], tokens[:-1]), tokens[-1]
+        if isinstance(parent, dict):
+            if token in parent:
+                old = parent[token]
+                undo.append(lambda: parent.__setitem__(token, old))
+            else:
+                undo.append(lambda: parent.pop(token))
+            parent[token] = value
+        elif isinstance(parent, list):
+            index = _list_index(parent, token, allow_end=True)
+            parent.insert(index, value)
+            undo.append(lambda: parent.pop(index))
+        else:
+            raise JsonPatchError("Cannot add a member to a scalar")
+
+    def remove(tokens) -> Any:
+        if not tokens:
+            raise JsonPatchError("Cannot remove the document root")
+        parent, token = _walk(root[0], tokens[:-1]), tokens[-1]
+        if isinstance(parent, dict):
+            if token not in parent:
+                raise JsonPatchError(f"Path not found: {token!r}")
+            old = parent.pop(token)
+            undo.append(lambda: parent.__setitem__(token, old))
+        elif isinstance(parent, list):
+            index = _list_index(parent, token)
+            old = parent.pop(index)
+            undo.append(lambda: parent.insert(index, old))
+        else:
+            raise JsonPatchError("Cannot remove a member of a scalar")
+        return old
+
+    def replace(tokens, value):
+        if not tokens:
+            return set_root(value)
+        parent, token = _walk(root[0], tokens[:-1]), tokens[-1]
+        if isinstance(parent, dict):
+            if token not in parent:
+                raise JsonPatchError(f"Path not found: {token!r}")
+        elif isinstance(parent, list):
+            token = _list_index(parent, token)
+        else:
+            raise JsonPatchError("Cannot replace a member of a scalar")
+        old = parent[token]
+        undo.append(lambda: parent.__setitem__(token, old))
+        parent[token] = value
+
+    try:
+        for operation in operations:
+            if not isinstance(operation, dict) or "op" not in operation or "path" not in operation:
+                raise JsonPatchError(f"Malformed operation: {operation!r}")
+            op, tokens = operation["op"], parse_pointer(operation["path"])
+            if op in ("add", "replace", "test") and "value" not in operation:
+                raise JsonPatchError(f"'{op}' operation requires a value")
+            if op == "add":
+                add(tokens, operation["value"])
+            elif op == "remove":
+                remove(tokens)
+            elif op == "replace":
+                replace(tokens, operation["value"])
+            elif op in ("move", "copy"):
+                source = parse_pointer(operation.get("from"))
+                if op == "move":
+                    if tokens[:len(source)] == source and len(tokens) > len(source):
+                        raise JsonPatchError("Cannot move a value into one of its children")
+                    if tokens != source:
+                        add(tokens, remove(source))
+                else:
+                    add(tokens, copy.deepcopy(_walk(root[0], source)))
+            elif op == "test":
+                if _walk(root[0], tokens) != operation["value"]:
+                    raise JsonPatchTestFailed(f"Test failed at {operation['path']}")
+            else:
+                raise JsonPatchError(f"Unknown operation: {op!r}")
+    except JsonPatchError:
+        for revert in reversed(undo):
+            revert()
+        raise
+    except (TypeError, AttributeError) as e:
+        for revert in reversed(undo):
+            revert()
+        raise JsonPatchError(str(e))
+    return root[0]
+
+def make_patch(old: Any, new: Any, path: str = "") -> List[dict]:
+    """Minimal-effort diff producing add/remove/replace operations from old to new."""
+    if type(old) is not type(new):
+        return [{"op": "replace", "path": path, "value": new}]
+    if isinstance(old, dict):
+        operations = []
+        for key in old:
+            if key not in new:
+                operations.append({"op": "remove", "path": f"{path}/{escape_token(key)}"})
+        for key, value in new.items():
+            child = f"{path}/{escape_token(key)}"
+            if key not in old:
+                operations.append({"op": "add", "path": child, "value": value})
+            elif old[key] != value:
+                operations.extend(make_patch(old[key], value, child))
+        return operations
+    if isinstance(old, list):
+        operations = []
+        for index in range(min(len(old), len(new))):
+            if old[index] != new[index]:
+                operations.extend(make_patch(old[index], new[index], f"{path}/{index}"))
+        for index in range(len(old) - 1, len(new) - 1, -1):
+            operations.append({"op": "remove", "path": f"{path}/{index}"})
+        for index in range(len(old), len(new)):
+            operations.append({"op": "add", "path": f"{path}/-", "value": new[index]})
+        return operations
+    return [] if old == new else [{"op": "replace", "path": path, "value": new}]
@@ -0,0 +1,153 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from services.data_dir import data_path
+from services.model_scheduler import submit_in_context
+from services.project_documents import content_hash
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Bump when the map prompt or the key point format changes so stale extractions are not reused
+MAP_VERSION = "1"
+
+def response_hash(response: Dict[str, Any]) -> str:
+    """Hash of everything the map prompt sees for one literature response."""
+    return content_hash({
+        "version": MAP_VERSION,
+        "content": response.get("content", ""),
+        "question": response.get("question") or "",
+        "citations": [citation_label(c) for c in response.get("citations") or []]
+    })[:32]
+
+def citation_label(citation: Any) -> str:
+    if isinstance(citation, dict):
+        return (citation.get("apa") or citation.get("title") or citation.get("url") or "").strip()
+    return str(citation).strip()
+
+def parse_key_points(text: str, citations: List[Any]) -> Optional[List[Dict[str, Any]]]:
+    """
+    Key points from a map response, with citation numbers resolved to the
+    response's own citation labels. None if the model did not return the JSON.
+    """
+    match = re.search(r"\{.*\}", text or "", re.DOTALL)
+    if not match:
+        return None
+    try:
+        data = json.loads(match.group())
+    except json.JSONDecodeError:
+        return None
+    if not isinstance(data, dict) or not isinstance(data.get("key_points"), list):
+        return None
+
+    labels = [citation_label(c) for c in citations]
+    points = []
+    for point in data["key_points"]:
+        if not isinstance(point, dict) or not point.get("claim"):
+            continue
+        cited = []
+        for number in point.get("citations") or []:
+            if isinstance(number, int) and 1 <= number <= len(labels) and labels[number - 1] not in cited:
+                cited.append(labels[number - 1])
+        points.append({
+            "claim": str(point["claim"]).strip(),
+            "evidence": [str(e).strip() for e in point.get("evidence") or [] if e],
+            "citations": cited
+        })
+    return points
+
+class KeyPointCache:
+    """Map stage output per literature response hash, shared across subsections and projects."""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or data_path("literature_key_points.sqlite3")
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS key_points (
+                response_hash TEXT PRIMARY KEY,
+                points TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )
+            """
+        )
+        self.conn.commit()
+
+    def get_many(self, hashes: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+        found: Dict[str, List[Dict[str, Any]]] = {}
+        unique = list(dict.fromkeys(hashes))
+        with self.lock:
+            for start in range(0, len(unique), 500):
+                batch = unique[start:start + 500]
+                rows = self.conn.execute(
+                    f"SELECT response_hash, points FROM key_points WHERE response_hash IN ({','.join('?' * len(batch))})",
+                    batch
+                ).fetchall()
+                found.update((digest, json.loads(points)) for digest, points in rows)
+        return found
+
+    def put(self, digest: str, points: List[Dict[str, Any]]) -> None:
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO key_points (response_hash, points, created_at) VALUES (?, ?, ?)",
+                (digest, json.dumps(points, ensure_ascii=False), time.time())
+            )
+            self.conn.commit()
+
+_cache: Optional[KeyPointCache] = None
+
+def get_key_point_cache() -> KeyPointCache:
+    global _cache
+    if _cache is None:
+        _cache = KeyPointCache()
+    return _cache
+
+def map_responses(
+    responses: List[Dict[str, Any]],
+    extract: Callable[[Dict[str, Any]], Optional[List[Dict[str, Any]]]],
+    cache: KeyPointCache,
+    max_workers: int = 4
+) -> Tuple[List[List[Dict[str, Any]]], Dict[str, int]]:
+    """
+    Key points for every response, in order. Cached responses are not sent
+    again, identical responses are extracted once, and at most max_workers
+    extractions run at a time. A response whose extraction fails falls back to
+    its leading text as a single point and is not cached.
+    """
+    hashes = [response_hash(response) for response in responses]
+    results = cache.get_many(hashes)
+    pending = {digest: response for digest, response in zip(hashes, responses) if digest not in results}
+    stats = {"responses": len(responses), "cached": len(responses) - sum(h in pending for h in hashes),
+             "extracted": 0, "failed": 0}
+
+    def run(item):
+        digest, response = item
+        try:
+            return digest, extract(response)
+        except Exception as e:
+            logger.warning(f"Key point extraction failed: {str(e)}")
+            return digest, None
+
+    if pending:
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(pending)))) as pool:
+            futures = [submit_in_context(pool, run, item) for item in pending.items()]
+            for digest, points in (future.result() for future in futures):
+                if points:
+                    cache.put(digest, points)
+                    stats["extracted"] += 1
+                else:
+                    response = pending[digest]
+                    points = [{
+                        "claim": (response.get("content") or "")[:500],
+                        "evidence": [],
+                        "citations": [citation_label(c) for c in response.get("citations") or []]
+                    }]
+                    stats["failed"] += 1
+                results[digest] = points
+
+    return [results[digest] for digest in hashes], stats
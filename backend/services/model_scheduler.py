@@ -0,0 +1,264 @@
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar, copy_context
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Tuple
+import heapq
+import itertools
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE, STANDARD, BULK = "interactive", "standard", "bulk"
+# Highest priority first; prefetch guesses run as bulk
+PRIORITIES = [INTERACTIVE, STANDARD, BULK]
+PRIORITY_ALIASES = {"prefetch": BULK}
+
+MODEL_MAX_CONCURRENCY = int(os.getenv("MODEL_MAX_CONCURRENCY", "8"))
+# Slots only interactive calls may use, so a click never waits behind a bulk run
+INTERACTIVE_RESERVED = int(os.getenv("MODEL_INTERACTIVE_RESERVED", "2"))
+WAIT_SAMPLES = 500
+
+# Full mounted paths (router prefixes included) of endpoints whose calls come from one user click
+INTERACTIVE_PATHS = {
+    "/refine_thesis", "/generate_probing_questions", "/answer_probing_questions", "/auto_refine_thesis",
+    "/recommend_sources", "/generate_methodology_options", "/generate_structured_outline",
+    "/generate_section_context", "/generate_subsection_context", "/identify_citation"
+}
+# Endpoints the frontend calls in loops over every question, citation or section
+BULK_PATHS = {
+    "/generate_citation_response", "/generate_citation_digests", "/generate_fused_response",
+    "/generate_prose_from_outline", "/generate_section_prose", "/generate_section_prose/stream",
+    "/generate_question_citations", "/data-analysis/analyze-subsection", "/data-analysis/analyze-inclusion-exclusion",
+    "/data-analysis/build-data-outline", "/data-analysis/build-data-outlines", "/data-analysis/generate-subsection-outline"
+}
+
+_priority: ContextVar[str] = ContextVar("model_call_priority", default=STANDARD)
+_tenant: ContextVar[str] = ContextVar("model_call_tenant", default="anonymous")
+_usage: ContextVar[Optional["CallUsage"]] = ContextVar("model_call_usage", default=None)
+
+class CallUsage:
+    """
+    Model calls made on behalf of one request, including those from its worker
+    threads. Blocks tracked inside another tracked block also report to it.
+    """
+
+    def __init__(self, parent: Optional["CallUsage"] = None):
+        self.parent = parent
+        self.lock = threading.Lock()
+        self.calls = 0
+        self.call_seconds = 0.0
+        self.wait_seconds = 0.0
+        self.longest = 0.0
+        self.failures = 0
+
+    def add(self, waited: float, duration: float) -> None:
+        with self.lock:
+            self.calls += 1
+            self.call_seconds += duration
+            self.wait_seconds += waited
+            self.longest = max(self.longest, duration)
+        if self.parent is not None:
+            self.parent.add(waited, duration)
+
+    def fail(self) -> None:
+        with self.lock:
+            self.failures += 1
+        if self.parent is not None:
+            self.parent.fail()
+
+@contextmanager
+def track_usage() -> Iterator[CallUsage]:
+    """Collect the model calls made inside the block (and threads submitted from it)."""
+    usage = CallUsage(_usage.get())
+    token = _usage.set(usage)
+    try:
+        yield usage
+    finally:
+        _usage.reset(token)
+
+def record_model_failure() -> None:
+    """Mark the current request as having had a model call fail (callers often get an error string back)."""
+    usage = _usage.get()
+    if usage is not None:
+        usage.fail()
+
+def normalize_priority(value: Optional[str]) -> Optional[str]:
+    value = (value or "").strip().lower()
+    value = PRIORITY_ALIASES.get(value, value)
+    return value if value in PRIORITIES else None
+
+def path_priority(path: str) -> str:
+    if path in INTERACTIVE_PATHS:
+        return INTERACTIVE
+    if path in BULK_PATHS:
+        return BULK
+    return STANDARD
+
+@contextmanager
+def model_call_context(priority: Optional[str] = None, tenant: Optional[str] = None) -> Iterator[None]:
+    """Run the model calls made inside the block under this priority class and tenant."""
+    tokens = []
+    if normalize_priority(priority):
+        tokens.append((_priority, _priority.set(normalize_priority(priority))))
+    if tenant:
+        tokens.append((_tenant, _tenant.set(tenant)))
+    try:
+        yield
+    finally:
+        for var, token in reversed(tokens):
+            var.reset(token)
+
+def current_call_context() -> Tuple[str, str]:
+    return _priority.get(), _tenant.get()
+
+def submit_in_context(pool, fn: Callable[..., Any], *args, **kwargs):
+    """pool.submit that keeps the caller's priority class and tenant on the worker thread."""
+    return pool.submit(copy_context().run, fn, *args, **kwargs)
+
+class Ticket:
+    __slots__ = ("priority", "tenant", "start", "finish", "seq", "enqueued", "started", "ended")
+
+    def __init__(self, priority: str, tenant: str, start: float, finish: float, seq: int):
+        self.priority, self.tenant, self.start, self.finish, self.seq = priority, tenant, start, finish, seq
+        self.enqueued = time.time()
+        self.started = 0.0
+        self.ended = 0.0
+
+class ModelCallScheduler:
+    """
+    Admits model calls in priority order: interactive, then standard, then
+    bulk. Within a class, tenants (projects or users) are served by weighted
+    fair queuing on the call's token budget, so one project's batch of
+    hundreds of calls interleaves with another's single call instead of
+    running ahead of it. Bulk and standard calls never take the slots
+    reserved for interactive traffic.
+    """
+
+    def __init__(self, capacity: int = MODEL_MAX_CONCURRENCY, reserved: int = INTERACTIVE_RESERVED,
+                 weights: Optional[Dict[str, float]] = None):
+        self.capacity = max(1, capacity)
+        self.reserved = min(max(0, reserved), self.capacity - 1)
+        self.weights = weights or {}
+        self.cond = threading.Condition()
+        self.seq = itertools.count()
+        self.queues: Dict[str, List[Tuple[float, int, Ticket]]] = {p: [] for p in PRIORITIES}
+        self.virtual: Dict[str, float] = {p: 0.0 for p in PRIORITIES}
+        self.last_finish: Dict[Tuple[str, str], float] = {}
+        self.running: Dict[str, int] = {p: 0 for p in PRIORITIES}
+        self.completed: Dict[str, int] = {p: 0 for p in PRIORITIES}
+        self.waits: Dict[str, Deque[float]] = {p: deque(maxlen=WAIT_SAMPLES) for p in PRIORITIES}
+        self.durations: Dict[str, Deque[float]] = {p: deque(maxlen=WAIT_SAMPLES) for p in PRIORITIES}
+
+    def _can_start(self, ticket: Ticket) -> bool:
+        queue = self.queues[ticket.priority]
+        if not queue or queue[0][2] is not ticket:
+            return False
+        rank = PRIORITIES.index(ticket.priority)
+        if any(self.queues[p] for p in PRIORITIES[:rank]):
+            return False
+        total = sum(self.running.values())
+        if ticket.priority == INTERACTIVE:
+            return total < self.capacity
+        return total < self.capacity and total - self.running[INTERACTIVE] < self.capacity - self.reserved
+
+    def acquire(self, priority: str, tenant: str, cost: float) -> Ticket:
+        """Block until the call may run; returns the ticket to release."""
+        with self.cond:
+            start = max(self.virtual[priority], self.last_finish.get((priority, tenant), 0.0))
+            finish = start + max(cost, 1.0) / self.weights.get(tenant, 1.0)
+            self.last_finish[(priority, tenant)] = finish
+            ticket = Ticket(priority, tenant, start, finish, next(self.seq))
+            heapq.heappush(self.queues[priority], (finish, ticket.seq, ticket))
+            while not self._can_start(ticket):
+                self.cond.wait()
+            heapq.heappop(self.queues[priority])
+            self.running[priority] += 1
+            self.virtual[priority] = max(self.virtual[priority], ticket.start)
+            ticket.started = time.time()
+            self.waits[priority].append(ticket.started - ticket.enqueued)
+            # The next head of this or a lower class may also fit
+            self.cond.notify_all()
+        return ticket
+
+    def release(self, ticket: Ticket) -> None:
+        with self.cond:
+            self.running[ticket.priority] -= 1
+            self.completed[ticket.priority] += 1
+            ticket.ended = time.time()
+            self.durations[ticket.priority].append(ticket.ended - ticket.started)
+            if not any(self.queues.values()) and not any(self.running.values()):
+                # Idle: restart virtual time so old finish tags do not carry over
+                self.virtual = {p: 0.0 for p in PRIORITIES}
+                self.last_finish.clear()
+            self.cond.notify_all()
+
+    @contextmanager
+    def slot(self, cost: float = 4000) -> Iterator[Ticket]:
+        """
+        Hold a model slot for the current priority class and tenant. Waiting
+        blocks the thread, so model calls belong in sync (def) endpoints or
+        worker threads, never on the event loop.
+        """
+        priority, tenant = current_call_context()
+        ticket = self.acquire(priority, tenant, cost)
+        try:
+            yield ticket
+        finally:
+            self.release(ticket)
+            usage = _usage.get()
+            if usage is not None:
+                usage.add(ticket.started - ticket.enqueued, ticket.ended - ticket.started)
+
+    def slots_for(self, priority: str) -> int:
+        """Slots a class can use at once."""
+        return self.capacity if priority == INTERACTIVE else self.capacity - self.reserved
+
+    def stats(self) -> Dict[str, Any]:
+        with self.cond:
+            classes = {}
+            for priority in PRIORITIES:
+                waits = sorted(self.waits[priority])
+                durations = list(self.durations[priority])
+                classes[priority] = {
+                    "queued": len(self.queues[priority]),
+                    "running": self.running[priority],
+                    "completed": self.completed[priority],
+                    "tenants_waiting": len({entry[2].tenant for entry in self.queues[priority]}),
+                    "wait_avg": round(sum(waits) / len(waits), 3) if waits else 0.0,
+                    "wait_p95": round(waits[min(len(waits) - 1, int(len(waits) * 0.95))], 3) if waits else 0.0,
+                    "wait_max": round(waits[-1], 3) if waits else 0.0,
+                    "duration_avg": round(sum(durations) / len(durations), 3) if durations else 0.0
+                }
+        return {"capacity": self.capacity, "interactive_reserved": self.reserved, "classes": classes}
+
+_scheduler: Optional[ModelCallScheduler] = None
+
+def get_model_scheduler() -> ModelCallScheduler:
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = ModelCallScheduler()
+    return _scheduler
+
+class ModelCallContextMiddleware:
+    """
+    Tags each request's model calls with a priority class and tenant: the
+    X-Priority header when valid, otherwise by endpoint; the tenant is
+    X-Project-Id, then X-User-Id, then the client address.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = {key.decode("latin-1").lower(): value.decode("latin-1") for key, value in scope.get("headers", [])}
+        priority = normalize_priority(headers.get("x-priority")) or path_priority(scope.get("path", ""))
+        client = scope.get("client")
+        tenant = headers.get("x-project-id") or headers.get("x-user-id") or (client[0] if client else "anonymous")
+        with model_call_context(priority, tenant):
+            await self.app(scope, receive, send)
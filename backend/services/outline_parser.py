@@ -0,0 +1,184 @@
+from typing import Any, Dict, List, Optional
+from services.citation_keys import canonical_citation_key
+from services.project_documents import content_hash, response_text
+import re
+
+# "1." / "a." / "i." / "1)" / "a)" / "i)", optionally behind a bullet or bold markers
+LINE_MARKER = re.compile(r"^(\s*)(?:[-*•]\s+)?(?:\*\*)?(\d{1,2}|[ivxlc]+|[a-z])([.)])(?:\*\*)?\s+(.*)$")
+REFERENCE = re.compile(r"\[(\s*\d+(?:[_.]\d+)*(?:\s*,\s*\d+(?:[_.]\d+)*)*\s*)\]")
+ROMAN_VALUES = {"i": 1, "v": 5, "x": 10, "l": 50, "c": 100}
+MAX_DEPTH = 6
+
+def roman_value(token: str) -> Optional[int]:
+    """Value of a lowercase roman numeral in canonical form, None otherwise."""
+    if not token or any(ch not in ROMAN_VALUES for ch in token):
+        return None
+    total = 0
+    for ch, following in zip(token, token[1:] + " "):
+        value = ROMAN_VALUES[ch]
+        total += -value if following != " " and ROMAN_VALUES[following] > value else value
+    return total if to_roman(total) == token else None
+
+def to_roman(value: int) -> str:
+    out = ""
+    for number, symbol in ((100, "c"), (90, "xc"), (50, "l"), (40, "xl"), (10, "x"), (9, "ix"), (5, "v"), (4, "iv"), (1, "i")):
+        while value >= number:
+            out += symbol
+            value -= number
+    return out
+
+def references_in(text: str) -> List[str]:
+    """Reference ids from [n], [1, 2] and [1_3] markers, in order of first appearance."""
+    found = [ref.strip() for match in REFERENCE.findall(text or "") for ref in match.split(",")]
+    return list(dict.fromkeys(found))
+
+class OutlineParser:
+    """
+    Single-pass parser for the six-level response outline
+    ("1." > "a." > "i." > "1)" > "a)" > "i)") with [n] citation markers.
+
+    Text can be fed in chunks as it streams; only complete lines are parsed,
+    each exactly once, so the whole response costs one pass. "i."/"v."/"x."
+    style markers are read as the next letter or the next roman numeral
+    depending on what the open siblings expect, with indentation as the
+    tie-breaker.
+    """
+
+    def __init__(self, references: Optional[Dict[str, Any]] = None):
+        self.references = references or {}
+        self.nodes: List[Dict[str, Any]] = []
+        self.preamble: List[str] = []
+        self.notes: List[str] = []
+        self.stack: List[Dict[str, Any]] = []  # open node per depth
+        self.buffer = ""
+        self.text_parts: List[str] = []
+        self.continuing = False
+        self.indented = False
+        self.line_count = 0
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        """Parse the complete lines in chunk; returns the nodes they opened."""
+        self.text_parts.append(chunk)
+        lines = (self.buffer + chunk).split("\n")
+        self.buffer = lines.pop()
+        opened = []
+        for line in lines:
+            node = self._line(line)
+            if node is not None:
+                opened.append(node)
+        return opened
+
+    def close(self) -> Dict[str, Any]:
+        """Parse the trailing partial line and return the finished tree."""
+        if self.buffer:
+            self._line(self.buffer)
+            self.buffer = ""
+        return self.tree()
+
+    def tree(self) -> Dict[str, Any]:
+        """Compact tree of everything parsed so far, with citation references resolved."""
+        refs = list(dict.fromkeys(ref for node in self._walk(self.nodes) for ref in node["refs"]))
+        return {
+            "hash": content_hash("".join(self.text_parts)),
+            "nodes": self.nodes,
+            "preamble": self.preamble,
+            "notes": self.notes,
+            "citations": {ref: self._resolve(ref) for ref in refs}
+        }
+
+    def _resolve(self, ref: str) -> Optional[Dict[str, Any]]:
+        citation = self.references.get(ref)
+        if citation is None:
+            return None
+        if not isinstance(citation, dict):
+            citation = citation.dict() if hasattr(citation, "dict") else {"apa": str(citation)}
+        apa = citation.get("apa") or citation.get("title") or citation.get("source") or ""
+        return {"apa": apa, "citation_key": canonical_citation_key(apa) if apa else None}
+
+    def _walk(self, nodes):
+        for node in nodes:
+            yield node
+            yield from self._walk(node["children"])
+
+    def _depth(self, token: str, closer: str, indent: int) -> int:
+        """Depth 1-6 for a marker, given the nodes currently open."""
+        if token.isdigit():
+            return 1 if closer == "." else 4
+        letter_depth, roman_depth = (2, 3) if closer == "." else (5, 6)
+        if len(token) > 1:
+            return roman_depth if roman_value(token) else letter_depth
+
+        letter_sibling = self.stack[letter_depth - 1] if len(self.stack) >= letter_depth else None
+        roman_sibling = self.stack[roman_depth - 1] if len(self.stack) >= roman_depth else None
+        next_letter = chr(ord(letter_sibling["token"]) + 1) if letter_sibling and len(letter_sibling["token"]) == 1 else "a"
+        next_roman = to_roman((roman_value(roman_sibling["token"]) or 0) + 1) if roman_sibling else "i"
+        if letter_sibling is None or token != next_roman:
+            return letter_depth
+        if token != next_letter:
+            return roman_depth
+        # "h." followed by "i.": deeper indentation means a numeral; flat text reads as one too
+        if self.indented:
+            return roman_depth if indent > letter_sibling["indent"] else letter_depth
+        return roman_depth
+
+    def _line(self, line: str) -> Optional[Dict[str, Any]]:
+        number = self.line_count
+        self.line_count += 1
+        match = LINE_MARKER.match(line)
+        if not match:
+            stripped = line.strip()
+            if not stripped:
+                self.continuing = False
+            elif self.continuing and self.stack:
+                node = self.stack[-1]
+                node["text"] = f"{node['text']} {stripped}"
+                node["refs"] = list(dict.fromkeys(node["refs"] + references_in(stripped)))
+            else:
+                (self.notes if self.nodes else self.preamble).append(stripped)
+            return None
+
+        indent, token, closer, content = match.groups()
+        width = len(indent.expandtabs(4))
+        self.indented = self.indented or width > 0
+        depth = self._depth(token, closer, width)
+        # A marker deeper than anything open hangs off the deepest open node
+        depth = min(depth, len(self.stack) + 1, MAX_DEPTH)
+        node = {
+            "marker": f"{token}{closer}",
+            "token": token,
+            "depth": depth,
+            "indent": width,
+            "line": number,
+            "text": content.strip(),
+            "refs": references_in(content),
+            "children": []
+        }
+        del self.stack[depth - 1:]
+        (self.stack[-1]["children"] if self.stack else self.nodes).append(node)
+        self.stack.append(node)
+        self.continuing = True
+        return node
+
+def parse_outline(text: str, references: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Parse a complete outline response in one pass."""
+    parser = OutlineParser(references)
+    parser.feed(text or "")
+    return parser.close()
+
+def stored_outline(response: Any, references: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """The tree stored next to a response when it still matches the text, otherwise a fresh parse."""
+    text = response_text(response)
+    outline = response.get("outline") if isinstance(response, dict) else None
+    if isinstance(outline, dict) and outline.get("hash") == content_hash(text):
+        return outline
+    return parse_outline(text, references)
+
+def flatten_outline(nodes: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Depth-first list of nodes without their children, for consumers that render line by line."""
+    flat = []
+    stack = list(reversed(nodes))
+    while stack:
+        node = stack.pop()
+        flat.append({key: value for key, value in node.items() if key != "children"})
+        stack.extend(reversed(node["children"]))
+    return flat
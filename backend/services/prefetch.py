@@ -0,0 +1,195 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from services.model_scheduler import BULK, model_call_context, track_usage
+from services.project_documents import content_hash
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+PREFETCH_TTL_SECONDS = float(os.getenv("PREFETCH_TTL_SECONDS", "600"))
+# Estimated model tokens a scope (project, or everyone without one) may spend on guesses per window
+PREFETCH_SPEND_CAP = int(os.getenv("PREFETCH_SPEND_CAP", "40000"))
+PREFETCH_SPEND_WINDOW = 3600.0
+PREFETCH_WORKERS = int(os.getenv("PREFETCH_WORKERS", "1"))
+CALL_TOKENS = 4000
+
+# Workflow event the frontend sends -> the generations the next clicks almost always request, in order
+NEXT_STEPS = {
+    "thesis_finalized": ["recommend_sources"],
+    "methodology_selected": ["generate_methodology_options"],
+    "section_created": ["generate_section_context"]
+}
+# Events after which earlier guesses for the scope are stale
+RESETTING_EVENTS = {"thesis_finalized"}
+
+_worker = threading.local()
+
+def in_prefetch_worker() -> bool:
+    """True on a prefetch thread, where the endpoints being prefetched must not look themselves up."""
+    return getattr(_worker, "active", False)
+
+class Prefetchable:
+    def __init__(self, normalize: Callable[[Dict[str, Any]], Dict[str, Any]], compute: Callable[[Dict[str, Any]], Any],
+                 cost: Callable[[Dict[str, Any]], int]):
+        self.normalize, self.compute, self.cost = normalize, compute, cost
+
+class PrefetchScheduler:
+    """
+    Runs likely next-step generations in the background and keeps each
+    result for a short time under the exact request that would produce it.
+    The endpoint takes the result on the user's click; a guess still running
+    is joined, one still queued is cancelled so the click runs it directly.
+    Guesses whose model calls failed are never served. Endpoints that take
+    results must be sync (def) handlers, since joining blocks the thread.
+    """
+
+    def __init__(self, workers: int = PREFETCH_WORKERS, ttl: float = PREFETCH_TTL_SECONDS,
+                 spend_cap: int = PREFETCH_SPEND_CAP, window: float = PREFETCH_SPEND_WINDOW):
+        self.ttl, self.spend_cap, self.window = ttl, spend_cap, window
+        self.pool = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="prefetch")
+        self.lock = threading.Lock()
+        self.endpoints: Dict[str, Prefetchable] = {}
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.spend: Dict[str, List[Tuple[float, int]]] = {}
+        self.counters = {name: 0 for name in ("queued", "hits", "joined", "cancelled", "expired", "failed", "over_budget")}
+
+    def register(self, name: str, normalize: Callable[[Dict[str, Any]], Dict[str, Any]], compute: Callable[[Dict[str, Any]], Any],
+                 cost: Optional[Callable[[Dict[str, Any]], int]] = None) -> None:
+        """Make an endpoint prefetchable; normalize turns a payload into the exact request the endpoint sees."""
+        self.endpoints[name] = Prefetchable(normalize, compute, cost or (lambda payload: CALL_TOKENS))
+
+    def key(self, name: str, request: Dict[str, Any]) -> str:
+        return content_hash([name, request])
+
+    def spent(self, scope: str, now: float) -> int:
+        entries = [(at, cost) for at, cost in self.spend.get(scope, []) if now - at < self.window]
+        self.spend[scope] = entries
+        return sum(cost for _, cost in entries)
+
+    def enqueue(self, scope: str, name: str, payload: Dict[str, Any]) -> str:
+        """Queue one guess; returns "queued", "exists", "over_budget", "incomplete" or "unknown"."""
+        endpoint = self.endpoints.get(name)
+        if endpoint is None:
+            return "unknown"
+        try:
+            request = endpoint.normalize(payload)
+            cost = endpoint.cost(request)
+        except Exception:
+            return "incomplete"
+        key = self.key(name, request)
+        now = time.time()
+        with self.lock:
+            self._expire(now)
+            if key in self.entries:
+                return "exists"
+            if self.spent(scope, now) + cost > self.spend_cap:
+                self.counters["over_budget"] += 1
+                return "over_budget"
+            charge = (now, cost)
+            self.spend[scope].append(charge)
+            future = self.pool.submit(self._run, endpoint, request, scope)
+            self.entries[key] = {"name": name, "scope": scope, "future": future, "created": now, "charge": charge}
+            self.counters["queued"] += 1
+        return "queued"
+
+    def _run(self, endpoint: Prefetchable, request: Dict[str, Any], scope: str) -> Any:
+        _worker.active = True
+        try:
+            # Guesses only use model capacity nobody is waiting for
+            with model_call_context(BULK, scope), track_usage() as usage:
+                result = endpoint.compute(request)
+            if usage.failures:
+                # The endpoint wrapped a model error into a normal-looking response
+                raise RuntimeError(f"{usage.failures} model call(s) failed")
+            return result
+        finally:
+            _worker.active = False
+
+    def take(self, name: str, payload: Dict[str, Any]) -> Optional[Any]:
+        """The prefetched result for this exact request, or None when the caller should generate it."""
+        endpoint = self.endpoints.get(name)
+        if endpoint is None or in_prefetch_worker():
+            return None
+        try:
+            key = self.key(name, endpoint.normalize(payload))
+        except Exception:
+            return None
+        with self.lock:
+            self._expire(time.time())
+            entry = self.entries.pop(key, None)
+        if entry is None:
+            return None
+        future: Future = entry["future"]
+        if self._cancel(entry):
+            return None
+        joined = not future.done()
+        try:
+            result = future.result()
+        except Exception as e:
+            logger.info(f"Prefetched {name} failed, generating on demand: {str(e)}")
+            self._count("failed")
+            return None
+        self._count("joined" if joined else "hits")
+        return result
+
+    def _count(self, name: str) -> None:
+        with self.lock:
+            self.counters[name] += 1
+
+    def _cancel(self, entry: Dict[str, Any]) -> bool:
+        """Cancel a guess that has not started and refund its spend."""
+        if not entry["future"].cancel():
+            return False
+        with self.lock:
+            charges = self.spend.get(entry["scope"], [])
+            if entry["charge"] in charges:
+                charges.remove(entry["charge"])
+            self.counters["cancelled"] += 1
+        return True
+
+    def cancel(self, scope: str) -> int:
+        """Drop every guess for a scope; queued ones never reach the model."""
+        with self.lock:
+            keys = [key for key, entry in self.entries.items() if entry["scope"] == scope]
+            entries = [self.entries.pop(key) for key in keys]
+        for entry in entries:
+            self._cancel(entry)
+        return len(entries)
+
+    def _expire(self, now: float) -> None:
+        for key in [key for key, entry in self.entries.items() if now - entry["created"] > self.ttl]:
+            entry = self.entries.pop(key)
+            entry["future"].cancel()
+            self.counters["expired"] += 1
+
+    def schedule(self, event: str, scope: str, context: Dict[str, Any]) -> List[Dict[str, str]]:
+        """Queue the likely next generations after a workflow event; one status per predicted endpoint."""
+        if event in RESETTING_EVENTS:
+            self.cancel(scope)
+        return [{"endpoint": name, "status": self.enqueue(scope, name, context)} for name in NEXT_STEPS.get(event, [])]
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.time()
+        with self.lock:
+            self._expire(now)
+            states = {"pending": 0, "ready": 0}
+            for entry in self.entries.values():
+                states["ready" if entry["future"].done() else "pending"] += 1
+            spend = {scope: self.spent(scope, now) for scope in list(self.spend)}
+        return {**states, **self.counters, "spend": {scope: tokens for scope, tokens in spend.items() if tokens},
+                "spend_cap": self.spend_cap}
+
+_scheduler: Optional[PrefetchScheduler] = None
+
+def get_prefetcher() -> PrefetchScheduler:
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = PrefetchScheduler()
+    return _scheduler
+
+def model_fields(model) -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+    """Normalizer for endpoints taking a request model: the payload as the endpoint would parse it."""
+    return lambda payload: model(**payload).dict()
@@ -0,0 +1,202 @@
+from typing import Any, Dict, Iterator, List, Optional
+import hashlib
+import json
+import re
+
+# Containers that hold draft outline state. Older project files use literatureReviewData/draftData,
+# newer ones dataObservationData; some store it at the top level instead of under "data".
+DRAFT_CONTAINER_KEYS = ("draftData", "literatureReviewData", "dataObservationData", "dataAndObservationsData")
+
+def project_payload(project: Dict[str, Any]) -> Dict[str, Any]:
+    """Return the project's data dict whether given a full project file or just its data."""
+    data = project.get("data")
+    return data if isinstance(data, dict) else project
+
+def draft_containers(project: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Return every non-empty draft container found in the project, without duplicates."""
+    data = project_payload(project)
+    containers = []
+    seen = set()
+    for source in (data, project):
+        for key in DRAFT_CONTAINER_KEYS:
+            container = source.get(key)
+            if isinstance(container, dict) and id(container) not in seen:
+                seen.add(id(container))
+                containers.append(container)
+    return containers
+
+def content_hash(value: Any) -> str:
+    """Stable SHA-256 of a string or JSON-serializable value."""
+    if not isinstance(value, str):
+        value = json.dumps(value, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(value.encode("utf-8")).hexdigest()
+
+def response_text(response: Any) -> str:
+    """Responses are usually plain strings, but some builders store dicts."""
+    if isinstance(response, str):
+        return response
+    if isinstance(response, dict):
+        for field in ("response", "content", "text", "prose_content"):
+            if isinstance(response.get(field), str):
+                return response[field]
+    return json.dumps(response, ensure_ascii=False) if response is not None else ""
+
+def citation_text(citation: Dict[str, Any]) -> str:
+    parts = [citation.get("apa") or citation.get("title") or citation.get("source") or ""]
+    if citation.get("description"):
+        parts.append(citation["description"])
+    return "\n".join(part for part in parts if part)
+
+def _document(doc_id: str, kind: str, text: str, **metadata) -> Dict[str, Any]:
+    return {
+        "id": doc_id,
+        "kind": kind,
+        "text": text.strip(),
+        "metadata": {key: value for key, value in metadata.items() if value is not None}
+    }
+
+def iter_project_documents(project: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    """
+    Walk a project file and yield one document per searchable unit:
+    outline sections/subsections/questions, draft responses, citation references
+    and master outline prose. Document ids are stable paths within the project.
+    """
+    data = project_payload(project)
+
+    for s_idx, section in enumerate(data.get("outlineData") or []):
+        yield _document(
+            f"outline/{s_idx}", "section",
+            f"{section.get('section_title', '')}\n{section.get('section_context', '')}",
+            section_index=s_idx, section_title=section.get("section_title")
+        )
+        for ss_idx, subsection in enumerate(section.get("subsections") or []):
+            yield _document(
+                f"outline/{s_idx}/{ss_idx}", "subsection",
+                f"{subsection.get('subsection_title', '')}\n{subsection.get('subsection_context', '')}",
+                section_index=s_idx, subsection_index=ss_idx,
+                section_title=section.get("section_title"),
+                subsection_title=subsection.get("subsection_title")
+            )
+            for q_idx, question in enumerate(subsection.get("questions") or []):
+                yield _document(
+                    f"outline/{s_idx}/{ss_idx}/{q_idx}", "question",
+                    question.get("question", "") if isinstance(question, dict) else str(question),
+                    section_index=s_idx, subsection_index=ss_idx, question_index=q_idx,
+                    key=f"{s_idx}-{ss_idx}-{q_idx}",
+                    subsection_title=subsection.get("subsection_title")
+                )
+
+    seen_ids = set()
+    for container in draft_containers(project):
+        for key, responses in (container.get("responses") or {}).items():
+            if not isinstance(responses, list):
+                responses = [responses]
+            for r_idx, response in enumerate(responses):
+                doc_id = f"responses/{key}/{r_idx}"
+                if doc_id in seen_ids:
+                    continue
+                seen_ids.add(doc_id)
+                yield _document(doc_id, "response", response_text(response), key=key, response_index=r_idx)
+
+        for key, references in (container.get("citationReferenceMap") or {}).items():
+            for ref_idx, reference in (references or {}).items():
+                doc_id = f"citations/{key}/{ref_idx}"
+                citation = (reference or {}).get("citation") or {}
+                if doc_id in seen_ids or not citation:
+                    continue
+                seen_ids.add(doc_id)
+                yield _document(
+                    doc_id, "citation", citation_text(citation),
+                    key=key, reference_number=reference.get("referenceNumber"), apa=citation.get("apa")
+                )
+
+        for m_idx, master in enumerate(container.get("masterOutlines") or []):
+            subsections = master.get("prose_subsections") or master.get("master_subsections") or []
+            for ss_idx, subsection in enumerate(subsections):
+                doc_id = f"master/{m_idx}/{ss_idx}"
+                if doc_id in seen_ids:
+                    continue
+                seen_ids.add(doc_id)
+                body = subsection.get("prose_content")
+                if not isinstance(body, str):
+                    body = "\n".join(
+                        value for field, value in subsection.items()
+                        if isinstance(value, str) and field not in ("subsection_title", "reference_path")
+                    )
+                yield _document(
+                    doc_id, "master_outline", f"{subsection.get('subsection_title', '')}\n{body}",
+                    section_index=master.get("section_index", m_idx), subsection_index=ss_idx,
+                    section_title=master.get("section_title"),
+                    subsection_title=subsection.get("subsection_title")
+                )
+
+    # Projects without a citationReferenceMap still carry citations on their outline questions
+    for s_idx, section in enumerate(data.get("outlineData") or []):
+        for ss_idx, subsection in enumerate(section.get("subsections") or []):
+            for q_idx, question in enumerate(subsection.get("questions") or []):
+                if not isinstance(question, dict):
+                    continue
+                key = f"{s_idx}-{ss_idx}-{q_idx}"
+                for c_idx, citation in enumerate(question.get("citations") or []):
+                    doc_id = f"citations/{key}/{c_idx}"
+                    if doc_id in seen_ids or not isinstance(citation, dict):
+                        continue
+                    seen_ids.add(doc_id)
+                    yield _document(
+                        doc_id, "citation", citation_text(citation),
+                        key=key, reference_number=c_idx + 1, apa=citation.get("apa")
+                    )
+
+def chunk_text(text: str, max_chars: int = 1500) -> List[str]:
+    """
+    Split text into chunks of at most max_chars, preferring paragraph and then
+    sentence boundaries so outline points and prose paragraphs stay intact.
+    """
+    text = (text or "").strip()
+    if not text:
+        return []
+    if len(text) <= max_chars:
+        return [text]
+
+    pieces: List[str] = []
+    for paragraph in re.split(r"\n\s*\n", text):
+        paragraph = paragraph.strip()
+        if len(paragraph) <= max_chars:
+            pieces.append(paragraph)
+            continue
+        # Oversized paragraph: fall back to sentences, then hard splits
+        for sentence in re.split(r"(?<=[.!?])\s+|\n", paragraph):
+            while len(sentence) > max_chars:
+                pieces.append(sentence[:max_chars])
+                sentence = sentence[max_chars:]
+            if sentence.strip():
+                pieces.append(sentence.strip())
+
+    chunks: List[str] = []
+    current = ""
+    for piece in pieces:
+        candidate = f"{current}\n\n{piece}" if current else piece
+        if len(candidate) <= max_chars:
+            current = candidate
+        else:
+            chunks.append(current)
+            current = piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+def iter_project_chunks(project: Dict[str, Any], max_chars: int = 1500, project_id: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """Yield chunked documents with a content hash, ready for indexing."""
+    project_id = project_id or project.get("id") or "default"
+    for document in iter_project_documents(project):
+        for c_idx, chunk in enumerate(chunk_text(document["text"], max_chars)):
+            source = {
+                "project_id": project_id,
+                "doc_path": document["id"],
+                "kind": document["kind"],
+                "chunk_index": c_idx,
+                "text": chunk,
+                **document["metadata"]
+            }
+            source["content_hash"] = content_hash(source)
+            yield {"id": f"{project_id}::{document['id']}::{c_idx}", "source": source}
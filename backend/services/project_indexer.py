@@ -0,0 +1,203 @@
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from services.data_dir import data_path
+from services.project_documents import iter_project_chunks
+import json
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INDEX = os.getenv("OPENSEARCH_PROJECT_INDEX", "report-generator-projects")
+
+INDEX_BODY = {
+    "settings": {"index": {"number_of_shards": 1}},
+    "mappings": {
+        "properties": {
+            "project_id": {"type": "keyword"},
+            "doc_path": {"type": "keyword"},
+            "kind": {"type": "keyword"},
+            "key": {"type": "keyword"},
+            "chunk_index": {"type": "integer"},
+            "content_hash": {"type": "keyword"},
+            "text": {"type": "text"},
+            "section_title": {"type": "text"},
+            "subsection_title": {"type": "text"},
+            "apa": {"type": "text"}
+        }
+    }
+}
+
+class IndexManifestStore:
+    """Remembers the content hash of every chunk last indexed for a project."""
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory or os.path.dirname(data_path("index_manifests", "_"))
+
+    def _path(self, project_id: str) -> str:
+        safe_id = "".join(ch if ch.isalnum() or ch in "-_" else "_" for ch in project_id)
+        return os.path.join(self.directory, f"{safe_id}.json")
+
+    def load(self, project_id: str) -> Dict[str, str]:
+        try:
+            with open(self._path(project_id), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def save(self, project_id: str, manifest: Dict[str, str]) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(project_id)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, path)
+
+class ProjectIndexer:
+    """
+    Bulk-indexes project documents into OpenSearch. Chunks are keyed by
+    content hash so re-saving a project only sends what changed; rejected
+    bulk items (HTTP 429) are retried with exponential backoff.
+    """
+
+    def __init__(
+        self,
+        client,
+        index_name: str = DEFAULT_INDEX,
+        batch_size: int = 200,
+        max_batch_bytes: int = 5 * 1024 * 1024,
+        max_retries: int = 5,
+        backoff_seconds: float = 1.0,
+        chunk_chars: int = 1500,
+        manifest_store: Optional[IndexManifestStore] = None,
+        sleep: Callable[[float], None] = time.sleep
+    ):
+        if client is None:
+            raise ValueError("An OpenSearch client is required for indexing")
+        self.client = client
+        self.index_name = index_name
+        self.batch_size = batch_size
+        self.max_batch_bytes = max_batch_bytes
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.chunk_chars = chunk_chars
+        self.manifest_store = manifest_store or IndexManifestStore()
+        self.sleep = sleep
+
+    def ensure_index(self) -> None:
+        if not self.client.indices.exists(index=self.index_name):
+            self.client.indices.create(index=self.index_name, body=INDEX_BODY)
+
+    def index_project(self, project: Dict[str, Any], project_id: Optional[str] = None, full_reindex: bool = False) -> Dict[str, Any]:
+        """Index a project file, sending only added/changed chunks and deleting removed ones."""
+        project_id = project_id or project.get("id")
+        if not project_id:
+            raise ValueError("Project id is required for indexing")
+
+        self.ensure_index()
+        previous = self.manifest_store.load(project_id)
+
+        current: Dict[str, str] = {}
+        actions: List[Tuple[Dict[str, Any], Optional[Dict[str, Any]], str, Optional[str]]] = []
+        for chunk in iter_project_chunks(project, self.chunk_chars, project_id):
+            chunk_hash = chunk["source"]["content_hash"]
+            current[chunk["id"]] = chunk_hash
+            if full_reindex or previous.get(chunk["id"]) != chunk_hash:
+                actions.append(({"index": {"_index": self.index_name, "_id": chunk["id"]}}, chunk["source"], chunk["id"], chunk_hash))
+
+        stale_ids = [doc_id for doc_id in previous if doc_id not in current]
+        for doc_id in stale_ids:
+            actions.append(({"delete": {"_index": self.index_name, "_id": doc_id}}, None, doc_id, None))
+
+        report = {
+            "project_id": project_id,
+            "index": self.index_name,
+            "total_chunks": len(current),
+            "indexed": 0,
+            "deleted": 0,
+            "unchanged": len(current) - (len(actions) - len(stale_ids)),
+            "failed": 0,
+            "batches": 0,
+            "retries": 0,
+            "errors": []
+        }
+
+        # Start from the previous manifest and record only confirmed writes,
+        # so a failed chunk is retried on the next save
+        manifest = dict(previous)
+        for batch in self._batches(actions):
+            succeeded, failed = self._send_batch(batch, report)
+            for _, _, doc_id, chunk_hash in succeeded:
+                if chunk_hash is None:
+                    manifest.pop(doc_id, None)
+                    report["deleted"] += 1
+                else:
+                    manifest[doc_id] = chunk_hash
+                    report["indexed"] += 1
+            for (_, _, doc_id, _), error in failed:
+                report["failed"] += 1
+                if len(report["errors"]) < 20:
+                    report["errors"].append({"id": doc_id, "error": error})
+
+        self.manifest_store.save(project_id, manifest)
+        logger.info(
+            f"Indexed project {project_id}: {report['indexed']} indexed, {report['deleted']} deleted, "
+            f"{report['unchanged']} unchanged, {report['failed']} failed in {report['batches']} batches"
+        )
+        return report
+
+    def _batches(self, actions):
+        batch, batch_bytes = [], 0
+        for action in actions:
+            size = len(json.dumps(action[1])) if action[1] is not None else 0
+            if batch and (len(batch) >= self.batch_size or batch_bytes + size > self.max_batch_bytes):
+                yield batch
+                batch, batch_bytes = [], 0
+            batch.append(action)
+            batch_bytes += size
+        if batch:
+            yield batch
+
+    def _send_batch(self, batch, report):
+        """Send one _bulk request, retrying throttled items until they succeed or retries run out."""
+        pending = batch
+        succeeded, failed = [], []
+        for attempt in range(self.max_retries + 1):
+            body = []
+            for header, source, _, _ in pending:
+                body.append(header)
+                if source is not None:
+                    body.append(source)
+
+            report["batches"] += 1
+            try:
+                response = self.client.bulk(body=body)
+            except Exception as e:
+                if getattr(e, "status_code", None) == 429 and attempt < self.max_retries:
+                    report["retries"] += 1
+                    self.sleep(self.backoff_seconds * (2 ** attempt))
+                    continue
+                failed.extend((action, str(e)) for action in pending)
+                return succeeded, failed
+
+            throttled = []
+            for action, item in zip(pending, response.get("items", [])):
+                result = next(iter(item.values()), {})
+                status = result.get("status", 500)
+                # A delete of an already-missing document is fine
+                if status < 300 or (status == 404 and action[1] is None):
+                    succeeded.append(action)
+                elif status == 429:
+                    throttled.append(action)
+                else:
+                    failed.append((action, str(result.get("error", f"status {status}"))))
+
+            if not throttled:
+                return succeeded, failed
+            if attempt < self.max_retries:
+                report["retries"] += 1
+                self.sleep(self.backoff_seconds * (2 ** attempt))
+            pending = throttled
+
+        failed.extend((action, "rejected: bulk queue full") for action in pending)
+        return succeeded, failed
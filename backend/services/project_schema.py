@@ -0,0 +1,156 @@
+from typing import Any, Dict, Iterator, Optional
+from services.project_documents import content_hash
+
+NORMALIZED_FORMAT = "report_generator.normalized"
+SCHEMA_VERSION = 1
+
+# Keys whose list value is an outline (a list of sections)
+OUTLINE_KEYS = ("outlineData", "outline")
+
+def ref(node_id: str) -> Dict[str, str]:
+    return {"$ref": node_id}
+
+def ref_id(value: Any) -> Optional[str]:
+    """Node id if value is a reference, else None."""
+    if isinstance(value, dict) and len(value) == 1 and isinstance(value.get("$ref"), str):
+        return value["$ref"]
+    return None
+
+def node_id(kind: str, body: Any) -> str:
+    # Bodies already hold child ids, so the id covers the whole subtree (Merkle-style)
+    return f"{kind}:{content_hash(body)[:24]}"
+
+class Normalizer:
+    """
+    Replaces outlines, outline nodes (sections, subsections, questions),
+    methodology objects and responses with {"$ref": id} references, collecting
+    each distinct node once in self.nodes. Ids are content hashes, so identical
+    subtrees anywhere in a project (or across projects) share one node.
+    """
+
+    def __init__(self, nodes: Optional[Dict[str, Any]] = None):
+        self.nodes: Dict[str, Any] = nodes if nodes is not None else {}
+
+    def _store(self, kind: str, body: Any) -> Dict[str, str]:
+        identifier = node_id(kind, body)
+        self.nodes.setdefault(identifier, body)
+        return ref(identifier)
+
+    def question(self, question: Any) -> Any:
+        return self._store("question", question) if isinstance(question, dict) else question
+
+    def subsection(self, subsection: Any) -> Any:
+        if not isinstance(subsection, dict):
+            return subsection
+        body = dict(subsection)
+        if isinstance(body.get("questions"), list):
+            body["questions"] = [self.question(question) for question in body["questions"]]
+        return self._store("subsection", body)
+
+    def section(self, section: Any) -> Any:
+        if not isinstance(section, dict):
+            return section
+        body = dict(section)
+        if isinstance(body.get("subsections"), list):
+            body["subsections"] = [self.subsection(subsection) for subsection in body["subsections"]]
+        return self._store("section", body)
+
+    def outline(self, outline: list) -> Dict[str, str]:
+        return self._store("outline", [self.section(section) for section in outline])
+
+    def response(self, response: Any) -> Dict[str, str]:
+        return self._store("response", response)
+
+    def methodology(self, methodology: dict) -> Dict[str, str]:
+        return self._store("methodology", self.value(methodology))
+
+    def value(self, value: Any) -> Any:
+        """Normalize an arbitrary part of a project file."""
+        if isinstance(value, list):
+            return [self.value(item) for item in value]
+        if not isinstance(value, dict):
+            return value
+        result = {}
+        for key, item in value.items():
+            if key in OUTLINE_KEYS and isinstance(item, list) and item:
+                result[key] = self.outline(item)
+            elif key == "methodology" and isinstance(item, dict):
+                result[key] = self.methodology(item)
+            elif key == "responses" and isinstance(item, dict):
+                result[key] = {response_key: self.response(response) for response_key, response in item.items()}
+            else:
+                result[key] = self.value(item)
+        return result
+
+def rehydrate(value: Any, nodes: Dict[str, Any], share: bool = False, _memo: Optional[Dict[str, Any]] = None) -> Any:
+    """
+    Replace references with node contents. With share=True every reference to
+    one node yields the same object (smaller in memory, but callers must treat
+    the result as read-only); by default each occurrence is an independent copy.
+    """
+    if share and _memo is None:
+        _memo = {}
+    identifier = ref_id(value)
+    if identifier is not None:
+        if identifier not in nodes:
+            raise KeyError(f"Missing node {identifier}")
+        if share:
+            if identifier not in _memo:
+                _memo[identifier] = rehydrate(nodes[identifier], nodes, share, _memo)
+            return _memo[identifier]
+        return rehydrate(nodes[identifier], nodes)
+    if isinstance(value, list):
+        return [rehydrate(item, nodes, share, _memo) for item in value]
+    if isinstance(value, dict):
+        return {key: rehydrate(item, nodes, share, _memo) for key, item in value.items()}
+    return value
+
+def iter_refs(value: Any) -> Iterator[str]:
+    """Yield every node id referenced directly by value (not following nodes)."""
+    identifier = ref_id(value)
+    if identifier is not None:
+        yield identifier
+    elif isinstance(value, list):
+        for item in value:
+            yield from iter_refs(item)
+    elif isinstance(value, dict):
+        for item in value.values():
+            yield from iter_refs(item)
+
+def reachable_nodes(value: Any, nodes: Dict[str, Any]) -> set:
+    """Ids of all nodes reachable from value."""
+    seen = set()
+    stack = list(iter_refs(value))
+    while stack:
+        identifier = stack.pop()
+        if identifier in seen or identifier not in nodes:
+            continue
+        seen.add(identifier)
+        stack.extend(iter_refs(nodes[identifier]))
+    return seen
+
+def normalize_project(project: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert a legacy project file into the normalized format."""
+    normalizer = Normalizer()
+    root = normalizer.value(project)
+    return {
+        "format": NORMALIZED_FORMAT,
+        "schema_version": SCHEMA_VERSION,
+        "root": root,
+        "nodes": normalizer.nodes
+    }
+
+def is_normalized(document: Any) -> bool:
+    return isinstance(document, dict) and document.get("format") == NORMALIZED_FORMAT
+
+def rehydrate_project(document: Dict[str, Any], share: bool = False) -> Dict[str, Any]:
+    """Rebuild the legacy project shape from a normalized document."""
+    if not is_normalized(document):
+        raise ValueError("Not a normalized project document")
+    if document.get("schema_version", SCHEMA_VERSION) > SCHEMA_VERSION:
+        raise ValueError(f"Unsupported normalized schema version {document['schema_version']}")
+    return rehydrate(document["root"], document["nodes"], share=share)
+
+def as_legacy_project(document: Dict[str, Any]) -> Dict[str, Any]:
+    """Accept either format and return a legacy project (imports, uploads)."""
+    return rehydrate_project(document) if is_normalized(document) else document
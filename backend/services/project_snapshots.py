@@ -0,0 +1,379 @@
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from services.project_schema import iter_refs, rehydrate
+from services.project_store import ProjectStore, assemble_project, get_project_store
+import hashlib
+import json
+import time
+import uuid
+
+DEFAULT_BRANCH = "main"
+
+class ProjectSnapshots:
+    """
+    Copy-on-write snapshots and branches of stored projects.
+
+    A snapshot is a list of record references. Record bodies and the outline,
+    methodology and response nodes they point to are content-addressed and
+    live once in a table shared by every snapshot of every project. Because a
+    node id covers its whole subtree, creating a snapshot only copies nodes
+    whose id is not already present, and an unchanged record costs a single
+    lookup. Large bodies are shared with the project store's blob store by
+    reference count. Branches are named pointers to a head snapshot.
+    """
+
+    def __init__(self, store: Optional[ProjectStore] = None):
+        self.store = store or get_project_store()
+        self.conn = self.store.conn
+        self.lock = self.store.lock
+        with self.lock:
+            self.conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS snapshot_nodes (
+                    node_id TEXT PRIMARY KEY,
+                    children TEXT NOT NULL,
+                    body TEXT,
+                    blob TEXT
+                );
+                CREATE TABLE IF NOT EXISTS snapshots (
+                    id TEXT PRIMARY KEY,
+                    project_id TEXT NOT NULL,
+                    branch TEXT NOT NULL,
+                    parent_id TEXT,
+                    message TEXT,
+                    created_at REAL NOT NULL,
+                    record_count INTEGER NOT NULL,
+                    new_nodes INTEGER NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS snapshots_by_project ON snapshots (project_id, created_at);
+                CREATE TABLE IF NOT EXISTS snapshot_records (
+                    snapshot_id TEXT NOT NULL,
+                    path TEXT NOT NULL,
+                    kind TEXT NOT NULL,
+                    parent TEXT,
+                    position INTEGER,
+                    node_id TEXT NOT NULL,
+                    PRIMARY KEY (snapshot_id, path)
+                );
+                CREATE TABLE IF NOT EXISTS snapshot_branches (
+                    project_id TEXT NOT NULL,
+                    name TEXT NOT NULL,
+                    head TEXT,
+                    created_at REAL NOT NULL,
+                    PRIMARY KEY (project_id, name)
+                );
+                """
+            )
+            self.conn.commit()
+
+    # --- nodes ------------------------------------------------------------
+    def _has_node(self, identifier: str) -> bool:
+        return self.conn.execute("SELECT 1 FROM snapshot_nodes WHERE node_id = ?", (identifier,)).fetchone() is not None
+
+    def _insert_node(self, identifier: str, children: List[str], body: Optional[str], blob: Optional[str]) -> None:
+        if blob:
+            self.store.blobs.incref(blob)
+        self.conn.execute(
+            "INSERT INTO snapshot_nodes (node_id, children, body, blob) VALUES (?, ?, ?, ?)",
+            (identifier, json.dumps(children), body, blob)
+        )
+
+    def _copy_nodes(self, project_id: str, identifiers: Iterable[str]) -> int:
+        """Copy store nodes (and their subtrees) that snapshots do not have yet."""
+        copied = 0
+        stack = list(identifiers)
+        while stack:
+            identifier = stack.pop()
+            if self._has_node(identifier):
+                # Ids are content hashes of bodies holding child ids: the whole subtree is present
+                continue
+            row = self.conn.execute(
+                "SELECT children, body, blob FROM nodes WHERE project_id = ? AND node_id = ?", (project_id, identifier)
+            ).fetchone()
+            if row is None:
+                raise KeyError(f"Missing node {identifier}")
+            children = json.loads(row[0])
+            self._insert_node(identifier, children, row[1], row[2])
+            copied += 1
+            stack.extend(children)
+        return copied
+
+    def _record_node(self, project_id: str, body: Optional[str], blob: Optional[str]) -> Tuple[str, int]:
+        """Node id for a stored record body, copying it and anything it references if new."""
+        digest = blob or hashlib.sha256(body.encode("utf-8")).hexdigest()
+        identifier = f"record:{digest[:24]}"
+        if self._has_node(identifier):
+            return identifier, 0
+        children = sorted(set(iter_refs(self.store._decode(body, blob))))
+        copied = self._copy_nodes(project_id, children)
+        self._insert_node(identifier, children, body, blob)
+        return identifier, copied + 1
+
+    def _load_nodes(self, identifiers: Iterable[str]) -> Dict[str, Any]:
+        nodes: Dict[str, Any] = {}
+        pending = set(identifiers)
+        while pending:
+            batch = list(pending)[:500]
+            pending.difference_update(batch)
+            for identifier, children, body, blob in self.conn.execute(
+                f"SELECT node_id, children, body, blob FROM snapshot_nodes WHERE node_id IN ({','.join('?' * len(batch))})",
+                batch
+            ):
+                nodes[identifier] = self.store._decode(body, blob)
+                pending.update(child for child in json.loads(children) if child not in nodes)
+        return nodes
+
+    def _reachable(self, identifiers: Iterable[str], stop: Set[str] = frozenset()) -> Set[str]:
+        """Node ids reachable from identifiers, not descending into ids in stop."""
+        seen: Set[str] = set()
+        pending = {identifier for identifier in identifiers if identifier not in stop}
+        while pending:
+            batch = list(pending)[:500]
+            pending.difference_update(batch)
+            seen.update(batch)
+            for (children,) in self.conn.execute(
+                f"SELECT children FROM snapshot_nodes WHERE node_id IN ({','.join('?' * len(batch))})", batch
+            ):
+                pending.update(child for child in json.loads(children) if child not in seen and child not in stop)
+        return seen
+
+    # --- snapshots --------------------------------------------------------
+    def _info(self, snapshot_id: str) -> Optional[Dict[str, Any]]:
+        row = self.conn.execute(
+            "SELECT id, project_id, branch, parent_id, message, created_at, record_count, new_nodes FROM snapshots WHERE id = ?",
+            (snapshot_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        keys = ("id", "project_id", "branch", "parent_id", "message", "created_at", "record_count", "new_nodes")
+        return dict(zip(keys, row))
+
+    def _records(self, snapshot_id: str) -> Dict[str, tuple]:
+        return {
+            row[0]: row[1:]
+            for row in self.conn.execute(
+                "SELECT path, kind, parent, position, node_id FROM snapshot_records WHERE snapshot_id = ?", (snapshot_id,)
+            )
+        }
+
+    def _head(self, project_id: str, branch: str) -> Optional[tuple]:
+        return self.conn.execute(
+            "SELECT head FROM snapshot_branches WHERE project_id = ? AND name = ?", (project_id, branch)
+        ).fetchone()
+
+    def create_snapshot(self, project_id: str, branch: str = DEFAULT_BRANCH, message: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Snapshot the stored project onto branch (created if missing). Returns the
+        snapshot info with created=False when nothing changed since the branch head.
+        """
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT path, kind, parent, position, body, blob FROM records WHERE project_id = ?", (project_id,)
+            ).fetchall()
+            if not rows:
+                raise KeyError(project_id)
+            head = self._head(project_id, branch)
+            head_id = head[0] if head else None
+
+            records = {}
+            new_nodes = 0
+            for path, kind, parent, position, body, blob in rows:
+                identifier, copied = self._record_node(project_id, body, blob)
+                records[path] = (kind, parent, position, identifier)
+                new_nodes += copied
+            if head_id and records == self._records(head_id):
+                self.conn.commit()
+                return dict(self._info(head_id), created=False)
+
+            snapshot_id = uuid.uuid4().hex[:16]
+            now = time.time()
+            self.conn.execute(
+                "INSERT INTO snapshots (id, project_id, branch, parent_id, message, created_at, record_count, new_nodes) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (snapshot_id, project_id, branch, head_id, message, now, len(records), new_nodes)
+            )
+            self.conn.executemany(
+                "INSERT INTO snapshot_records (snapshot_id, path, kind, parent, position, node_id) VALUES (?, ?, ?, ?, ?, ?)",
+                [(snapshot_id, path, *record) for path, record in records.items()]
+            )
+            self.conn.execute(
+                "INSERT INTO snapshot_branches (project_id, name, head, created_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (project_id, name) DO UPDATE SET head = excluded.head",
+                (project_id, branch, snapshot_id, now)
+            )
+            self.conn.commit()
+            return dict(self._info(snapshot_id), created=True)
+
+    def get_snapshot_info(self, snapshot_id: str) -> Optional[Dict[str, Any]]:
+        with self.lock:
+            return self._info(snapshot_id)
+
+    def list_snapshots(self, project_id: str, branch: Optional[str] = None) -> List[Dict[str, Any]]:
+        """All snapshots of a project, newest first; with branch, that branch's history from its head."""
+        with self.lock:
+            if branch is None:
+                ids = [row[0] for row in self.conn.execute(
+                    "SELECT id FROM snapshots WHERE project_id = ? ORDER BY created_at DESC", (project_id,)
+                )]
+                return [self._info(snapshot_id) for snapshot_id in ids]
+            head = self._head(project_id, branch)
+            if head is None:
+                raise KeyError(branch)
+            history = []
+            snapshot_id = head[0]
+            while snapshot_id:
+                info = self._info(snapshot_id)
+                history.append(info)
+                snapshot_id = info["parent_id"]
+            return history
+
+    def load_snapshot(self, snapshot_id: str) -> Optional[Dict[str, Any]]:
+        """The project file as it was when the snapshot was taken."""
+        with self.lock:
+            records = self._records(snapshot_id)
+            if not records:
+                return None
+            nodes = self._load_nodes(record[3] for record in records.values())
+        return assemble_project([
+            {"path": path, "kind": kind, "parent": parent, "position": position,
+             "value": rehydrate(nodes[identifier], nodes)}
+            for path, (kind, parent, position, identifier) in records.items()
+        ])
+
+    def restore(self, snapshot_id: str) -> Dict[str, Any]:
+        """Write a snapshot back as the project's working copy; only records that differ are rewritten."""
+        project = self.load_snapshot(snapshot_id)
+        if project is None:
+            raise KeyError(snapshot_id)
+        return self.store.save_project(project)
+
+    def diff(self, from_id: str, to_id: str) -> Dict[str, Any]:
+        """
+        Records added, removed and changed between two snapshots, plus the nodes
+        (sections, subsections, questions, responses...) that exist only on one side.
+        Unchanged records are skipped by id, so the cost follows the size of the
+        records that changed rather than the project.
+        """
+        with self.lock:
+            if self._info(from_id) is None or self._info(to_id) is None:
+                raise KeyError(from_id if self._info(from_id) is None else to_id)
+            old, new = self._records(from_id), self._records(to_id)
+            changed = sorted(path for path in old.keys() & new.keys() if old[path][3] != new[path][3])
+            old_roots = {old[path][3] for path in changed} | {old[path][3] for path in old.keys() - new.keys()}
+            new_roots = {new[path][3] for path in changed} | {new[path][3] for path in new.keys() - old.keys()}
+            # Walk each side stopping at nodes the other side also reaches
+            unchanged = {record[3] for path, record in new.items() if path in old and old[path][3] == record[3]}
+            old_side = self._reachable(old_roots, unchanged)
+            new_side = self._reachable(new_roots, unchanged)
+            added_nodes, removed_nodes = new_side - old_side, old_side - new_side
+
+        def by_kind(identifiers):
+            counts: Dict[str, int] = {}
+            for identifier in identifiers:
+                kind = identifier.split(":", 1)[0]
+                if kind != "record":
+                    counts[kind] = counts.get(kind, 0) + 1
+            return counts
+
+        return {
+            "from_id": from_id,
+            "to_id": to_id,
+            "added": sorted(new.keys() - old.keys()),
+            "removed": sorted(old.keys() - new.keys()),
+            "changed": [{"path": path, "kind": new[path][0]} for path in changed],
+            "unchanged": len(unchanged),
+            "nodes_added": by_kind(added_nodes),
+            "nodes_removed": by_kind(removed_nodes)
+        }
+
+    def delete_snapshot(self, snapshot_id: str) -> bool:
+        """Remove one snapshot; its children and any branch pointing at it move to its parent."""
+        with self.lock:
+            info = self._info(snapshot_id)
+            if info is None:
+                return False
+            self.conn.execute("UPDATE snapshots SET parent_id = ? WHERE parent_id = ?", (info["parent_id"], snapshot_id))
+            self.conn.execute("UPDATE snapshot_branches SET head = ? WHERE head = ?", (info["parent_id"], snapshot_id))
+            self.conn.execute("DELETE FROM snapshot_records WHERE snapshot_id = ?", (snapshot_id,))
+            self.conn.execute("DELETE FROM snapshots WHERE id = ?", (snapshot_id,))
+            self.conn.commit()
+            self.collect_garbage()
+            return True
+
+    # --- branches ---------------------------------------------------------
+    def list_branches(self, project_id: str) -> List[Dict[str, Any]]:
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT name, head, created_at FROM snapshot_branches WHERE project_id = ? ORDER BY created_at", (project_id,)
+            ).fetchall()
+        return [{"name": name, "head": head, "created_at": created_at} for name, head, created_at in rows]
+
+    def create_branch(self, project_id: str, name: str, from_snapshot: Optional[str] = None,
+                      from_branch: str = DEFAULT_BRANCH) -> Dict[str, Any]:
+        """Start a branch at a snapshot (default: the head of from_branch). Nothing is copied."""
+        with self.lock:
+            if self._head(project_id, name) is not None:
+                raise ValueError(f"Branch {name} already exists")
+            if from_snapshot is None:
+                head = self._head(project_id, from_branch)
+                if head is None or head[0] is None:
+                    raise KeyError(from_branch)
+                from_snapshot = head[0]
+            info = self._info(from_snapshot)
+            if info is None or info["project_id"] != project_id:
+                raise KeyError(from_snapshot)
+            now = time.time()
+            self.conn.execute(
+                "INSERT INTO snapshot_branches (project_id, name, head, created_at) VALUES (?, ?, ?, ?)",
+                (project_id, name, from_snapshot, now)
+            )
+            self.conn.commit()
+        return {"name": name, "head": from_snapshot, "created_at": now}
+
+    def delete_branch(self, project_id: str, name: str) -> int:
+        """Drop a branch and the snapshots no other branch can reach; returns how many were deleted."""
+        with self.lock:
+            if self._head(project_id, name) is None:
+                raise KeyError(name)
+            self.conn.execute("DELETE FROM snapshot_branches WHERE project_id = ? AND name = ?", (project_id, name))
+            parents = dict(self.conn.execute("SELECT id, parent_id FROM snapshots WHERE project_id = ?", (project_id,)))
+            keep = set()
+            for (snapshot_id,) in self.conn.execute(
+                "SELECT head FROM snapshot_branches WHERE project_id = ?", (project_id,)
+            ).fetchall():
+                while snapshot_id and snapshot_id not in keep:
+                    keep.add(snapshot_id)
+                    snapshot_id = parents.get(snapshot_id)
+            doomed = [snapshot_id for snapshot_id in parents if snapshot_id not in keep]
+            for snapshot_id in doomed:
+                self.conn.execute("DELETE FROM snapshot_records WHERE snapshot_id = ?", (snapshot_id,))
+                self.conn.execute("DELETE FROM snapshots WHERE id = ?", (snapshot_id,))
+            self.conn.commit()
+            if doomed:
+                self.collect_garbage()
+            return len(doomed)
+
+    def collect_garbage(self) -> int:
+        """Delete snapshot nodes no snapshot references and release their blobs."""
+        with self.lock:
+            roots = {row[0] for row in self.conn.execute("SELECT DISTINCT node_id FROM snapshot_records")}
+            reachable = self._reachable(roots)
+            garbage = [
+                (identifier, blob)
+                for identifier, blob in self.conn.execute("SELECT node_id, blob FROM snapshot_nodes").fetchall()
+                if identifier not in reachable
+            ]
+            for identifier, blob in garbage:
+                self.conn.execute("DELETE FROM snapshot_nodes WHERE node_id = ?", (identifier,))
+                if blob:
+                    self.store.blobs.decref(blob)
+            self.conn.commit()
+            self.store.blobs.gc()
+            return len(garbage)
+
+_snapshots: Optional[ProjectSnapshots] = None
+
+def get_project_snapshots() -> ProjectSnapshots:
+    global _snapshots
+    if _snapshots is None:
+        _snapshots = ProjectSnapshots()
+    return _snapshots
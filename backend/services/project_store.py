@@ -0,0 +1,531 @@
+from typing import Any, Dict, List, Optional, Tuple
+from services.blob_store import ContentAddressedBlobStore
+from services.data_dir import data_path
+from services.project_documents import DRAFT_CONTAINER_KEYS, content_hash
+from services.project_schema import Normalizer, iter_refs, rehydrate
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+# Bodies larger than this go to the compressed blob store instead of SQLite
+INLINE_LIMIT = 1024
+
+_CONTAINERS = "|".join(DRAFT_CONTAINER_KEYS)
+_PATH_KINDS = [
+    ("section", re.compile(r"^data/outlineData/(\d+)$")),
+    ("subsection", re.compile(r"^data/outlineData/(\d+)/subsections/(\d+)$")),
+    ("draft", re.compile(rf"^(?:data/)?(?:{_CONTAINERS})$")),
+    ("response", re.compile(rf"^(?:data/)?(?:{_CONTAINERS})/responses/[^/]+$")),
+]
+
+def classify_path(path: str) -> Tuple[str, Optional[str], Optional[int]]:
+    """
+    Return (kind, parent path, list position) for a record path. Paths are JSON
+    pointers into the legacy project file without the leading slash, e.g.
+    "data/outlineData/2/subsections/0" or "data/draftData/responses/2-0-1".
+    """
+    if path == "":
+        return "project", None, None
+    for kind, pattern in _PATH_KINDS:
+        match = pattern.match(path)
+        if not match:
+            continue
+        if kind == "section":
+            return kind, "data/outlineData", int(match.group(1))
+        if kind == "subsection":
+            return kind, path.rsplit("/subsections/", 1)[0], int(match.group(2))
+        if kind == "draft":
+            return kind, "", None
+        return kind, path.rsplit("/responses/", 1)[0], None
+    raise ValueError(f"Unsupported project record path: {path}")
+
+def split_project(project: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Break a legacy project file into records: the project shell, one record per
+    outline section and subsection, one per draft container and one per response.
+    """
+    root = {key: value for key, value in project.items() if key != "data"}
+    data = project.get("data")
+    records: List[Dict[str, Any]] = []
+
+    if isinstance(data, dict):
+        data_rest = dict(data)
+        sections = data.get("outlineData")
+        if isinstance(sections, list) and sections:
+            del data_rest["outlineData"]
+            for s_idx, section in enumerate(sections):
+                section_path = f"data/outlineData/{s_idx}"
+                subsections = section.get("subsections") if isinstance(section, dict) else None
+                if isinstance(subsections, list) and subsections:
+                    section = {key: value for key, value in section.items() if key != "subsections"}
+                    for ss_idx, subsection in enumerate(subsections):
+                        records.append({"path": f"{section_path}/subsections/{ss_idx}", "value": subsection})
+                records.append({"path": section_path, "value": section})
+        root["data"] = data_rest
+
+    for prefix, source in (("data/", root.get("data") or {}), ("", root)):
+        for key in DRAFT_CONTAINER_KEYS:
+            container = source.get(key)
+            if not isinstance(container, dict):
+                continue
+            container_path = f"{prefix}{key}"
+            responses = container.get("responses")
+            if isinstance(responses, dict) and responses:
+                container = {k: v for k, v in container.items() if k != "responses"}
+                for position, (response_key, response) in enumerate(responses.items()):
+                    records.append({"path": f"{container_path}/responses/{response_key}", "value": response, "position": position})
+            del source[key]
+            records.append({"path": container_path, "value": container})
+
+    records.append({"path": "", "value": root})
+    for record in records:
+        kind, parent, position = classify_path(record["path"])
+        record.update(kind=kind, parent=parent)
+        record.setdefault("position", position)
+    return records
+
+def assemble_project(records: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Inverse of split_project: rebuild the legacy project file from its records."""
+    by_kind: Dict[str, List[Dict[str, Any]]] = {}
+    for record in records:
+        by_kind.setdefault(record["kind"], []).append(record)
+    if not by_kind.get("project"):
+        return None
+
+    project = by_kind["project"][0]["value"]
+    order = lambda record: (record["position"] if record["position"] is not None else 0, record["path"])
+
+    containers = {}
+    for record in by_kind.get("draft", []):
+        container = record["value"]
+        containers[record["path"]] = container
+        if record["path"].startswith("data/"):
+            project.setdefault("data", {})[record["path"][5:]] = container
+        else:
+            project[record["path"]] = container
+    for record in sorted(by_kind.get("response", []), key=order):
+        container = containers.get(record["parent"])
+        if container is not None:
+            container.setdefault("responses", {})[record["path"].rsplit("/responses/", 1)[1]] = record["value"]
+
+    sections = {}
+    for record in sorted(by_kind.get("section", []), key=order):
+        sections[record["path"]] = record["value"]
+        project.setdefault("data", {}).setdefault("outlineData", []).append(record["value"])
+    for record in sorted(by_kind.get("subsection", []), key=order):
+        section = sections.get(record["parent"])
+        if section is not None:
+            section.setdefault("subsections", []).append(record["value"])
+    return project
+
+class ProjectStore:
+    """
+    Server-side project storage. Project metadata and small records live in SQLite;
+    large bodies go to a content-addressed, compressed blob store shared by all
+    projects, so regenerated output identical to earlier output is stored once.
+    Every section, subsection
+    and response is a separately addressable record, so a single response save
+    touches one row.
+
+    Record bodies are kept in the normalized form (services.project_schema):
+    outline nodes, methodology and responses are stored once per project in the
+    nodes table and referenced by id, so duplicated subtrees such as
+    draftData.outline cost only a reference.
+    """
+
+    def __init__(self, db_path: Optional[str] = None, blob_root: Optional[str] = None, inline_limit: int = INLINE_LIMIT):
+        self.db_path = db_path or data_path("projects.sqlite3")
+        self.inline_limit = inline_limit
+        self.lock = threading.RLock()
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        # Blob references live in this database so they commit with the rows holding them
+        self.blobs = ContentAddressedBlobStore(
+            blob_root or os.path.dirname(data_path("blobs", "_")), conn=self.conn, lock=self.lock
+        )
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS projects (
+                id TEXT PRIMARY KEY,
+                name TEXT,
+                description TEXT,
+                created_at TEXT,
+                updated_at TEXT,
+                stored_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS records (
+                project_id TEXT NOT NULL,
+                path TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                parent TEXT,
+                position INTEGER,
+                hash TEXT NOT NULL,
+                body TEXT,
+                blob TEXT,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (project_id, path)
+            );
+            CREATE INDEX IF NOT EXISTS records_by_parent ON records (project_id, parent, position);
+            CREATE TABLE IF NOT EXISTS nodes (
+                project_id TEXT NOT NULL,
+                node_id TEXT NOT NULL,
+                children TEXT NOT NULL,
+                body TEXT,
+                blob TEXT,
+                refs INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (project_id, node_id)
+            );
+            """
+        )
+        self.conn.commit()
+        if "refs" not in {row[1] for row in self.conn.execute("PRAGMA table_info(nodes)")}:
+            # Stores from before reference counting: add the column and count once
+            self.conn.execute("ALTER TABLE nodes ADD COLUMN refs INTEGER NOT NULL DEFAULT 0")
+            self.conn.commit()
+            for (project_id,) in self.conn.execute("SELECT DISTINCT project_id FROM nodes").fetchall():
+                self.collect_garbage(project_id)
+
+    # --- record bodies ----------------------------------------------------
+    def _encode(self, value: Any) -> Tuple[Optional[str], Optional[str]]:
+        """Inline JSON for small values; otherwise a blob hash (taking one reference)."""
+        body = json.dumps(value, ensure_ascii=False)
+        if len(body) <= self.inline_limit:
+            return body, None
+        return None, self.blobs.put(body.encode("utf-8"))
+
+    def _decode(self, body: Optional[str], blob: Optional[str]) -> Any:
+        if blob:
+            data = self.blobs.get(blob)
+            return json.loads(data.decode("utf-8")) if data is not None else None
+        return json.loads(body) if body is not None else None
+
+    def _row_to_record(self, row, include_body: bool = True) -> Dict[str, Any]:
+        path, kind, parent, position, record_hash, body, blob, updated_at = row
+        record = {"path": path, "kind": kind, "parent": parent, "position": position, "hash": record_hash, "updated_at": updated_at}
+        if include_body:
+            record["value"] = self._decode(body, blob)
+        return record
+
+    def _load_nodes(self, project_id: str, values: List[Any]) -> Dict[str, Any]:
+        """Fetch every node reachable from the given normalized values."""
+        nodes: Dict[str, Any] = {}
+        pending = {identifier for value in values for identifier in iter_refs(value)}
+        while pending:
+            batch = list(pending)[:500]
+            pending.difference_update(batch)
+            for identifier, children, body, blob in self.conn.execute(
+                f"SELECT node_id, children, body, blob FROM nodes WHERE project_id = ? AND node_id IN ({','.join('?' * len(batch))})",
+                [project_id, *batch]
+            ):
+                nodes[identifier] = self._decode(body, blob)
+                pending.update(child for child in json.loads(children) if child not in nodes)
+        return nodes
+
+    def _resolve(self, project_id: str, records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Rehydrate normalized record values into the legacy shape."""
+        with_values = [record for record in records if "value" in record]
+        nodes = self._load_nodes(project_id, [record["value"] for record in with_values])
+        for record in with_values:
+            record["value"] = rehydrate(record["value"], nodes)
+        return records
+
+    def _normalize(self, normalizer: Normalizer, record: Dict[str, Any]) -> Any:
+        value = record["value"]
+        if record["kind"] == "section":
+            return normalizer.section(value)
+        if record["kind"] == "subsection":
+            return normalizer.subsection(value)
+        if record["kind"] == "response":
+            return normalizer.response(value)
+        return normalizer.value(value)
+
+    # --- node references ----------------------------------------------------
+    # Each node counts one reference per record and per node whose value points at it
+    def _incref_nodes(self, project_id: str, identifiers: List[str]) -> None:
+        self.conn.executemany(
+            "UPDATE nodes SET refs = refs + 1 WHERE project_id = ? AND node_id = ?",
+            [(project_id, identifier) for identifier in identifiers]
+        )
+
+    def _decref_nodes(self, project_id: str, identifiers: List[str]) -> int:
+        """Drop references; nodes left unreferenced are deleted and release their own children."""
+        pending = list(identifiers)
+        deleted = 0
+        while pending:
+            identifier = pending.pop()
+            row = self.conn.execute(
+                "SELECT refs, children, blob FROM nodes WHERE project_id = ? AND node_id = ?", (project_id, identifier)
+            ).fetchone()
+            if row is None:
+                continue
+            refs, children, blob = row
+            if refs > 1:
+                self.conn.execute(
+                    "UPDATE nodes SET refs = refs - 1 WHERE project_id = ? AND node_id = ?", (project_id, identifier)
+                )
+                continue
+            self.conn.execute("DELETE FROM nodes WHERE project_id = ? AND node_id = ?", (project_id, identifier))
+            if blob:
+                self.blobs.decref(blob)
+            pending.extend(json.loads(children))
+            deleted += 1
+        return deleted
+
+    def _write_nodes(self, project_id: str, nodes: Dict[str, Any]) -> None:
+        identifiers = list(nodes)
+        existing = set()
+        for start in range(0, len(identifiers), 500):
+            batch = identifiers[start:start + 500]
+            existing.update(row[0] for row in self.conn.execute(
+                f"SELECT node_id FROM nodes WHERE project_id = ? AND node_id IN ({','.join('?' * len(batch))})",
+                [project_id, *batch]
+            ))
+        rows, children = [], []
+        for identifier in identifiers:
+            if identifier in existing:
+                continue
+            body, blob = self._encode(nodes[identifier])
+            child_ids = sorted(set(iter_refs(nodes[identifier])))
+            children.extend(child_ids)
+            rows.append((project_id, identifier, json.dumps(child_ids), body, blob))
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO nodes (project_id, node_id, children, body, blob) VALUES (?, ?, ?, ?, ?)", rows
+        )
+        self._incref_nodes(project_id, children)
+
+    def collect_garbage(self, project_id: str) -> int:
+        """
+        Full sweep: delete nodes no longer reachable from any record of the
+        project and recount references. Saves keep the counts current, so this
+        only repairs stores written before counting (or by hand).
+        """
+        with self.lock:
+            roots = set()
+            for body, blob in self.conn.execute("SELECT body, blob FROM records WHERE project_id = ?", (project_id,)):
+                roots.update(iter_refs(self._decode(body, blob)))
+            children = {
+                identifier: json.loads(child_ids)
+                for identifier, child_ids in self.conn.execute(
+                    "SELECT node_id, children FROM nodes WHERE project_id = ?", (project_id,)
+                )
+            }
+            reachable = set()
+            stack = list(roots)
+            while stack:
+                identifier = stack.pop()
+                if identifier in reachable or identifier not in children:
+                    continue
+                reachable.add(identifier)
+                stack.extend(children[identifier])
+            garbage = [identifier for identifier in children if identifier not in reachable]
+            counts = {identifier: 0 for identifier in reachable}
+            for body, blob in self.conn.execute("SELECT body, blob FROM records WHERE project_id = ?", (project_id,)):
+                for identifier in set(iter_refs(self._decode(body, blob))):
+                    if identifier in counts:
+                        counts[identifier] += 1
+            for identifier in reachable:
+                for child in children[identifier]:
+                    if child in counts:
+                        counts[child] += 1
+            self.conn.executemany(
+                "UPDATE nodes SET refs = ? WHERE project_id = ? AND node_id = ?",
+                [(count, project_id, identifier) for identifier, count in counts.items()]
+            )
+            for identifier in garbage:
+                blob = self.conn.execute(
+                    "SELECT blob FROM nodes WHERE project_id = ? AND node_id = ?", (project_id, identifier)
+                ).fetchone()[0]
+                self.conn.execute("DELETE FROM nodes WHERE project_id = ? AND node_id = ?", (project_id, identifier))
+                if blob:
+                    self.blobs.decref(blob)
+            self.conn.commit()
+            self.blobs.gc()
+            return len(garbage)
+
+    def _write_records(self, project_id: str, records: List[Dict[str, Any]], now: float) -> None:
+        normalizer = Normalizer()
+        released = self._release_records(project_id, [record["path"] for record in records])
+        rows, refs = [], []
+        for record in records:
+            value = self._normalize(normalizer, record)
+            refs.extend(set(iter_refs(value)))
+            body, blob = self._encode(value)
+            rows.append((project_id, record["path"], record["kind"], record["parent"], record["position"],
+                         record["hash"], body, blob, now))
+        self._write_nodes(project_id, normalizer.nodes)
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO records (project_id, path, kind, parent, position, hash, body, blob, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            rows
+        )
+        # Take the new references before dropping the old ones so shared nodes survive the swap
+        self._incref_nodes(project_id, refs)
+        self._decref_nodes(project_id, released)
+
+    def _release_records(self, project_id: str, paths: List[str]) -> List[str]:
+        """
+        Drop the blob references held by the records at paths (before they are
+        replaced or deleted) and return the node references their bodies hold.
+        """
+        refs = []
+        for start in range(0, len(paths), 500):
+            batch = paths[start:start + 500]
+            for body, blob in self.conn.execute(
+                f"SELECT body, blob FROM records WHERE project_id = ? AND path IN ({','.join('?' * len(batch))})",
+                [project_id, *batch]
+            ).fetchall():
+                refs.extend(set(iter_refs(self._decode(body, blob))))
+                if blob:
+                    self.blobs.decref(blob)
+        return refs
+
+    def _delete_paths(self, project_id: str, paths: List[str]) -> None:
+        released = self._release_records(project_id, paths)
+        for start in range(0, len(paths), 500):
+            batch = paths[start:start + 500]
+            self.conn.execute(
+                f"DELETE FROM records WHERE project_id = ? AND path IN ({','.join('?' * len(batch))})", [project_id, *batch]
+            )
+        self._decref_nodes(project_id, released)
+
+    def _touch(self, project_id: str, root: Optional[Dict[str, Any]], now: float) -> None:
+        if root is None:
+            self.conn.execute("UPDATE projects SET stored_at = ? WHERE id = ?", (now, project_id))
+            return
+        self.conn.execute(
+            "INSERT OR REPLACE INTO projects (id, name, description, created_at, updated_at, stored_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (project_id, root.get("name"), root.get("description"), root.get("createdAt"), root.get("updatedAt"), now)
+        )
+
+    # --- whole projects ---------------------------------------------------
+    def save_project(self, project: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Store a full project file. Only records whose content hash changed are
+        rewritten and records no longer present are deleted; nodes they alone
+        referenced are released by reference count, without reading the rest.
+        """
+        project_id = project.get("id")
+        if not project_id:
+            raise ValueError("Project id is required")
+        records = split_project(project)
+        for record in records:
+            record["hash"] = content_hash(record["value"])
+
+        with self.lock:
+            existing = dict(self.conn.execute("SELECT path, hash FROM records WHERE project_id = ?", (project_id,)).fetchall())
+            changed = [record for record in records if existing.get(record["path"]) != record["hash"]]
+            stale = sorted(set(existing) - {record["path"] for record in records})
+            now = time.time()
+            self._write_records(project_id, changed, now)
+            self._delete_paths(project_id, stale)
+            self._touch(project_id, records[-1]["value"], now)
+            self.conn.commit()
+            if changed or stale:
+                self.blobs.gc()
+        return {
+            "project_id": project_id,
+            "written": len(changed),
+            "deleted": len(stale),
+            "unchanged": len(records) - len(changed)
+        }
+
+    def list_projects(self) -> List[Dict[str, Any]]:
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT id, name, description, created_at, updated_at FROM projects ORDER BY stored_at DESC"
+            ).fetchall()
+        return [
+            {"id": row[0], "name": row[1], "description": row[2], "createdAt": row[3], "updatedAt": row[4]}
+            for row in rows
+        ]
+
+    def get_project(self, project_id: str) -> Optional[Dict[str, Any]]:
+        return assemble_project(self.list_records(project_id))
+
+    def delete_project(self, project_id: str) -> bool:
+        with self.lock:
+            paths = [row[0] for row in self.conn.execute("SELECT path FROM records WHERE project_id = ?", (project_id,))]
+            # Every node goes too, so there are no references to count down
+            for table in ("records", "nodes"):
+                for (blob,) in self.conn.execute(
+                    f"SELECT blob FROM {table} WHERE project_id = ? AND blob IS NOT NULL", (project_id,)
+                ).fetchall():
+                    self.blobs.decref(blob)
+            self.conn.execute("DELETE FROM records WHERE project_id = ?", (project_id,))
+            self.conn.execute("DELETE FROM nodes WHERE project_id = ?", (project_id,))
+            deleted = self.conn.execute("DELETE FROM projects WHERE id = ?", (project_id,)).rowcount
+            self.conn.commit()
+            self.blobs.gc()
+        return bool(deleted or paths)
+
+    # --- individual records -----------------------------------------------
+    def list_records(self, project_id: str, parent: Optional[str] = None, kind: Optional[str] = None,
+                     include_body: bool = True) -> List[Dict[str, Any]]:
+        query = "SELECT path, kind, parent, position, hash, body, blob, updated_at FROM records WHERE project_id = ?"
+        params: List[Any] = [project_id]
+        if parent is not None:
+            query += " AND parent = ?"
+            params.append(parent)
+        if kind is not None:
+            query += " AND kind = ?"
+            params.append(kind)
+        with self.lock:
+            rows = self.conn.execute(query + " ORDER BY parent, position, path", params).fetchall()
+            return self._resolve(project_id, [self._row_to_record(row, include_body) for row in rows])
+
+    def get_record(self, project_id: str, path: str) -> Optional[Dict[str, Any]]:
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT path, kind, parent, position, hash, body, blob, updated_at FROM records WHERE project_id = ? AND path = ?",
+                (project_id, path)
+            ).fetchone()
+            return self._resolve(project_id, [self._row_to_record(row)])[0] if row else None
+
+    def put_record(self, project_id: str, path: str, value: Any) -> Dict[str, Any]:
+        """Create or replace one record (e.g. a single response) without touching the rest of the project."""
+        kind, parent, position = classify_path(path)
+        with self.lock:
+            if kind != "project" and not self.conn.execute("SELECT 1 FROM projects WHERE id = ?", (project_id,)).fetchone():
+                raise KeyError(project_id)
+            current = self.conn.execute(
+                "SELECT position FROM records WHERE project_id = ? AND path = ?", (project_id, path)
+            ).fetchone()
+            if current:
+                position = current[0]
+            elif kind == "response":
+                last = self.conn.execute(
+                    "SELECT MAX(position) FROM records WHERE project_id = ? AND parent = ?", (project_id, parent)
+                ).fetchone()[0]
+                position = 0 if last is None else last + 1
+            record = {"path": path, "kind": kind, "parent": parent, "position": position,
+                      "hash": content_hash(value), "value": value}
+            now = time.time()
+            self._write_records(project_id, [record], now)
+            self._touch(project_id, value if kind == "project" else None, now)
+            self.conn.commit()
+        record["updated_at"] = now
+        return record
+
+    def delete_record(self, project_id: str, path: str) -> int:
+        """Delete a record and every record nested under it."""
+        if path == "":
+            raise ValueError("Use delete_project to remove a whole project")
+        with self.lock:
+            paths = [row[0] for row in self.conn.execute(
+                "SELECT path FROM records WHERE project_id = ? AND (path = ? OR substr(path, 1, ?) = ?)",
+                (project_id, path, len(path) + 1, f"{path}/")
+            )]
+            self._delete_paths(project_id, paths)
+            self._touch(project_id, None, time.time())
+            self.conn.commit()
+        return len(paths)
+
+_store: Optional[ProjectStore] = None
+
+def get_project_store() -> ProjectStore:
+    global _store
+    if _store is None:
+        _store = ProjectStore()
+    return _store
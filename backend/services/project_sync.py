@@ -0,0 +1,224 @@
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from services.json_patch import apply_patch
+from services.project_store import ProjectStore, get_project_store
+import json
+import re
+import threading
+import time
+
+# Fold the patch log into a stored snapshot after this many patches or bytes
+SNAPSHOT_EVERY = 50
+SNAPSHOT_BYTES = 512 * 1024
+
+class VersionConflict(Exception):
+    """The client's base version is not the current version."""
+
+    def __init__(self, current_version: int):
+        super().__init__(f"Project is at version {current_version}")
+        self.current_version = current_version
+
+def make_etag(project_id: str, version: int) -> str:
+    return f'"{project_id}-v{version}"'
+
+def parse_etag(value: Optional[str]) -> Optional[int]:
+    """Version from an If-Match value; accepts our ETags (weak or strong) or a bare number."""
+    if not value:
+        return None
+    match = re.search(r"-v(\d+)\"?$", value.strip()) or re.fullmatch(r"\s*(\d+)\s*", value)
+    return int(match.group(1)) if match else None
+
+class ProjectSync:
+    """
+    Versioned copies of projects for delta saves. Clients send RFC 6902 patches
+    against the version they last saw; each accepted patch is appended to a log
+    and bumps the version. Every SNAPSHOT_EVERY patches the current document is
+    written to the project store as a snapshot and the log is truncated.
+    Recently used documents are kept in memory so a patch does not re-read the project.
+    """
+
+    def __init__(self, store: Optional[ProjectStore] = None, cache_size: int = 8,
+                 snapshot_every: int = SNAPSHOT_EVERY, snapshot_bytes: int = SNAPSHOT_BYTES):
+        self.store = store or get_project_store()
+        self.snapshot_every = snapshot_every
+        self.snapshot_bytes = snapshot_bytes
+        self.cache_size = cache_size
+        self.cache: "OrderedDict[str, Tuple[int, Any]]" = OrderedDict()
+        self.lock = self.store.lock
+        with self.lock:
+            self.store.conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS sync_state (
+                    project_id TEXT PRIMARY KEY,
+                    version INTEGER NOT NULL,
+                    snapshot_version INTEGER NOT NULL,
+                    log_bytes INTEGER NOT NULL DEFAULT 0
+                );
+                CREATE TABLE IF NOT EXISTS sync_patches (
+                    project_id TEXT NOT NULL,
+                    version INTEGER NOT NULL,
+                    operations TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    PRIMARY KEY (project_id, version)
+                );
+                """
+            )
+            self.store.conn.commit()
+
+    def _state(self, project_id: str) -> Optional[Tuple[int, int, int]]:
+        return self.store.conn.execute(
+            "SELECT version, snapshot_version, log_bytes FROM sync_state WHERE project_id = ?", (project_id,)
+        ).fetchone()
+
+    def _remember(self, project_id: str, version: int, doc: Any) -> None:
+        self.cache[project_id] = (version, doc)
+        self.cache.move_to_end(project_id)
+        while len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+
+    def _load(self, project_id: str) -> Optional[Tuple[int, Any]]:
+        cached = self.cache.get(project_id)
+        state = self._state(project_id)
+        if cached and state and cached[0] == state[0]:
+            self.cache.move_to_end(project_id)
+            return cached
+        doc = self.store.get_project(project_id)
+        if doc is None:
+            return None
+        if state is None:
+            # Project saved through the plain store: start versioning from its current content
+            self.store.conn.execute(
+                "INSERT INTO sync_state (project_id, version, snapshot_version, log_bytes) VALUES (?, 1, 1, 0)", (project_id,)
+            )
+            self.store.conn.commit()
+            state = (1, 1, 0)
+        version, snapshot_version, _ = state
+        for (operations,) in self.store.conn.execute(
+            "SELECT operations FROM sync_patches WHERE project_id = ? AND version > ? ORDER BY version",
+            (project_id, snapshot_version)
+        ):
+            doc = apply_patch(doc, json.loads(operations))
+        self._remember(project_id, version, doc)
+        return version, doc
+
+    def get(self, project_id: str) -> Optional[Tuple[int, Any]]:
+        """Return (version, document) or None when the project does not exist."""
+        with self.lock:
+            return self._load(project_id)
+
+    def put(self, project: Dict[str, Any], expected_version: Optional[int] = None) -> int:
+        """Replace the whole document (first upload, import, or recovering from a conflict)."""
+        project_id = project.get("id")
+        if not project_id:
+            raise ValueError("Project id is required")
+        with self.lock:
+            state = self._state(project_id)
+            current = state[0] if state else 0
+            if expected_version is not None and expected_version != current:
+                raise VersionConflict(current)
+            version = current + 1
+            self.store.save_project(project)
+            self._reset(project_id, version)
+            self._remember(project_id, version, project)
+            return version
+
+    def patch(self, project_id: str, operations: List[Dict[str, Any]], expected_version: int) -> int:
+        """Apply a patch made against expected_version; returns the new version."""
+        with self.lock:
+            loaded = self._load(project_id)
+            if loaded is None:
+                raise KeyError(project_id)
+            version, doc = loaded
+            if expected_version != version:
+                raise VersionConflict(version)
+            encoded = json.dumps(operations, ensure_ascii=False)
+            # Values in the operations become part of the cached document
+            doc = apply_patch(doc, json.loads(encoded))
+            if not isinstance(doc, dict) or doc.get("id") != project_id:
+                # Undo by reloading from the snapshot and log
+                self.cache.pop(project_id, None)
+                raise ValueError("Patch must not change or remove the project id")
+
+            version += 1
+            self.store.conn.execute(
+                "INSERT INTO sync_patches (project_id, version, operations, created_at) VALUES (?, ?, ?, ?)",
+                (project_id, version, encoded, time.time())
+            )
+            self.store.conn.execute(
+                "UPDATE sync_state SET version = ?, log_bytes = log_bytes + ? WHERE project_id = ?",
+                (version, len(encoded), project_id)
+            )
+            self.store.conn.commit()
+            self._remember(project_id, version, doc)
+            _, snapshot_version, log_bytes = self._state(project_id)
+            if version - snapshot_version >= self.snapshot_every or log_bytes >= self.snapshot_bytes:
+                self._snapshot(project_id, version, doc)
+            return version
+
+    def patches_since(self, project_id: str, version: int) -> Optional[List[Dict[str, Any]]]:
+        """Patches after version, or None if they were compacted away (the client must refetch)."""
+        with self.lock:
+            state = self._state(project_id)
+            if state is None or version < state[1]:
+                return None
+            return [
+                {"version": v, "operations": json.loads(operations)}
+                for v, operations in self.store.conn.execute(
+                    "SELECT version, operations FROM sync_patches WHERE project_id = ? AND version > ? ORDER BY version",
+                    (project_id, version)
+                )
+            ]
+
+    def compact(self, project_id: str) -> Optional[int]:
+        """Write the current document as a snapshot and drop the patch log."""
+        with self.lock:
+            loaded = self._load(project_id)
+            if loaded is None:
+                return None
+            self._snapshot(project_id, *loaded)
+            return loaded[0]
+
+    def external_write(self, project_id: str, write: Callable[[], Any]) -> Any:
+        """
+        Run a direct store write (e.g. a single-record update) in version order:
+        pending patches are folded in first and the write gets its own version.
+        """
+        with self.lock:
+            loaded = self._load(project_id)
+            if loaded is not None:
+                self._snapshot(project_id, *loaded)
+            result = write()
+            if loaded is not None:
+                self._reset(project_id, loaded[0] + 1)
+            self.cache.pop(project_id, None)
+            return result
+
+    def forget(self, project_id: str) -> None:
+        with self.lock:
+            self.store.conn.execute("DELETE FROM sync_patches WHERE project_id = ?", (project_id,))
+            self.store.conn.execute("DELETE FROM sync_state WHERE project_id = ?", (project_id,))
+            self.store.conn.commit()
+            self.cache.pop(project_id, None)
+
+    def _snapshot(self, project_id: str, version: int, doc: Any) -> None:
+        # The store rewrites only records whose content changed since the last snapshot
+        self.store.save_project(doc)
+        self._reset(project_id, version)
+
+    def _reset(self, project_id: str, version: int) -> None:
+        self.store.conn.execute("DELETE FROM sync_patches WHERE project_id = ?", (project_id,))
+        self.store.conn.execute(
+            "INSERT OR REPLACE INTO sync_state (project_id, version, snapshot_version, log_bytes) VALUES (?, ?, ?, 0)",
+            (project_id, version, version)
+        )
+        self.store.conn.commit()
+
+_sync: Optional[ProjectSync] = None
+_sync_lock = threading.Lock()
+
+def get_project_sync() -> ProjectSync:
+    global _sync
+    with _sync_lock:
+        if _sync is None:
+            _sync = ProjectSync()
+        return _sync
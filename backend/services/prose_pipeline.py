@@ -0,0 +1,213 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, Iterator, List, Optional
+from services.model_scheduler import submit_in_context
+from services.semantic_index import format_related_evidence
+import json
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+PROSE_MAX_TOKENS = 4000
+TRANSITION_MAX_TOKENS = 1200
+# Characters of each neighbouring subsection the transition pass sees
+EDGE_CHARS = 400
+
+def citation_lines(citation_references) -> str:
+    return "\n".join(
+        f"[{ref.reference_id}]: {ref.citation.apa or ref.citation.title or ref.citation.source}"
+        for ref in (citation_references or [])
+    )
+
+def related_section(project_id: Optional[str], query: str) -> str:
+    related_evidence = format_related_evidence(project_id, query)
+    return f"""
+RELATED EVIDENCE ELSEWHERE IN THE PAPER (use only for cross-references and transitions, not as new claims):
+{related_evidence}
+""" if related_evidence else ""
+
+def prose_prompt(thesis: str, methodology: str, section_context: str, subsection_context: str,
+                 questions: List[str], citations_list: str, responses_content: str, related: str) -> str:
+    """Prompt that turns fused outlines into paragraphs for one subsection."""
+    if len(questions) == 1:
+        question_block = f"QUESTION BEING ADDRESSED: {questions[0]}"
+    else:
+        question_block = "QUESTIONS BEING ADDRESSED (cover them in this order):\n" + "\n".join(
+            f"{number}. {question}" for number, question in enumerate(questions, 1)
+        )
+    return f"""You are an academic synthesis and writing engine.
+Your task is to convert the fused outline—which contains section/subsection structure, contextual analysis, and question responses—into research-paper-quality prose.
+
+PRIMARY OBJECTIVE:
+Transform the completed section/subsection content into full, coherent paragraphs that:
+- Clearly express the larger point or argument implied by the section's context statement
+- Integrate and elaborate upon the data and responses from the fused outline
+- Maintain academic flow, logical structure, and narrative cohesion
+
+WRITING REQUIREMENTS:
+- Write at a formal academic level, suitable for publication or graduate-level research
+- Each subsection should produce 2–4 well-developed paragraphs unless otherwise directed by data density
+- Maintain strong coherence using transitions that reinforce the section's relationship to the broader argument
+- Use context statement: "{section_context or subsection_context}"
+
+CITATION FORMAT:
+- Use blue-linked citations for in-app pop-up functionality
+- Format: <span style="color:blue;" data-cite="[Reference]">[Reference]</span>
+- Example: According to the analysis <span style="color:blue;" data-cite="[1]">[1]</span>
+- Multiple sources: <span style="color:blue;" data-cite="[1,2]">[1, 2]</span>
+
+STYLE REQUIREMENTS:
+- Objective, analytical tone
+- Smooth transitions between evidence and interpretation
+- Avoid repetition of citation phrases or excessive quotation; paraphrase appropriately
+- Begin with the intent and purpose described in the contextual analysis
+- Every paragraph should stay aligned with why this section exists and how it supports the thesis
+
+THESIS CONTEXT: {thesis}
+METHODOLOGY: {methodology}
+SECTION CONTEXT: {section_context}
+SUBSECTION CONTEXT: {subsection_context}
+
+{question_block}
+
+AVAILABLE CITATIONS:
+{citations_list}
+
+FUSED OUTLINE CONTENT TO CONVERT TO PROSE:
+{responses_content}
+{related}
+
+Generate full academic prose that converts the outline structure into flowing paragraphs while maintaining all citations and arguments. Do not use bullet points or outline formatting - write complete paragraphs only."""
+
+def subsection_prompt(request, unit) -> str:
+    """One prompt per subsection, covering all its answered questions in order."""
+    references = [ref for question in unit.questions for ref in (question.citation_references or [])]
+    responses_content = "\n\n".join(
+        f"Response {number} (question {question.question_number}):\n{question.fused_response}"
+        for number, question in enumerate(unit.questions, 1)
+    )
+    query = "\n".join([q.question for q in unit.questions] + [unit.subsection_context or ""])
+    return prose_prompt(
+        request.thesis, request.methodology, unit.section_context or "", unit.subsection_context or "",
+        [q.question for q in unit.questions], citation_lines(references), responses_content,
+        related_section(request.project_id, query)
+    )
+
+def write_subsection(request, position: int, generate: Callable[[str, int], str]) -> Dict[str, Any]:
+    unit = request.subsections[position]
+    result = {
+        "position": position,
+        "section_index": unit.section_index,
+        "subsection_index": unit.subsection_index,
+        "subsection_title": unit.subsection_title,
+        "prose": "",
+        "opening_transition": None,
+        "error": None,
+        "elapsed": 0.0
+    }
+    if not any(q.fused_response.strip() for q in unit.questions):
+        result["error"] = "No responses available for questions in this subsection"
+        return result
+    started = time.time()
+    try:
+        result["prose"] = generate(subsection_prompt(request, unit), PROSE_MAX_TOKENS).strip()
+    except Exception as e:
+        logger.error(f"Prose generation failed for {unit.subsection_title}: {str(e)}")
+        result["error"] = str(e)
+    result["elapsed"] = round(time.time() - started, 3)
+    return result
+
+def iter_subsections(request, generate: Callable[[str, int], str]) -> Iterator[Dict[str, Any]]:
+    """Subsection results in completion order, at most max_concurrency generating at a time."""
+    if not request.subsections:
+        return
+    workers = max(1, min(request.max_concurrency, len(request.subsections)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [submit_in_context(pool, write_subsection, request, position, generate)
+                   for position in range(len(request.subsections))]
+        for future in as_completed(futures):
+            yield future.result()
+
+def transition_prompt(request, written: List[Dict[str, Any]]) -> str:
+    summaries = []
+    for number, result in enumerate(written, 1):
+        unit = request.subsections[result["position"]]
+        prose = result["prose"]
+        summaries.append(f"""
+SUBSECTION {number}: {unit.section_title} / {unit.subsection_title}
+- Opens with: {prose[:EDGE_CHARS]}
+- Ends with: {prose[-EDGE_CHARS:]}""")
+    return f"""
+These subsections of one paper were written independently and in parallel. Write the transitions that make them read in sequence.
+
+THESIS: {request.thesis}
+{''.join(summaries)}
+
+For every subsection after the first write one sentence that bridges from the end of the previous subsection into its opening.
+Do not repeat claims or add citations.
+
+Respond with JSON only:
+{{"transitions": [{{"subsection": 2, "sentence": "..."}}]}}
+"""
+
+def write_transitions(request, results: List[Dict[str, Any]], generate: Callable[[str, int], str]) -> Dict[int, str]:
+    """Request position -> opening transition, for every written subsection after the first."""
+    written = [result for result in results if result["prose"]]
+    if len(written) < 2:
+        return {}
+    text = generate(transition_prompt(request, written), TRANSITION_MAX_TOKENS)
+    start, end = text.find("{"), text.rfind("}") + 1
+    if start < 0 or end <= start:
+        raise ValueError("Transition response contained no JSON")
+    transitions = {}
+    for item in json.loads(text[start:end]).get("transitions", []):
+        if not isinstance(item, dict) or not item.get("sentence"):
+            continue
+        try:
+            number = int(item.get("subsection"))
+        except (TypeError, ValueError):
+            continue
+        if 2 <= number <= len(written):
+            transitions[written[number - 1]["position"]] = str(item["sentence"]).strip()
+    return transitions
+
+def run_pipeline(request, generate: Callable[[str, int], str]) -> Iterator[Dict[str, Any]]:
+    """
+    Events for one prose build: a "subsection" event as each subsection
+    finishes, a "transitions" event once all are done, then "done" with the
+    timings. Each event carries the request position so the client can place
+    subsections that finish out of order.
+    """
+    results: List[Optional[Dict[str, Any]]] = [None] * len(request.subsections)
+    started = time.time()
+    for result in iter_subsections(request, generate):
+        results[result["position"]] = result
+        yield dict(result, event="subsection")
+    timings = {"parallel_wave": round(time.time() - started, 3)}
+
+    transitions: Dict[int, str] = {}
+    if request.transitions:
+        started = time.time()
+        try:
+            transitions = write_transitions(request, results, generate)
+        except Exception as e:
+            logger.error(f"Transition pass failed, returning subsections without transitions: {str(e)}")
+        timings["transitions"] = round(time.time() - started, 3)
+    yield {"event": "transitions", "transitions": [{"position": p, "sentence": s} for p, s in sorted(transitions.items())]}
+    yield {"event": "done", "timings": timings}
+
+def assemble(request, events: Iterator[Dict[str, Any]]) -> Dict[str, Any]:
+    """Collect pipeline events into the subsections in paper order with their transitions applied."""
+    results: List[Optional[Dict[str, Any]]] = [None] * len(request.subsections)
+    transitions: Dict[int, str] = {}
+    timings: Dict[str, float] = {}
+    for event in events:
+        if event["event"] == "subsection":
+            results[event["position"]] = {k: v for k, v in event.items() if k != "event"}
+        elif event["event"] == "transitions":
+            transitions = {item["position"]: item["sentence"] for item in event["transitions"]}
+        elif event["event"] == "done":
+            timings = event["timings"]
+    for position, sentence in transitions.items():
+        results[position]["opening_transition"] = sentence
+    return {"subsections": results, "transitions_written": bool(transitions), "timings": timings}
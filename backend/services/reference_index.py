@@ -0,0 +1,324 @@
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from services.citation_keys import canonical_citation_key, normalize_text
+from services.data_dir import data_path
+from services.evidence_index import MARKER, surname_tokens
+from services.outline_parser import stored_outline
+from services.project_documents import content_hash, draft_containers, project_payload, response_text
+import re
+import sqlite3
+import threading
+
+HTML_TAG = re.compile(r"<[^>]+>")
+PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+QUESTION_REFERENCE = re.compile(r"^(\d+)_(\d+)$")
+EXCERPT_CHARS = 200
+
+class MarkerResolver:
+    """
+    Resolves citation markers the way the drafting views number them:
+    [n] is a project-wide reference number when the project has a
+    citationReferenceMap, otherwise the n-th citation of the question (or of
+    the subsection, for prose); [q_c] is citation c of question q in the
+    subsection; [Surname, p. x] matches an author of the scope's citations.
+    """
+
+    def __init__(self, project: Dict[str, Any]):
+        data = project_payload(project)
+        self.questions: Dict[str, List[Dict[str, Any]]] = {}
+        outlines = [data.get("outlineData") or []] + [c.get("outline") or [] for c in draft_containers(project)]
+        for outline in outlines:
+            for s_idx, section in enumerate(outline):
+                for ss_idx, subsection in enumerate(section.get("subsections") or []):
+                    for q_idx, question in enumerate(subsection.get("questions") or []):
+                        if isinstance(question, dict):
+                            citations = [c for c in question.get("citations") or [] if isinstance(c, dict) and c.get("apa")]
+                            self.questions.setdefault(f"{s_idx}-{ss_idx}-{q_idx}", citations)
+        self.subsections: Dict[str, List[Dict[str, Any]]] = {}
+        for key in sorted(self.questions, key=lambda k: tuple(int(part) for part in k.split("-"))):
+            self.subsections.setdefault(key.rsplit("-", 1)[0], []).extend(self.questions[key])
+
+        self.numbers: Dict[str, Dict[str, Any]] = {}
+        for container in draft_containers(project):
+            for references in (container.get("citationReferenceMap") or {}).values():
+                for reference in (references or {}).values():
+                    citation = (reference or {}).get("citation") or {}
+                    if citation.get("apa") and reference.get("referenceNumber") is not None:
+                        self.numbers.setdefault(str(reference["referenceNumber"]), citation)
+        self.numbers_signature = content_hash(sorted((n, c["apa"]) for n, c in self.numbers.items()))
+        self._signatures: Dict[str, str] = {}
+
+    def scope_citations(self, scope: str) -> List[Dict[str, Any]]:
+        return (self.questions if scope.count("-") == 2 else self.subsections).get(scope) or []
+
+    def signature(self, scope: str) -> str:
+        """Hash of everything a marker in this scope can resolve to."""
+        if scope not in self._signatures:
+            subsection = scope if scope.count("-") == 1 else scope.rsplit("-", 1)[0]
+            self._signatures[scope] = content_hash([
+                self.numbers_signature,
+                [c["apa"] for c in self.scope_citations(scope)],
+                [c["apa"] for c in self.subsections.get(subsection) or []]
+            ])
+        return self._signatures[scope]
+
+    def resolve(self, part: str, scope: str) -> Optional[Dict[str, Any]]:
+        part = part.strip()
+        question_ref = QUESTION_REFERENCE.match(part)
+        if question_ref:
+            subsection = scope if scope.count("-") == 1 else scope.rsplit("-", 1)[0]
+            citations = self.questions.get(f"{subsection}-{int(question_ref.group(1)) - 1}") or []
+            index = int(question_ref.group(2)) - 1
+            return citations[index] if 0 <= index < len(citations) else None
+        if part.isdigit():
+            if self.numbers:
+                return self.numbers.get(part)
+            citations = self.scope_citations(scope)
+            return citations[int(part) - 1] if 1 <= int(part) <= len(citations) else None
+        normalized = normalize_text(part)
+        if not normalized or normalized[0].isdigit() or normalized.startswith("p "):
+            return None
+        for citation in self.scope_citations(scope):
+            if any(name and normalized.startswith(name) for name in surname_tokens(citation["apa"])):
+                return citation
+        return None
+
+    def cited(self, text: str, scope: str) -> List[Tuple[str, Dict[str, Any]]]:
+        """(marker, citation) for each distinct citation the text points to, in order."""
+        found, seen = [], set()
+        for marker in MARKER.findall(text or ""):
+            for part in re.split(r"[;,]\s*", marker):
+                citation = self.resolve(part, scope)
+                if citation is not None and citation["apa"] not in seen:
+                    seen.add(citation["apa"])
+                    found.append((part.strip(), citation))
+        return found
+
+    def sources(self) -> Iterator[Tuple[str, str, Dict[str, Any]]]:
+        """(scope, marker, citation) for every numbered marker; scope "" is project-wide."""
+        for number, citation in self.numbers.items():
+            yield "", number, citation
+        for key, citations in self.questions.items():
+            subsection, q_idx = key.rsplit("-", 1)
+            for c_idx, citation in enumerate(citations, 1):
+                yield subsection, f"{int(q_idx) + 1}_{c_idx}", citation
+                if not self.numbers:
+                    yield key, str(c_idx), citation
+        if not self.numbers:
+            for subsection, citations in self.subsections.items():
+                for number, citation in enumerate(citations, 1):
+                    yield subsection, str(number), citation
+
+def excerpt(text: str) -> str:
+    text = " ".join(text.split())
+    return text if len(text) <= EXCERPT_CHARS else text[:EXCERPT_CHARS - 3].rstrip() + "..."
+
+def iter_reference_units(project: Dict[str, Any]) -> Iterator[Tuple[str, str, str, Any]]:
+    """
+    (location, kind, scope, content) for every response and prose paragraph.
+    Responses are located as responses/<question key>/<index>, prose paragraphs
+    as master/<master outline>/<subsection>/<paragraph>. A response whose
+    parsed tree was saved in responseOutlines is yielded together with it.
+    """
+    seen = set()
+    for container in draft_containers(project):
+        outlines = container.get("responseOutlines") or {}
+        for key, responses in (container.get("responses") or {}).items():
+            stored = outlines.get(key) if isinstance(outlines.get(key), list) else []
+            for r_idx, response in enumerate(responses if isinstance(responses, list) else [responses]):
+                location = f"responses/{key}/{r_idx}"
+                if location not in seen:
+                    seen.add(location)
+                    if isinstance(response, str) and r_idx < len(stored) and isinstance(stored[r_idx], dict):
+                        response = {"response": response, "outline": stored[r_idx]}
+                    yield location, "response", key, response
+        for m_idx, master in enumerate(container.get("masterOutlines") or []):
+            s_idx = master.get("section_index", m_idx)
+            for ss_idx, subsection in enumerate(master.get("prose_subsections") or []):
+                prose = subsection.get("prose_content")
+                if not isinstance(prose, str):
+                    continue
+                paragraphs = [p for p in PARAGRAPH_BREAK.split(HTML_TAG.sub("", prose)) if p.strip()]
+                for p_idx, paragraph in enumerate(paragraphs):
+                    location = f"master/{m_idx}/{ss_idx}/{p_idx}"
+                    if location not in seen:
+                        seen.add(location)
+                        yield location, "prose", f"{s_idx}-{ss_idx}", paragraph.strip()
+
+def outline_paths(nodes: List[Dict[str, Any]], prefix: str = "") -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """(path, node) with paths like "1.a.ii" built from the node markers."""
+    for node in nodes:
+        path = f"{prefix}.{node['token']}" if prefix else node["token"]
+        yield path, node
+        yield from outline_paths(node["children"], path)
+
+def unit_usages(location: str, kind: str, scope: str, content: Any, resolver: MarkerResolver) -> List[Tuple[str, str, str, str, str, str]]:
+    """(citation_key, apa, kind, location, marker, excerpt) rows for one unit."""
+    rows = []
+    if kind == "response":
+        seen = set()
+        for line in response_text(content).splitlines():
+            for marker, citation in resolver.cited(line, scope):
+                if citation["apa"] not in seen:
+                    seen.add(citation["apa"])
+                    rows.append((canonical_citation_key(citation["apa"]), citation["apa"], "response", location, marker, excerpt(line)))
+        for path, node in outline_paths(stored_outline(content)["nodes"]):
+            for marker, citation in resolver.cited(node["text"], scope):
+                rows.append((canonical_citation_key(citation["apa"]), citation["apa"], "outline_point",
+                             f"{location}#{path}", marker, excerpt(node["text"])))
+    else:
+        for marker, citation in resolver.cited(content, scope):
+            rows.append((canonical_citation_key(citation["apa"]), citation["apa"], kind, location, marker, excerpt(content)))
+    return rows
+
+class ReferenceIndex:
+    """
+    Inverted index of citation use across a project: citation -> every
+    response, outline point and prose paragraph citing it, and marker ->
+    source. Re-indexing diffs each response/paragraph against the hash stored
+    for it (text plus the citations its markers can resolve to), so only
+    changed units are re-resolved.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or data_path("reference_index.sqlite3")
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS reference_units (
+                project_id TEXT NOT NULL,
+                location TEXT NOT NULL,
+                unit_hash TEXT NOT NULL,
+                PRIMARY KEY (project_id, location)
+            );
+            CREATE TABLE IF NOT EXISTS reference_usages (
+                project_id TEXT NOT NULL,
+                unit TEXT NOT NULL,
+                citation_key TEXT NOT NULL,
+                apa TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                location TEXT NOT NULL,
+                marker TEXT NOT NULL,
+                excerpt TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS reference_usages_by_citation ON reference_usages (project_id, citation_key);
+            CREATE INDEX IF NOT EXISTS reference_usages_by_location ON reference_usages (project_id, location);
+            CREATE INDEX IF NOT EXISTS reference_usages_by_unit ON reference_usages (project_id, unit);
+            CREATE TABLE IF NOT EXISTS reference_sources (
+                project_id TEXT NOT NULL,
+                scope TEXT NOT NULL,
+                marker TEXT NOT NULL,
+                citation_key TEXT NOT NULL,
+                apa TEXT NOT NULL,
+                PRIMARY KEY (project_id, scope, marker)
+            );
+            """
+        )
+        self.conn.commit()
+
+    def index_project(self, project: Dict[str, Any], project_id: Optional[str] = None) -> Dict[str, Any]:
+        project_id = project_id or project.get("id")
+        if not project_id:
+            raise ValueError("Project has no id; pass project_id")
+        resolver = MarkerResolver(project)
+        units = {}
+        for location, kind, scope, content in iter_reference_units(project):
+            text = response_text(content) if kind == "response" else content
+            units[location] = (kind, scope, content, content_hash([text, resolver.signature(scope)]))
+        sources = [(project_id, scope, marker, canonical_citation_key(c["apa"]), c["apa"]) for scope, marker, c in resolver.sources()]
+
+        with self.lock:
+            stored = dict(self.conn.execute(
+                "SELECT location, unit_hash FROM reference_units WHERE project_id = ?", (project_id,)
+            ))
+            changed = [location for location, unit in units.items() if stored.get(location) != unit[3]]
+            removed = [location for location in stored if location not in units]
+            stale = changed + removed
+            self.conn.executemany(
+                "DELETE FROM reference_usages WHERE project_id = ? AND unit = ?", [(project_id, loc) for loc in stale]
+            )
+            self.conn.executemany(
+                "DELETE FROM reference_units WHERE project_id = ? AND location = ?", [(project_id, loc) for loc in removed]
+            )
+            usage_count = 0
+            for location in changed:
+                kind, scope, content, unit_hash = units[location]
+                rows = unit_usages(location, kind, scope, content, resolver)
+                self.conn.executemany(
+                    "INSERT INTO reference_usages (project_id, unit, citation_key, apa, kind, location, marker, excerpt) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    [(project_id, location) + row for row in rows]
+                )
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO reference_units (project_id, location, unit_hash) VALUES (?, ?, ?)",
+                    (project_id, location, unit_hash)
+                )
+                usage_count += len(rows)
+            self.conn.execute("DELETE FROM reference_sources WHERE project_id = ?", (project_id,))
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO reference_sources (project_id, scope, marker, citation_key, apa) VALUES (?, ?, ?, ?, ?)",
+                sources
+            )
+            total = self.conn.execute("SELECT COUNT(*) FROM reference_usages WHERE project_id = ?", (project_id,)).fetchone()[0]
+            self.conn.commit()
+        return {
+            "project_id": project_id,
+            "units": len(units),
+            "changed": len(changed),
+            "removed": len(removed),
+            "resolved": usage_count,
+            "usages": total
+        }
+
+    def usages(self, project_id: str, citation_key: str, kind: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Where a source is used: every response, outline point and paragraph citing it."""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT apa, kind, location, marker, excerpt FROM reference_usages WHERE project_id = ? AND citation_key = ?"
+                + (" AND kind = ?" if kind else "") + " ORDER BY kind, location",
+                (project_id, citation_key) + ((kind,) if kind else ())
+            ).fetchall()
+        if not rows:
+            return None
+        counts: Dict[str, int] = {}
+        for row in rows:
+            counts[row[1]] = counts.get(row[1], 0) + 1
+        return {
+            "citation_key": citation_key,
+            "apa": rows[0][0],
+            "counts": counts,
+            "usages": [{"kind": k, "location": loc, "marker": m, "excerpt": e} for _, k, loc, m, e in rows]
+        }
+
+    def supports(self, project_id: str, location: str) -> List[Dict[str, Any]]:
+        """What supports a response, outline point (response#path) or paragraph: the sources it cites."""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT citation_key, apa, marker, kind FROM reference_usages WHERE project_id = ? AND location = ? ORDER BY rowid",
+                (project_id, location)
+            ).fetchall()
+        return [{"citation_key": key, "apa": apa, "marker": marker, "kind": kind} for key, apa, marker, kind in rows]
+
+    def resolve(self, project_id: str, marker: str, scope: str = "") -> Optional[Dict[str, Any]]:
+        """The source behind a numbered marker, looked up in the scope, its subsection, then project-wide."""
+        scopes = [scope] if scope else []
+        if scope.count("-") == 2:
+            scopes.append(scope.rsplit("-", 1)[0])
+        scopes.append("")
+        with self.lock:
+            for candidate in scopes:
+                row = self.conn.execute(
+                    "SELECT citation_key, apa FROM reference_sources WHERE project_id = ? AND scope = ? AND marker = ?",
+                    (project_id, candidate, marker.strip().strip("[]"))
+                ).fetchone()
+                if row:
+                    return {"marker": marker.strip().strip("[]"), "scope": candidate, "citation_key": row[0], "apa": row[1]}
+        return None
+
+_index: Optional[ReferenceIndex] = None
+
+def get_reference_index() -> ReferenceIndex:
+    global _index
+    if _index is None:
+        _index = ReferenceIndex()
+    return _index
@@ -0,0 +1,332 @@
+from typing import Any, Dict, List, Optional
+from services.data_dir import data_path
+from services.embeddings import Embedder, get_embedder
+from services.project_documents import iter_project_chunks
+import json
+import logging
+import os
+import threading
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Document kinds worth retrieving as evidence
+SEMANTIC_KINDS = ("citation", "response", "master_outline")
+
+# Below this many live vectors a brute-force scan is both exact and fast enough
+EXACT_SEARCH_LIMIT = int(os.getenv("SEMANTIC_EXACT_SEARCH_LIMIT", "20000"))
+# Share of tombstoned rows above which the index is rewritten without them
+COMPACT_DELETED_RATIO = float(os.getenv("SEMANTIC_COMPACT_DELETED_RATIO", "0.25"))
+
+class SemanticIndex:
+    """
+    Vector index for one project. Vectors live in a memory-mapped float32 matrix
+    (vectors.f32) that grows by doubling; row metadata is kept in meta.json.
+    Replaced and removed documents leave tombstoned rows, which are compacted
+    away once they make up more than COMPACT_DELETED_RATIO of the rows.
+    Small indexes are searched exactly; large ones through an inverted-file
+    (IVF) partition built with k-means.
+    """
+
+    def __init__(self, directory: str, dim: int, embedder_name: str):
+        self.directory = directory
+        self.dim = dim
+        self.embedder_name = embedder_name
+        self.rows: List[Dict[str, Any]] = []
+        self.row_by_id: Dict[str, int] = {}
+        self.capacity = 0
+        self.vectors: Optional[np.memmap] = None
+        self.centroids: Optional[np.ndarray] = None
+        self.assignments: Optional[np.ndarray] = None
+        self.ivf_built_for = 0
+        self.lock = threading.RLock()
+        os.makedirs(directory, exist_ok=True)
+        self._load()
+
+    @property
+    def _meta_path(self) -> str:
+        return os.path.join(self.directory, "meta.json")
+
+    @property
+    def _vectors_path(self) -> str:
+        return os.path.join(self.directory, "vectors.f32")
+
+    @property
+    def _ivf_path(self) -> str:
+        return os.path.join(self.directory, "ivf.npz")
+
+    def _load(self) -> None:
+        if not os.path.exists(self._meta_path):
+            return
+        with open(self._meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("dim") != self.dim or meta.get("embedder") != self.embedder_name:
+            # Vectors from a different embedder are not comparable; start over
+            logger.info(f"Discarding semantic index in {self.directory}: embedder changed")
+            return
+        self.rows = meta["rows"]
+        self.capacity = meta["capacity"]
+        self.row_by_id = {row["id"]: i for i, row in enumerate(self.rows) if not row.get("deleted")}
+        if self.capacity:
+            self.vectors = np.memmap(self._vectors_path, dtype=np.float32, mode="r+", shape=(self.capacity, self.dim))
+        if os.path.exists(self._ivf_path):
+            ivf = np.load(self._ivf_path)
+            self.centroids = ivf["centroids"]
+            self.assignments = ivf["assignments"]
+            self.ivf_built_for = int(ivf["built_for"])
+
+    def _save(self) -> None:
+        if self.vectors is not None:
+            self.vectors.flush()
+        tmp_path = f"{self._meta_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"dim": self.dim, "embedder": self.embedder_name, "capacity": self.capacity, "rows": self.rows}, f)
+        os.replace(tmp_path, self._meta_path)
+        if self.centroids is not None:
+            np.savez(self._ivf_path, centroids=self.centroids, assignments=self.assignments, built_for=self.ivf_built_for)
+
+    def _ensure_capacity(self, needed: int) -> None:
+        if needed <= self.capacity:
+            return
+        new_capacity = max(1024, self.capacity)
+        while new_capacity < needed:
+            new_capacity *= 2
+        grown_path = f"{self._vectors_path}.grow"
+        grown = np.memmap(grown_path, dtype=np.float32, mode="w+", shape=(new_capacity, self.dim))
+        if self.vectors is not None:
+            grown[:len(self.rows)] = self.vectors[:len(self.rows)]
+            del self.vectors
+        grown.flush()
+        del grown
+        os.replace(grown_path, self._vectors_path)
+        self.vectors = np.memmap(self._vectors_path, dtype=np.float32, mode="r+", shape=(new_capacity, self.dim))
+        self.capacity = new_capacity
+
+    @property
+    def size(self) -> int:
+        return len(self.row_by_id)
+
+    def upsert(self, documents: List[Dict[str, Any]], embedder: Embedder, batch_size: int = 32) -> Dict[str, int]:
+        """
+        Add or replace documents ({id, text, content_hash, metadata}). Documents whose
+        content hash is unchanged are skipped; changed ones get a new row and the old
+        row is tombstoned. Embedding requests are issued in batches.
+        """
+        with self.lock:
+            pending = [
+                doc for doc in documents
+                if doc["id"] not in self.row_by_id or self.rows[self.row_by_id[doc["id"]]]["hash"] != doc["content_hash"]
+            ]
+            for start in range(0, len(pending), batch_size):
+                batch = pending[start:start + batch_size]
+                vectors = embedder.embed([doc["text"] for doc in batch])
+                base = len(self.rows)
+                self._ensure_capacity(base + len(batch))
+                self.vectors[base:base + len(batch)] = vectors
+                for offset, doc in enumerate(batch):
+                    if doc["id"] in self.row_by_id:
+                        self.rows[self.row_by_id[doc["id"]]]["deleted"] = True
+                    self.rows.append({
+                        "id": doc["id"],
+                        "hash": doc["content_hash"],
+                        "text": doc["text"],
+                        "metadata": doc.get("metadata", {})
+                    })
+                    self.row_by_id[doc["id"]] = base + offset
+                if self.centroids is not None:
+                    self.assignments = np.concatenate([self.assignments, self._nearest_centroids(vectors)])
+            self._compact_if_sparse()
+            self._save()
+            return {"embedded": len(pending), "skipped": len(documents) - len(pending)}
+
+    def remove_missing(self, keep_ids) -> int:
+        """Tombstone every row whose id is not in keep_ids."""
+        with self.lock:
+            removed = 0
+            for doc_id in [doc_id for doc_id in self.row_by_id if doc_id not in keep_ids]:
+                self.rows[self.row_by_id.pop(doc_id)]["deleted"] = True
+                removed += 1
+            if removed:
+                self._compact_if_sparse()
+                self._save()
+            return removed
+
+    def compact(self) -> int:
+        """Rewrite the index with only its live rows; returns how many tombstoned rows were dropped."""
+        with self.lock:
+            dropped = self._compact()
+            if dropped:
+                self._save()
+            return dropped
+
+    def _compact_if_sparse(self) -> None:
+        if self.rows and len(self.rows) - self.size > COMPACT_DELETED_RATIO * len(self.rows):
+            self._compact()
+
+    def _compact(self) -> int:
+        live = np.array(sorted(self.row_by_id.values()), dtype=np.int64)
+        dropped = len(self.rows) - len(live)
+        if dropped == 0:
+            return 0
+        capacity = 1024
+        while capacity < len(live):
+            capacity *= 2
+        compact_path = f"{self._vectors_path}.compact"
+        compacted = np.memmap(compact_path, dtype=np.float32, mode="w+", shape=(capacity, self.dim))
+        for start in range(0, len(live), 8192):
+            chunk = live[start:start + 8192]
+            compacted[start:start + len(chunk)] = self.vectors[chunk]
+        compacted.flush()
+        del compacted
+        del self.vectors
+        os.replace(compact_path, self._vectors_path)
+        self.vectors = np.memmap(self._vectors_path, dtype=np.float32, mode="r+", shape=(capacity, self.dim))
+        self.capacity = capacity
+        self.rows = [self.rows[row] for row in live]
+        self.row_by_id = {row["id"]: i for i, row in enumerate(self.rows)}
+        if self.centroids is not None:
+            # Same centroids, so each live row keeps its list; only the row numbers change
+            self.assignments = self.assignments[live]
+        logger.info(f"Compacted semantic index in {self.directory}: dropped {dropped} deleted rows")
+        return dropped
+
+    def _nearest_centroids(self, vectors: np.ndarray) -> np.ndarray:
+        return np.argmax(vectors @ self.centroids.T, axis=1).astype(np.int32)
+
+    def build_ivf(self, iterations: int = 10, seed: int = 0) -> None:
+        """Partition live vectors with spherical k-means (about sqrt(n) lists)."""
+        with self.lock:
+            count = len(self.rows)
+            live = np.array(sorted(self.row_by_id.values()), dtype=np.int64)
+            if len(live) == 0:
+                return
+            n_lists = max(1, int(np.sqrt(len(live))))
+            rng = np.random.default_rng(seed)
+            sample = self.vectors[rng.choice(live, size=min(len(live), n_lists * 64), replace=False)]
+            centroids = sample[rng.choice(len(sample), size=n_lists, replace=False)].copy()
+            for _ in range(iterations):
+                labels = np.argmax(sample @ centroids.T, axis=1)
+                for c in range(n_lists):
+                    members = sample[labels == c]
+                    if len(members):
+                        centroid = members.sum(axis=0)
+                        centroids[c] = centroid / (np.linalg.norm(centroid) or 1.0)
+            self.centroids = centroids.astype(np.float32)
+            assignments = np.empty(count, dtype=np.int32)
+            for start in range(0, count, 8192):
+                assignments[start:start + 8192] = self._nearest_centroids(self.vectors[start:min(count, start + 8192)])
+            self.assignments = assignments
+            self.ivf_built_for = len(live)
+            self._save()
+
+    def search(self, query_vector: np.ndarray, k: int = 5, exact: Optional[bool] = None, n_probe: int = 8,
+               kinds: Optional[List[str]] = None, exclude_ids=None) -> List[Dict[str, Any]]:
+        """Return the k most similar live rows as {id, score, text, metadata}."""
+        with self.lock:
+            if not self.row_by_id:
+                return []
+            query = np.asarray(query_vector, dtype=np.float32).reshape(-1)
+            query = query / (np.linalg.norm(query) or 1.0)
+            use_exact = exact if exact is not None else self.size <= EXACT_SEARCH_LIMIT
+
+            if use_exact:
+                candidates = np.array(sorted(self.row_by_id.values()), dtype=np.int64)
+            else:
+                if self.centroids is None or self.size > 2 * self.ivf_built_for:
+                    self.build_ivf()
+                probe = np.argsort(-(self.centroids @ query))[:n_probe]
+                candidates = np.nonzero(np.isin(self.assignments, probe))[0]
+                candidates = np.array([row for row in candidates if not self.rows[row].get("deleted")], dtype=np.int64)
+
+            if kinds or exclude_ids:
+                candidates = np.array([
+                    row for row in candidates
+                    if (not kinds or self.rows[row]["metadata"].get("kind") in kinds)
+                    and (not exclude_ids or self.rows[row]["id"] not in exclude_ids)
+                ], dtype=np.int64)
+            if len(candidates) == 0:
+                return []
+
+            scores = np.asarray(self.vectors[candidates] @ query)
+            top = np.argsort(-scores)[:k] if len(scores) <= k else np.argpartition(-scores, k)[:k]
+            top = top[np.argsort(-scores[top])]
+            return [
+                {
+                    "id": self.rows[candidates[i]]["id"],
+                    "score": float(scores[i]),
+                    "text": self.rows[candidates[i]]["text"],
+                    "metadata": self.rows[candidates[i]]["metadata"]
+                }
+                for i in top
+            ]
+
+_indexes: Dict[str, SemanticIndex] = {}
+_registry_lock = threading.Lock()
+
+def _safe_id(project_id: str) -> str:
+    return "".join(ch if ch.isalnum() or ch in "-_" else "_" for ch in project_id)
+
+def get_project_index(project_id: str, embedder: Optional[Embedder] = None, create: bool = True) -> Optional[SemanticIndex]:
+    embedder = embedder or get_embedder()
+    directory = os.path.dirname(data_path("semantic", _safe_id(project_id), "_"))
+    key = f"{project_id}:{embedder.name}:{embedder.dim}"
+    with _registry_lock:
+        if key not in _indexes:
+            if not create and not os.path.exists(os.path.join(directory, "meta.json")):
+                return None
+            _indexes[key] = SemanticIndex(directory, embedder.dim, embedder.name)
+        return _indexes[key]
+
+def index_project(project: Dict[str, Any], project_id: Optional[str] = None, embedder: Optional[Embedder] = None) -> Dict[str, Any]:
+    """Embed a project's citations, responses and master outline prose, re-embedding only changed chunks."""
+    embedder = embedder or get_embedder()
+    project_id = project_id or project.get("id")
+    if not project_id:
+        raise ValueError("Project id is required for semantic indexing")
+
+    documents = []
+    for chunk in iter_project_chunks(project, project_id=project_id):
+        source = chunk["source"]
+        if source["kind"] not in SEMANTIC_KINDS:
+            continue
+        metadata = {k: v for k, v in source.items() if k not in ("text", "content_hash", "project_id")}
+        documents.append({"id": chunk["id"], "text": source["text"], "content_hash": source["content_hash"], "metadata": metadata})
+
+    index = get_project_index(project_id, embedder)
+    stats = index.upsert(documents, embedder)
+    stats["removed"] = index.remove_missing({doc["id"] for doc in documents})
+    stats["size"] = index.size
+    stats["project_id"] = project_id
+    return stats
+
+def search_project(project_id: str, query: str, k: int = 5, embedder: Optional[Embedder] = None, **kwargs) -> List[Dict[str, Any]]:
+    embedder = embedder or get_embedder()
+    index = get_project_index(project_id, embedder, create=False)
+    if index is None:
+        return []
+    return index.search(embedder.embed([query])[0], k=k, **kwargs)
+
+def format_related_evidence(project_id: Optional[str], query: str, k: int = 5, exclude_keys=None) -> str:
+    """
+    Prompt snippet listing semantically related evidence from elsewhere in the project.
+    Returns an empty string when there is no project index or the lookup fails,
+    so prompt builders can include it unconditionally.
+    """
+    if not project_id or not query:
+        return ""
+    try:
+        results = search_project(project_id, query, k=k * 2 if exclude_keys else k)
+    except Exception as e:
+        logger.warning(f"Semantic lookup failed for project {project_id}: {str(e)}")
+        return ""
+    if exclude_keys:
+        results = [r for r in results if r["metadata"].get("key") not in exclude_keys][:k]
+    if not results:
+        return ""
+    lines = []
+    for result in results:
+        meta = result["metadata"]
+        where = meta.get("subsection_title") or meta.get("key") or meta.get("doc_path")
+        snippet = result["text"][:400].replace("\n", " ")
+        lines.append(f"- ({meta.get('kind')}, {where}) {snippet}")
+    return "\n".join(lines)
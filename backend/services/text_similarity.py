@@ -0,0 +1,245 @@
+from typing import Any, Callable, Dict, List, Optional, Sequence
+import re
+import numpy as np
+
+try:
+    from scipy import sparse
+    from scipy.sparse.csgraph import connected_components
+except ImportError:  # dense NumPy fallback; fine for a section's worth of text
+    sparse = None
+
+# Same filtering as the outline view's keyword extraction: lowercase words longer than three characters
+STOP_WORDS = frozenset("""
+the and or but in on at to for of with by is are was were be been being have has had do does did will would
+could should may might must shall can this that these those what how when where why which who whom whose
+there their they them than then into from about over under between also such other more most some
+behind within across against during after before through while upon toward towards including among since
+because both each very well used
+""".split())
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+# Matrices with at most this many cells are kept dense
+DENSE_LIMIT = 2_000_000
+
+def tokenize(text: str) -> List[str]:
+    return [
+        token for token in TOKEN_PATTERN.findall((text or "").lower())
+        if is_content_word(token)
+    ]
+
+def is_content_word(token: str) -> bool:
+    return len(token) > 3 and token not in STOP_WORDS and not token.isdigit()
+
+def tokenize_phrases(text: str) -> List[str]:
+    """Content words plus bigrams of adjacent content words ("energy leverage")."""
+    words = TOKEN_PATTERN.findall((text or "").lower())
+    content = [is_content_word(word) for word in words]
+    tokens = [word for word, keep in zip(words, content) if keep]
+    tokens.extend(
+        f"{words[i]} {words[i + 1]}" for i in range(len(words) - 1) if content[i] and content[i + 1]
+    )
+    return tokens
+
+class TfidfMatrix:
+    """
+    Sublinear TF-IDF rows (L2-normalized) for a list of texts. Stored as a
+    SciPy CSR matrix when SciPy is available and the matrix is large, otherwise
+    as a dense array (slicing small dense blocks is cheaper than sparse overhead).
+    """
+
+    def __init__(self, texts: Sequence[str], analyzer: Callable[[str], List[str]] = tokenize):
+        self.size = len(texts)
+        self.vocabulary: Dict[str, int] = {}
+        ids = [[self.vocabulary.setdefault(token, len(self.vocabulary)) for token in analyzer(text)] for text in texts]
+        self.terms = list(self.vocabulary)
+        width = max(len(self.terms), 1)
+
+        # One entry per (row, term) with its count, from a single sort of row * width + term
+        lengths = np.fromiter((len(row) for row in ids), dtype=np.int64, count=self.size)
+        flat = np.fromiter((term for row in ids for term in row), dtype=np.int64, count=int(lengths.sum()))
+        keys, counts = np.unique(np.repeat(np.arange(self.size, dtype=np.int64), lengths) * width + flat, return_counts=True)
+        rows, cols = keys // width, keys % width
+        df = np.bincount(cols, minlength=len(self.terms))
+        idf = np.log((1 + self.size) / (1 + df)) + 1
+        data = (1 + np.log(counts)) * idf[cols]
+        norms = np.sqrt(np.bincount(rows, weights=data ** 2, minlength=self.size))
+        data = data / norms[rows]
+
+        shape = (self.size, len(self.terms))
+        self.sparse = sparse is not None and self.size * len(self.terms) > DENSE_LIMIT
+        if self.sparse:
+            self.matrix = sparse.csr_matrix((data, (rows, cols)), shape=shape)
+        else:
+            self.matrix = np.zeros(shape)
+            self.matrix[rows, cols] = data
+
+    def rows(self, indices: Sequence[int]):
+        return self.matrix[np.asarray(indices, dtype=np.int64)]
+
+    def similarity(self, indices: Optional[Sequence[int]] = None) -> np.ndarray:
+        """Dense cosine similarity between the given rows (all rows by default)."""
+        block = self.matrix if indices is None else self.rows(indices)
+        product = block @ block.T
+        return product.toarray() if self.sparse else product
+
+    def top_terms(self, groups: Sequence[Sequence[int]], k: int = 5) -> List[List[str]]:
+        """Highest-weighted terms of each group's centroid, for many groups in one product."""
+        if not groups:
+            return []
+        members = [(g, row) for g, rows in enumerate(groups) for row in rows]
+        group_ids = np.array([g for g, _ in members], dtype=np.int64)
+        row_ids = np.array([row for _, row in members], dtype=np.int64)
+        if self.sparse:
+            indicator = sparse.csr_matrix(
+                (np.ones(len(members)), (group_ids, row_ids)), shape=(len(groups), self.size)
+            )
+            centroids = (indicator @ self.matrix).tocsr()
+            result = []
+            for g in range(len(groups)):
+                start, end = centroids.indptr[g], centroids.indptr[g + 1]
+                weights, columns = centroids.data[start:end], centroids.indices[start:end]
+                order = np.lexsort((columns, -weights))[:k]
+                result.append([self.terms[columns[i]] for i in order if weights[i] > 0])
+            return result
+        centroids = np.zeros((len(groups), len(self.terms)))
+        np.add.at(centroids, group_ids, self.matrix[row_ids])
+        return [
+            [self.terms[i] for i in np.argsort(-row, kind="stable")[:k] if row[i] > 0]
+            for row in centroids
+        ]
+
+def group_indices(similarity: np.ndarray, threshold: float, linkage: str = "seed") -> List[List[int]]:
+    """
+    Partition rows of a similarity matrix into groups.
+
+    "seed" matches the outline view: each ungrouped item in order starts a group
+    and takes every ungrouped item more similar than threshold to it.
+    "connected" groups items reachable through any chain of similar pairs.
+    """
+    size = similarity.shape[0]
+    if size == 0:
+        return []
+    adjacency = similarity > threshold
+    if linkage == "connected":
+        if sparse is not None:
+            _, labels = connected_components(sparse.csr_matrix(adjacency), directed=False)
+        else:
+            labels = np.arange(size)
+            changed = True
+            while changed:  # min-label propagation
+                neighbour_min = np.where(adjacency, labels[None, :], size).min(axis=1)
+                updated = np.minimum(labels, neighbour_min)
+                changed = bool((updated != labels).any())
+                labels = updated
+        groups: Dict[int, List[int]] = {}
+        for index, label in enumerate(labels.tolist()):
+            groups.setdefault(label, []).append(index)
+        return list(groups.values())
+    if linkage != "seed":
+        raise ValueError(f"Unknown linkage: {linkage}")
+
+    grouped = np.zeros(size, dtype=bool)
+    groups = []
+    for seed in range(size):
+        if grouped[seed]:
+            continue
+        members = np.flatnonzero(adjacency[seed] & ~grouped)
+        members = [seed] + [int(i) for i in members if i != seed]
+        grouped[members] = True
+        groups.append(members)
+    return groups
+
+def average_linkage(similarity: np.ndarray, clusters: int) -> List[List[int]]:
+    """
+    Agglomerative clustering: repeatedly merge the two most similar clusters
+    (average similarity between their members) until clusters remain.
+    Groups are returned in order of their first member.
+    """
+    size = similarity.shape[0]
+    scores = np.array(similarity, dtype=float)
+    np.fill_diagonal(scores, -np.inf)
+    counts = np.ones(size)
+    active = np.ones(size, dtype=bool)
+    members = [[i] for i in range(size)]
+    while active.sum() > max(clusters, 1):
+        masked = np.where(active[:, None] & active[None, :], scores, -np.inf)
+        a, b = sorted(divmod(int(np.argmax(masked)), size))
+        # Lance-Williams update for average linkage
+        merged = (counts[a] * scores[a] + counts[b] * scores[b]) / (counts[a] + counts[b])
+        scores[a, :] = merged
+        scores[:, a] = merged
+        scores[a, a] = -np.inf
+        counts[a] += counts[b]
+        active[b] = False
+        members[a] = sorted(members[a] + members[b])
+    return sorted((members[i] for i in np.flatnonzero(active)), key=lambda group: group[0])
+
+def theme_name(terms: List[str]) -> str:
+    if not terms:
+        return "Research Analysis"
+    primary = " ".join(terms[:3])
+    return f"{primary[0].upper()}{primary[1:]} Analysis"
+
+def group_texts(texts: Sequence[str], threshold: float = 0.3, linkage: str = "seed") -> List[Dict[str, Any]]:
+    """Group texts by TF-IDF cosine similarity."""
+    tfidf = TfidfMatrix(texts)
+    groups = group_indices(tfidf.similarity(), threshold, linkage)
+    return [
+        {"members": members, "key_terms": terms, "theme": theme_name(terms)}
+        for members, terms in zip(groups, tfidf.top_terms(groups))
+    ]
+
+def group_section(section: Dict[str, Any], question_threshold: float = 0.3, finding_threshold: float = 0.3,
+                  linkage: str = "seed") -> List[Dict[str, Any]]:
+    """
+    Theme groups of questions per subsection, and within each theme the groups
+    of similar citation findings, for a whole outline section. Term weights
+    come from the whole section so that shared vocabulary counts for less;
+    similarities are computed once per subsection and sliced per theme.
+    """
+    question_texts, finding_texts = [], []
+    layout = []
+    for subsection in section.get("subsections") or []:
+        question_rows, finding_rows = [], []
+        for question in subsection.get("questions") or []:
+            if not isinstance(question, dict):
+                continue
+            citations = [c for c in question.get("citations") or [] if isinstance(c, dict)]
+            question_rows.append(len(question_texts))
+            finding_rows.append(list(range(len(finding_texts), len(finding_texts) + len(citations))))
+            question_texts.append(question.get("question") or "")
+            finding_texts.extend(c.get("description") or c.get("apa") or "" for c in citations)
+        layout.append((subsection, question_rows, finding_rows))
+
+    question_tfidf = TfidfMatrix(question_texts)
+    finding_tfidf = TfidfMatrix(finding_texts)
+    result, question_term_rows, finding_term_rows = [], [], []
+    for subsection, question_rows, finding_rows in layout:
+        flat_findings = [row for rows in finding_rows for row in rows]
+        finding_similarity = finding_tfidf.similarity(flat_findings) if flat_findings else None
+        offsets = np.cumsum([0] + [len(rows) for rows in finding_rows])
+
+        question_groups = []
+        for members in group_indices(question_tfidf.similarity(question_rows), question_threshold, linkage) if question_rows else []:
+            # (question index within subsection, citation index within question) for every finding in the theme
+            positions = [(q, c) for q in members for c in range(len(finding_rows[q]))]
+            local = np.array([offsets[q] + c for q, c in positions], dtype=np.int64)
+            finding_groups = []
+            if len(local):
+                for finding_members in group_indices(finding_similarity[np.ix_(local, local)], finding_threshold, linkage):
+                    finding_term_rows.append([finding_rows[positions[i][0]][positions[i][1]] for i in finding_members])
+                    finding_groups.append({"citations": [list(positions[i]) for i in finding_members]})
+            question_term_rows.append([question_rows[q] for q in members])
+            question_groups.append({"question_indices": members, "finding_groups": finding_groups})
+        result.append({"subsection_title": subsection.get("subsection_title", ""), "question_groups": question_groups})
+
+    question_terms = iter(question_tfidf.top_terms(question_term_rows))
+    finding_terms = iter(finding_tfidf.top_terms(finding_term_rows))
+    for subsection in result:
+        for group in subsection["question_groups"]:
+            group["key_terms"] = next(question_terms)
+            group["theme"] = theme_name(group["key_terms"])
+            for finding in group["finding_groups"]:
+                finding["key_terms"] = next(finding_terms)
+    return result
@@ -0,0 +1,177 @@
+from collections import Counter
+from typing import Any, Dict, List, Optional
+from services.text_similarity import TfidfMatrix, average_linkage, tokenize_phrases
+import json
+import math
+import re
+
+MAX_THEMES = 4
+YEAR_PATTERN = re.compile(r"\b(?:19|20)\d{2}\b")
+SENTENCE_PATTERN = re.compile(r"(?<=[.!?])\s+")
+
+def theme_count(questions: int) -> int:
+    """Roughly sqrt(n) themes, at most MAX_THEMES and never more than there are questions."""
+    if questions <= 1:
+        return questions
+    return min(MAX_THEMES, questions, max(2, round(math.sqrt(questions))))
+
+def question_document(question: Dict[str, Any]) -> str:
+    parts = [question.get("question", "")]
+    for citation in question.get("citations") or []:
+        if isinstance(citation, dict):
+            parts.append(citation.get("description") or "")
+    return "\n".join(parts)
+
+def key_phrases(terms: List[str], k: int = 5) -> List[str]:
+    """Top terms with bigrams first; words already inside a chosen bigram are dropped."""
+    bigrams = [term for term in terms if " " in term]
+    covered = {word for bigram in bigrams for word in bigram.split()}
+    words = [term for term in terms if " " not in term and term not in covered]
+    return (bigrams + words)[:k]
+
+def local_theme_name(phrases: List[str], fallback: str) -> str:
+    if not phrases:
+        return fallback
+    name = " and ".join(phrases[:2])
+    return name[0].upper() + name[1:]
+
+def year_span(texts: List[str]) -> Optional[str]:
+    years = sorted({int(year) for text in texts for year in YEAR_PATTERN.findall(text or "")})
+    if not years:
+        return None
+    return str(years[0]) if len(years) == 1 else f"{years[0]}-{years[-1]}"
+
+def citation_numbers(citations: List[Dict[str, Any]]) -> Dict[str, int]:
+    """APA string -> 1-based position in the request's citation list."""
+    numbers: Dict[str, int] = {}
+    for index, citation in enumerate(citations, 1):
+        apa = (citation.get("apa") or "").strip() if isinstance(citation, dict) else ""
+        if apa and apa not in numbers:
+            numbers[apa] = index
+    return numbers
+
+def cluster_questions(questions: List[Dict[str, Any]], citations: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Group questions (with their citation descriptions) into candidate themes by
+    TF-IDF over words and two-word phrases and average-linkage clustering, and
+    describe each group with what the data says: key phrases, years, source
+    categories, cited works and a leading sentence per source.
+    """
+    if not questions:
+        return []
+    tfidf = TfidfMatrix([question_document(q) for q in questions], analyzer=tokenize_phrases)
+    groups = average_linkage(tfidf.similarity(), theme_count(len(questions)))
+    numbers = citation_numbers(citations)
+
+    clusters = []
+    for members, terms in zip(groups, tfidf.top_terms(groups, k=10)):
+        cited = [c for i in members for c in questions[i].get("citations") or [] if isinstance(c, dict)]
+        descriptions = [c.get("description") or "" for c in cited]
+        categories = Counter(category for c in cited for category in c.get("categories") or [] if isinstance(category, str))
+        apas = list(dict.fromkeys((c.get("apa") or "").strip() for c in cited if c.get("apa")))
+        clusters.append({
+            "questions": members,
+            "key_phrases": key_phrases(terms),
+            "temporal_scope": year_span([questions[i].get("question", "") for i in members] + descriptions),
+            "evidence_types": [category for category, _ in categories.most_common(3)],
+            "citations": [numbers[apa] for apa in apas if apa in numbers],
+            "sources": apas,
+            "evidence": [SENTENCE_PATTERN.split(d.strip())[0] for d in descriptions if d.strip()][:3]
+        })
+    return clusters
+
+def format_clusters(clusters: List[Dict[str, Any]], questions: List[Dict[str, Any]]) -> str:
+    """Compact description of the local clusters for the naming prompt."""
+    blocks = []
+    for number, cluster in enumerate(clusters, 1):
+        lines = [f"CLUSTER {number}"]
+        lines.extend(f"  Q{i + 1}: {questions[i].get('question', '')}" for i in cluster["questions"])
+        lines.append(f"  Key phrases: {', '.join(cluster['key_phrases']) or 'n/a'}")
+        if cluster["temporal_scope"]:
+            lines.append(f"  Years mentioned: {cluster['temporal_scope']}")
+        if cluster["evidence_types"]:
+            lines.append(f"  Source types: {'; '.join(cluster['evidence_types'])}")
+        lines.extend(f"  Evidence: {sentence}" for sentence in cluster["evidence"][:2])
+        blocks.append("\n".join(lines))
+    return "\n\n".join(blocks)
+
+def parse_cluster_naming(text: str, cluster_total: int) -> Optional[Dict[str, Any]]:
+    """The naming JSON with cluster numbers checked; None if unusable."""
+    match = re.search(r"\{.*\}", text or "", re.DOTALL)
+    if not match:
+        return None
+    try:
+        data = json.loads(match.group())
+    except json.JSONDecodeError:
+        return None
+    if not isinstance(data, dict):
+        return None
+    themes = {}
+    for theme in data.get("themes") or []:
+        if isinstance(theme, dict) and isinstance(theme.get("cluster"), int) and theme.get("theme_name"):
+            if 1 <= theme["cluster"] <= cluster_total:
+                themes[theme["cluster"]] = theme
+    if not themes:
+        return None
+    # Clusters the model left out of the order keep their place at the end
+    order = [n for n in data.get("order") or [] if isinstance(n, int) and 1 <= n <= cluster_total]
+    order = list(dict.fromkeys(order + list(range(1, cluster_total + 1))))
+    return dict(data, themes=themes, order=order)
+
+def build_clustered_analysis(clusters: List[Dict[str, Any]], naming: Optional[Dict[str, Any]],
+                             subsection_title: str) -> Dict[str, Any]:
+    """
+    DataAnalysisResponse fields from the local clusters, named and ordered by
+    the model when naming is given, otherwise from the clusters' key phrases.
+    """
+    order = naming["order"] if naming else sorted(
+        range(1, len(clusters) + 1), key=lambda n: (-len(clusters[n - 1]["questions"]), n)
+    )
+    themes = naming["themes"] if naming else {}
+    points = {p.get("cluster"): p for p in (naming or {}).get("outline_points") or [] if isinstance(p, dict)}
+
+    thematic_clusters, main_points = [], []
+    for position, number in enumerate(order, 1):
+        cluster = clusters[number - 1]
+        theme = themes.get(number, {})
+        name = (theme.get("theme_name") or local_theme_name(cluster["key_phrases"], f"{subsection_title} Analysis")).strip()
+        description = theme.get("theme_description") or (
+            f"Questions on {', '.join(cluster['key_phrases'][:3]) or subsection_title.lower()}"
+        )
+        thematic_clusters.append({
+            "theme_name": name,
+            "theme_description": description,
+            "questions": [f"Q{i + 1}" for i in cluster["questions"]],
+            "key_concepts": cluster["key_phrases"],
+            "evidence_types": cluster["evidence_types"] or ["citation_content"],
+            "temporal_scope": cluster["temporal_scope"]
+        })
+        point = points.get(number, {})
+        main_points.append({
+            "level": str(position),
+            "content": point.get("content") or description,
+            "supporting_evidence": cluster["evidence"][:2],
+            "citations": cluster["citations"][:5],
+            "rationale": point.get("rationale") or f"Supported by {len(cluster['sources'])} sources grouped under {name}",
+            "questions": [f"Q{i + 1}" for i in cluster["questions"]]
+        })
+
+    names = [cluster["theme_name"] for cluster in thematic_clusters]
+    transitions = (naming or {}).get("transitions")
+    if not isinstance(transitions, list) or not all(isinstance(t, str) for t in transitions):
+        transitions = [f"From {a} to {b}" for a, b in zip(names, names[1:])]
+    return {
+        "thematic_clusters": thematic_clusters,
+        "logical_structure": {
+            "approach": (naming or {}).get("approach") or "Themes ordered by the amount of supporting evidence",
+            "reasoning": (naming or {}).get("reasoning") or "Questions grouped locally by shared terms in their questions and sources",
+            "sequence": names,
+            "transitions": transitions
+        },
+        "generated_outline": {
+            "main_points": main_points,
+            "thematic_basis": f"{len(clusters)} themes found by clustering questions and their sources",
+            "logical_flow": " -> ".join(names),
+            "evidence_integration": "Each point cites the sources of the questions in its theme"
+        }
+    }
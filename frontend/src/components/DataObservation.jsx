@@ -2,6 +2,7 @@ import { useState, useEffect, useRef } from 'react';
 import { FaPlay, FaPlayCircle, FaExpand, FaChevronLeft, FaChevronRight, FaCheckCircle, FaSpinner, FaEye, FaInfoCircle, FaPlus, FaMinus, FaSyncAlt, FaPause, FaFastForward } from 'react-icons/fa';
 import axios from 'axios';
 import Modal from './Modal';
+import RetryService from '../services/retryService';
 
 const DataObservation = ({
   outlineData,
@@ -588,36 +589,21 @@ const DataObservation = ({
           // Call the new prose generation endpoint with timeout
           console.log(`      🔄 Generating prose for question: ${question.question.substring(0, 50)}...`);
           
-          const controller = new AbortController();
-          const timeoutId = setTimeout(() => controller.abort(), 60000); // 60 second timeout
-          
           try {
-            const proseResponse = await fetch('http://localhost:8000/generate_prose_from_outline', {
-              method: 'POST',
-              headers: {
-                'Content-Type': 'application/json',
-              },
-              body: JSON.stringify({
-                thesis: finalThesis || '',
-                methodology: safeMethodology || '',
-                section_context: section.section_context || '',
-                subsection_context: subsection.subsection_context || '',
-                question: question.question,
-                citation_responses: [fusedResponse],
-                citations: question.citations || [],
-                question_number: originalQuestionIndex + 1,
-                citation_references: citationReferences
-              }),
-              signal: controller.signal
-            });
-            
-            clearTimeout(timeoutId);
-
-            if (!proseResponse.ok) {
-              throw new Error(`HTTP error! status: ${proseResponse.status}`);
-            }
-
-            const proseData = await proseResponse.json();
+            // One Idempotency-Key across retries: a retry after a timeout gets the first attempt's prose
+            const proseResponse = await RetryService.postWithRetry('http://localhost:8000/generate_prose_from_outline', {
+              thesis: finalThesis || '',
+              methodology: safeMethodology || '',
+              section_context: section.section_context || '',
+              subsection_context: subsection.subsection_context || '',
+              question: question.question,
+              citation_responses: [fusedResponse],
+              citations: question.citations || [],
+              question_number: originalQuestionIndex + 1,
+              citation_references: citationReferences
+            }, { timeout: 60000 }); // 60 second timeout per attempt
+
+            const proseData = proseResponse.data;
             console.log(`      🔍 Prose response for question ${originalQuestionIndex + 1}:`, proseData);
             
             if (proseData && proseData.response) {
@@ -628,8 +614,7 @@ const DataObservation = ({
               combinedProse += `<p><em>Error: No prose generated for this question.</em></p>\n\n`;
             }
           } catch (fetchError) {
-            clearTimeout(timeoutId);
-            if (fetchError.name === 'AbortError') {
+            if (fetchError.code === 'ECONNABORTED') {
               console.error(`      ⏱️ Timeout generating prose for question ${originalQuestionIndex + 1}`);
               combinedProse += `<p><em>Timeout: Prose generation took too long for this question.</em></p>\n\n`;
             } else {
@@ -1213,7 +1198,7 @@ const DataObservation = ({
         const referenceInfo = questionRefs[i] || {};
         const referenceNumber = referenceInfo.referenceNumber || (i + 1);
 
-        const response = await axios.post('http://localhost:8000/generate_citation_response', {
+        const response = await RetryService.postWithRetry('http://localhost:8000/generate_citation_response', {
           question: questionObj.question,
           citation: safeCitation,
           section_context: sectionContext,
@@ -1237,7 +1222,7 @@ const DataObservation = ({
           author: typeof c.author === "string" ? c.author : null,
           reference_id: (questionRefs[i]?.referenceNumber || (i + 1)).toString()
         }));
-        const fusedResp = await axios.post('http://localhost:8000/generate_fused_response', {
+        const fusedResp = await RetryService.postWithRetry('http://localhost:8000/generate_fused_response', {
           question: questionObj.question,
           citation_responses: citationResponses,
           citations: safeCitations,
@@ -2,6 +2,7 @@ import { useState, useEffect, useRef } from 'react';
 import { FaPlay, FaPlayCircle, FaExpand, FaChevronLeft, FaChevronRight, FaCheckCircle, FaSpinner, FaEye, FaInfoCircle, FaPlus, FaMinus, FaSyncAlt, FaPause, FaFastForward } from 'react-icons/fa';
 import axios from 'axios';
 import Modal from './Modal';
+import RetryService from '../services/retryService';
 
 const DataObservationBuilder = ({
   outlineData,
@@ -42,6 +43,8 @@ const DataObservationBuilder = ({
   // Step 2: Answer Questions (existing functionality)
   const [questions, setQuestions] = useState({}); // { questionKey: "question text" }
   const [responses, setResponses] = useState({}); // { questionKey: [resp1, resp2, ..., fusedResp] }
+  // Parsed outline trees the backend returned alongside each response, saved so indexing can skip re-parsing
+  const responseOutlines = useRef({}); // { questionKey: [outline1, outline2, ..., fusedOutline] }
   const [loading, setLoading] = useState({});
   const [currentResponseIdx, setCurrentResponseIdx] = useState({}); // { questionKey: idx }
   const [selectedResponse, setSelectedResponse] = useState(null);
@@ -104,6 +107,9 @@ const DataObservationBuilder = ({
       console.log('Loading responses:', Object.keys(literatureData.responses).length);
       setResponses(literatureData.responses);
     }
+    if (literatureData.responseOutlines) {
+      responseOutlines.current = literatureData.responseOutlines;
+    }
     
     // Restore UI states
     if (literatureData.showContextMap !== undefined) setShowContextMap(literatureData.showContextMap);
@@ -238,6 +244,7 @@ const DataObservationBuilder = ({
           showStep3Interface: false,
           questions: questions,
           responses: responses,
+          responseOutlines: responseOutlines.current,
           masterOutlines: masterOutlines
         });
       }
@@ -367,7 +374,8 @@ const DataObservationBuilder = ({
           stepStatus: { 1: 'complete', 2: 'complete', 3: 'ready' },
           questionAnsweringComplete: true,
           questions: questions,
-          responses: responses
+          responses: responses,
+          responseOutlines: responseOutlines.current
         });
       }
     }
@@ -411,6 +419,7 @@ const DataObservationBuilder = ({
           detailedOutlineComplete: true,
           questions: questions,
           responses: responses,
+          responseOutlines: responseOutlines.current,
           masterOutlines: generatedProse, // This contains the prose data
           contextMapData: contextMapData,
           showContextMap: showContextMap,
@@ -425,6 +434,7 @@ const DataObservationBuilder = ({
       if (onLiteratureReviewComplete) {
         onLiteratureReviewComplete({
           responses: responses,
+          responseOutlines: responseOutlines.current,
           masterOutlines: generatedProse,
           contextMapData: contextMapData,
           completionStatus: 'complete'
@@ -509,6 +519,7 @@ const DataObservationBuilder = ({
               detailedOutlineComplete: false,
               questions: questions,
               responses: responses,
+              responseOutlines: responseOutlines.current,
               masterOutlines: currentProgress,
               contextMapData: contextMapData,
               showContextMap: showContextMap,
@@ -540,6 +551,7 @@ const DataObservationBuilder = ({
         detailedOutlineComplete: true,
         questions: questions,
         responses: responses,
+        responseOutlines: responseOutlines.current,
         masterOutlines: proseResults,
         contextMapData: contextMapData,
         showContextMap: showContextMap,
@@ -607,36 +619,21 @@ const DataObservationBuilder = ({
           // Call the new prose generation endpoint with timeout
           console.log(`      🔄 Generating prose for question: ${question.question.substring(0, 50)}...`);
           
-          const controller = new AbortController();
-          const timeoutId = setTimeout(() => controller.abort(), 60000); // 60 second timeout
-          
           try {
-            const proseResponse = await fetch('http://localhost:8000/generate_prose_from_outline', {
-              method: 'POST',
-              headers: {
-                'Content-Type': 'application/json',
-              },
-              body: JSON.stringify({
-                thesis: finalThesis || '',
-                methodology: safeMethodology || '',
-                section_context: section.section_context || '',
-                subsection_context: subsection.subsection_context || '',
-                question: question.question,
-                citation_responses: [fusedResponse],
-                citations: question.citations || [],
-                question_number: originalQuestionIndex + 1,
-                citation_references: citationReferences
-              }),
-              signal: controller.signal
-            });
-            
-            clearTimeout(timeoutId);
-
-            if (!proseResponse.ok) {
-              throw new Error(`HTTP error! status: ${proseResponse.status}`);
-            }
-
-            const proseData = await proseResponse.json();
+            // One Idempotency-Key across retries: a retry after a timeout gets the first attempt's prose
+            const proseResponse = await RetryService.postWithRetry('http://localhost:8000/generate_prose_from_outline', {
+              thesis: finalThesis || '',
+              methodology: safeMethodology || '',
+              section_context: section.section_context || '',
+              subsection_context: subsection.subsection_context || '',
+              question: question.question,
+              citation_responses: [fusedResponse],
+              citations: question.citations || [],
+              question_number: originalQuestionIndex + 1,
+              citation_references: citationReferences
+            }, { timeout: 60000 }); // 60 second timeout per attempt
+
+            const proseData = proseResponse.data;
             console.log(`      🔍 Prose response for question ${originalQuestionIndex + 1}:`, proseData);
             
             if (proseData && proseData.response) {
@@ -647,8 +644,7 @@ const DataObservationBuilder = ({
               combinedProse += `<p><em>Error: No prose generated for this question.</em></p>\n\n`;
             }
           } catch (fetchError) {
-            clearTimeout(timeoutId);
-            if (fetchError.name === 'AbortError') {
+            if (fetchError.code === 'ECONNABORTED') {
               console.error(`      ⏱️ Timeout generating prose for question ${originalQuestionIndex + 1}`);
               combinedProse += `<p><em>Timeout: Prose generation took too long for this question.</em></p>\n\n`;
             } else {
@@ -1215,6 +1211,7 @@ const DataObservationBuilder = ({
 
       // 1. Generate outline for each citation
       const citationResponses = [];
+      const citationOutlines = [];
       for (let i = 0; i < citations.length; i++) {
         const c = citations[i] || {};
         const safeCitation = {
@@ -1230,7 +1227,7 @@ const DataObservationBuilder = ({
         const referenceInfo = questionRefs[i] || {};
         const referenceNumber = referenceInfo.referenceNumber || (i + 1);
 
-        const response = await axios.post('http://localhost:8000/generate_citation_response', {
+        const response = await RetryService.postWithRetry('http://localhost:8000/generate_citation_response', {
           question: questionObj.question,
           citation: safeCitation,
           section_context: sectionContext,
@@ -1242,10 +1239,12 @@ const DataObservationBuilder = ({
           reference_id: referenceNumber.toString() // Add reference number to backend call
         });
         citationResponses.push(response.data.response);
+        citationOutlines.push(response.data.outline || null);
       }
 
       // 2. Generate fused/master outline
       let fusedResponse = '';
+      let fusedOutline = null;
       if (citationResponses.length > 0) {
         const safeCitations = citations.map((c, i) => ({
           apa: typeof c.apa === "string" ? c.apa : null,
@@ -1254,7 +1253,7 @@ const DataObservationBuilder = ({
           author: typeof c.author === "string" ? c.author : null,
           reference_id: (questionRefs[i]?.referenceNumber || (i + 1)).toString()
         }));
-        const fusedResp = await axios.post('http://localhost:8000/generate_fused_response', {
+        const fusedResp = await RetryService.postWithRetry('http://localhost:8000/generate_fused_response', {
           question: questionObj.question,
           citation_responses: citationResponses,
           citations: safeCitations,
@@ -1269,7 +1268,12 @@ const DataObservationBuilder = ({
           }))
         });
         fusedResponse = fusedResp.data.response;
+        fusedOutline = fusedResp.data.outline || null;
       }
+      responseOutlines.current = {
+        ...responseOutlines.current,
+        [key]: [...citationOutlines, fusedOutline]
+      };
 
       // Update responses and auto-save with the latest state
       setResponses(prev => {
@@ -1287,6 +1291,7 @@ const DataObservationBuilder = ({
             outline: outlineData,
             questions: questions,
             responses: updated,
+            responseOutlines: responseOutlines.current,
             thesis: finalThesis,
             methodology,
             citationReferenceMap: citationReferenceMap,
@@ -1571,6 +1576,7 @@ const DataObservationBuilder = ({
                   if (onLiteratureReviewComplete) {
                     onLiteratureReviewComplete({
                       responses: responses,
+                      responseOutlines: responseOutlines.current,
                       masterOutlines: masterOutlines,
                       contextMapData: contextMapData,
                       completionStatus: 'complete'
@@ -1,6 +1,7 @@
 import { useState, useEffect } from 'react';
 import axios from 'axios';
 import { FaEdit, FaSave, FaTimes, FaInfoCircle, FaChevronLeft, FaChevronRight, FaPlus } from 'react-icons/fa';
+import PrefetchService from '../services/prefetchService';
 import './ComponentStyles.css';
 
 const MethodologyGenerator = ({
@@ -117,6 +118,18 @@ const MethodologyGenerator = ({
 
   const handleMethodologySelect = (methodologyId) => {
     setSelectedMethodology(methodologyId);
+    // Generating options for the chosen methodology is almost always the next request
+    if (finalThesis && sourceCategories?.length && selectedPaperType) {
+      PrefetchService.notify('methodology_selected', {
+        methodology_type: methodologyId,
+        final_thesis: finalThesis,
+        paper_type: selectedPaperType.name,
+        paper_purpose: selectedPaperType.purpose,
+        paper_tone: selectedPaperType.tone,
+        paper_structure: selectedPaperType.structure,
+        source_categories: sourceCategories
+      });
+    }
     // setSelectedSubMethodology(''); // Clear but don't require - Removed from production, kept for future consideration
     setGeneratedMethodologies([]);
     setMethodologySets([]);
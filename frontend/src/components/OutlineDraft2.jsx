@@ -2,6 +2,7 @@ import { useState, useEffect, useRef } from 'react';
 import { FaPlay, FaSpinner, FaCheckCircle, FaExpand, FaEye, FaSearch, FaCog, FaEdit, FaArrowRight, FaInfoCircle, FaPlus, FaMinus, FaSyncAlt } from 'react-icons/fa';
 import axios from 'axios';
 import Modal from './Modal';
+import RetryService from '../services/retryService';
 
 const OutlineDraft2 = ({
   outlineData,
@@ -864,28 +865,12 @@ const OutlineDraft2 = ({
       // Call AI endpoint for data outline building with timeout and better error handling
       console.log('📤 Making fetch request to build-data-outline endpoint...');
       
-      const controller = new AbortController();
-      const timeoutId = setTimeout(() => controller.abort(), 120000); // 2 minute timeout
-      
-      const response = await fetch('http://localhost:8000/data-analysis/build-data-outline', {
-        method: 'POST',
-        headers: {
-          'Content-Type': 'application/json',
-        },
-        body: JSON.stringify(dataRequest),
-        signal: controller.signal
-      });
-      
-      clearTimeout(timeoutId);
+      const response = await RetryService.postWithRetry(
+        'http://localhost:8000/data-analysis/build-data-outline', dataRequest, { timeout: 120000 } // 2 minute timeout per attempt
+      );
       console.log('📥 Received response from build-data-outline endpoint:', response.status, response.statusText);
       
-      if (!response.ok) {
-        const errorText = await response.text();
-        console.error(`❌ Backend error details:`, errorText);
-        throw new Error(`Data outline building failed for "${section.section_title}": ${response.status} ${response.statusText} - ${errorText}`);
-      }
-      
-      const dataOutline = await response.json();
+      const dataOutline = response.data;
       console.log(`✅ Received data outline for "${section.section_title}":`, dataOutline);
       
       // Process and structure the data outline
@@ -935,13 +920,19 @@ const OutlineDraft2 = ({
       console.error(`❌ Error building data outline for "${section.section_title}":`, error);
       
       // Handle specific error types
-      if (error.name === 'AbortError') {
+      if (error.response) {
+        const errorText = JSON.stringify(error.response.data);
+        console.error(`❌ Backend error details:`, errorText);
+        throw new Error(`Data outline building failed for "${section.section_title}": ${error.response.status} ${error.response.statusText} - ${errorText}`);
+      }
+
+      if (error.code === 'ECONNABORTED') {
         console.error('⏰ Request timed out after 2 minutes');
         throw new Error(`Request timed out for "${section.section_title}". The AI processing is taking too long.`);
       }
       
       // Handle network errors
-      if (error instanceof TypeError && error.message.includes('fetch')) {
+      if (error.code === 'ERR_NETWORK') {
         console.error('🌐 Network error occurred');
         throw new Error(`Network error for "${section.section_title}". Please check if the backend server is running.`);
       }
@@ -2717,21 +2708,17 @@ const OutlineDraft2 = ({
           });
           
           // Call the AI analysis endpoint for outline logic analysis
-          const response = await fetch('http://localhost:8000/data-analysis/analyze-inclusion-exclusion', {
-            method: 'POST',
-            headers: {
-              'Content-Type': 'application/json',
-            },
-            body: JSON.stringify(analysisRequest)
-          });
-          
-          if (!response.ok) {
-            const errorText = await response.text();
+          let response;
+          try {
+            response = await RetryService.postWithRetry('http://localhost:8000/data-analysis/analyze-inclusion-exclusion', analysisRequest);
+          } catch (requestError) {
+            if (!requestError.response) throw requestError;
+            const errorText = JSON.stringify(requestError.response.data);
             console.error(`Backend error for "${subsection.subsection_title}":`, errorText);
-            throw new Error(`Analysis failed for "${subsection.subsection_title}": ${response.status} ${response.statusText} - ${errorText}`);
+            throw new Error(`Analysis failed for "${subsection.subsection_title}": ${requestError.response.status} ${requestError.response.statusText} - ${errorText}`);
           }
           
-          const aiAnalysis = await response.json();
+          const aiAnalysis = response.data;
           console.log(`Completed AI analysis for "${subsection.subsection_title}":`, aiAnalysis);
           
           // Debug the structure of generated_outline.main_points
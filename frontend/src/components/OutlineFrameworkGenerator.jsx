@@ -2,6 +2,7 @@ import { useState, useEffect } from 'react';
 import axios from 'axios';
 import { FaEdit, FaQuestionCircle, FaBookOpen, FaEye, FaEyeSlash, FaSpinner } from 'react-icons/fa';
 import CitationViewer from './CitationViewer';
+import PrefetchService from '../services/prefetchService';
 import './CitationViewer.css';
 // PaperStructurePreview moved to App.jsx (rendered below Methodology)
 import RetryService from '../services/retryService';
@@ -38,6 +39,23 @@ const OutlineGenerator = ({
     }
   }, [savedCustomStructure]);
 
+  // Once the structure settles, start the section contexts that outline generation requests first
+  useEffect(() => {
+    if (!customStructure || !finalThesis || !methodology || hasGenerated) return undefined;
+    const timer = setTimeout(() => {
+      customStructure.filter(s => !s.isAdmin).forEach(section => {
+        PrefetchService.notify('section_created', {
+          final_thesis: finalThesis,
+          section_title: section.title,
+          section_description: section.context || '',
+          methodology: methodology,
+          source_categories: sourceCategories
+        });
+      });
+    }, 3000);
+    return () => clearTimeout(timer);
+  }, [customStructure, finalThesis, methodology, sourceCategories, hasGenerated]);
+
   // Trigger generation when explicitly requested
   useEffect(() => {
     if (triggerGeneration && customStructure && !loading) {
@@ -110,7 +128,7 @@ const OutlineGenerator = ({
       // Generate context for each section using AI
       const sectionsWithContext = [];
       for (const section of customStructure.filter(s => !s.isAdmin)) {
-        const sectionContextResponse = await axios.post('http://localhost:8000/generate_section_context', {
+        const sectionContextResponse = await RetryService.postWithRetry('http://localhost:8000/generate_section_context', {
           final_thesis: finalThesis,
           section_title: section.title,
           section_description: section.context || '',
@@ -120,7 +138,7 @@ const OutlineGenerator = ({
 
         const subsectionsWithContext = [];
         for (const sub of section.subsections || []) {
-          const subsectionContextResponse = await axios.post('http://localhost:8000/generate_subsection_context', {
+          const subsectionContextResponse = await RetryService.postWithRetry('http://localhost:8000/generate_subsection_context', {
             final_thesis: finalThesis,
             section_title: section.title,
             section_context: sectionContextResponse.data.context,
@@ -190,7 +208,7 @@ const OutlineGenerator = ({
         question: questionObj.question
       });
 
-      const res = await axios.post('http://localhost:8000/generate_question_citations', {
+      const res = await RetryService.postWithRetry('http://localhost:8000/generate_question_citations', {
         final_thesis: finalThesis,
         methodology: methodology,
         source_categories: sourceCategories,
@@ -270,7 +288,7 @@ const OutlineGenerator = ({
       const section = outline[sectionIndex];
       const subsection = section.subsections[subsectionIndex];
 
-      const res = await axios.post('http://localhost:8000/generate_questions', {
+      const res = await RetryService.postWithRetry('http://localhost:8000/generate_questions', {
         final_thesis: finalThesis,
         methodology: methodology,
         section_title: section.section_title,
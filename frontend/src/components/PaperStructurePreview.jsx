@@ -1,5 +1,6 @@
 import { useState, useEffect } from 'react';
 import axios from 'axios';
+import RetryService from '../services/retryService';
 import { FaList, FaEye, FaEyeSlash, FaPlus, FaTrash, FaEdit, FaSave, FaTimes, FaArrowUp, FaArrowDown, FaSpinner, FaCheck, FaSync } from 'react-icons/fa';
 
 const PaperStructurePreview = ({ 
@@ -496,7 +497,7 @@ IV. Legal and Policy Framework
 End of Prompt`;
 
       // Call the backend to generate sections and subsections
-      const response = await axios.post('http://localhost:8000/generate_sections_subsections', {
+      const response = await RetryService.postWithRetry('http://localhost:8000/generate_sections_subsections', {
         prompt: prompt,
         paper_type: paperType.id,
         methodology: methodology,
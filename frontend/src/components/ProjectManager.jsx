@@ -1,5 +1,7 @@
 import { useState, useEffect, forwardRef, useImperativeHandle } from 'react';
 import { FaSave, FaFolderOpen, FaPlus, FaTrash, FaDownload, FaUpload, FaCopy } from 'react-icons/fa';
+import ProjectStoreService from '../services/projectStoreService';
+import ProjectSyncService, { SyncConflictError } from '../services/projectSyncService';
 
 const ProjectManager = forwardRef(({ 
   currentProject, 
@@ -43,19 +45,104 @@ const ProjectManager = forwardRef(({
   }, []);
 
   const loadProjectsList = () => {
+    let localProjects = [];
     try {
       const savedProjects = localStorage.getItem('report_generator_projects');
       console.log('Raw saved projects:', savedProjects); // Debug log
       if (savedProjects) {
         const parsedProjects = JSON.parse(savedProjects);
         console.log('Parsed projects:', parsedProjects); // Debug log
-        setProjects(Array.isArray(parsedProjects) ? parsedProjects : []);
-      } else {
-        setProjects([]);
+        localProjects = Array.isArray(parsedProjects) ? parsedProjects : [];
       }
     } catch (error) {
       console.error('Error loading projects:', error);
-      setProjects([]);
+    }
+    setProjects(localProjects);
+
+    // Projects too large for localStorage only exist on the server, and a local copy can be older than the
+    // server's when a local write failed; list those as remote entries so loading them fetches the server version
+    ProjectStoreService.listProjects()
+      .then(serverProjects => {
+        const serverById = new Map(serverProjects.map(p => [p.id, p]));
+        const isNewer = (server, local) => Date.parse(server.updatedAt || 0) > Date.parse(local.updatedAt || 0);
+        const merged = localProjects.map(local => {
+          const server = serverById.get(local.id);
+          return server && isNewer(server, local) ? { ...server, remote: true } : local;
+        });
+        const localIds = new Set(localProjects.map(p => p.id));
+        const remoteOnly = serverProjects
+          .filter(p => !localIds.has(p.id))
+          .map(p => ({ ...p, remote: true }));
+        if (remoteOnly.length > 0 || merged.some((p, i) => p !== localProjects[i])) {
+          setProjects([...merged, ...remoteOnly]);
+        }
+      })
+      .catch(error => console.warn('Project server unavailable, using local projects only:', error.message));
+  };
+
+  // Write the project list locally and push the changed project to the server store
+  const persistProjects = (updatedProjects, changedProject = null) => {
+    try {
+      localStorage.setItem(
+        'report_generator_projects',
+        JSON.stringify(updatedProjects.filter(p => !p.remote))
+      );
+    } catch (error) {
+      console.warn('localStorage is full; relying on the project server:', error);
+      if (changedProject) {
+        // Drop the outdated local copy so it cannot hide the server version on the next reload
+        try {
+          localStorage.setItem(
+            'report_generator_projects',
+            JSON.stringify(updatedProjects.filter(p => !p.remote && p.id !== changedProject.id))
+          );
+        } catch (retryError) {
+          console.warn('Could not drop the outdated local copy:', retryError);
+        }
+      }
+    }
+    if (changedProject) {
+      ProjectSyncService.syncProject(changedProject)
+        .then(result => {
+          // Edits from another tab or device were merged in on the server; show the merged project
+          if (result?.rebased) adoptProject(result.project);
+        })
+        .catch(error => {
+          if (error instanceof SyncConflictError) {
+            resolveSyncConflict(error, changedProject);
+            return;
+          }
+          console.warn('Failed to save project to server:', error.message);
+        });
+    }
+  };
+
+  // Replace the local copy of a project with the given version and load it
+  const adoptProject = (project) => {
+    setProjects(previous => {
+      const updated = previous.map(p => (p.id === project.id ? project : p));
+      try {
+        localStorage.setItem('report_generator_projects', JSON.stringify(updated.filter(p => !p.remote)));
+      } catch (error) {
+        console.warn('localStorage is full; relying on the project server:', error);
+      }
+      return updated;
+    });
+    setCurrentProject(project);
+    onLoadProject(project);
+  };
+
+  const resolveSyncConflict = async (error, project) => {
+    const keepLocal = window.confirm(
+      `"${project.name}" was changed in another tab or on another device, and some of those changes ` +
+      'overlap your unsaved edits.\n\nOK: keep your version and overwrite the other changes.\n' +
+      'Cancel: load the other version and discard your overlapping edits.'
+    );
+    try {
+      const resolved = await ProjectSyncService.resolveConflict(error, project, keepLocal);
+      if (!keepLocal) adoptProject(resolved);
+    } catch (resolveError) {
+      console.warn('Failed to resolve project sync conflict:', resolveError.message);
     }
   };
 
@@ -102,7 +189,7 @@ const ProjectManager = forwardRef(({
     }
 
     setProjects(existingProjects);
-    localStorage.setItem('report_generator_projects', JSON.stringify(existingProjects));
+    persistProjects(existingProjects, projectData);
     
     // Update current project reference and set as active project
     const updatedProject = existingProjects.find(p => p.id === projectData.id);
@@ -169,7 +256,7 @@ const ProjectManager = forwardRef(({
         existingProjects.push(autoProjectData);
         
         setProjects(existingProjects);
-        localStorage.setItem('report_generator_projects', JSON.stringify(existingProjects));
+        persistProjects(existingProjects, autoProjectData);
         
         // Set as current project
         setCurrentProject(autoProjectData);
@@ -204,7 +291,7 @@ const ProjectManager = forwardRef(({
     if (existingIndex >= 0) {
       existingProjects[existingIndex] = projectData;
       setProjects(existingProjects);
-      localStorage.setItem('report_generator_projects', JSON.stringify(existingProjects));
+      persistProjects(existingProjects, projectData);
       
       // Update the current project state to display in the active project box
       setCurrentProject(projectData);
@@ -220,7 +307,16 @@ const ProjectManager = forwardRef(({
     }
   };
 
-  const loadProject = (project) => {
+  const loadProject = async (project) => {
+    if (project.remote) {
+      try {
+        project = await ProjectSyncService.loadProject(project.id);
+      } catch (error) {
+        console.error('Error loading project from server:', error);
+        alert(`Error loading project: ${error.message}`);
+        return;
+      }
+    }
     onLoadProject(project);
     setShowLoadModal(false);
   };
@@ -229,7 +325,10 @@ const ProjectManager = forwardRef(({
     if (window.confirm('Are you sure you want to delete this project?')) {
       const updatedProjects = projects.filter(p => p.id !== projectId);
       setProjects(updatedProjects);
-      localStorage.setItem('report_generator_projects', JSON.stringify(updatedProjects));
+      persistProjects(updatedProjects);
+      ProjectStoreService.deleteProject(projectId)
+        .catch(error => console.warn('Failed to delete project on server:', error.message));
+      ProjectSyncService.forget(projectId);
       loadProjectsList(); // Refresh the list
     }
   };
@@ -265,7 +364,7 @@ const ProjectManager = forwardRef(({
     });
 
     setProjects(updatedProjects);
-    localStorage.setItem('report_generator_projects', JSON.stringify(updatedProjects));
+    persistProjects(updatedProjects, updatedProjects.find(p => p.id === projectId && !p.remote));
     
     // Update current project if it's the one being edited
     if (currentProject && currentProject.id === projectId) {
@@ -303,7 +402,7 @@ const ProjectManager = forwardRef(({
           
           const updatedProjects = [...projects, projectData];
           setProjects(updatedProjects);
-          localStorage.setItem('report_generator_projects', JSON.stringify(updatedProjects));
+          persistProjects(updatedProjects, projectData);
           
           alert('Project imported successfully!');
           loadProjectsList(); // Refresh the list
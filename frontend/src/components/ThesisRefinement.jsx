@@ -1,6 +1,7 @@
 import { useState, useEffect } from 'react';
 import axios from 'axios';
 import { FaQuestionCircle } from 'react-icons/fa';
+import PrefetchService from '../services/prefetchService';
 
 const ThesisRefinement = ({ finalThesis, setFinalThesis, onFinalize, selectedPaperType }) => {
   const [initialThesis, setInitialThesis] = useState(finalThesis || '');
@@ -137,6 +138,8 @@ const ThesisRefinement = ({ finalThesis, setFinalThesis, onFinalize, selectedPap
     setCollapsed(true);
     setFinalThesis(thesisToUse); // <-- update app state
     onFinalize(thesisToUse);
+    // Source recommendations are almost always the next request
+    PrefetchService.notify('thesis_finalized', { final_thesis: thesisToUse });
   };
 
   const handleEdit = () => {
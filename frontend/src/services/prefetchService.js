@@ -0,0 +1,19 @@
+import axios from 'axios';
+
+const API_BASE = 'http://localhost:8000';
+
+class PrefetchService {
+  // Tell the backend which step just finished so it can start the likely next generations.
+  // Fire-and-forget: a failed hint only means the next click generates on demand.
+  static notify(event, context, projectId = null) {
+    axios.post(`${API_BASE}/prefetch/events`, { event, context, project_id: projectId })
+      .catch(err => console.warn(`Prefetch hint ${event} failed:`, err.message));
+  }
+
+  static cancel(projectId) {
+    return axios.delete(`${API_BASE}/prefetch/${encodeURIComponent(projectId || 'anonymous')}`)
+      .catch(err => console.warn('Prefetch cancel failed:', err.message));
+  }
+}
+
+export default PrefetchService;
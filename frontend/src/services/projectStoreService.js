@@ -0,0 +1,41 @@
+import axios from 'axios';
+
+const API_BASE = 'http://localhost:8000';
+
+class ProjectStoreService {
+  static async listProjects() {
+    const res = await axios.get(`${API_BASE}/projects`);
+    return res.data;
+  }
+
+  static async saveProject(project) {
+    // The server only rewrites the sections, subsections and responses that changed
+    const res = await axios.post(`${API_BASE}/projects`, { project });
+    return res.data;
+  }
+
+  static async loadProject(projectId) {
+    const res = await axios.get(`${API_BASE}/projects/${encodeURIComponent(projectId)}`);
+    return res.data;
+  }
+
+  static async deleteProject(projectId) {
+    const res = await axios.delete(`${API_BASE}/projects/${encodeURIComponent(projectId)}`);
+    return res.data;
+  }
+
+  static async listRecords(projectId, parent, includeBody = true) {
+    const res = await axios.get(`${API_BASE}/projects/${encodeURIComponent(projectId)}/records`, {
+      params: { parent, include_body: includeBody }
+    });
+    return res.data.records;
+  }
+
+  static async saveRecord(projectId, path, value) {
+    // e.g. path = 'data/dataObservationData/responses/2-0-1' to save a single response
+    const res = await axios.put(`${API_BASE}/projects/${encodeURIComponent(projectId)}/records/${path}`, { value });
+    return res.data;
+  }
+}
+
+export default ProjectStoreService;
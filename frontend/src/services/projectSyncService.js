@@ -0,0 +1,234 @@
+import axios from 'axios';
+
+const API_BASE = 'http://localhost:8000';
+
+const escapeToken = (token) => String(token).replace(/~/g, '~0').replace(/\//g, '~1');
+
+const isObject = (value) => value !== null && typeof value === 'object' && !Array.isArray(value);
+
+// Build RFC 6902 operations turning oldValue into newValue (add/remove/replace only)
+export const createPatch = (oldValue, newValue, path = '') => {
+  if (oldValue === newValue) return [];
+  if (Array.isArray(oldValue) && Array.isArray(newValue)) {
+    const ops = [];
+    const shared = Math.min(oldValue.length, newValue.length);
+    for (let i = 0; i < shared; i++) {
+      ops.push(...createPatch(oldValue[i], newValue[i], `${path}/${i}`));
+    }
+    for (let i = oldValue.length - 1; i >= newValue.length; i--) {
+      ops.push({ op: 'remove', path: `${path}/${i}` });
+    }
+    for (let i = oldValue.length; i < newValue.length; i++) {
+      ops.push({ op: 'add', path: `${path}/-`, value: newValue[i] });
+    }
+    return ops;
+  }
+  if (isObject(oldValue) && isObject(newValue)) {
+    const ops = [];
+    Object.keys(oldValue).forEach(key => {
+      if (!(key in newValue) || newValue[key] === undefined) {
+        if (oldValue[key] !== undefined) ops.push({ op: 'remove', path: `${path}/${escapeToken(key)}` });
+      }
+    });
+    Object.keys(newValue).forEach(key => {
+      if (newValue[key] === undefined) return;
+      const childPath = `${path}/${escapeToken(key)}`;
+      if (!(key in oldValue) || oldValue[key] === undefined) {
+        ops.push({ op: 'add', path: childPath, value: newValue[key] });
+      } else {
+        ops.push(...createPatch(oldValue[key], newValue[key], childPath));
+      }
+    });
+    return ops;
+  }
+  if (JSON.stringify(oldValue) === JSON.stringify(newValue)) return [];
+  return [{ op: 'replace', path, value: newValue }];
+};
+
+// Paths an operation depends on: removals and appends shift their whole array
+const operationScope = (operation) => {
+  const parent = operation.path.slice(0, operation.path.lastIndexOf('/'));
+  const last = operation.path.slice(operation.path.lastIndexOf('/') + 1);
+  if (operation.op === 'remove' && /^\d+$/.test(last)) return parent;
+  if (operation.op === 'add' && last === '-') return parent;
+  return operation.path;
+};
+
+const overlaps = (a, b) => a === b || a.startsWith(`${b}/`) || b.startsWith(`${a}/`);
+
+// Bookkeeping every save rewrites; this client's value simply wins
+const LAST_WRITER_WINS = ['/updatedAt', '/data/activeTab'];
+
+// Operations in ours that touch something theirs also changed
+export const conflictingOperations = (ours, theirs) => {
+  const theirScopes = theirs
+    .map(operationScope)
+    .filter(scope => !LAST_WRITER_WINS.includes(scope));
+  return ours.filter(operation => theirScopes.some(scope => overlaps(operationScope(operation), scope)));
+};
+
+// Raised when the server copy changed in ways that overlap this client's unsynced edits
+export class SyncConflictError extends Error {
+  constructor(projectId, conflicts, server) {
+    super(`Project ${projectId} was changed elsewhere; ${conflicts.length} of your edits overlap those changes`);
+    this.name = 'SyncConflictError';
+    this.projectId = projectId;
+    this.conflicts = conflicts;
+    // { etag, project } of the server version the edits could not be replayed onto
+    this.server = server;
+  }
+}
+
+const BASE_STORAGE_PREFIX = 'report_generator_sync_base_';
+
+class ProjectSyncService {
+  // projectId -> { etag, snapshot } of the last version the server acknowledged
+  static synced = new Map();
+
+  // After a reload only the ETag is known ({ etag } without a snapshot)
+  static getBase(projectId) {
+    if (!this.synced.has(projectId)) {
+      try {
+        const stored = localStorage.getItem(`${BASE_STORAGE_PREFIX}${projectId}`);
+        if (stored) return { etag: JSON.parse(stored).etag };
+      } catch (error) {
+        console.warn('Could not read sync base from localStorage:', error);
+      }
+    }
+    return this.synced.get(projectId);
+  }
+
+  // The snapshot stays in memory; only the ETag is persisted, so the project is not stored twice
+  static setBase(projectId, etag, snapshot) {
+    this.synced.set(projectId, { etag, snapshot });
+    try {
+      localStorage.setItem(`${BASE_STORAGE_PREFIX}${projectId}`, JSON.stringify({ etag }));
+    } catch (error) {
+      console.warn('Could not persist sync ETag to localStorage:', error);
+    }
+  }
+
+  static forget(projectId) {
+    this.synced.delete(projectId);
+    localStorage.removeItem(`${BASE_STORAGE_PREFIX}${projectId}`);
+  }
+
+  static async uploadProject(project, etag = null) {
+    const snapshot = JSON.parse(JSON.stringify(project));
+    const res = await axios.put(`${API_BASE}/sync/${encodeURIComponent(project.id)}`, snapshot, {
+      headers: etag ? { 'If-Match': etag } : {}
+    });
+    this.setBase(project.id, res.headers.etag, snapshot);
+    return res.data;
+  }
+
+  static async fetchProject(projectId) {
+    const res = await axios.get(`${API_BASE}/sync/${encodeURIComponent(projectId)}`);
+    return { etag: res.headers.etag, project: res.data.project };
+  }
+
+  static async loadProject(projectId) {
+    const { etag, project } = await this.fetchProject(projectId);
+    this.setBase(projectId, etag, project);
+    return project;
+  }
+
+  static async sendPatch(projectId, operations, etag, snapshot) {
+    const res = await axios.patch(`${API_BASE}/sync/${encodeURIComponent(projectId)}`, operations, {
+      headers: { 'If-Match': etag, 'Content-Type': 'application/json' }
+    });
+    this.setBase(projectId, res.headers.etag, snapshot);
+    return res.data;
+  }
+
+  // After a reload the server copy at the remembered ETag is the base. If the server has moved on
+  // since, our edits cannot be told apart from its, so the whole difference is a conflict.
+  static async restoreBase(projectId, etag, snapshot) {
+    const server = await this.fetchProject(projectId);
+    if (server.etag === etag) {
+      this.synced.set(projectId, { etag, snapshot: server.project });
+      return this.synced.get(projectId);
+    }
+    const operations = createPatch(server.project, snapshot);
+    if (operations.length === 0) {
+      this.setBase(projectId, server.etag, server.project);
+      return this.synced.get(projectId);
+    }
+    throw new SyncConflictError(projectId, operations, server);
+  }
+
+  // Send only what changed since the last acknowledged version
+  static async syncProject(project) {
+    let base = this.getBase(project.id);
+    if (!base) {
+      return this.uploadProject(project);
+    }
+    const snapshot = JSON.parse(JSON.stringify(project));
+    if (!base.snapshot) {
+      try {
+        base = await this.restoreBase(project.id, base.etag, snapshot);
+      } catch (error) {
+        if (error.response?.status !== 404) throw error;
+        this.forget(project.id);
+        return this.uploadProject(project);
+      }
+    }
+    const operations = createPatch(base.snapshot, snapshot);
+    if (operations.length === 0) {
+      return { project_id: project.id, unchanged: true };
+    }
+    try {
+      return await this.sendPatch(project.id, operations, base.etag, snapshot);
+    } catch (error) {
+      const status = error.response?.status;
+      if (status === 404) {
+        // Server copy is gone; nothing there to overwrite
+        this.forget(project.id);
+        return this.uploadProject(project);
+      }
+      if (status === 412 || status === 409 || status === 422) {
+        return this.rebase(project.id, base, operations, snapshot);
+      }
+      throw error;
+    }
+  }
+
+  // The server moved on since our base: replay our edits on its version unless they overlap its changes
+  static async rebase(projectId, base, operations, snapshot) {
+    const server = await this.fetchProject(projectId);
+    const theirs = createPatch(base.snapshot, server.project);
+    if (theirs.length === 0) {
+      // Nothing changed on the server since our base, so the patch itself was at fault
+      return this.uploadProject(snapshot, server.etag);
+    }
+    const conflicts = conflictingOperations(operations, theirs);
+    if (conflicts.length > 0) {
+      throw new SyncConflictError(projectId, conflicts, server);
+    }
+    console.warn(`Project ${projectId} changed on the server; rebasing ${operations.length} edits onto it`);
+    try {
+      const result = await this.sendPatch(projectId, operations, server.etag, snapshot);
+      // Our acknowledged state is now the server's merge, not just our snapshot
+      const merged = await this.fetchProject(projectId);
+      this.setBase(projectId, merged.etag, merged.project);
+      return { ...result, rebased: true, project: merged.project };
+    } catch (error) {
+      if (error.response) {
+        throw new SyncConflictError(projectId, operations, server);
+      }
+      throw error;
+    }
+  }
+
+  // Settle a SyncConflictError: overwrite the version the user saw with theirs, or adopt the server's
+  static async resolveConflict(error, project, keepLocal) {
+    if (keepLocal) {
+      await this.uploadProject(project, error.server.etag);
+      return project;
+    }
+    this.setBase(error.projectId, error.server.etag, error.server.project);
+    return error.server.project;
+  }
+}
+
+export default ProjectSyncService;
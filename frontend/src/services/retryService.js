@@ -1,10 +1,20 @@
+import axios from 'axios';
+
+const newIdempotencyKey = () =>
+  (typeof crypto !== 'undefined' && crypto.randomUUID)
+    ? crypto.randomUUID()
+    : `${Date.now().toString(36)}-${Math.random().toString(36).slice(2)}`;
+
 class RetryService {
+  // operation receives one Idempotency-Key shared by all its attempts; send it as a header so the
+  // backend replays an attempt that already succeeded instead of generating again
   static async withRetry(operation, maxRetries = 3, baseDelay = 2000) {
     let lastError;
+    const idempotencyKey = newIdempotencyKey();
     
     for (let attempt = 0; attempt <= maxRetries; attempt++) {
       try {
-        return await operation();
+        return await operation(idempotencyKey);
       } catch (error) {
         lastError = error;
         
@@ -13,13 +23,16 @@ class RetryService {
                            error.response?.status === 503 ||
                            error.message?.includes('rate limit') ||
                            error.response?.data?.detail?.includes('rate limit');
+        // A timed-out attempt may still finish server-side; the shared key makes retrying it safe
+        const isTimeout = error.code === 'ECONNABORTED' || error.code === 'ETIMEDOUT';
         
-        if (!isRateLimit || attempt === maxRetries) {
+        if ((!isRateLimit && !isTimeout) || attempt === maxRetries) {
           throw error;
         }
         
-        // Calculate delay with exponential backoff
-        const delay = baseDelay * Math.pow(2, attempt) + Math.random() * 1000;
+        // Prefer the server's Retry-After when it sheds load, otherwise back off exponentially
+        const retryAfter = Number(error.response?.headers?.['retry-after']);
+        const delay = (retryAfter > 0 ? retryAfter * 1000 : baseDelay * Math.pow(2, attempt)) + Math.random() * 1000;
         console.log(`Rate limit hit, retrying in ${delay}ms (attempt ${attempt + 1}/${maxRetries + 1})`);
         
         await new Promise(resolve => setTimeout(resolve, delay));
@@ -29,6 +42,13 @@ class RetryService {
     throw lastError;
   }
   
+  static postWithRetry(url, data, config = {}, maxRetries = 3) {
+    return this.withRetry(idempotencyKey => axios.post(url, data, {
+      ...config,
+      headers: { ...(config.headers || {}), 'Idempotency-Key': idempotencyKey }
+    }), maxRetries);
+  }
+  
   static async batchWithRetry(operations, batchSize = 3, delayBetweenBatches = 2000) {
     const results = [];
     
@@ -0,0 +1,121 @@
+"""Benchmark question/finding grouping: outline-view loops vs. the TF-IDF service.
+
+The baseline is a line-for-line Python port of groupQuestionsByTheme /
+calculateQuestionSimilarity and groupSimilarFindings / extractKeywords /
+calculateSimilarity from OutlineDraft2.jsx, run per subsection and per theme as
+the outline view does. The vectorized side is services.text_similarity.group_section
+over the same sections.
+
+Usage:
+  python scripts/benchmark_similarity.py [PROJECT_FILES...] [--flatten] [--repeat N]
+
+--flatten puts every question of a project into one subsection, the case where
+the pairwise loops grow quadratically (large subsections, "all questions" views).
+"""
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import argparse
+import json
+import re
+import sys
+import time
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "backend"))
+
+from services.text_similarity import group_section  # noqa: E402
+
+DEFAULT_FIXTURES = ["Russian_Aggression.json", "Cyber_Liberties_Answered.json"]
+JS_STOP_WORDS = {
+    'the', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by', 'is', 'are', 'was', 'were', 'be',
+    'been', 'being', 'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would', 'could', 'should', 'may', 'might',
+    'must', 'shall', 'can', 'this', 'that', 'these', 'those'
+}
+
+def js_question_similarity(question1: str, question2: str) -> float:
+    words1 = {w for w in question1.lower().split() if len(w) > 3}
+    words2 = {w for w in question2.lower().split() if len(w) > 3}
+    union = words1 | words2
+    return len(words1 & words2) / len(union) if union else 0.0
+
+def js_extract_keywords(description: str) -> List[str]:
+    words = re.sub(r"[^\w\s]", " ", description.lower()).split()
+    return [w for w in words if len(w) > 3 and w not in JS_STOP_WORDS][:10]
+
+def js_similarity(keywords1: List[str], keywords2: List[str]) -> float:
+    set1, set2 = set(keywords1), set(keywords2)
+    union = set1 | set2
+    return len(set1 & set2) / len(union) if union else 0.0
+
+def js_group(items: List[Any], similar) -> List[List[Any]]:
+    groups, processed = [], set()
+    for index, item in enumerate(items):
+        if index in processed:
+            continue
+        group = [item]
+        for other_index, other in enumerate(items):
+            if other_index != index and other_index not in processed and similar(item, other) > 0.3:
+                group.append(other)
+                processed.add(other_index)
+        processed.add(index)
+        groups.append(group)
+    return groups
+
+def baseline_group_section(section: Dict[str, Any]) -> int:
+    """Outline-view grouping for one section; returns the number of finding groups."""
+    total = 0
+    for subsection in section.get("subsections") or []:
+        questions = subsection.get("questions") or []
+        for theme in js_group(questions, lambda a, b: js_question_similarity(a["question"], b["question"])):
+            citations = [c for q in theme for c in q.get("citations") or []]
+            # The view re-extracts the other citation's keywords on every comparison
+            total += len(js_group(citations, lambda a, b: js_similarity(
+                js_extract_keywords(a.get("description", "")), js_extract_keywords(b.get("description", ""))
+            )))
+    return total
+
+def project_sections(path: Path) -> List[Dict[str, Any]]:
+    with open(path, "r", encoding="utf-8") as f:
+        project = json.load(f)
+    data = project.get("data", project)
+    outline = (data.get("draftData") or {}).get("outline") or data.get("outlineData") or []
+    return [s for s in outline if any(sub.get("questions") for sub in s.get("subsections") or [])]
+
+def flatten_sections(sections: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    questions = [q for s in sections for sub in s.get("subsections") or [] for q in sub.get("questions") or []]
+    return [{"section_title": "All questions", "subsections": [{"subsection_title": "All", "questions": questions}]}]
+
+def timed(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark outline-view grouping against the TF-IDF service")
+    parser.add_argument("paths", nargs="*", default=[str(ROOT / name) for name in DEFAULT_FIXTURES])
+    parser.add_argument("--flatten", action="store_true", help="Group all of a project's questions as one subsection")
+    parser.add_argument("--repeat", type=int, default=3, help="Best of N runs")
+    args = parser.parse_args(argv)
+
+    print(f"{'project':32} {'sections':>8} {'questions':>9} {'citations':>9} {'baseline s':>11} {'tf-idf s':>9} {'speedup':>8}")
+    for path in map(Path, args.paths):
+        if not path.exists():
+            print(f"{path.name:32} missing")
+            continue
+        sections = project_sections(path)
+        if args.flatten:
+            sections = flatten_sections(sections)
+        questions = [q for s in sections for sub in s.get("subsections") or [] for q in sub.get("questions") or []]
+        citations = sum(len(q.get("citations") or []) for q in questions)
+        baseline = timed(lambda: [baseline_group_section(s) for s in sections], args.repeat)
+        vectorized = timed(lambda: [group_section(s) for s in sections], args.repeat)
+        speedup = baseline / vectorized if vectorized else float("inf")
+        print(f"{path.name[:32]:32} {len(sections):>8} {len(questions):>9} {citations:>9} "
+              f"{baseline:>11.4f} {vectorized:>9.4f} {speedup:>7.1f}x")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
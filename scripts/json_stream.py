@@ -0,0 +1,378 @@
+"""Event-based JSON reading and writing with bounded memory.
+
+The reader turns a file into a stream of (event, value) pairs without building
+the document; the writer turns such a stream back into text. Untouched input
+written with indent=2 comes back byte-for-byte identical to
+json.dumps(..., indent=2, ensure_ascii=False), which is how project files are saved.
+
+Events: start_map, map_key, end_map, start_array, end_array,
+string, number (raw text, so formatting is preserved), boolean, null.
+"""
+from json.decoder import scanstring
+from typing import Any, Iterable, Iterator, List, Optional, Tuple
+import json
+import re
+
+Event = Tuple[str, Any]
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_STRING_END = re.compile(r'(?:[^"\\]|\\.)*"', re.S)
+_NUMBER = re.compile(r"-?(?:0|[1-9]\d*)(?:\.\d+)?(?:[eE][+-]?\d+)?")
+_LITERALS = {"t": ("true", "boolean", True), "f": ("false", "boolean", False), "n": ("null", "null", None)}
+
+class JsonStreamError(ValueError):
+    def __init__(self, message: str, offset: int):
+        super().__init__(f"{message} at offset {offset}")
+        self.offset = offset
+
+class _Buffer:
+    """Sliding window over a text stream; only the unread part is kept."""
+
+    def __init__(self, fp, chunk_size: int):
+        self.fp = fp
+        self.chunk_size = chunk_size
+        self.text = ""
+        self.pos = 0
+        self.consumed = 0  # characters dropped from the front of text
+        self.eof = False
+
+    def fill(self) -> bool:
+        if self.eof:
+            return False
+        chunk = self.fp.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        if self.pos > self.chunk_size:
+            self.consumed += self.pos
+            self.text = self.text[self.pos:]
+            self.pos = 0
+        self.text += chunk
+        return True
+
+    def offset(self) -> int:
+        return self.consumed + self.pos
+
+    def skip_whitespace(self) -> Optional[str]:
+        """Advance past whitespace and return the next character (None at end of input)."""
+        while True:
+            self.pos = _WHITESPACE.match(self.text, self.pos).end()
+            if self.pos < len(self.text):
+                return self.text[self.pos]
+            if not self.fill():
+                return None
+
+    def read_string(self) -> str:
+        while True:
+            match = _STRING_END.match(self.text, self.pos + 1)
+            if match:
+                try:
+                    value, end = scanstring(self.text, self.pos + 1)
+                except json.JSONDecodeError as e:
+                    raise JsonStreamError(f"Invalid string: {e.msg}", self.consumed + e.pos)
+                self.pos = end
+                return value
+            if not self.fill():
+                raise JsonStreamError("Unterminated string", self.offset())
+
+    def read_number(self) -> str:
+        while True:
+            match = _NUMBER.match(self.text, self.pos)
+            if match and (match.end() < len(self.text) or self.eof):
+                self.pos = match.end()
+                return match.group()
+            if not match and (len(self.text) - self.pos > 1 or self.eof):
+                raise JsonStreamError("Invalid number", self.offset())
+            self.fill()
+
+    def read_literal(self) -> Event:
+        word, kind, value = _LITERALS[self.text[self.pos]]
+        while len(self.text) - self.pos < len(word) and self.fill():
+            pass
+        if self.text[self.pos:self.pos + len(word)] != word:
+            raise JsonStreamError("Invalid literal", self.offset())
+        self.pos += len(word)
+        return kind, value
+
+def iter_events(fp, chunk_size: int = 64 * 1024) -> Iterator[Event]:
+    """Yield parse events for the single JSON document in fp (a text file)."""
+    buffer = _Buffer(fp, chunk_size)
+    # Stack of open containers: "{" or "["; state says what the parser expects next
+    stack: List[str] = []
+    state = "value"  # value | key_or_end | key | colon | comma_or_end | done
+
+    while True:
+        char = buffer.skip_whitespace()
+        if char is None:
+            if state != "done":
+                raise JsonStreamError("Unexpected end of input", buffer.offset())
+            return
+        if state == "done":
+            raise JsonStreamError("Extra data after document", buffer.offset())
+
+        if state in ("key_or_end", "key"):
+            if char == "}" and state == "key_or_end":
+                buffer.pos += 1
+                stack.pop()
+                yield "end_map", None
+                state = "comma_or_end" if stack else "done"
+            elif char == '"':
+                yield "map_key", buffer.read_string()
+                state = "colon"
+            else:
+                raise JsonStreamError("Expected object key", buffer.offset())
+            continue
+
+        if state == "colon":
+            if char != ":":
+                raise JsonStreamError("Expected ':'", buffer.offset())
+            buffer.pos += 1
+            state = "value"
+            continue
+
+        if state == "comma_or_end":
+            closer = "}" if stack[-1] == "{" else "]"
+            if char == ",":
+                buffer.pos += 1
+                state = "key" if stack[-1] == "{" else "value"
+            elif char == closer:
+                buffer.pos += 1
+                stack.pop()
+                yield ("end_map" if closer == "}" else "end_array"), None
+                state = "comma_or_end" if stack else "done"
+            else:
+                raise JsonStreamError(f"Expected ',' or '{closer}'", buffer.offset())
+            continue
+
+        # state == "value" (or an array that may close immediately)
+        if char == "]" and stack and stack[-1] == "[" and state == "value_or_end":
+            buffer.pos += 1
+            stack.pop()
+            yield "end_array", None
+            state = "comma_or_end" if stack else "done"
+            continue
+        if char == "{":
+            buffer.pos += 1
+            stack.append("{")
+            yield "start_map", None
+            state = "key_or_end"
+            continue
+        if char == "[":
+            buffer.pos += 1
+            stack.append("[")
+            yield "start_array", None
+            state = "value_or_end"
+            continue
+        if char == '"':
+            yield "string", buffer.read_string()
+        elif char == "-" or char.isdigit():
+            yield "number", buffer.read_number()
+        elif char in _LITERALS:
+            yield buffer.read_literal()
+        else:
+            raise JsonStreamError(f"Unexpected character {char!r}", buffer.offset())
+        state = "comma_or_end" if stack else "done"
+
+def number_value(raw: str):
+    return int(raw) if re.fullmatch(r"-?\d+", raw) else float(raw)
+
+def iter_with_paths(events: Iterable[Event]) -> Iterator[Tuple[tuple, str, Any]]:
+    """
+    Annotate events with the path of the value they belong to. Container start
+    and scalar events carry the value's own path; map_key events carry the path
+    of the member about to start; end events carry the container's path.
+    """
+    path: List[Any] = []
+    # Per open container: ("map", current key) or ("array", next index)
+    frames: List[list] = []
+
+    def value_path():
+        if frames and frames[-1][0] == "array":
+            index = frames[-1][1]
+            frames[-1][1] += 1
+            return tuple(path) + (index,)
+        return tuple(path) + ((frames[-1][1],) if frames else ())
+
+    for event, value in events:
+        if event == "map_key":
+            frames[-1][1] = value
+            yield tuple(path) + (value,), event, value
+        elif event in ("start_map", "start_array"):
+            own = value_path()
+            yield own, event, value
+            path = list(own)
+            frames.append(["map", None] if event == "start_map" else ["array", 0])
+        elif event in ("end_map", "end_array"):
+            frames.pop()
+            own = tuple(path)
+            path = path[:-1] if path else []
+            yield own, event, value
+        else:
+            yield value_path(), event, value
+
+def build_value(first: Event, events: Iterator[Event]) -> Any:
+    """Materialize one value starting with event `first`, consuming its events."""
+    event, value = first
+    if event == "start_map":
+        result = {}
+        for event, value in events:
+            if event == "end_map":
+                return result
+            result[value] = build_value(next(events), events)
+    if event == "start_array":
+        result = []
+        for item in events:
+            if item[0] == "end_array":
+                return result
+            result.append(build_value(item, events))
+    if event == "number":
+        return number_value(value)
+    if event in ("string", "boolean", "null"):
+        return value
+    raise JsonStreamError(f"Unexpected event {event}", -1)
+
+def skip_value(first: Event, events: Iterator[Event]) -> None:
+    """Consume the events of one value without building it."""
+    if first[0] not in ("start_map", "start_array"):
+        return
+    depth = 1
+    for event, _ in events:
+        if event in ("start_map", "start_array"):
+            depth += 1
+        elif event in ("end_map", "end_array"):
+            depth -= 1
+            if depth == 0:
+                return
+
+def value_events(value: Any) -> Iterator[Event]:
+    """Events for an in-memory Python value."""
+    if isinstance(value, dict):
+        yield "start_map", None
+        for key, item in value.items():
+            yield "map_key", key
+            yield from value_events(item)
+        yield "end_map", None
+    elif isinstance(value, (list, tuple)):
+        yield "start_array", None
+        for item in value:
+            yield from value_events(item)
+        yield "end_array", None
+    elif isinstance(value, bool):
+        yield "boolean", value
+    elif value is None:
+        yield "null", None
+    elif isinstance(value, (int, float)):
+        yield "number", json.dumps(value)
+    else:
+        yield "string", str(value)
+
+def subtree_events(fp, target: tuple, chunk_size: int = 64 * 1024) -> Iterator[Event]:
+    """Events of the value at path `target` in fp, read with a fresh parser."""
+    events = iter_events(fp, chunk_size)
+    pathed = iter_with_paths(events)
+    for path, event, value in pathed:
+        if path == target and event not in ("map_key", "end_map", "end_array"):
+            yield event, value
+            if event in ("start_map", "start_array"):
+                depth = 1
+                for _, event, value in pathed:
+                    yield event, value
+                    if event in ("start_map", "start_array"):
+                        depth += 1
+                    elif event in ("end_map", "end_array"):
+                        depth -= 1
+                        if depth == 0:
+                            break
+            return
+    raise KeyError(target)
+
+class JsonStreamWriter:
+    """
+    Write events as JSON text. With indent=2 the output matches
+    json.dumps(value, indent=2, ensure_ascii=False) for the same value.
+    """
+
+    def __init__(self, fp, indent: Optional[int] = 2, ensure_ascii: bool = False):
+        self.fp = fp
+        self.indent = indent
+        self.ensure_ascii = ensure_ascii
+        # Per open container: number of members written so far
+        self.counts: List[int] = []
+        self.pending_open: Optional[str] = None
+        self.after_key = False
+
+    def _newline(self, depth: int) -> str:
+        return "\n" + " " * (self.indent * depth) if self.indent is not None else ""
+
+    def _flush_open(self) -> None:
+        if self.pending_open is not None:
+            self.fp.write(self.pending_open)
+            self.counts.append(0)
+            self.pending_open = None
+
+    def _before_item(self) -> None:
+        if self.after_key:
+            self.after_key = False
+            return
+        if self.counts:
+            separator = "," if self.indent is not None else ", "
+            self.fp.write((separator if self.counts[-1] else "") + self._newline(len(self.counts)))
+            self.counts[-1] += 1
+
+    def event(self, event: str, value: Any = None) -> None:
+        if event in ("end_map", "end_array"):
+            closer = "}" if event == "end_map" else "]"
+            if self.pending_open is not None:
+                self.fp.write(self.pending_open + closer)
+                self.pending_open = None
+            else:
+                self.counts.pop()
+                self.fp.write(self._newline(len(self.counts)) + closer)
+            return
+
+        self._flush_open()
+        if event == "map_key":
+            self._before_item()
+            self.fp.write(json.dumps(value, ensure_ascii=self.ensure_ascii) + ": ")
+            self.after_key = True
+            return
+        self._before_item()
+        if event == "start_map":
+            self.pending_open = "{"
+        elif event == "start_array":
+            self.pending_open = "["
+        elif event == "string":
+            self.fp.write(json.dumps(value, ensure_ascii=self.ensure_ascii))
+        elif event == "number":
+            self.fp.write(value)
+        elif event == "boolean":
+            self.fp.write("true" if value else "false")
+        elif event == "null":
+            self.fp.write("null")
+        else:
+            raise ValueError(f"Unknown event {event}")
+
+    def events(self, events: Iterable[Event]) -> None:
+        for event, value in events:
+            self.event(event, value)
+
+    def value(self, value: Any) -> None:
+        self.events(value_events(value))
+
+class DuplicateKeys:
+    """Track keys per open object to find duplicates while streaming."""
+
+    def __init__(self):
+        self.open: List[set] = []
+
+    def seen(self, event: str, value: Any) -> bool:
+        """Feed an event; True when it is a map_key already present in the current object."""
+        if event == "start_map":
+            self.open.append(set())
+        elif event == "end_map":
+            self.open.pop()
+        elif event == "map_key":
+            if value in self.open[-1]:
+                return True
+            self.open[-1].add(value)
+        return False
@@ -0,0 +1,441 @@
+"""Validate, migrate and checksum project JSON files.
+
+Files are read as event streams (see json_stream.py) and rewritten through a
+streaming writer, so memory use depends on the largest edited subtree (one
+outline section), not on file size. Many files are processed in parallel.
+
+Usage:
+  python scripts/project_files.py validate [PATHS...] [--min-data-sections N]
+  python scripts/project_files.py dedupe-keys [PATHS...] [--dry-run]
+  python scripts/project_files.py migrate-data-observation [PATHS...] [--dry-run]
+  python scripts/project_files.py mark-data-sections PATHS... --title TITLE [--title TITLE ...] [--dry-run]
+  python scripts/project_files.py checksum [PATHS...] --manifest manifest.json
+  python scripts/project_files.py verify-manifest manifest.json
+
+Common options: --workers N, --manifest FILE (per-file sizes, SHA-256 before and
+after, and what changed), --no-backup. PATHS may be files or directories
+(searched recursively for *.json); the default is the repository root.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from json_stream import (  # noqa: E402
+    Event, JsonStreamError, JsonStreamWriter, build_value, iter_events, skip_value, subtree_events
+)
+
+ROOT = Path(__file__).resolve().parents[1]
+SKIP_DIRS = {"node_modules", ".venv", "venv", ".git", "__pycache__"}
+DRAFT_CONTAINER_KEYS = {"draftData", "literatureReviewData", "dataObservationData", "dataAndObservationsData"}
+DATA_SECTION_MARKERS = {"section_type": "data", "category": "data_section", "is_data_section": True}
+
+def find_json_files(paths: Iterable[str]) -> List[Path]:
+    files = []
+    for raw in paths:
+        path = Path(raw)
+        if path.is_dir():
+            files.extend(
+                p for p in sorted(path.rglob("*.json"))
+                if not SKIP_DIRS.intersection(p.relative_to(path).parts[:-1])
+            )
+        elif path.exists():
+            files.append(path)
+        else:
+            raise FileNotFoundError(raw)
+    return files
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _match(pattern: tuple, path: tuple) -> bool:
+    return len(pattern) == len(path) and all(p == "*" or p == v for p, v in zip(pattern, path))
+
+# Scanning
+
+def scan(path: Path) -> Dict[str, Any]:
+    """
+    One streaming pass collecting what the commands need to decide whether a
+    file must be rewritten: top-level keys, duplicate keys, outline sections
+    and their data-section flags, and response counts.
+    """
+    top_level: Dict[str, str] = {}
+    duplicates: List[str] = []
+    sections: Dict[int, Dict[str, Any]] = {}
+    responses = 0
+    # Per open container: [path, key set or next index]
+    frames: List[list] = []
+
+    with open(path, "r", encoding="utf-8") as f:
+        for event, value in iter_events(f):
+            if event == "map_key":
+                frame = frames[-1]
+                if value in frame[1]:
+                    duplicates.append("/".join(str(part) for part in frame[0] + (value,)))
+                frame[1].add(value)
+                frame[2] = value
+                continue
+            if event in ("end_map", "end_array"):
+                frames.pop()
+                continue
+
+            if frames:
+                frame = frames[-1]
+                if isinstance(frame[1], set):
+                    value_path = frame[0] + (frame[2],)
+                else:
+                    value_path = frame[0] + (frame[1],)
+                    frame[1] += 1
+            else:
+                value_path = ()
+
+            if len(value_path) == 1:
+                top_level[value_path[0]] = event
+            elif len(value_path) == 4 and value_path[:2] == ("data", "outlineData"):
+                section = sections.setdefault(value_path[2], {})
+                if value_path[3] == "section_title" and event == "string":
+                    section["title"] = value
+                elif value_path[3] == "is_data_section":
+                    section["is_data_section"] = value is True
+            elif len(value_path) in (3, 4) and value_path[-2] == "responses" and value_path[-3] in DRAFT_CONTAINER_KEYS:
+                responses += 1
+
+            if event == "start_map":
+                frames.append([value_path, set(), None])
+            elif event == "start_array":
+                frames.append([value_path, 0])
+
+    return {
+        "top_level": top_level,
+        "is_project": top_level.get("data") == "start_map",
+        "duplicate_keys": duplicates,
+        "sections": [sections[i] for i in sorted(sections)],
+        "responses": responses
+    }
+
+# Rewriting
+
+class Transform:
+    """
+    Streams events to a writer, optionally:
+      edits      {path pattern: fn(value) -> value}; matching subtrees are materialized
+      splice     fn(path, first_event) -> events or None; replaces a value without building it
+      append     fn(path, keys) -> [(key, events)]; adds members at the end of an object
+      dedupe_keys  drop repeated keys in an object, keeping the first
+    Patterns are tuples of keys/indices where "*" matches anything.
+    """
+
+    def __init__(self, edits: Optional[Dict[tuple, Callable[[Any], Any]]] = None,
+                 splice: Optional[Callable[[tuple, Event], Optional[Iterable[Event]]]] = None,
+                 append: Optional[Callable[[tuple, set], List[Tuple[str, Iterable[Event]]]]] = None,
+                 dedupe_keys: bool = False):
+        self.edits = edits or {}
+        self.splice = splice
+        self.append = append
+        self.dedupe_keys = dedupe_keys
+        self.stats = {"edited": 0, "spliced": 0, "appended": 0, "duplicates_dropped": 0}
+
+    def run(self, events: Iterator[Event], writer: JsonStreamWriter) -> Dict[str, int]:
+        events = iter(events)
+        frames: List[list] = []
+        for event, value in events:
+            if event == "map_key":
+                frame = frames[-1]
+                if self.dedupe_keys and value in frame[1]:
+                    skip_value(next(events), events)
+                    self.stats["duplicates_dropped"] += 1
+                    continue
+                frame[1].add(value)
+                frame[2] = value
+                writer.event(event, value)
+                continue
+            if event in ("end_map", "end_array"):
+                frame = frames.pop()
+                if event == "end_map" and self.append:
+                    for key, member in self.append(frame[0], frame[1]):
+                        writer.event("map_key", key)
+                        writer.events(member)
+                        self.stats["appended"] += 1
+                writer.event(event, value)
+                continue
+
+            if frames:
+                frame = frames[-1]
+                if isinstance(frame[1], set):
+                    value_path = frame[0] + (frame[2],)
+                else:
+                    value_path = frame[0] + (frame[1],)
+                    frame[1] += 1
+            else:
+                value_path = ()
+
+            replacement = self.splice(value_path, (event, value)) if self.splice else None
+            if replacement is not None:
+                skip_value((event, value), events)
+                writer.events(replacement)
+                self.stats["spliced"] += 1
+                continue
+            edit = next((fn for pattern, fn in self.edits.items() if _match(pattern, value_path)), None)
+            if edit is not None:
+                writer.value(edit(build_value((event, value), events)))
+                self.stats["edited"] += 1
+                continue
+
+            writer.event(event, value)
+            if event == "start_map":
+                frames.append([value_path, set(), None])
+            elif event == "start_array":
+                frames.append([value_path, 0])
+        return self.stats
+
+class _HashingSink:
+    """Text sink that hashes UTF-8 output and optionally writes it to a binary file."""
+
+    def __init__(self, fp=None):
+        self.fp = fp
+        self.digest = hashlib.sha256()
+        self.size = 0
+
+    def write(self, text: str) -> None:
+        data = text.encode("utf-8")
+        self.digest.update(data)
+        self.size += len(data)
+        if self.fp is not None:
+            self.fp.write(data)
+
+def rewrite(path: Path, transform: Transform, dry_run: bool = False, backup: bool = True) -> Dict[str, Any]:
+    """
+    Run transform over the file. The output goes to a temporary file next to
+    it (or only through a hash in a dry run) and replaces the original only if
+    the bytes differ.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=str(path.parent), prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as out, open(path, "r", encoding="utf-8") as src:
+            sink = _HashingSink(None if dry_run else out)
+            stats = transform.run(iter_events(src), JsonStreamWriter(sink))
+        result = {"sha256_after": sink.digest.hexdigest(), "size_after": sink.size, "stats": stats}
+        result["changed"] = result["sha256_after"] != file_sha256(path)
+        if result["changed"] and not dry_run:
+            bak = path.with_name(path.name + ".bak")
+            if backup and not bak.exists():
+                shutil.copyfile(path, bak)
+                result["backup"] = str(bak)
+            os.replace(tmp_path, path)
+        return result
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+def _file_subtree(path: Path, target: tuple) -> Iterator[Event]:
+    with open(path, "r", encoding="utf-8") as f:
+        yield from subtree_events(f, target)
+
+# Commands (each takes a path, its scan and the parsed options)
+
+def cmd_validate(path: Path, info: Dict[str, Any], options: Dict[str, Any]) -> Dict[str, Any]:
+    problems = [f"duplicate key {key}" for key in info["duplicate_keys"]]
+    data_sections = [s.get("title", "Unknown") for s in info["sections"] if s.get("is_data_section")]
+    if info["is_project"] and len(data_sections) < options.get("min_data_sections", 0):
+        problems.append(f"{len(data_sections)} data sections, expected at least {options['min_data_sections']}")
+    return {
+        "ok": not problems,
+        "problems": problems,
+        "sections": len(info["sections"]),
+        "data_sections": data_sections,
+        "responses": info["responses"]
+    }
+
+def cmd_dedupe_keys(path: Path, info: Dict[str, Any], options: Dict[str, Any]) -> Dict[str, Any]:
+    if not info["duplicate_keys"]:
+        return {"changed": False}
+    result = rewrite(path, Transform(dedupe_keys=True), options["dry_run"], options["backup"])
+    result["duplicate_keys"] = info["duplicate_keys"]
+    return result
+
+def cmd_migrate_data_observation(path: Path, info: Dict[str, Any], options: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy top-level literatureReviewData to dataObservationData when the latter is missing or null."""
+    top_level = info["top_level"]
+    if top_level.get("literatureReviewData", "null") == "null" or top_level.get("dataObservationData", "null") != "null":
+        return {"changed": False}
+    source = ("literatureReviewData",)
+
+    def splice(value_path, first):
+        if value_path == ("dataObservationData",) and first[0] == "null":
+            return _file_subtree(path, source)
+        return None
+
+    def append(value_path, keys):
+        if value_path == () and "dataObservationData" not in keys:
+            return [("dataObservationData", _file_subtree(path, source))]
+        return []
+
+    # Duplicate keys would make json.load keep the last value; keep the first like dedupe-keys
+    transform = Transform(splice=splice, append=append, dedupe_keys=True)
+    return rewrite(path, transform, options["dry_run"], options["backup"])
+
+def cmd_mark_data_sections(path: Path, info: Dict[str, Any], options: Dict[str, Any]) -> Dict[str, Any]:
+    """Add data-section markers to outline sections whose titles were given (and their subsections)."""
+    components = {title: f"Component {i}" for i, title in enumerate(options["titles"], 1)}
+    if not any(s.get("title") in components for s in info["sections"]):
+        return {"changed": False, "marked": []}
+    marked = []
+
+    def mark(section):
+        if isinstance(section, dict) and section.get("section_title") in components:
+            section.update(DATA_SECTION_MARKERS)
+            section["data_component"] = components[section["section_title"]]
+            for subsection in section.get("subsections") or []:
+                if isinstance(subsection, dict):
+                    subsection.update(DATA_SECTION_MARKERS)
+            marked.append(section["section_title"])
+        return section
+
+    result = rewrite(path, Transform(edits={("data", "outlineData", "*"): mark}), options["dry_run"], options["backup"])
+    result["marked"] = marked
+    return result
+
+def cmd_checksum(path: Path, info: Dict[str, Any], options: Dict[str, Any]) -> Dict[str, Any]:
+    return {}
+
+COMMANDS = {
+    "validate": cmd_validate,
+    "dedupe-keys": cmd_dedupe_keys,
+    "migrate-data-observation": cmd_migrate_data_observation,
+    "mark-data-sections": cmd_mark_data_sections,
+    "checksum": cmd_checksum
+}
+
+def process_file(job: Tuple[str, str, Dict[str, Any]]) -> Dict[str, Any]:
+    """Run one command on one file (the unit of work sent to the process pool)."""
+    command, raw_path, options = job
+    path = Path(raw_path)
+    result: Dict[str, Any] = {"path": raw_path}
+    try:
+        result["size"] = path.stat().st_size
+        result["sha256"] = file_sha256(path)
+        if command == "checksum":
+            return result
+        info = scan(path)
+        result["is_project"] = info["is_project"]
+        if command != "validate" and not info["is_project"]:
+            result["changed"] = False
+            return result
+        result.update(COMMANDS[command](path, info, options))
+    except (JsonStreamError, UnicodeDecodeError, OSError) as e:
+        result["error"] = str(e)
+    return result
+
+def run(command: str, paths: List[Path], options: Dict[str, Any], workers: int = 1) -> List[Dict[str, Any]]:
+    jobs = [(command, str(path), options) for path in paths]
+    if workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(process_file, jobs))
+    return [process_file(job) for job in jobs]
+
+def write_manifest(manifest_path: Path, command: str, results: List[Dict[str, Any]], dry_run: bool) -> None:
+    base = manifest_path.resolve().parent
+    files = []
+    for result in results:
+        entry = dict(result)
+        entry["path"] = os.path.relpath(Path(result["path"]).resolve(), base)
+        files.append(entry)
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump({"command": command, "dry_run": dry_run, "files": files}, f, indent=2, ensure_ascii=False)
+
+def verify_manifest(manifest_path: Path) -> List[Dict[str, Any]]:
+    """Check files against a manifest; for rewrites the expected hash is the post-rewrite one (unless a dry run)."""
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    base = manifest_path.resolve().parent
+    results = []
+    for entry in manifest["files"]:
+        if "error" in entry:
+            continue
+        path = base / entry["path"]
+        expected = entry["sha256"]
+        if entry.get("changed") and not manifest.get("dry_run"):
+            expected = entry["sha256_after"]
+        result = {"path": str(path), "expected": expected}
+        if not path.exists():
+            result["error"] = "missing"
+        else:
+            result["sha256"] = file_sha256(path)
+            result["ok"] = result["sha256"] == expected
+        results.append(result)
+    return results
+
+def _describe(command: str, result: Dict[str, Any]) -> str:
+    if "error" in result:
+        return f"ERROR {result['path']}: {result['error']}"
+    if command == "checksum":
+        return f"{result['sha256']}  {result['path']}"
+    if command == "validate":
+        if not result.get("is_project"):
+            return f"ok    {result['path']} (not a project file)"
+        status = "ok   " if result["ok"] else "FAIL "
+        details = f"{result['sections']} sections, {len(result['data_sections'])} data sections, {result['responses']} responses"
+        return f"{status} {result['path']}: {details}" + "".join(f"\n      - {p}" for p in result["problems"])
+    if result.get("changed"):
+        return f"changed {result['path']} ({result['size']} -> {result['size_after']} bytes)"
+    return f"same    {result['path']}"
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Validate, migrate and checksum project JSON files")
+    parser.add_argument("command", choices=sorted(list(COMMANDS) + ["verify-manifest"]))
+    parser.add_argument("paths", nargs="*", help="Files or directories (default: repository root)")
+    parser.add_argument("--dry-run", action="store_true", help="Report what would change without writing")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--manifest", help="Write a JSON manifest of sizes and checksums")
+    parser.add_argument("--no-backup", dest="backup", action="store_false", help="Do not write .bak files")
+    parser.add_argument("--title", dest="titles", action="append", default=[], help="Section title (mark-data-sections)")
+    parser.add_argument("--min-data-sections", type=int, default=0, help="Fail validation below this count")
+    args = parser.parse_args(argv)
+
+    if args.command == "verify-manifest":
+        if len(args.paths) != 1:
+            parser.error("verify-manifest takes the manifest path")
+        results = verify_manifest(Path(args.paths[0]))
+        for result in results:
+            status = "ok      " if result.get("ok") else "MISMATCH"
+            print(f"{status} {result['path']}" + (f" ({result['error']})" if "error" in result else ""))
+        return 0 if all(result.get("ok") for result in results) else 1
+
+    if args.command == "mark-data-sections" and not args.titles:
+        parser.error("mark-data-sections requires at least one --title")
+
+    paths = find_json_files(args.paths or [str(ROOT)])
+    if args.manifest:
+        paths = [p for p in paths if p.resolve() != Path(args.manifest).resolve()]
+    options = {
+        "dry_run": args.dry_run,
+        "backup": args.backup,
+        "titles": args.titles,
+        "min_data_sections": args.min_data_sections
+    }
+    results = run(args.command, paths, options, args.workers)
+    for result in results:
+        print(_describe(args.command, result))
+    if args.manifest:
+        write_manifest(Path(args.manifest), args.command, results, args.dry_run)
+
+    failed = [r for r in results if "error" in r or r.get("ok") is False]
+    changed = [r for r in results if r.get("changed")]
+    if args.command not in ("validate", "checksum"):
+        print(f"{len(changed)} of {len(results)} files {'would change' if args.dry_run else 'changed'}")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,12 @@
+import os
+import sys
+
+# Backend modules import each other as top-level packages (services, schemas, routers)
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend")
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+# Keep stores and caches written during tests out of backend/data
+if "REPORT_GENERATOR_DATA_DIR" not in os.environ:
+    import tempfile
+    os.environ["REPORT_GENERATOR_DATA_DIR"] = tempfile.mkdtemp(prefix="report_generator_test_data_")
@@ -0,0 +1,104 @@
+import time
+
+import pytest
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from services import admission
+from services.admission import AdmissionController, AdmissionMiddleware
+from services.model_scheduler import BULK, INTERACTIVE, CallUsage, ModelCallContextMiddleware, ModelCallScheduler
+
+BULK_PATH = "/generate_citation_response"
+
+
+def usage(seconds):
+    used = CallUsage()
+    used.add(0.0, seconds)
+    return used
+
+
+def test_bulk_requests_are_shed_once_the_backlog_exceeds_their_budget():
+    # Two slots, one reserved for interactive calls: bulk work drains one call-second per second
+    controller = AdmissionController(ModelCallScheduler(capacity=2, reserved=1))
+    decisions = [controller.admit(BULK_PATH, BULK, budget=100) for _ in range(6)]
+
+    # Known generation endpoints start at 20s each: 0+20, 20+20, ... 80+20 fit, 100+20 does not
+    assert [d["admitted"] for d in decisions] == [True] * 5 + [False]
+    assert decisions[-1]["retry_after"] == 20
+
+    # Interactive traffic does not queue behind bulk work
+    click = controller.admit("/refine_thesis", INTERACTIVE, budget=60)
+    assert click["admitted"]
+    # Endpoints that never call the model are always admitted
+    assert controller.admit("/projects", BULK, budget=1)["admitted"]
+
+    controller.finish(BULK_PATH, BULK, decisions[0]["work"], usage(5.0), elapsed=5.0)
+    controller.finish("/refine_thesis", INTERACTIVE, click["work"], usage(3.0), elapsed=3.0)
+    stats = controller.stats()
+    assert stats["endpoints"][BULK_PATH]["work_seconds"] == 5.0
+    assert stats["endpoints"][BULK_PATH]["shed"] == 1
+    assert stats["shed"] == 1 and stats["backlog_seconds"][BULK] == 80.0
+    # Cheaper measured work lets the next request in: 80s ahead + 5s of its own
+    assert controller.admit(BULK_PATH, BULK, budget=100)["admitted"]
+
+
+def test_middleware_rejects_with_retry_after_and_learns_from_model_calls():
+    scheduler = ModelCallScheduler(capacity=2, reserved=1)
+    controller = AdmissionController(scheduler)
+    app = FastAPI()
+    app.add_middleware(AdmissionMiddleware, controller=controller)
+    app.add_middleware(ModelCallContextMiddleware)
+
+    @app.post(BULK_PATH)
+    def generate():
+        with scheduler.slot():
+            time.sleep(0.02)
+        return {"ok": True}
+
+    client = TestClient(app)
+    assert client.post(BULK_PATH).json() == {"ok": True}
+    learned = controller.stats()["endpoints"][BULK_PATH]
+    assert learned["measured"] == 1 and 0.02 <= learned["work_seconds"] < 1
+
+    controller.backlog[BULK] = 50.0
+    shed = client.post(BULK_PATH, headers={"X-Request-Budget": "30"})
+    assert shed.status_code == 429
+    assert shed.headers["retry-after"] == "21"
+    assert shed.json()["budget_seconds"] == 30
+    assert client.post(BULK_PATH, headers={"X-Request-Budget": "120"}).status_code == 200
+
+
+def test_per_id_paths_share_stats_and_the_table_is_capped(monkeypatch):
+    controller = AdmissionController(ModelCallScheduler(capacity=2, reserved=1))
+    for snapshot in range(50):
+        controller.admit(f"/snapshots/project-{snapshot}/s{snapshot}/restore", BULK, budget=100)
+    controller.admit("/data-analysis/build-data-outlines", BULK, budget=100)
+
+    endpoints = controller.stats()["endpoints"]
+    assert endpoints["/snapshots/*"]["admitted"] == 50
+    # Generation endpoints keep their own seeded entry
+    assert endpoints["/data-analysis/build-data-outlines"]["work_seconds"] == 20.0
+
+    monkeypatch.setattr(admission, "MAX_ENDPOINTS", len(controller.endpoints))
+    for probe in range(10):
+        controller.admit(f"/probe-{probe}", BULK, budget=100)
+    controller.admit("/refine_thesis", INTERACTIVE, budget=100)
+    assert set(controller.endpoints) == {"/snapshots/*", "/data-analysis/build-data-outlines", "*", "/refine_thesis"}
+    assert controller.stats()["endpoints"]["*"]["admitted"] == 10
+
+
+@pytest.mark.parametrize("budget", ["nan", "inf", "-inf", "0", "-5", "soon"])
+def test_middleware_rejects_budgets_that_are_not_positive_and_finite(budget):
+    controller = AdmissionController(ModelCallScheduler(capacity=2, reserved=1))
+    app = FastAPI()
+    app.add_middleware(AdmissionMiddleware, controller=controller)
+    app.add_middleware(ModelCallContextMiddleware)
+
+    @app.post(BULK_PATH)
+    def generate():
+        return {"ok": True}
+
+    response = TestClient(app).post(BULK_PATH, headers={"X-Request-Budget": budget})
+    assert response.status_code == 400
+    assert controller.stats()["admitted"] == 0
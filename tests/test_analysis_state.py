@@ -0,0 +1,154 @@
+import json
+
+import routers.data_analysis as data_analysis
+from schemas.data_analysis import QuestionAnalysisRequest
+from services.analysis_state import AnalysisStateStore, plan_reanalysis
+from services.model_scheduler import record_model_failure
+
+
+def make_request(questions, **overrides):
+    fields = dict(
+        questions=questions,
+        citations=[c for q in questions for c in q["citations"]],
+        subsection_title="Sanctions",
+        subsection_context="Economic pressure",
+        section_title="Responses",
+        thesis="Sanctions shaped escalation",
+        methodology="Case study",
+        project_id="p1",
+        pre_cluster=False
+    )
+    fields.update(overrides)
+    return QuestionAnalysisRequest(**fields)
+
+
+def question(text, apa):
+    return {"question": text, "citations": [{"apa": apa, "description": f"About {text}"}]}
+
+
+def test_plan_detects_changed_and_removed_questions():
+    questions = [question(f"Question {i}", f"Author{i}, A. (2020). Title {i}.") for i in range(4)]
+    first = make_request(questions)
+    state = {"context_hash": data_analysis.context_hash(first), "hashes": plan_reanalysis(None, first)["hashes"]}
+    assert plan_reanalysis(state, first)["mode"] == "cached"
+
+    # Question 0 removed, a citation of question 2 edited, one question appended
+    edited = questions[1:] + [question("Question 4", "Author4, A. (2021). Title 4.")]
+    edited[1] = question("Question 2", "Author2, A. (2020). Revised title.")
+    plan = plan_reanalysis(state, make_request(edited))
+    assert plan["mode"] == "incremental"
+    assert plan["changed"] == [1, 3]
+    assert plan["relabel"] == {"Q2": "Q1", "Q4": "Q3"}
+    assert sorted(plan["removed"]) == ["Q1", "Q3"]
+
+    assert plan_reanalysis(state, make_request(questions, thesis="Different thesis"))["mode"] == "full"
+
+
+def test_endpoint_reanalyzes_only_changed_questions(monkeypatch, tmp_path):
+    store = AnalysisStateStore(str(tmp_path / "state.sqlite3"))
+    monkeypatch.setattr(data_analysis, "get_analysis_state_store", lambda: store)
+    monkeypatch.setattr(data_analysis, "format_related_evidence", lambda *args: "")
+    prompts = []
+
+    def fake_bedrock(prompt):
+        prompts.append(prompt)
+        if len(prompts) == 1:
+            return "Theme 1: Energy leverage\n- Gas supply\nTheme 2: Financial isolation\n- SWIFT"
+        return json.dumps({
+            "thematic_clusters": [{"theme_name": "Financial isolation", "questions": ["Q3"], "key_concepts": ["Asset freezes"]}],
+            "outline_points": [{"content": "Asset freezes expanded after 2022", "citations": [3]}]
+        })
+
+    monkeypatch.setattr(data_analysis, "invoke_bedrock", fake_bedrock)
+    questions = [question(f"Question {i}", f"Author{i}, A. (2020). Title {i}.") for i in range(3)]
+
+    full = data_analysis.analyze_subsection_data(make_request(questions))
+    assert full.recomputation.mode == "full" and len(prompts) == 1
+
+    cached = data_analysis.analyze_subsection_data(make_request(questions))
+    assert cached.recomputation.mode == "cached" and len(prompts) == 1
+    assert cached.thematic_clusters == full.thematic_clusters
+
+    questions[2] = question("Question 2 revised", "Author2, A. (2020). Title 2.")
+    merged = data_analysis.analyze_subsection_data(make_request(questions))
+    assert merged.recomputation.mode == "incremental"
+    assert merged.recomputation.recomputed_questions == ["Q3"]
+    assert merged.recomputation.reused_questions == ["Q1", "Q2"]
+    assert "Question 2 revised" in prompts[1] and "Question 0" not in prompts[1]
+    assert "Energy leverage" in prompts[1]
+
+    isolation = next(c for c in merged.thematic_clusters if c.theme_name == "Financial isolation")
+    assert "Q3" in isolation.questions and "Asset freezes" in isolation.key_concepts
+    assert merged.generated_outline.main_points[-1].content == "Asset freezes expanded after 2022"
+    assert merged.generated_outline.main_points[-1].questions == ["Q3"]
+
+
+def test_removing_questions_prunes_themes_without_calling_the_model(monkeypatch, tmp_path):
+    store = AnalysisStateStore(str(tmp_path / "state.sqlite3"))
+    monkeypatch.setattr(data_analysis, "get_analysis_state_store", lambda: store)
+    monkeypatch.setattr(data_analysis, "format_related_evidence", lambda *args: "")
+    prompts = []
+    monkeypatch.setattr(data_analysis, "invoke_bedrock", lambda prompt: prompts.append(prompt) or "")
+    questions = [question(f"Question {i}", f"Author{i}, A. (2020). Title {i}.") for i in range(3)]
+    store.put(
+        store.key("p1", "Responses", "Sanctions"), "p1", data_analysis.context_hash(make_request(questions)),
+        plan_reanalysis(None, make_request(questions))["hashes"],
+        {
+            "thematic_clusters": [
+                {"theme_name": "Energy leverage", "theme_description": "Gas", "questions": ["Q1"],
+                 "key_concepts": [], "evidence_types": [], "temporal_scope": None},
+                {"theme_name": "Financial isolation", "theme_description": "SWIFT", "questions": ["Q2", "Q3"],
+                 "key_concepts": [], "evidence_types": [], "temporal_scope": None}
+            ],
+            "logical_structure": {"approach": "thematic", "reasoning": "r", "transitions": [],
+                                  "sequence": ["Energy leverage", "Financial isolation"]},
+            "generated_outline": {
+                "main_points": [
+                    {"level": "1", "content": "Gas cut-offs", "supporting_evidence": [], "citations": [1],
+                     "rationale": "r", "questions": ["Q1"]},
+                    {"level": "2", "content": "Reserves frozen", "supporting_evidence": [], "citations": [2],
+                     "rationale": "r", "questions": ["Q1", "Q3"]},
+                    {"level": "3", "content": "Overview", "supporting_evidence": [], "citations": [], "rationale": "r"}
+                ],
+                "thematic_basis": "t", "logical_flow": "l", "evidence_integration": "e"
+            },
+            "content_summary": "s",
+            "analysis_confidence": "High"
+        }
+    )
+
+    pruned = data_analysis.analyze_subsection_data(make_request(questions[1:]))
+    assert prompts == []
+    assert pruned.recomputation.mode == "pruned"
+    assert pruned.recomputation.removed_questions == ["Q1"] and pruned.recomputation.recomputed_questions == []
+    assert [(c.theme_name, c.questions) for c in pruned.thematic_clusters] == [("Financial isolation", ["Q1", "Q2"])]
+    assert pruned.logical_structure.sequence == ["Financial isolation"]
+    # The point drawn only from the removed question is gone; the others follow the relabelling
+    assert [(p.level, p.content, p.questions) for p in pruned.generated_outline.main_points] == [
+        ("1", "Reserves frozen", ["Q2"]), ("2", "Overview", [])
+    ]
+
+
+def test_analyses_from_failed_model_calls_are_not_kept(monkeypatch, tmp_path):
+    store = AnalysisStateStore(str(tmp_path / "state.sqlite3"))
+    monkeypatch.setattr(data_analysis, "get_analysis_state_store", lambda: store)
+    monkeypatch.setattr(data_analysis, "format_related_evidence", lambda *args: "")
+    prompts = []
+
+    def flaky_bedrock(prompt):
+        prompts.append(prompt)
+        if len(prompts) == 1:
+            record_model_failure()
+            return "Rate limit exceeded: Too many requests"
+        return "Theme 1: Energy leverage\n- Gas supply"
+
+    monkeypatch.setattr(data_analysis, "invoke_bedrock", flaky_bedrock)
+    questions = [question(f"Question {i}", f"Author{i}, A. (2020). Title {i}.") for i in range(2)]
+
+    throttled = data_analysis.analyze_subsection_data(make_request(questions))
+    assert throttled.recomputation.mode == "full"
+    retried = data_analysis.analyze_subsection_data(make_request(questions))
+    assert retried.recomputation.mode == "full" and len(prompts) == 2
+    assert [c.theme_name for c in retried.thematic_clusters] == ["Energy leverage"]
+    assert data_analysis.analyze_subsection_data(make_request(questions)).recomputation.mode == "cached"
+    assert len(prompts) == 2
@@ -0,0 +1,34 @@
+import os
+
+from services.blob_store import FILE_THRESHOLD, ContentAddressedBlobStore
+
+
+def test_identical_content_is_stored_once_and_collected(tmp_path):
+    store = ContentAddressedBlobStore(str(tmp_path), codec="gzip")
+    text = ("The Fourth Amendment and new technologies. " * 200).encode("utf-8")
+
+    first = store.put(text)
+    assert store.put(text) == first
+    stats = store.stats()
+    assert stats["blobs"] == 1 and stats["references"] == 2
+    assert stats["stored_size"] < stats["size"] / 10
+    assert store.get(first) == text
+
+    store.decref(first)
+    assert store.gc()["deleted"] == 0
+    store.decref(first)
+    assert store.gc()["deleted"] == 1
+    assert store.get(first) is None
+
+
+def test_large_blobs_go_to_files(tmp_path):
+    store = ContentAddressedBlobStore(str(tmp_path), codec="gzip")
+    data = os.urandom(FILE_THRESHOLD * 2)
+    digest = store.put(data)
+    path = store._path(digest, "gzip")
+    assert os.path.exists(path)
+    assert store.get(digest) == data
+
+    store.decref(digest)
+    store.gc()
+    assert not os.path.exists(path)
@@ -0,0 +1,95 @@
+import json
+import threading
+import time
+
+import routers.data_analysis as data_analysis
+from schemas.data_analysis import BuildDataOutlinesRequest
+
+
+def section(title, position, subsections):
+    return {
+        "section_title": title,
+        "section_context": f"Evidence for {title}",
+        "subsections": [{"subsection_title": s, "questions": []} for s in subsections],
+        "logic_framework": [],
+        "thesis": "Sanctions shaped escalation",
+        "methodology": "Case study",
+        "paper_type": "analytical",
+        "section_position": {"current": position, "total": 3}
+    }
+
+
+def outline_for(title):
+    return json.dumps({
+        "section_title": title,
+        "section_overview": f"{title} overview",
+        "subsection_outlines": [
+            {"subsection_title": f"{title} A", "main_points": ["First"], "supporting_details": [],
+             "transitions": ["Within-section transition"], "citations_used": [1]},
+            {"subsection_title": f"{title} B", "main_points": ["Last"], "supporting_details": [],
+             "transitions": [], "citations_used": []}
+        ],
+        "logical_flow": "Chronological",
+        "integration_notes": "n/a",
+        "methodology_alignment": "n/a"
+    })
+
+
+def test_sections_generate_concurrently_and_are_stitched(monkeypatch):
+    titles = ["Energy", "Finance", "Military"]
+    prompts = {}
+    active, peak = [0], [0]
+    lock = threading.Lock()
+
+    def fake_bedrock(prompt, max_tokens=4000):
+        if "outlined independently and in parallel" in prompt:
+            return json.dumps({"sections": [
+                {"section_title": "Energy", "opening_transition": None, "closing_transition": "Energy hands off to finance."},
+                {"section_title": "Finance", "opening_transition": "Building on energy leverage,",
+                 "closing_transition": None, "revised_overview": "Finance, after energy"}
+            ]})
+        title = next(t for t in titles if f"SECTION: {t}" in prompt)
+        with lock:
+            prompts[title] = prompt
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.05)
+        with lock:
+            active[0] -= 1
+        if title == "Military":
+            raise RuntimeError("model unavailable")
+        return outline_for(title)
+
+    monkeypatch.setattr(data_analysis, "invoke_bedrock", fake_bedrock)
+    request = BuildDataOutlinesRequest(sections=[
+        section("Energy", 1, ["Gas"]), section("Finance", 2, ["SWIFT", "Reserves"]), section("Military", 3, ["Aid"])
+    ])
+    response = data_analysis.build_data_outlines(request)
+
+    assert peak[0] == 3
+    # Later sections see the planned titles of the earlier ones, not their generated text
+    assert "This is the first section" in prompts["Energy"]
+    assert "Energy" in prompts["Finance"].split("PREVIOUS SECTIONS:")[1].split("## STEP 1")[0]
+    assert "Reserves" in prompts["Military"]
+
+    energy, finance, military = response.outlines
+    assert military is None and "model unavailable" in response.errors["Military"]
+    assert response.stitched
+    assert energy.subsection_outlines[-1].transitions == ["Energy hands off to finance."]
+    assert finance.subsection_outlines[0].transitions == ["Building on energy leverage,", "Within-section transition"]
+    assert finance.section_overview == "Finance, after energy"
+    assert set(response.timings) == {"parallel_wave", "stitch"}
+
+
+def test_unparseable_stitch_keeps_parallel_outlines(monkeypatch):
+    def fake_bedrock(prompt, max_tokens=4000):
+        if "outlined independently and in parallel" in prompt:
+            return "Sorry, no JSON here"
+        return outline_for("Energy" if "SECTION: Energy" in prompt else "Finance")
+
+    monkeypatch.setattr(data_analysis, "invoke_bedrock", fake_bedrock)
+    request = BuildDataOutlinesRequest(sections=[section("Energy", 1, ["Gas"]), section("Finance", 2, ["SWIFT"])])
+    response = data_analysis.build_data_outlines(request)
+
+    assert not response.stitched and not response.errors
+    assert response.outlines[0].subsection_outlines[-1].transitions == []
@@ -0,0 +1,37 @@
+from services.citation_dedup import CitationClusterIndex, build_project_clusters, resolve_citation_key
+from services.citation_keys import canonical_citation_key
+
+SHADOW_SHORT = "Bamford, J. (2008). The shadow factory: The ultra-secret NSA from 9/11 to the eavesdropping on America. Doubleday."
+SHADOW_LONG = "Bamford, J. (2008). The shadow factory: The ultra-secret National Security Agency from 9/11 to the eavesdropping on America. Doubleday."
+KERR_2018 = "Kerr, O. S. (2018). The Fourth Amendment and new technologies: Constitutional myths and the case for caution. Michigan Law Review, 102(5), 801-888."
+KERR_2011 = "Kerr, O. S. (2011). The Fourth Amendment and New Technologies: Constitutional Myths and the Case for Caution. Michigan Law Review, 102(5), 801-888."
+DONOHUE = "Donohue, L. K. (2016). The future of foreign intelligence: Privacy and surveillance in a digital age. Oxford University Press."
+OTHER_AUTHOR = "Regan, P. M. (2016). The future of foreign intelligence: Privacy and surveillance in a digital age. Oxford University Press."
+
+
+def test_near_duplicates_share_a_cluster(tmp_path):
+    index = CitationClusterIndex("p", str(tmp_path / "clusters.json"))
+    first = index.add(SHADOW_SHORT)
+    assert index.add(SHADOW_LONG) == first
+    assert index.add(KERR_2018) == index.add(KERR_2011)
+    assert index.add(KERR_2018) != first
+    # Same title by a different author is kept apart
+    assert index.add(DONOHUE) != index.add(OTHER_AUTHOR)
+
+    clusters = index.clusters()
+    assert len(clusters) == 2
+    assert canonical_citation_key(KERR_2018) in {c["representative"] for c in clusters}
+
+
+def test_manual_merge_survives_rebuild():
+    project = {"id": "dedup-test", "data": {"outlineData": [{"subsections": [{"questions": [
+        {"question": "Q", "citations": [{"apa": SHADOW_SHORT}, {"apa": SHADOW_LONG}, {"apa": DONOHUE}, {"apa": KERR_2011}]}
+    ]}]}]}}
+    index = build_project_clusters(project)
+    assert len(index.clusters()) == 1
+
+    representative = index.merge([canonical_citation_key(DONOHUE), canonical_citation_key(KERR_2011)])
+    rebuilt = build_project_clusters(project)
+    assert rebuilt.resolve(canonical_citation_key(KERR_2011)) == representative
+    assert resolve_citation_key("dedup-test", canonical_citation_key(DONOHUE)) == representative
+    assert resolve_citation_key(None, "unknown") == "unknown"
@@ -0,0 +1,89 @@
+import json
+
+import routers.literature_review as literature_review
+from schemas.literature_review import Citation, CitationDigestRequest, CitationResponseRequest
+from services.citation_digest import DigestCache, digest_key, relevant_claims
+
+SMITH = "Smith, J. (2019). Gas and power in Europe. Journal of Energy, 4(2), 1-20."
+SMITH_REFORMATTED = "SMITH, J (2019) Gas and Power in Europe. Journal of Energy."
+JONES = "Jones, A. (2021). Sanctions after Crimea. Policy Press."
+
+DIGEST = {
+    "summary": "Gas as leverage.",
+    "claims": [{"claim": f"Claim {i} about topic {i}", "quotes": [f"quote {i}"], "location": f"p. {i}"} for i in range(12)]
+    + [{"claim": "Gazprom cut gas deliveries to Ukraine in 2009", "quotes": ["deliveries fell by 40%"], "location": "p. 4"}]
+}
+
+
+class FakeModel:
+    def __init__(self, digest=DIGEST):
+        self.digest = digest
+        self.prompts = []
+
+    def __call__(self, prompt, max_tokens=4000):
+        self.prompts.append((prompt, max_tokens))
+        if "Return only JSON" in prompt:
+            return json.dumps(self.digest) if self.digest else "Unexpected error: throttled"
+        return '1. "deliveries fell by 40%" [1]'
+
+
+def request(question, apa=SMITH, **overrides):
+    fields = dict(
+        question=question, citation=Citation(apa=apa), thesis="t", methodology="m",
+        question_number=1, citation_number=1, reference_id="1"
+    )
+    fields.update(overrides)
+    return CitationResponseRequest(**fields)
+
+
+def install(monkeypatch, tmp_path, model):
+    cache = DigestCache(str(tmp_path / "digests.sqlite3"))
+    monkeypatch.setattr(literature_review, "invoke_bedrock", model)
+    monkeypatch.setattr(literature_review, "get_digest_cache", lambda: cache)
+    return cache
+
+
+def test_one_digest_serves_every_question_citing_the_work(monkeypatch, tmp_path):
+    model = FakeModel()
+    install(monkeypatch, tmp_path, model)
+    statuses = [
+        literature_review.generate_citation_response(request(q, apa=apa)).digest_status
+        for q, apa in [("Why did gas deliveries to Ukraine fall?", SMITH), ("What did Gazprom do?", SMITH_REFORMATTED),
+                       ("Was gas a weapon?", SMITH)]
+    ]
+    assert statuses == ["generated", "cached", "cached"]
+    digest_calls = [p for p in model.prompts if "Return only JSON" in p[0]]
+    answers = [p for p in model.prompts if "Return only JSON" not in p[0]]
+    assert len(digest_calls) == 1 and len(answers) == 3
+    assert all(tokens == literature_review.DERIVED_MAX_TOKENS for _, tokens in answers)
+    assert "Gazprom cut gas deliveries" in answers[0][0] and "Claim 11" not in answers[0][0]
+
+
+def test_failed_digest_falls_back_to_full_recall(monkeypatch, tmp_path):
+    model = FakeModel(digest=None)
+    cache = install(monkeypatch, tmp_path, model)
+    response = literature_review.generate_citation_response(request("Why?"))
+    assert response.digest_status is None
+    assert "Use only direct quotes from the cited text" in model.prompts[-1][0]
+    assert cache.get(digest_key(SMITH)) is None
+
+    literature_review.generate_citation_response(request("Why?", use_digest=False))
+    assert sum("Return only JSON" in p for p, _ in model.prompts) == 1
+
+
+def test_prefetch_digests_each_distinct_work_once(monkeypatch, tmp_path):
+    model = FakeModel()
+    install(monkeypatch, tmp_path, model)
+    citations = [Citation(apa=SMITH), Citation(apa=JONES), Citation(apa=SMITH_REFORMATTED), Citation(title="")]
+    result = literature_review.generate_citation_digests(CitationDigestRequest(citations=citations))
+    assert (result.generated, result.cached, result.failed) == (3, 0, 1)
+    assert result.digests[0].citation_key == result.digests[2].citation_key
+    assert len(model.prompts) == 2
+
+    again = literature_review.generate_citation_digests(CitationDigestRequest(citations=citations[:2]))
+    assert again.cached == 2 and len(model.prompts) == 2
+
+
+def test_relevant_claims_keep_the_works_order():
+    claims = relevant_claims(DIGEST, "gas deliveries Ukraine 2009", limit=3)
+    assert len(claims) == 3 and claims[-1]["claim"].startswith("Gazprom")
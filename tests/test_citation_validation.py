@@ -0,0 +1,108 @@
+import json
+from unittest.mock import patch
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from routers import citations
+from services import citation_dedup
+from services.citation_keys import canonical_citation_key
+from services.citation_verdicts import CitationVerdictStore
+
+
+def test_canonical_key_ignores_formatting():
+    a = canonical_citation_key("Bamford, J. (2008). The shadow factory: The ultra-secret NSA from 9/11 to the eavesdropping on America. Doubleday.")
+    b = canonical_citation_key("Bamford, James (2008). The Shadow Factory: the ultra-secret NSA from 9/11 to the Eavesdropping on America. New York: Doubleday.")
+    c = canonical_citation_key("Bamford, J. (2009). The shadow factory. Doubleday.")
+    assert a == b
+    assert a != c
+    assert canonical_citation_key("Smith, J. A., & O'Neil, B. (2019). A study. J, 3(2).").startswith("o neil+smith|2019|")
+
+
+def fake_batch_reply(prompt):
+    count = prompt.count("    APA: ")
+    return json.dumps([
+        {"id": f"C{i}", "status": "valid", "explanation": "Real book", "link": None}
+        for i in range(1, count + 1)
+    ])
+
+
+def test_batch_validates_each_unique_source_once(tmp_path):
+    app = FastAPI()
+    app.include_router(citations.router)
+    client = TestClient(app)
+    store = CitationVerdictStore(str(tmp_path / "verdicts.sqlite3"))
+
+    items = [
+        {"citation": {"apa": "Schneier, B. (2015). Data and Goliath: The hidden battles to collect your data. Norton."}, "question": "Q1"},
+        {"citation": {"apa": "Schneier, Bruce (2015). Data and goliath: the hidden battles to collect your data. W. W. Norton."}, "question": "Q2"},
+        {"citation": {"apa": "Regan, P. M. (2019). The US national security state. Oxford University Press."}, "question": "Q3"},
+    ]
+    body = {"items": items, "context": {"thesis": "T", "methodology": {"description": "M"}}, "project_id": "p1"}
+
+    with patch.object(citations, "get_verdict_store", return_value=store), \
+         patch.object(citations, "invoke_bedrock", side_effect=fake_batch_reply) as model:
+        first = client.post("/check_citation_validity_batch", json=body).json()
+        second = client.post("/check_citation_validity_batch", json=body).json()
+
+    assert model.call_count == 1
+    assert first["unique_citations"] == 2 and first["validated"] == 2 and first["model_calls"] == 1
+    assert [r["status"] for r in first["results"]] == ["valid"] * 3
+    assert first["results"][0]["citation_key"] == first["results"][1]["citation_key"]
+    assert second["validated"] == 0 and second["cached"] == 2
+    assert all(r["cached"] for r in second["results"])
+
+
+def test_batch_without_project_does_not_share_verdicts(tmp_path):
+    app = FastAPI()
+    app.include_router(citations.router)
+    client = TestClient(app)
+    store = CitationVerdictStore(str(tmp_path / "verdicts.sqlite3"))
+    body = {
+        "items": [{"citation": {"apa": "Regan, P. M. (2019). The US national security state. Oxford University Press."}}],
+        "context": {"thesis": "T", "methodology": {"description": "M"}}
+    }
+
+    with patch.object(citations, "get_verdict_store", return_value=store), \
+         patch.object(citations, "invoke_bedrock", side_effect=fake_batch_reply) as model:
+        client.post("/check_citation_validity_batch", json=body)
+        second = client.post("/check_citation_validity_batch", json=body).json()
+
+    assert model.call_count == 2
+    assert second["cached"] == 0 and second["validated"] == 1
+    assert store.get_many(None, [second["results"][0]["citation_key"]]) == {}
+
+
+def test_batch_saves_the_cluster_index_once_and_verdicts_survive_reclustering(tmp_path):
+    app = FastAPI()
+    app.include_router(citations.router)
+    client = TestClient(app)
+    store = CitationVerdictStore(str(tmp_path / "verdicts.sqlite3"))
+    short = "Bamford, J. (2008). The shadow factory: The ultra-secret NSA from 9/11 to the eavesdropping on America. Doubleday."
+    long_form = "Bamford, J. (2008). The shadow factory: The ultra-secret National Security Agency from 9/11 to the eavesdropping on America. Doubleday."
+    context = {"thesis": "T", "methodology": {"description": "M"}}
+    items = [
+        {"citation": {"apa": short}},
+        {"citation": {"apa": "Regan, P. M. (2019). The US national security state. Oxford University Press."}},
+        {"citation": {"apa": "Donohue, L. K. (2016). The future of foreign intelligence. Oxford University Press."}},
+    ]
+
+    saves = []
+    original_save = citation_dedup.CitationClusterIndex.save
+    with patch.object(citations, "get_verdict_store", return_value=store), \
+         patch.object(citations, "invoke_bedrock", side_effect=fake_batch_reply) as model, \
+         patch.object(citation_dedup.CitationClusterIndex, "save", lambda self: saves.append(1) or original_save(self)):
+        first = client.post("/check_citation_validity_batch", json={"items": items, "context": context, "project_id": "recluster"}).json()
+        assert len(saves) == 1 and first["validated"] == 3
+
+        # A rebuild that sees the longer formatting first makes it the representative
+        project = {"id": "recluster", "data": {"outlineData": [{"subsections": [{"questions": [
+            {"question": "Q", "citations": [{"apa": long_form}, {"apa": short}]}
+        ]}]}]}}
+        index = citation_dedup.build_project_clusters(project)
+        assert index.resolve(first["results"][0]["citation_key"]) != first["results"][0]["citation_key"]
+
+        again = client.post("/check_citation_validity_batch", json={"items": [{"citation": {"apa": long_form}}], "context": context, "project_id": "recluster"}).json()
+
+    assert model.call_count == 1
+    assert again["cached"] == 1 and again["results"][0]["status"] == "valid"
@@ -0,0 +1,87 @@
+import pytest
+from fastapi import HTTPException
+
+import routers.evidence as evidence_router
+from routers.evidence import citation_evidence, lookup_evidence
+from schemas.evidence import EvidenceLookupRequest
+from services.citation_keys import canonical_citation_key
+from services.evidence_index import EvidenceIndex, attribute_markers, pick_sentences, score_sentence, split_sentences
+
+SMITH = "Smith, J. (2019). Gas and power in Europe. Journal of Energy, 4(2), 1-20."
+JONES = "Jones, A., & Lee, B. (2021). Sanctions after Crimea. Policy Press."
+
+
+def project(description, response):
+    citations = [
+        {"apa": SMITH, "description": description},
+        {"apa": JONES, "description": "This study examines sanctions. The EU froze 300 billion in reserves in 2022."}
+    ]
+    outline = [{"section_title": "Findings", "subsections": [{"subsection_title": "Energy", "questions": [
+        {"question": "How was gas used as leverage?", "citations": citations}
+    ]}]}]
+    return {"id": "p1", "data": {"draftData": {"outline": outline, "responses": {"0-0-0": [response]}}}}
+
+
+DESCRIPTION = ("This book explores energy politics in general terms. Gazprom cut supply to Ukraine by 40% in January 2009 "
+               "under the Energy Strategy. The author discusses pipeline diplomacy, e.g. Nord Stream.")
+RESPONSE = ("1. Russia cut gas to Ukraine in 2009 to gain leverage [Smith, p. 4]\n"
+            "2. Frozen reserves limited war financing after 2022 [2]\n"
+            "3. A sentence with no marker at all here.")
+
+
+def test_split_and_score_sentences():
+    sentences = split_sentences(DESCRIPTION)
+    assert len(sentences) == 3 and sentences[2].endswith("e.g. Nord Stream.")
+    assert split_sentences('Under Moscow control." [Tsygankov, p. 152] More text follows here.') == [
+        'Under Moscow control." [Tsygankov, p. 152] More text follows here.'
+    ]
+    scored = [dict(score_sentence(s), sentence=s, position=i) for i, s in enumerate(sentences)]
+    assert scored[0]["generic"] and not scored[1]["generic"]
+    assert scored[1]["verifiable"] and scored[1]["specificity"] > scored[2]["specificity"]
+    picks = pick_sentences(scored)
+    assert picks["specific"] == 1 and picks["verifiable"] == 1
+
+
+def test_response_markers_attribute_to_citations():
+    citations = [{"apa": SMITH}, {"apa": JONES}]
+    assert attribute_markers("Gas was cut [Smith, p. 4].", citations) == [0]
+    assert attribute_markers("Reserves were frozen [2]; see also [Jones & Lee, 2021].", citations) == [1]
+    assert attribute_markers("No marker here.", citations) == []
+
+
+def test_index_lookup_and_reindex(tmp_path):
+    index = EvidenceIndex(str(tmp_path / "evidence.sqlite3"))
+    stats = index.index_project(project(DESCRIPTION, RESPONSE))
+    assert stats["project_id"] == "p1" and stats["citations"] == 2 and stats["segmented"] == stats["texts"] == 4
+
+    smith = index.lookup("p1", canonical_citation_key(SMITH))
+    assert smith["apa"] == SMITH
+    assert smith["sentences"][0]["sentence"].startswith("Gazprom cut supply")
+    assert {s["source"] for s in smith["sentences"]} == {"description", "response"}
+    assert smith["descriptions"][0]["origins"] == ["0-0-0"]
+    assert smith["descriptions"][0]["picks"]["verifiable"].startswith("Gazprom")
+    responses = index.lookup("p1", canonical_citation_key(JONES), source="response")["sentences"]
+    assert [s["sentence"] for s in responses] == ["Frozen reserves limited war financing after 2022 [2]"]
+
+    again = index.index_project(project(DESCRIPTION, RESPONSE))
+    assert again["segmented"] == 0 and again["reused"] == 4 and again["removed"] == 0
+
+    changed = index.index_project(project(DESCRIPTION, "Gas was cut in 2009 [Smith, p. 4]"))
+    assert changed["segmented"] == 1 and changed["removed"] == 1
+    assert index.lookup("p1", canonical_citation_key(JONES), source="response") is None
+    with pytest.raises(ValueError):
+        index.index_project({"data": {}})
+
+
+def test_endpoints_resolve_apa_and_keys(tmp_path, monkeypatch):
+    index = EvidenceIndex(str(tmp_path / "evidence.sqlite3"))
+    index.index_project(project(DESCRIPTION, RESPONSE))
+    monkeypatch.setattr(evidence_router, "get_evidence_index", lambda: index)
+
+    assert citation_evidence("p1", apa=SMITH)["citation_key"] == canonical_citation_key(SMITH)
+    with pytest.raises(HTTPException) as missing:
+        citation_evidence("p1", apa="Nobody, X. (2000). Unknown.")
+    assert missing.value.status_code == 404
+
+    results = lookup_evidence("p1", EvidenceLookupRequest(citations=[canonical_citation_key(JONES), "unknown"])).results
+    assert results[canonical_citation_key(JONES)].apa == JONES and results["unknown"] is None
@@ -0,0 +1,87 @@
+import routers.literature_review as literature_review
+from schemas.literature_review import Citation, CitationReference, FusedResponseRequest
+from services.fused_outline import FusedOutlineStore, split_branches
+
+FUSED = """Here is the master outline:
+1. Gas was used as leverage [1, 2]
+   a. "Supply fell by 40%" [1]
+2. Sanctions followed [2]
+   a. "Reserves were frozen" [2]
+3. Pipelines mattered [3]
+   a. "Nord Stream carried half the gas" [3]"""
+
+OUTLINES = {"1": "1. Smith on gas [1]", "2": "1. Jones on sanctions [2]", "3": "1. Brown on pipelines [3]"}
+
+
+class FakeModel:
+    def __init__(self, fused=FUSED, refused='1. Pipelines were rerouted [3]\n   a. "TurkStream opened" [3]'):
+        self.fused, self.refused = fused, refused
+        self.prompts = []
+
+    def __call__(self, prompt, max_tokens=4000):
+        self.prompts.append(prompt)
+        return self.refused if "updating part of a master outline" in prompt else self.fused
+
+
+def fuse_request(outlines=OUTLINES):
+    refs = list(outlines)
+    return FusedResponseRequest(
+        question="How was gas used?", citation_responses=[outlines[r] for r in refs], citations=[],
+        thesis="t", methodology="m", question_number=1, project_id="p1",
+        citation_references=[CitationReference(reference_id=r, citation=Citation(apa=f"Author{r}, A. (2020). Work {r}.")) for r in refs]
+    )
+
+
+def install(monkeypatch, tmp_path, model):
+    store = FusedOutlineStore(str(tmp_path / "fused.sqlite3"))
+    monkeypatch.setattr(literature_review, "invoke_bedrock", model)
+    monkeypatch.setattr(literature_review, "get_fused_outline_store", lambda: store)
+
+
+def fuse(outlines=OUTLINES):
+    return literature_review.generate_fused_response(fuse_request(outlines))
+
+
+def test_branches_carry_provenance():
+    split = split_branches(FUSED)
+    assert split["preamble"] == "Here is the master outline:"
+    assert [b["refs"] for b in split["branches"]] == [["1", "2"], ["2"], ["3"]]
+    assert split["branches"][1]["text"] == '2. Sanctions followed [2]\n   a. "Reserves were frozen" [2]'
+
+
+def test_only_branches_of_the_changed_citation_are_refused(monkeypatch, tmp_path):
+    model = FakeModel()
+    install(monkeypatch, tmp_path, model)
+    first = fuse()
+    assert first.fusion.mode == "full" and first.fusion.provenance == {"1": [1], "2": [1, 2], "3": [3]}
+    assert fuse().fusion.mode == "cached" and len(model.prompts) == 1
+
+    updated = fuse(dict(OUTLINES, **{"3": "1. Brown on new pipelines [3]"}))
+    prompt = model.prompts[-1]
+    assert "Brown on new pipelines" in prompt and "Smith on gas" not in prompt and "Pipelines mattered" in prompt
+    assert updated.fusion.mode == "incremental"
+    assert (updated.fusion.points_kept, updated.fusion.points_refused) == (2, 1)
+    assert updated.response == FUSED.split("3. Pipelines")[0] + '3. Pipelines were rerouted [3]\n   a. "TurkStream opened" [3]'
+    assert updated.outline["nodes"][2]["refs"] == ["3"]
+
+
+def test_removed_citation_drops_its_points_without_a_model_call(monkeypatch, tmp_path):
+    model = FakeModel()
+    install(monkeypatch, tmp_path, model)
+    fuse()
+    reduced = fuse({"1": OUTLINES["1"], "2": OUTLINES["2"]})
+    assert len(model.prompts) == 1
+    assert reduced.fusion.mode == "incremental" and reduced.fusion.removed_refs == ["3"]
+    assert "Pipelines" not in reduced.response and reduced.response.endswith('"Reserves were frozen" [2]')
+
+
+def test_large_changes_and_unusable_updates_fuse_everything(monkeypatch, tmp_path):
+    model = FakeModel(refused="Sorry, I cannot help with that.")
+    install(monkeypatch, tmp_path, model)
+    fuse()
+    assert fuse(dict(OUTLINES, **{"1": "changed", "2": "changed"})).fusion.mode == "full"
+
+    # One changed outline would be refused on its own, but the model's update is unusable
+    fallback = fuse(dict(OUTLINES, **{"1": "changed", "2": "changed", "3": "changed too"}))
+    assert "updating part of a master outline" in model.prompts[-2]
+    assert fallback.fusion.mode == "full" and fallback.response == FUSED
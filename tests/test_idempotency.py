@@ -0,0 +1,83 @@
+import asyncio
+
+import httpx
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+
+from services.idempotency import IdempotencyMiddleware, IdempotencyStore
+from services.model_scheduler import record_model_failure
+
+
+def make_app(tmp_path):
+    calls = []
+    app = FastAPI()
+    app.add_middleware(IdempotencyMiddleware, store=IdempotencyStore(str(tmp_path / "idempotency.sqlite3")))
+
+    @app.post("/generate")
+    async def generate(payload: dict):
+        calls.append(payload)
+        await asyncio.sleep(0.05)
+        return {"answer": f"generation {len(calls)}"}
+
+    @app.post("/throttled")
+    def throttled(payload: dict):
+        calls.append(payload)
+        raise HTTPException(status_code=429, detail="Rate limit exceeded")
+
+    @app.post("/model-error")
+    def model_error(payload: dict):
+        # What invoke_bedrock does on throttling: record the failure and return the error as text
+        calls.append(payload)
+        record_model_failure()
+        return {"response": "Rate limit exceeded: slow down"}
+
+    return app, calls
+
+
+def test_retry_replays_the_stored_response(tmp_path):
+    app, calls = make_app(tmp_path)
+    client = TestClient(app)
+    headers = {"Idempotency-Key": "k1"}
+
+    first = client.post("/generate", json={"q": "a"}, headers=headers)
+    retry = client.post("/generate", json={"q": "a"}, headers=headers)
+    assert first.json() == retry.json() == {"answer": "generation 1"}
+    assert retry.headers["idempotent-replayed"] == "true" and "idempotent-replayed" not in first.headers
+    assert len(calls) == 1
+
+    assert client.post("/generate", json={"q": "b"}, headers=headers).status_code == 422
+    # Without a key, or with a new one, the endpoint runs again
+    assert client.post("/generate", json={"q": "a"}).json() == {"answer": "generation 2"}
+    assert client.post("/generate", json={"q": "a"}, headers={"Idempotency-Key": "k2"}).json() == {"answer": "generation 3"}
+
+
+def test_failed_attempts_are_not_stored(tmp_path):
+    app, calls = make_app(tmp_path)
+    client = TestClient(app)
+    for _ in range(2):
+        assert client.post("/throttled", json={}, headers={"Idempotency-Key": "k1"}).status_code == 429
+    assert len(calls) == 2
+
+
+def test_model_errors_returned_as_success_are_not_stored(tmp_path):
+    app, calls = make_app(tmp_path)
+    client = TestClient(app)
+    for _ in range(2):
+        response = client.post("/model-error", json={}, headers={"Idempotency-Key": "k1"})
+        assert response.status_code == 200 and "idempotent-replayed" not in response.headers
+    assert len(calls) == 2
+
+
+def test_retry_during_the_first_attempt_waits_for_it(tmp_path):
+    app, calls = make_app(tmp_path)
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            return await asyncio.gather(*[
+                client.post("/generate", json={"q": "a"}, headers={"Idempotency-Key": "k1"}) for _ in range(3)
+            ])
+
+    responses = asyncio.run(run())
+    assert len(calls) == 1
+    assert {r.json()["answer"] for r in responses} == {"generation 1"}
+    assert sum(r.headers.get("idempotent-replayed") == "true" for r in responses) == 2
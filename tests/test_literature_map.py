@@ -0,0 +1,100 @@
+import json
+import threading
+import time
+
+import routers.data_analysis as data_analysis
+from schemas.data_analysis import SubsectionOutlineRequest
+from services.literature_map import KeyPointCache
+
+
+def make_request(responses, **overrides):
+    fields = dict(
+        context_chain={
+            "subsection_context": "Economic pressure", "methodology_alignment": "Case study",
+            "thesis_connection": "Direct", "section_title": "Responses", "subsection_title": "Sanctions",
+            "position": "II.A."
+        },
+        literature_responses=responses,
+        thesis="Sanctions shaped escalation",
+        methodology="Case study",
+        paper_type="analytical",
+        outline_requirements={}
+    )
+    fields.update(overrides)
+    return SubsectionOutlineRequest(**fields)
+
+
+def literature(i, length=3000):
+    return {
+        "content": f"Finding {i}. " + "Detailed evidence. " * (length // 19),
+        "question": f"Question {i}",
+        "citations": [{"apa": f"Author{i}, A. (2020). Title {i}."}],
+        "type": "literature"
+    }
+
+
+OUTLINE = json.dumps({
+    "detailed_outline": [{"level": "1.", "content": "Merged point", "citations": ["Author0, A. (2020). Title 0."],
+                          "reference": "Response 1", "subPoints": []}],
+    "context_analysis": "ok", "literature_integration": "merged", "outline_rationale": "ok"
+})
+
+
+def test_map_reduce_extracts_full_responses_in_parallel_and_caches(monkeypatch, tmp_path):
+    cache = KeyPointCache(str(tmp_path / "key_points.sqlite3"))
+    monkeypatch.setattr(data_analysis, "get_key_point_cache", lambda: cache)
+    map_prompts, reduce_prompts = [], []
+    active, peak = [0], [0]
+    lock = threading.Lock()
+
+    def fake_bedrock(prompt, max_tokens=4000):
+        if "Extract the key points" in prompt:
+            with lock:
+                map_prompts.append(prompt)
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.02)
+            with lock:
+                active[0] -= 1
+            number = prompt.split("QUESTION: Question ")[1].split()[0]
+            if number == "5":
+                return "not json"
+            return json.dumps({"key_points": [
+                {"claim": f"Claim from response {number}", "evidence": ["2022 asset freeze"], "citations": [1, 7]}
+            ]})
+        reduce_prompts.append(prompt)
+        return OUTLINE
+
+    monkeypatch.setattr(data_analysis, "invoke_bedrock", fake_bedrock)
+    responses = [literature(i) for i in range(6)]
+    response = data_analysis.generate_subsection_outline(make_request(responses, map_concurrency=3))
+
+    assert len(map_prompts) == 6 and peak[0] == 3
+    # Map prompts see the whole response, not the first 500 characters
+    assert any(responses[0]["content"] in p for p in map_prompts)
+    assert "Claim from response 2" in reduce_prompts[0]
+    assert "Cite: Author2, A. (2020). Title 2." in reduce_prompts[0]
+    assert "Finding 5." in reduce_prompts[0]  # failed extraction falls back to leading text
+    assert response.literature_map.dict() == {"responses": 6, "cached": 0, "extracted": 5, "failed": 1, "key_points": 6}
+    assert response.detailed_outline[0].content == "Merged point"
+
+    # One response edited: only it (and the uncached failure) is extracted again
+    responses[1] = literature(1, length=4000)
+    response = data_analysis.generate_subsection_outline(make_request(responses))
+    assert len(map_prompts) == 8
+    assert response.literature_map.cached == 4
+
+
+def test_short_literature_uses_single_untruncated_prompt(monkeypatch):
+    prompts = []
+
+    def fake_bedrock(prompt, max_tokens=4000):
+        prompts.append(prompt)
+        return OUTLINE
+
+    monkeypatch.setattr(data_analysis, "invoke_bedrock", fake_bedrock)
+    responses = [literature(i, length=900) for i in range(2)]
+    response = data_analysis.generate_subsection_outline(make_request(responses))
+
+    assert len(prompts) == 1 and response.literature_map is None
+    assert responses[1]["content"] in prompts[0]
@@ -0,0 +1,155 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import app.main as main
+import routers.data_analysis as data_analysis
+import routers.refinement as refinement
+import services.model_scheduler as model_scheduler
+from services.model_scheduler import (
+    BULK, BULK_PATHS, INTERACTIVE, INTERACTIVE_PATHS, ModelCallContextMiddleware, ModelCallScheduler,
+    current_call_context, model_call_context, path_priority, submit_in_context
+)
+
+
+def wait_until(condition, timeout=5):
+    deadline = time.time() + timeout
+    while not condition():
+        assert time.time() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+class Caller:
+    """A model call on its own thread that holds its slot until released."""
+
+    def __init__(self, scheduler, priority, tenant, started):
+        self.scheduler, self.priority, self.tenant, self.started = scheduler, priority, tenant, started
+        self.done = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def run(self):
+        ticket = self.scheduler.acquire(self.priority, self.tenant, 4000)
+        self.started.append(self)
+        self.done.wait(5)
+        self.scheduler.release(ticket)
+
+    def finish(self):
+        self.done.set()
+        self.thread.join(5)
+
+
+def test_bulk_traffic_leaves_reserved_slots_for_interactive_calls():
+    scheduler = ModelCallScheduler(capacity=3, reserved=1)
+    started = []
+    bulk = [Caller(scheduler, BULK, "p1", started) for _ in range(3)]
+    wait_until(lambda: len(started) == 2 and scheduler.stats()["classes"][BULK]["queued"] == 1)
+
+    click = Caller(scheduler, INTERACTIVE, "p2", started)
+    wait_until(lambda: click in started)
+    stats = scheduler.stats()["classes"]
+    assert stats[INTERACTIVE]["running"] == 1 and stats[BULK]["running"] == 2 and stats[BULK]["queued"] == 1
+
+    time.sleep(0.02)
+    for caller in bulk + [click]:
+        caller.finish()
+    stats = scheduler.stats()["classes"]
+    assert stats[BULK]["completed"] == 3 and stats[INTERACTIVE]["completed"] == 1
+    assert stats[BULK]["wait_max"] >= 0.02 and stats[INTERACTIVE]["wait_max"] < 0.02
+
+
+def test_tenants_share_a_class_fairly():
+    scheduler = ModelCallScheduler(capacity=1, reserved=0)
+    started = []
+    blocker = Caller(scheduler, BULK, "warmup", started)
+    wait_until(lambda: started == [blocker])
+
+    batch = []
+    for _ in range(3):
+        batch.append(Caller(scheduler, BULK, "big-project", started))
+        wait_until(lambda: scheduler.stats()["classes"][BULK]["queued"] == len(batch))
+    single = Caller(scheduler, BULK, "small-project", started)
+    wait_until(lambda: scheduler.stats()["classes"][BULK]["tenants_waiting"] == 2)
+
+    blocker.finish()
+    order = []
+    for _ in range(4):
+        wait_until(lambda: len(started) == len(order) + 2)
+        order.append(started[-1])
+        order[-1].finish()
+    # The single call goes second, not behind the whole batch
+    assert order == [batch[0], single, batch[1], batch[2]]
+
+
+def test_context_reaches_worker_threads_and_requests():
+    with model_call_context(INTERACTIVE, "p9"):
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            assert submit_in_context(pool, current_call_context).result() == (INTERACTIVE, "p9")
+    assert current_call_context() == ("standard", "anonymous")
+
+    app = FastAPI()
+    app.add_middleware(ModelCallContextMiddleware)
+
+    @app.post("/generate_citation_response")
+    def bulk_endpoint():
+        return list(current_call_context())
+
+    @app.post("/refine_thesis")
+    def click_endpoint():
+        return list(current_call_context())
+
+    client = TestClient(app)
+    assert client.post("/generate_citation_response", headers={"X-Project-Id": "p1"}).json() == [BULK, "p1"]
+    assert client.post("/refine_thesis", headers={"X-User-Id": "u1"}).json() == [INTERACTIVE, "u1"]
+    assert client.post("/refine_thesis", headers={"X-Priority": "prefetch"}).json()[0] == BULK
+
+
+def test_mounted_endpoints_are_classified(monkeypatch):
+    mounted = {path for path, ops in main.app.openapi()["paths"].items() if "post" in ops}
+    assert INTERACTIVE_PATHS | BULK_PATHS <= mounted
+    assert all(path_priority(path) == BULK for path in mounted if path.startswith("/data-analysis/"))
+
+    seen = []
+    fake = lambda prompt, max_tokens=4000: seen.append(current_call_context()[0]) or '"Refined"'
+    monkeypatch.setattr(data_analysis, "invoke_bedrock", fake)
+    monkeypatch.setattr(refinement, "invoke_bedrock", fake)
+    client = TestClient(main.app)
+    client.post("/data-analysis/analyze-inclusion-exclusion", json={"thesis": "T"})
+    client.post("/refine_thesis", json={"current_topic": "T"})
+    assert seen == [BULK, INTERACTIVE]
+
+
+def test_waiting_for_a_model_slot_does_not_block_the_event_loop(monkeypatch):
+    scheduler = ModelCallScheduler(capacity=1, reserved=0)
+    monkeypatch.setattr(model_scheduler, "_scheduler", scheduler)
+
+    def fake_bedrock(prompt, max_tokens=4000):
+        with model_scheduler.get_model_scheduler().slot(max_tokens):
+            return '"Refined"'
+
+    monkeypatch.setattr(refinement, "invoke_bedrock", fake_bedrock)
+    started = []
+    blocker = Caller(scheduler, BULK, "other", started)
+    wait_until(lambda: started == [blocker])
+
+    with TestClient(main.app) as client:
+        results = {}
+        queued = threading.Thread(
+            target=lambda: results.update(click=client.post("/refine_thesis", json={"current_topic": "T"})), daemon=True
+        )
+        queued.start()
+        wait_until(lambda: scheduler.stats()["classes"][INTERACTIVE]["queued"] == 1)
+
+        # Other requests are still served while the click waits for a slot
+        other = threading.Thread(target=lambda: results.update(root=client.get("/")), daemon=True)
+        other.start()
+        other.join(2)
+        served = "root" in results
+        blocker.finish()
+        queued.join(5)
+
+    assert served and results["root"].status_code == 200
+    assert results["click"].status_code == 200
@@ -0,0 +1,73 @@
+from routers.data_analysis import extract_outline_from_ai_response
+from routers.literature_review import parse_outline_text
+from schemas.literature_review import OutlineParseRequest
+from services.outline_parser import OutlineParser, flatten_outline, parse_outline, roman_value, stored_outline
+
+SMITH = "Smith, J. (2019). Gas and power in Europe. Journal of Energy, 4(2), 1-20."
+
+OUTLINE = """Here is the master outline:
+1. Russia used gas supply as leverage over Ukraine [1]
+  a. Supply was cut in January 2009 [1, 2]
+    i. "Deliveries fell by 40%" [2]
+    ii. Transit through Ukraine stopped
+      1) Slovakia lost supply [1_3]
+        a) Factories closed
+          i) "Schools were shut" [3]
+  b. Prices were raised
+2. Sanctions followed the annexation
+   continued on the next line [4]
+
+Note: no contradictions found."""
+
+
+def test_six_levels_and_references():
+    tree = parse_outline(OUTLINE, {"1": {"apa": SMITH}})
+    flat = flatten_outline(tree["nodes"])
+    assert [(n["depth"], n["marker"]) for n in flat] == [
+        (1, "1."), (2, "a."), (3, "i."), (3, "ii."), (4, "1)"), (5, "a)"), (6, "i)"), (2, "b."), (1, "2.")
+    ]
+    assert flat[1]["refs"] == ["1", "2"] and flat[4]["refs"] == ["1_3"]
+    assert flat[-1]["text"] == "Sanctions followed the annexation continued on the next line [4]"
+    assert tree["preamble"] == ["Here is the master outline:"]
+    assert tree["notes"] == ["Note: no contradictions found."]
+    assert tree["citations"]["1"]["citation_key"].startswith("smith|2019|")
+    assert tree["citations"]["4"] is None
+
+
+def test_letter_or_roman_follows_siblings():
+    flat_text = "1. Point\n" + "\n".join(f"{c}. letter {c}" for c in "abcdefgh") + "\ni. ninth letter\n"
+    depths = [n["depth"] for n in flatten_outline(parse_outline(flat_text)["nodes"])]
+    assert depths == [1] + [2] * 8 + [3]  # flat text: "i." after "h." reads as a numeral
+
+    indented = "1. Point\n  h. letter\n  i. ninth letter\n    i. numeral\n    ii. numeral\n  j. letter"
+    flat = flatten_outline(parse_outline(indented)["nodes"])
+    assert [(n["depth"], n["token"]) for n in flat] == [(1, "1"), (2, "h"), (2, "i"), (3, "i"), (3, "ii"), (2, "j")]
+    assert roman_value("xiv") == 14 and roman_value("iiii") is None
+
+
+def test_streamed_chunks_match_single_parse():
+    parser = OutlineParser({"1": {"apa": SMITH}})
+    opened = []
+    for start in range(0, len(OUTLINE), 7):
+        opened.extend(parser.feed(OUTLINE[start:start + 7]))
+    tree = parser.close()
+    assert tree == parse_outline(OUTLINE, {"1": {"apa": SMITH}})
+    assert len(opened) == 9 and parser.notes == ["Note: no contradictions found."]
+
+
+def test_stored_tree_is_reused_until_text_changes():
+    tree = parse_outline(OUTLINE)
+    tree["marker"] = "stored"
+    assert stored_outline({"response": OUTLINE, "outline": tree}) is tree
+    assert "marker" not in stored_outline({"response": OUTLINE + "\n3. New point", "outline": tree})
+    assert parse_outline_text(OutlineParseRequest(text=OUTLINE))["nodes"][0]["refs"] == ["1"]
+
+
+def test_analysis_outline_uses_parsed_main_points():
+    outline = extract_outline_from_ai_response(OUTLINE, [])
+    assert [p.content for p in outline.main_points] == [
+        "Russia used gas supply as leverage over Ukraine [1]",
+        "Sanctions followed the annexation continued on the next line [4]"
+    ]
+    assert outline.main_points[0].citations == [1]
+    assert outline.main_points[0].supporting_evidence == ["Supply was cut in January 2009 [1, 2]", "Prices were raised"]
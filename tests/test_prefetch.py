@@ -0,0 +1,109 @@
+import threading
+
+import routers.methodology  # noqa: F401  registers generate_methodology_options
+import routers.sources as sources
+from schemas.sources import SourceRecommendationRequest
+from services.model_scheduler import record_model_failure
+from services.prefetch import PrefetchScheduler, get_prefetcher
+
+
+def echo(request):
+    return {"echo": request["q"]}
+
+
+def normalize(payload):
+    return {"q": payload["q"]}
+
+
+def wait_ready(scheduler, count=1):
+    for entry in list(scheduler.entries.values())[:count]:
+        entry["future"].result(timeout=5)
+
+
+def test_result_is_taken_once_for_the_exact_request():
+    scheduler = PrefetchScheduler()
+    scheduler.register("echo", normalize, echo)
+
+    assert scheduler.enqueue("p1", "echo", {"q": "a", "ignored": 1}) == "queued"
+    assert scheduler.enqueue("p1", "echo", {"q": "a"}) == "exists"
+    assert scheduler.enqueue("p1", "echo", {}) == "incomplete"
+    assert scheduler.enqueue("p1", "missing", {"q": "a"}) == "unknown"
+    wait_ready(scheduler)
+
+    assert scheduler.take("echo", {"q": "b"}) is None
+    assert scheduler.take("echo", {"q": "a"}) == {"echo": "a"}
+    assert scheduler.take("echo", {"q": "a"}) is None
+    assert scheduler.stats()["hits"] == 1
+
+
+def test_spend_cap_cancellation_and_queued_guesses():
+    release = threading.Event()
+
+    def blocking(request):
+        release.wait(5)
+        return request["q"]
+
+    scheduler = PrefetchScheduler(workers=1, spend_cap=12000)
+    scheduler.register("slow", normalize, blocking)
+
+    assert [scheduler.enqueue("p1", "slow", {"q": q}) for q in "abcd"] == ["queued", "queued", "queued", "over_budget"]
+    # Other projects have their own cap; identical requests share one guess
+    assert scheduler.enqueue("p2", "slow", {"q": "a"}) == "exists"
+    assert scheduler.enqueue("p2", "slow", {"q": "e"}) == "queued"
+
+    # A click on a guess that has not started runs it directly and refunds its spend
+    assert scheduler.take("slow", {"q": "c"}) is None
+    assert scheduler.enqueue("p1", "slow", {"q": "d"}) == "queued"
+
+    assert scheduler.cancel("p1") == 3
+    release.set()
+    stats = scheduler.stats()
+    assert stats["cancelled"] == 3
+    # Only the guess that was already running is still charged
+    assert stats["spend"] == {"p1": 4000, "p2": 4000}
+
+
+def test_guesses_whose_model_calls_failed_are_not_served():
+    def throttled(request):
+        # invoke_bedrock returns the error as text, which endpoints wrap into a normal response
+        record_model_failure()
+        return {"echo": "Rate limit exceeded: slow down"}
+
+    scheduler = PrefetchScheduler()
+    scheduler.register("echo", normalize, throttled)
+    scheduler.enqueue("p1", "echo", {"q": "a"})
+    for entry in scheduler.entries.values():
+        entry["future"].exception(timeout=5)
+
+    assert scheduler.take("echo", {"q": "a"}) is None
+    assert scheduler.stats()["failed"] == 1 and scheduler.stats()["hits"] == 0
+
+
+def test_expired_guesses_are_dropped():
+    scheduler = PrefetchScheduler(ttl=0)
+    scheduler.register("echo", normalize, echo)
+    scheduler.enqueue("p1", "echo", {"q": "a"})
+    wait_ready(scheduler)
+
+    assert scheduler.take("echo", {"q": "a"}) is None
+    assert scheduler.stats()["expired"] == 1
+
+
+def test_thesis_finalized_prefetches_source_recommendations(monkeypatch):
+    calls = []
+
+    def fake_bedrock(prompt, max_tokens=4000):
+        calls.append(prompt)
+        return "1. Journal articles\n2. Government reports"
+
+    monkeypatch.setattr(sources, "invoke_bedrock", fake_bedrock)
+    scheduler = get_prefetcher()
+    thesis = "Gas shaped the 2014 sanctions response"
+    statuses = scheduler.schedule("thesis_finalized", "prefetch-test", {"final_thesis": thesis, "paper_length_pages": 15})
+
+    assert statuses == [{"endpoint": "recommend_sources", "status": "queued"}]
+    wait_ready(scheduler)
+
+    response = sources.recommend_sources(SourceRecommendationRequest(final_thesis=thesis))
+    assert response == {"recommended_categories": ["1. Journal articles", "2. Government reports"]}
+    assert len(calls) == 1
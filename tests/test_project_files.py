@@ -0,0 +1,83 @@
+import io
+import json
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "scripts"))
+
+from json_stream import JsonStreamError, JsonStreamWriter, iter_events  # noqa: E402
+from project_files import main, run, verify_manifest  # noqa: E402
+
+
+def stream_copy(text, chunk_size=7):
+    out = io.StringIO()
+    JsonStreamWriter(out).events(iter_events(io.StringIO(text), chunk_size=chunk_size))
+    return out.getvalue()
+
+
+def test_round_trip_is_byte_identical():
+    with open(os.path.join(ROOT, "Cyber_Liberties_Answered.json"), "r", encoding="utf-8") as f:
+        text = f.read()
+    assert stream_copy(text, chunk_size=4096) == text
+
+    value = {"a": [], "b": {}, "c": [1, -2.5e3, True, None, "é \"q\" \\ \n"], "d": [{"e": [[]]}]}
+    assert stream_copy(json.dumps(value)) == json.dumps(value, indent=2, ensure_ascii=False)
+
+
+def test_invalid_json_is_rejected():
+    for text in ('{"a": 1,}', '{"a" 1}', '[1, 2', '{"a": tru}', '"unterminated', '[1] 2'):
+        with pytest.raises(JsonStreamError):
+            list(iter_events(io.StringIO(text), chunk_size=3))
+
+
+def write_project(path, project):
+    path.write_text(json.dumps(project, indent=2, ensure_ascii=False), encoding="utf-8")
+
+
+def test_migrate_dry_run_and_manifest(tmp_path):
+    project = {"id": "p", "data": {}, "literatureReviewData": {"responses": {"1-0-0": [{"a": "ü"}]}}}
+    write_project(tmp_path / "p.json", project)
+    write_project(tmp_path / "q.json", dict(project, dataObservationData={"responses": {}}))
+    manifest = tmp_path / "manifest.json"
+
+    assert main(["migrate-data-observation", str(tmp_path), "--dry-run", "--workers", "1", "--manifest", str(manifest)]) == 0
+    assert json.loads((tmp_path / "p.json").read_text(encoding="utf-8")) == project
+    entries = {os.path.basename(e["path"]): e for e in json.loads(manifest.read_text())["files"]}
+    assert entries["p.json"]["changed"] and not entries["q.json"]["changed"]
+    assert all(r["ok"] for r in verify_manifest(manifest))
+
+    main(["migrate-data-observation", str(tmp_path), "--workers", "2", "--manifest", str(manifest)])
+    migrated = json.loads((tmp_path / "p.json").read_text(encoding="utf-8"))
+    assert migrated == dict(project, dataObservationData=project["literatureReviewData"])
+    assert (tmp_path / "p.json").read_text(encoding="utf-8") == json.dumps(migrated, indent=2, ensure_ascii=False)
+    assert (tmp_path / "p.json.bak").exists()
+    assert all(r["ok"] for r in verify_manifest(manifest))
+
+
+def test_dedupe_and_mark_data_sections(tmp_path):
+    path = tmp_path / "cyber.json"
+    path.write_text(
+        '{"id": "c", "data": {"outlineData": ['
+        '{"section_title": "Intro", "subsections": []},'
+        '{"section_title": "Policy", "subsections": [{"subsection_title": "Gaps"}]}'
+        ']}, "draftData": {"responses": {"4-0-0": [1], "4-0-0": [2]}}}',
+        encoding="utf-8"
+    )
+    options = {"dry_run": False, "backup": False, "titles": ["Policy"], "min_data_sections": 1}
+
+    [result] = run("validate", [path], options)
+    assert not result["ok"] and result["problems"][0] == "duplicate key draftData/responses/4-0-0"
+
+    run("dedupe-keys", [path], options)
+    run("mark-data-sections", [path], options)
+    [result] = run("validate", [path], options)
+    assert result["ok"] and result["data_sections"] == ["Policy"] and result["responses"] == 1
+
+    project = json.loads(path.read_text(encoding="utf-8"))
+    assert project["draftData"]["responses"] == {"4-0-0": [1]}
+    policy = project["data"]["outlineData"][1]
+    assert policy["data_component"] == "Component 1" and policy["subsections"][0]["is_data_section"] is True
+    assert "is_data_section" not in project["data"]["outlineData"][0]
@@ -0,0 +1,95 @@
+import copy
+import json
+import os
+
+from services.project_documents import chunk_text, iter_project_documents
+from services.project_indexer import IndexManifestStore, ProjectIndexer
+
+FIXTURE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Cyber_Liberties_Answered.json")
+
+
+class FakeIndices:
+    def __init__(self):
+        self.created = {}
+
+    def exists(self, index):
+        return index in self.created
+
+    def create(self, index, body=None):
+        self.created[index] = body
+
+
+class FakeOpenSearch:
+    """Minimal stand-in for the opensearch-py client's bulk API."""
+
+    def __init__(self, reject_first=0):
+        self.indices = FakeIndices()
+        self.docs = {}
+        self.bulk_calls = 0
+        self.reject_first = reject_first
+
+    def bulk(self, body):
+        self.bulk_calls += 1
+        items = []
+        i = 0
+        while i < len(body):
+            action, meta = next(iter(body[i].items()))
+            if self.reject_first > 0:
+                self.reject_first -= 1
+                items.append({action: {"_id": meta["_id"], "status": 429}})
+            elif action == "delete":
+                found = self.docs.pop(meta["_id"], None) is not None
+                items.append({action: {"_id": meta["_id"], "status": 200 if found else 404}})
+            else:
+                self.docs[meta["_id"]] = body[i + 1]
+                items.append({action: {"_id": meta["_id"], "status": 201}})
+            i += 1 if action == "delete" else 2
+        return {"errors": any(item[next(iter(item))]["status"] >= 300 for item in items), "items": items}
+
+
+def load_project():
+    with open(FIXTURE, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def make_indexer(client, tmp_path, **kwargs):
+    return ProjectIndexer(client, manifest_store=IndexManifestStore(str(tmp_path)), sleep=lambda s: None, **kwargs)
+
+
+def test_walker_covers_outline_responses_and_citations():
+    kinds = {doc["kind"] for doc in iter_project_documents(load_project())}
+    assert {"section", "subsection", "question", "response", "citation"} <= kinds
+
+
+def test_chunk_text_respects_limit():
+    text = "\n\n".join(["Sentence one. Sentence two is here." * 20] * 5)
+    chunks = chunk_text(text, max_chars=300)
+    assert chunks and all(len(chunk) <= 300 for chunk in chunks)
+
+
+def test_incremental_reindex_only_sends_changes(tmp_path):
+    project = load_project()
+    client = FakeOpenSearch()
+    indexer = make_indexer(client, tmp_path, batch_size=100)
+
+    first = indexer.index_project(project)
+    assert first["indexed"] == first["total_chunks"] == len(client.docs)
+    assert first["batches"] > 1
+
+    second = indexer.index_project(project)
+    assert second["indexed"] == 0 and second["unchanged"] == first["total_chunks"]
+
+    changed = copy.deepcopy(project)
+    changed["data"]["literatureReviewData"]["responses"]["1-0-0"][0] = "1. A rewritten point [1]"
+    third = indexer.index_project(changed)
+    assert third["indexed"] >= 1
+    assert third["indexed"] + third["deleted"] < 10
+    assert any(doc["text"] == "1. A rewritten point [1]" for doc in client.docs.values())
+
+
+def test_throttled_items_are_retried(tmp_path):
+    client = FakeOpenSearch(reject_first=3)
+    report = make_indexer(client, tmp_path).index_project(load_project())
+    assert report["retries"] >= 1
+    assert report["failed"] == 0
+    assert len(client.docs) == report["total_chunks"]
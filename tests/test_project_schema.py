@@ -0,0 +1,32 @@
+import json
+import os
+
+from services.project_schema import normalize_project, ref_id, rehydrate_project
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load(name):
+    with open(os.path.join(ROOT, name), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_round_trip_on_fixtures():
+    for name in ("Russian_Aggression.json", "Cyber_Liberties_Answered.json", "Cyber_Liberties_data_text.json"):
+        project = load(name)
+        assert rehydrate_project(normalize_project(project)) == project
+
+
+def test_duplicated_subtrees_are_stored_once():
+    project = load("Russian_Aggression.json")
+    normalized = normalize_project(project)
+    data = normalized["root"]["data"]
+
+    assert ref_id(data["outlineData"]) == ref_id(data["draftData"]["outline"])
+    assert ref_id(data["methodology"]) == ref_id(data["draftData"]["methodology"])
+    assert len(json.dumps(normalized)) < len(json.dumps(project)) - 400_000
+
+    shared = rehydrate_project(normalized, share=True)["data"]
+    assert shared["outlineData"] is shared["draftData"]["outline"]
+    copied = rehydrate_project(normalized)["data"]
+    assert copied["outlineData"] is not copied["draftData"]["outline"]
@@ -0,0 +1,54 @@
+import copy
+import json
+import os
+
+from services.project_snapshots import ProjectSnapshots
+from services.project_store import ProjectStore
+
+FIXTURE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Russian_Aggression.json")
+
+
+def load_fixture():
+    with open(FIXTURE, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_snapshots_share_unchanged_nodes_and_restore(tmp_path):
+    store = ProjectStore(str(tmp_path / "projects.sqlite3"), str(tmp_path / "blobs"))
+    snapshots = ProjectSnapshots(store)
+    project = load_fixture()
+    project_id = project["id"]
+    store.save_project(project)
+
+    first = snapshots.create_snapshot(project_id, message="baseline")
+    assert first["created"] and first["new_nodes"] > 100
+    assert snapshots.create_snapshot(project_id)["created"] is False
+
+    # Regenerate one response on an experiment branch
+    snapshots.create_branch(project_id, "experiment")
+    edited = copy.deepcopy(project)
+    container = edited["data"]["draftData"]
+    key = next(iter(container["responses"]))
+    container["responses"][key] = ["Regenerated answer"]
+    store.save_project(edited)
+    second = snapshots.create_snapshot(project_id, branch="experiment")
+    assert second["parent_id"] == first["id"]
+    assert second["new_nodes"] == 2  # the response node and the record pointing at it
+
+    diff = snapshots.diff(first["id"], second["id"])
+    assert diff["changed"] == [{"path": f"data/draftData/responses/{key}", "kind": "response"}]
+    assert diff["added"] == diff["removed"] == []
+    assert diff["nodes_added"] == {"response": 1} and diff["nodes_removed"] == {"response": 1}
+
+    assert snapshots.load_snapshot(first["id"]) == project
+    assert snapshots.restore(first["id"])["written"] == 1
+    assert store.get_project(project_id) == project
+
+    assert [s["id"] for s in snapshots.list_snapshots(project_id, "experiment")] == [second["id"], first["id"]]
+    assert snapshots.delete_branch(project_id, "experiment") == 1
+    assert snapshots.load_snapshot(second["id"]) is None
+    assert snapshots.load_snapshot(first["id"]) == project
+
+    # Snapshots keep their content after the working project is deleted
+    store.delete_project(project_id)
+    assert snapshots.load_snapshot(first["id"]) == project
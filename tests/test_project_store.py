@@ -0,0 +1,89 @@
+import copy
+import json
+import os
+
+from services.project_store import ProjectStore, classify_path
+
+FIXTURE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Cyber_Liberties_Answered.json")
+
+
+def load_fixture():
+    with open(FIXTURE, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def make_store(tmp_path):
+    return ProjectStore(str(tmp_path / "projects.sqlite3"), str(tmp_path / "blobs"))
+
+
+def test_round_trip_and_incremental_save(tmp_path):
+    store = make_store(tmp_path)
+    project = load_fixture()
+
+    first = store.save_project(project)
+    assert first["written"] > 50 and first["unchanged"] == 0
+    assert store.get_project(project["id"]) == project
+
+    edited = copy.deepcopy(project)
+    key = next(iter(edited["data"]["literatureReviewData"]["responses"]))
+    edited["data"]["literatureReviewData"]["responses"][key] = ["Rewritten answer"]
+    second = store.save_project(edited)
+    assert second == {"project_id": project["id"], "written": 1, "deleted": 0, "unchanged": first["written"] - 1}
+    assert store.get_project(project["id"]) == edited
+
+
+def test_single_record_updates(tmp_path):
+    store = make_store(tmp_path)
+    project = load_fixture()
+    store.save_project(project)
+    project_id = project["id"]
+
+    sections = store.list_records(project_id, parent="data/outlineData", include_body=False)
+    assert [r["position"] for r in sections] == list(range(len(project["data"]["outlineData"])))
+    assert "value" not in sections[0]
+
+    path = "data/literatureReviewData/responses/9-9-9"
+    store.put_record(project_id, path, ["New response"])
+    assert store.get_record(project_id, path)["value"] == ["New response"]
+    assert store.get_project(project_id)["data"]["literatureReviewData"]["responses"]["9-9-9"] == ["New response"]
+
+    subsections = len(project["data"]["outlineData"][0]["subsections"])
+    assert store.delete_record(project_id, "data/outlineData/0") == subsections + 1
+    assert len(store.get_project(project_id)["data"]["outlineData"]) == len(project["data"]["outlineData"]) - 1
+
+
+def test_saves_release_only_the_replaced_records_nodes(tmp_path):
+    store = make_store(tmp_path)
+    project = load_fixture()
+    store.save_project(project)
+    project_id = project["id"]
+    node_count = lambda: store.conn.execute("SELECT COUNT(*) FROM nodes WHERE project_id = ?", (project_id,)).fetchone()[0]
+    before = node_count()
+
+    decoded = []
+    original_decode = store._decode
+    store._decode = lambda body, blob: decoded.append(1) or original_decode(body, blob)
+    edited = copy.deepcopy(project)
+    sections = edited["data"]["outlineData"]
+    sections[0] = dict(sections[0], section_title="Renamed section")
+    store.save_project(edited)
+    # Only the old body of the replaced record is read, not the whole project
+    assert len(decoded) == 1
+    store._decode = original_decode
+
+    # Reference counting left exactly what a full sweep keeps, with the counts it recomputes
+    refs = lambda: dict(store.conn.execute("SELECT node_id, refs FROM nodes WHERE project_id = ?", (project_id,)))
+    counted = refs()
+    assert store.collect_garbage(project_id) == 0 and refs() == counted
+    assert store.get_project(project_id) == edited
+
+    store.put_record(project_id, "data/outlineData/0", project["data"]["outlineData"][0])
+    store.delete_record(project_id, "data/outlineData/1")
+    counted = refs()
+    assert store.collect_garbage(project_id) == 0 and refs() == counted
+    assert node_count() < before
+
+
+def test_classify_path():
+    assert classify_path("data/outlineData/2/subsections/1") == ("subsection", "data/outlineData/2", 1)
+    assert classify_path("dataObservationData/responses/1-0-0") == ("response", "dataObservationData", None)
@@ -0,0 +1,84 @@
+import copy
+import json
+import os
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from routers import sync as sync_router
+from services.json_patch import JsonPatchError, JsonPatchTestFailed, apply_patch, make_patch
+from services.project_store import ProjectStore
+from services.project_sync import ProjectSync
+
+FIXTURE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Cyber_Liberties_Answered.json")
+
+
+def test_apply_patch_operations_and_rollback():
+    doc = {"a": {"b": [1, 2, 3]}, "c~d": "x", "e/f": 1}
+    doc = apply_patch(doc, [
+        {"op": "add", "path": "/a/b/1", "value": 9},
+        {"op": "remove", "path": "/a/b/0"},
+        {"op": "replace", "path": "/c~0d", "value": "y"},
+        {"op": "move", "from": "/e~1f", "path": "/g"},
+        {"op": "copy", "from": "/a/b", "path": "/h"},
+        {"op": "add", "path": "/h/-", "value": 4},
+        {"op": "test", "path": "/g", "value": 1},
+    ])
+    assert doc == {"a": {"b": [9, 2, 3]}, "c~d": "y", "g": 1, "h": [9, 2, 3, 4]}
+
+    before = copy.deepcopy(doc)
+    with pytest.raises(JsonPatchTestFailed):
+        apply_patch(doc, [{"op": "remove", "path": "/g"}, {"op": "test", "path": "/a/b/0", "value": 0}])
+    assert doc == before
+    with pytest.raises(JsonPatchError):
+        apply_patch(doc, [{"op": "replace", "path": "/missing", "value": 1}])
+
+
+def test_make_patch_round_trip():
+    with open(FIXTURE, "r", encoding="utf-8") as f:
+        old = json.load(f)
+    new = copy.deepcopy(old)
+    new["data"]["literatureReviewData"]["responses"]["1-0-0"] = ["Edited"]
+    new["data"]["outlineData"][0]["subsections"].pop()
+    new["name"] = "Renamed"
+    operations = make_patch(old, new)
+    assert len(json.dumps(operations)) < 2000
+    assert apply_patch(copy.deepcopy(old), operations) == new
+
+
+def test_versioned_patches_and_compaction(tmp_path):
+    store = ProjectStore(str(tmp_path / "projects.sqlite3"), str(tmp_path / "blobs"))
+    sync = ProjectSync(store, snapshot_every=3)
+    app = FastAPI()
+    app.include_router(sync_router.router)
+    client = TestClient(app)
+
+    project = {"id": "p1", "name": "Test", "data": {"outlineData": [{"section_title": "Intro", "subsections": []}]}}
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(sync_router, "get_project_sync", lambda: sync)
+        put = client.put("/sync/p1", json=project)
+        etag = put.headers["etag"]
+        assert put.json()["version"] == 1
+
+        rename = [{"op": "replace", "path": "/name", "value": "Renamed"}]
+        assert client.patch("/sync/p1", json=rename).status_code == 428
+        first = client.patch("/sync/p1", json=rename, headers={"If-Match": etag})
+        assert first.status_code == 200 and first.json()["version"] == 2
+        stale = client.patch("/sync/p1", json=rename, headers={"If-Match": etag})
+        assert stale.status_code == 412 and stale.headers["etag"] == first.headers["etag"]
+
+        bad = client.patch("/sync/p1", json=[{"op": "remove", "path": "/nope"}], headers={"If-Match": first.headers["etag"]})
+        assert bad.status_code == 422
+        assert client.get("/sync/p1/patches", params={"since": 1}).json()["patches"][0]["operations"] == rename
+
+        etag = first.headers["etag"]
+        for n in range(2):
+            etag = client.patch("/sync/p1", json=[{"op": "add", "path": f"/data/n{n}", "value": n}],
+                                headers={"If-Match": etag}).headers["etag"]
+        # The third patch since the snapshot triggers compaction
+        assert client.get("/sync/p1/patches", params={"since": 1}).status_code == 410
+
+    reloaded = ProjectSync(store).get("p1")
+    assert reloaded[0] == 4
+    assert reloaded[1]["name"] == "Renamed" and reloaded[1]["data"]["n1"] == 1
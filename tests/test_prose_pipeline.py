@@ -0,0 +1,110 @@
+import json
+import threading
+import time
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import routers.literature_review as literature_review
+from schemas.literature_review import SectionProseRequest
+
+
+def subsection(section_index, subsection_index, title, questions):
+    return {
+        "section_index": section_index,
+        "subsection_index": subsection_index,
+        "section_title": "Energy",
+        "subsection_title": title,
+        "subsection_context": f"Context for {title}",
+        "questions": [
+            {"question": q, "question_number": n, "fused_response": f"1. {q} answer [{n}_1]",
+             "citation_references": [{"reference_id": f"{n}_1", "citation": {"apa": f"Author{n}, A. (2020). Work."}}]}
+            for n, q in enumerate(questions, 1)
+        ]
+    }
+
+
+def request(**overrides):
+    data = {
+        "thesis": "Sanctions shaped escalation",
+        "methodology": "Case study",
+        "subsections": [
+            subsection(0, 0, "Gas", ["How was gas used?", "Who bought it?"]),
+            subsection(0, 1, "Oil", ["How was oil priced?"]),
+            subsection(0, 2, "Coal", []),
+            subsection(1, 0, "Grain", ["Where did grain go?"])
+        ]
+    }
+    data.update(overrides)
+    return SectionProseRequest(**data)
+
+
+class FakeModel:
+    """Slow per-subsection calls that finish in reverse order, plus the transition pass."""
+
+    def __init__(self, transitions=None):
+        self.transitions = transitions
+        self.prompts = []
+        self.active = self.peak = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, prompt, max_tokens=4000):
+        if "written independently and in parallel" in prompt:
+            self.prompts.append(prompt)
+            return self.transitions if self.transitions is not None else json.dumps({"transitions": [
+                {"subsection": 2, "sentence": "From gas the argument turns to oil."},
+                {"subsection": 3, "sentence": "Grain followed the same path."},
+                {"subsection": 9, "sentence": "Out of range."}
+            ]})
+        title = next(t for t in ("Gas", "Oil", "Grain") if f"Context for {t}" in prompt)
+        with self.lock:
+            self.prompts.append(prompt)
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep({"Gas": 0.15, "Oil": 0.1, "Grain": 0.05}[title])
+        with self.lock:
+            self.active -= 1
+        return f"{title} prose."
+
+
+def test_subsections_generate_concurrently_and_assemble_in_order(monkeypatch):
+    model = FakeModel()
+    monkeypatch.setattr(literature_review, "invoke_bedrock", model)
+    response = literature_review.generate_section_prose(request())
+
+    assert model.peak == 3
+    gas_prompt = next(p for p in model.prompts if "Context for Gas" in p)
+    assert "QUESTIONS BEING ADDRESSED" in gas_prompt and "Who bought it?" in gas_prompt and "[2_1]" in gas_prompt
+
+    gas, oil, coal, grain = response.subsections
+    assert [s.prose for s in response.subsections] == ["Gas prose.", "Oil prose.", "", "Grain prose."]
+    assert coal.error and gas.error is None
+    assert gas.opening_transition is None
+    assert oil.opening_transition == "From gas the argument turns to oil."
+    # Transition numbering skips subsections that produced no prose
+    assert grain.opening_transition == "Grain followed the same path."
+    assert response.transitions_written
+    assert set(response.timings) == {"parallel_wave", "transitions"}
+
+
+def test_concurrency_limit_and_failed_transition_pass(monkeypatch):
+    model = FakeModel(transitions="no json")
+    monkeypatch.setattr(literature_review, "invoke_bedrock", model)
+    response = literature_review.generate_section_prose(request(max_concurrency=1))
+
+    assert model.peak == 1
+    assert not response.transitions_written
+    assert [s.prose for s in response.subsections] == ["Gas prose.", "Oil prose.", "", "Grain prose."]
+
+
+def test_stream_emits_each_subsection_as_it_finishes(monkeypatch):
+    monkeypatch.setattr(literature_review, "invoke_bedrock", FakeModel())
+    app = FastAPI()
+    app.include_router(literature_review.router)
+    body = TestClient(app).post("/generate_section_prose/stream", json=json.loads(request().json())).text
+    events = [json.loads(line) for line in body.splitlines()]
+
+    # Completion order, not paper order; positions let the client place each one
+    assert [e["position"] for e in events if e["event"] == "subsection"] == [2, 3, 1, 0]
+    assert events[-2]["event"] == "transitions" and len(events[-2]["transitions"]) == 2
+    assert events[-1]["event"] == "done"
@@ -0,0 +1,118 @@
+import copy
+
+import pytest
+from fastapi import HTTPException
+
+import routers.references as references_router
+from routers.references import citation_usages, marker_source
+from services.citation_keys import canonical_citation_key
+from services.reference_index import ReferenceIndex
+
+SMITH = "Smith, J. (2019). Gas and power in Europe. Journal of Energy, 4(2), 1-20."
+JONES = "Jones, A., & Lee, B. (2021). Sanctions after Crimea. Policy Press."
+BROWN = "Brown, C. (2020). Pipelines and politics. Energy Review, 2(1), 5-9."
+
+
+def project(reference_map=True):
+    questions = [
+        {"question": "How was gas used?", "citations": [{"apa": SMITH}, {"apa": JONES}]},
+        {"question": "Which pipelines?", "citations": [{"apa": BROWN}]},
+    ]
+    draft = {
+        "outline": [{"section_title": "Findings", "subsections": [{"subsection_title": "Energy", "questions": questions}]}],
+        "responses": {
+            "0-0-0": [
+                "1. Gas was cut in 2009 [1]\n  a. Reserves were frozen [2]",
+                "1. Supply fell sharply [Smith, p. 4]"
+            ],
+            "0-0-1": ["1. Nord Stream mattered [3]"]
+        },
+        "masterOutlines": [{"section_index": 0, "prose_subsections": [{
+            "subsection_title": "Energy",
+            "prose_content": 'Gas was a lever <span style="color:blue;" data-cite="[1]">[1]</span>.\n\n'
+                             "Pipelines carried it [2_1] and sanctions followed [1_2]."
+        }]}]
+    }
+    if reference_map:
+        draft["citationReferenceMap"] = {
+            "0-0-0": {"0": {"referenceNumber": 1, "citation": {"apa": SMITH}},
+                      "1": {"referenceNumber": 2, "citation": {"apa": JONES}}},
+            "0-0-1": {"0": {"referenceNumber": 3, "citation": {"apa": BROWN}}}
+        }
+    return {"id": "p1", "data": {"draftData": draft}}
+
+
+def test_usages_cover_responses_outline_points_and_prose(tmp_path):
+    index = ReferenceIndex(str(tmp_path / "references.sqlite3"))
+    stats = index.index_project(project())
+    assert stats["units"] == 5 and stats["changed"] == 5
+
+    smith = index.usages("p1", canonical_citation_key(SMITH))
+    assert smith["counts"] == {"outline_point": 2, "prose": 1, "response": 2}
+    assert {u["location"] for u in smith["usages"] if u["kind"] == "outline_point"} == {
+        "responses/0-0-0/0#1", "responses/0-0-0/1#1"
+    }
+    assert [c["apa"] for c in index.supports("p1", "master/0/0/1")] == [BROWN, JONES]
+    assert [c["apa"] for c in index.supports("p1", "responses/0-0-0/0#1.a")] == [JONES]
+
+    assert index.resolve("p1", "[3]", "0-0-0")["apa"] == BROWN
+    assert index.resolve("p1", "2_1", "0-0")["apa"] == BROWN
+    assert index.resolve("p1", "9") is None
+
+
+def test_question_numbering_without_reference_map(tmp_path):
+    index = ReferenceIndex(str(tmp_path / "references.sqlite3"))
+    index.index_project(project(reference_map=False))
+    # [3] in question 0-0-1 has no third citation; in prose [1] is the subsection's first citation
+    assert index.supports("p1", "responses/0-0-1/0") == []
+    assert [c["apa"] for c in index.supports("p1", "master/0/0/0")] == [SMITH]
+    assert index.resolve("p1", "2", "0-0-0")["apa"] == JONES
+
+
+def test_reindex_only_touches_changed_units(tmp_path):
+    index = ReferenceIndex(str(tmp_path / "references.sqlite3"))
+    original = project()
+    index.index_project(original)
+    assert index.index_project(original)["changed"] == 0
+
+    edited = copy.deepcopy(original)
+    draft = edited["data"]["draftData"]
+    draft["responses"]["0-0-1"] = ["1. Nord Stream mattered [3] and so did sanctions [2]"]
+    del draft["responses"]["0-0-0"][1]
+    stats = index.index_project(edited)
+    assert stats["changed"] == 1 and stats["removed"] == 1
+    assert index.usages("p1", canonical_citation_key(SMITH))["counts"] == {"outline_point": 1, "prose": 1, "response": 1}
+    assert [c["apa"] for c in index.supports("p1", "responses/0-0-1/0")] == [BROWN, JONES]
+
+    # Renumbering the reference map re-resolves every unit even though no text changed
+    draft["citationReferenceMap"]["0-0-1"]["0"]["referenceNumber"] = 4
+    assert index.index_project(edited)["changed"] == 4
+    assert index.supports("p1", "responses/0-0-1/0")[0]["apa"] == JONES
+
+
+def test_saved_response_outlines_are_reused(tmp_path, monkeypatch):
+    import services.outline_parser as outline_parser
+    original = project()
+    draft = original["data"]["draftData"]
+    draft["responseOutlines"] = {"0-0-0": [outline_parser.parse_outline(draft["responses"]["0-0-0"][0])]}
+    parsed = []
+    real_parse = outline_parser.parse_outline
+    monkeypatch.setattr(outline_parser, "parse_outline", lambda text, references=None: parsed.append(text) or real_parse(text, references))
+
+    index = ReferenceIndex(str(tmp_path / "references.sqlite3"))
+    index.index_project(original)
+    # Only the two responses without a saved tree are parsed
+    assert parsed == [draft["responses"]["0-0-0"][1], draft["responses"]["0-0-1"][0]]
+    assert [c["apa"] for c in index.supports("p1", "responses/0-0-0/0#1.a")] == [JONES]
+
+
+def test_endpoints(tmp_path, monkeypatch):
+    index = ReferenceIndex(str(tmp_path / "references.sqlite3"))
+    index.index_project(project())
+    monkeypatch.setattr(references_router, "get_reference_index", lambda: index)
+
+    assert citation_usages("p1", apa=BROWN, kind="prose")["counts"] == {"prose": 1}
+    assert marker_source("p1", "1_2", scope="0-0-0")["apa"] == JONES
+    for call in (lambda: citation_usages("p1", apa=BROWN, kind="paragraph"), lambda: marker_source("p1", "7")):
+        with pytest.raises(HTTPException):
+            call()
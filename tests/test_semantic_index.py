@@ -0,0 +1,89 @@
+import numpy as np
+
+from services.embeddings import HashingEmbedder
+from services.semantic_index import SemanticIndex
+
+TOPICS = [
+    "NSA bulk metadata collection under Section 215 of the Patriot Act",
+    "Fourth Amendment warrant requirements for cell phone location data",
+    "Russian military intervention in Syria and Ukraine",
+    "European Union GDPR rules on cross-border data transfers",
+]
+
+
+def make_docs(n=400):
+    docs = []
+    for i in range(n):
+        topic = TOPICS[i % len(TOPICS)]
+        text = f"{topic} case {i} analysis"
+        docs.append({"id": f"doc-{i}", "text": text, "content_hash": str(hash(text)), "metadata": {"kind": "response"}})
+    return docs
+
+
+def test_hashing_embedder_is_deterministic_and_normalized():
+    embedder = HashingEmbedder(dim=64)
+    a = embedder.embed(["surveillance of phone records"])
+    b = embedder.embed(["surveillance of phone records"])
+    assert np.allclose(a, b)
+    assert np.isclose(np.linalg.norm(a[0]), 1.0)
+
+
+def test_exact_search_and_incremental_upsert(tmp_path):
+    embedder = HashingEmbedder(dim=128)
+    index = SemanticIndex(str(tmp_path), embedder.dim, embedder.name)
+    docs = make_docs()
+    assert index.upsert(docs, embedder)["embedded"] == len(docs)
+    assert index.upsert(docs, embedder)["embedded"] == 0
+
+    results = index.search(embedder.embed(["Fourth Amendment warrant for location data"])[0], k=3, exact=True)
+    assert all("Fourth Amendment" in r["text"] for r in results)
+
+    # Reopening reads the memory-mapped vectors back from disk
+    reopened = SemanticIndex(str(tmp_path), embedder.dim, embedder.name)
+    assert reopened.size == len(docs)
+    again = reopened.search(embedder.embed(["Fourth Amendment warrant for location data"])[0], k=3, exact=True)
+    assert [r["id"] for r in again] == [r["id"] for r in results]
+
+
+def test_approximate_search_finds_same_topic(tmp_path):
+    embedder = HashingEmbedder(dim=128)
+    index = SemanticIndex(str(tmp_path), embedder.dim, embedder.name)
+    index.upsert(make_docs(), embedder)
+    query = embedder.embed(["GDPR cross-border data transfers in the European Union"])[0]
+    approx = index.search(query, k=5, exact=False, n_probe=4)
+    assert approx and all("GDPR" in r["text"] for r in approx)
+
+
+def test_remove_missing_tombstones_rows(tmp_path):
+    embedder = HashingEmbedder(dim=64)
+    index = SemanticIndex(str(tmp_path), embedder.dim, embedder.name)
+    docs = make_docs(20)
+    index.upsert(docs, embedder)
+    assert index.remove_missing({d["id"] for d in docs[:5]}) == 15
+    results = index.search(embedder.embed([TOPICS[0]])[0], k=20, exact=True)
+    assert {r["id"] for r in results} <= {d["id"] for d in docs[:5]}
+
+
+def test_edited_documents_are_compacted_away(tmp_path):
+    embedder = HashingEmbedder(dim=64)
+    index = SemanticIndex(str(tmp_path), embedder.dim, embedder.name)
+    docs = make_docs(40)
+    index.upsert(docs, embedder)
+    index.build_ivf()
+
+    # Editing a fifth of the documents leaves tombstones below the threshold
+    edited = [dict(d, text=f"{d['text']} revised", content_hash=f"{d['content_hash']}-2") for d in docs[:8]]
+    index.upsert(edited + docs[8:], embedder)
+    assert len(index.rows) == 48
+
+    # A second round of edits pushes them past it and the rows are rewritten
+    edited = [dict(d, text=f"{d['text']} again", content_hash=f"{d['content_hash']}-3") for d in edited]
+    index.upsert(edited + docs[8:], embedder)
+    assert len(index.rows) == index.size == 40
+    assert not any(row.get("deleted") for row in index.rows)
+    assert len(index.assignments) == 40
+
+    query = embedder.embed([edited[0]["text"]])[0]
+    for search in (index, SemanticIndex(str(tmp_path), embedder.dim, embedder.name)):
+        assert search.search(query, k=1, exact=True)[0]["id"] == "doc-0"
+        assert search.search(query, k=1, exact=False, n_probe=64)[0]["id"] == "doc-0"
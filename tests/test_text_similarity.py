@@ -0,0 +1,52 @@
+import json
+import os
+
+import numpy as np
+
+import services.text_similarity as text_similarity
+from routers.similarity import group_section_questions
+from schemas.similarity import SectionGroupingRequest
+from services.text_similarity import TfidfMatrix, group_indices, group_texts
+
+FIXTURE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Russian_Aggression.json")
+
+
+def test_seed_and_connected_linkage():
+    texts = [
+        "Russian energy leverage over European gas supply",
+        "European gas supply shocks and Russian energy exports",
+        "Gas exports and pipeline politics",
+        "Cyber surveillance and civil liberties",
+    ]
+    seed = group_texts(texts, threshold=0.2)
+    assert [g["members"] for g in seed][0][:2] == [0, 1]
+    assert seed[-1]["members"] == [3] and "surveillance" in seed[-1]["key_terms"]
+
+    similarity = np.array([[1, .5, 0], [.5, 1, .5], [0, .5, 1]])
+    assert group_indices(similarity, 0.3, "seed") == [[0, 1], [2]]
+    assert group_indices(similarity, 0.3, "connected") == [[0, 1, 2]]
+
+
+def test_sparse_and_dense_storage_agree(monkeypatch):
+    texts = ["sanctions on energy exports", "energy exports after sanctions", "cyber liberties", ""]
+    dense = TfidfMatrix(texts)
+    monkeypatch.setattr(text_similarity, "DENSE_LIMIT", 0)
+    sparse = TfidfMatrix(texts)
+    assert sparse.sparse and not dense.sparse
+    assert np.allclose(sparse.similarity(), dense.similarity())
+    assert sparse.top_terms([[0, 1], [2]]) == dense.top_terms([[0, 1], [2]])
+
+
+def test_section_grouping_covers_every_question_and_citation():
+    with open(FIXTURE, "r", encoding="utf-8") as f:
+        outline = json.load(f)["data"]["draftData"]["outline"]
+    section = next(s for s in outline if any(sub.get("questions") for sub in s["subsections"]))
+    response = group_section_questions(SectionGroupingRequest(section=section))
+
+    assert len(response.subsections) == len(section["subsections"])
+    for subsection, grouped in zip(section["subsections"], response.subsections):
+        questions = subsection.get("questions") or []
+        assert sorted(i for g in grouped.question_groups for i in g.question_indices) == list(range(len(questions)))
+        cited = sorted(tuple(c) for g in grouped.question_groups for f in g.finding_groups for c in f.citations)
+        assert cited == [(q, c) for q, question in enumerate(questions) for c in range(len(question["citations"]))]
+        assert all(g.theme.endswith("Analysis") for g in grouped.question_groups)
@@ -0,0 +1,116 @@
+import json
+
+import routers.data_analysis as data_analysis
+from schemas.data_analysis import QuestionAnalysisRequest
+from services.analysis_state import AnalysisStateStore
+from services.theme_clusters import cluster_questions
+
+
+def question(text, description, apa, years=""):
+    return {
+        "question": text,
+        "citations": [{"apa": apa, "description": f"{description} {years}".strip(), "categories": ["Scholarly articles"]}]
+    }
+
+
+QUESTIONS = [
+    question("How did gas supply cuts give Russia energy leverage?", "Gas supply cuts and energy leverage over Europe.", "Smith (2019)", "In 2014 and 2022."),
+    question("Which pipelines carried the energy leverage?", "Pipeline politics and energy leverage in gas supply.", "Jones (2020)"),
+    question("How did financial sanctions freeze central bank reserves?", "Financial sanctions froze central bank reserves.", "Lee (2022)"),
+    question("Were SWIFT exclusions effective financial sanctions?", "SWIFT exclusions as financial sanctions on banks.", "Kim (2023)"),
+]
+
+
+def make_request(**overrides):
+    fields = dict(
+        questions=QUESTIONS,
+        citations=[c for q in QUESTIONS for c in q["citations"]],
+        subsection_title="Economic pressure",
+        subsection_context="Energy and finance",
+        section_title="Responses",
+        thesis="Sanctions shaped escalation",
+        methodology="Case study"
+    )
+    fields.update(overrides)
+    return QuestionAnalysisRequest(**fields)
+
+
+def test_local_clusters_group_questions_and_describe_evidence():
+    clusters = cluster_questions(QUESTIONS, [c for q in QUESTIONS for c in q["citations"]])
+    assert [c["questions"] for c in clusters] == [[0, 1], [2, 3]]
+    assert "energy leverage" in clusters[0]["key_phrases"]
+    assert "financial sanctions" in clusters[1]["key_phrases"]
+    assert clusters[0]["temporal_scope"] == "2014-2022"
+    assert clusters[1]["citations"] == [3, 4]
+
+
+def test_model_only_names_and_orders_clusters(monkeypatch):
+    prompts = []
+
+    def fake_bedrock(prompt, max_tokens=4000):
+        prompts.append((prompt, max_tokens))
+        return json.dumps({
+            "themes": [
+                {"cluster": 1, "theme_name": "Energy as leverage", "theme_description": "Gas cut-offs"},
+                {"cluster": 2, "theme_name": "Financial isolation", "theme_description": "Reserves and SWIFT"}
+            ],
+            "order": [2, 1],
+            "outline_points": [{"cluster": 2, "content": "Freezing reserves limited war financing"}]
+        })
+
+    monkeypatch.setattr(data_analysis, "invoke_bedrock", fake_bedrock)
+    response = data_analysis.analyze_subsection_data(make_request())
+
+    assert len(prompts) == 1 and prompts[0][1] < 4000
+    assert "CLUSTER 1" in prompts[0][0] and "Q3: How did financial sanctions" in prompts[0][0]
+    assert [c.theme_name for c in response.thematic_clusters] == ["Financial isolation", "Energy as leverage"]
+    assert response.thematic_clusters[0].questions == ["Q3", "Q4"]
+    assert response.logical_structure.sequence == ["Financial isolation", "Energy as leverage"]
+    first = response.generated_outline.main_points[0]
+    assert first.content == "Freezing reserves limited war financing" and first.citations == [3, 4]
+    assert first.questions == ["Q3", "Q4"]
+
+
+def test_local_result_when_model_is_unavailable(monkeypatch):
+    monkeypatch.setattr(data_analysis, "invoke_bedrock", lambda prompt, max_tokens=4000: "Unexpected error: no credentials")
+    response = data_analysis.analyze_subsection_data(make_request())
+
+    assert len(response.thematic_clusters) == 2
+    assert sorted(q for c in response.thematic_clusters for q in c.questions) == ["Q1", "Q2", "Q3", "Q4"]
+    assert response.analysis_confidence.startswith("Medium")
+
+
+def test_locally_named_result_is_not_kept(monkeypatch, tmp_path):
+    store = AnalysisStateStore(str(tmp_path / "state.sqlite3"))
+    monkeypatch.setattr(data_analysis, "get_analysis_state_store", lambda: store)
+    monkeypatch.setattr(data_analysis, "format_related_evidence", lambda *args: "")
+    replies = ["Sorry, I cannot help with that.", json.dumps({
+        "themes": [
+            {"cluster": 1, "theme_name": "Energy as leverage", "theme_description": "Gas cut-offs"},
+            {"cluster": 2, "theme_name": "Financial isolation", "theme_description": "Reserves and SWIFT"}
+        ],
+        "order": [1, 2]
+    })]
+    monkeypatch.setattr(data_analysis, "invoke_bedrock", lambda prompt, max_tokens=4000: replies.pop(0))
+
+    local = data_analysis.analyze_subsection_data(make_request(project_id="p1"))
+    assert local.analysis_confidence.startswith("Medium")
+    # The next call asks the model to name the themes again instead of serving the local names
+    named = data_analysis.analyze_subsection_data(make_request(project_id="p1"))
+    assert named.recomputation.mode == "full" and replies == []
+    assert [c.theme_name for c in named.thematic_clusters] == ["Energy as leverage", "Financial isolation"]
+    assert data_analysis.analyze_subsection_data(make_request(project_id="p1")).recomputation.mode == "cached"
+
+
+def test_full_analysis_json_is_converted(monkeypatch):
+    monkeypatch.setattr(data_analysis, "invoke_bedrock", lambda prompt, max_tokens=4000: json.dumps({
+        "thematic_clusters": [{
+            "theme_name": "Energy", "theme_description": "Gas", "questions": ["Q1"],
+            "key_concepts": ["gas"], "evidence_types": ["article"]
+        }],
+        "generated_outline": {"main_points": "not a list"}
+    }))
+    response = data_analysis.analyze_subsection_data(make_request(pre_cluster=False))
+
+    assert [c.theme_name for c in response.thematic_clusters] == ["Energy"]
+    assert response.generated_outline.main_points  # malformed part falls back to text parsing